@@ -18,10 +18,12 @@ from pydantic import BaseModel
 
 from contextlib import asynccontextmanager
 
-from src.rag.retriever import PolicyRetriever
+from src.rag.index_manager import IndexWatcher, get_index_manager
 from src.agents.tools import order_tools
 from src.agents.nodes.intent_classifier import classify_intent_async
 from src.agents.orchestrator import run as orchestrate
+from src.agents.orchestrator import run_stream as orchestrate_stream
+from src.agents.speculation import classify_with_speculation
 from src.agents.state import AgentState
 from src.llm.client import cleanup_client
 
@@ -41,6 +43,7 @@ from src.auth import (
     get_optional_user,
     get_auth_repo,
 )
+from src.auth.dependencies import require_admin
 from src.auth.models import RefreshRequest, UserResponse
 from src.auth.jwt_handler import get_token_expiry_seconds
 
@@ -61,7 +64,25 @@ async def lifespan(app: FastAPI):
     from src.monitoring.metrics import set_app_info
     set_app_info("ecommerce-agent", "0.2.0", "development")
 
+    # 인덱스 파일 변경 감시 (설정 시)
+    from src.config import get_config
+    watcher = None
+    if get_config().rag.reload.watch:
+        watcher = IndexWatcher(get_index_manager())
+        watcher.start()
+
+    # LLM 프로바이더별 장수명 HTTP 세션 (종료 시 cleanup_client에서 정리)
+    from src.llm.pool import get_llm_pool
+    from src.llm.router import configured_provider_configs
+    try:
+        await get_llm_pool().warmup(configured_provider_configs())
+    except Exception as e:
+        import logging
+        logging.warning(f"LLM 세션 풀 warmup 실패: {e}")
+
     yield
+    if watcher is not None:
+        watcher.stop()
     await cleanup_client()
 
 
@@ -136,9 +157,6 @@ class CreateTicketRequest(BaseModel):
     priority: str = "normal"
 
 
-retriever = PolicyRetriever()
-
-
 @app.get("/healthz")
 async def healthz() -> Dict[str, str]:
     return {"status": "ok"}
@@ -202,13 +220,45 @@ async def health_check() -> Dict[str, Any]:
 
     # RAG 인덱스 체크
     try:
-        from src.rag.retriever import get_retriever
-        rag_retriever = get_retriever()
-        health["components"]["rag_index"] = {"status": "up", "documents": len(rag_retriever._docs)}
+        index_stats = get_index_manager().stats()
+        health["components"]["rag_index"] = {
+            "status": "up",
+            "documents": index_stats["documents"],
+            "version": index_stats["version"],
+            "reloads": index_stats["reloads"],
+        }
     except Exception as e:
         health["components"]["rag_index"] = {"status": "down", "reason": str(e)}
         health["status"] = "degraded"
 
+    # 정책 답변 시맨틱 캐시
+    from src.rag.answer_cache import get_answer_cache
+    health["components"]["answer_cache"] = get_answer_cache().stats()
+
+    # LLM 응답 캐시
+    from src.llm.cache import get_llm_cache
+    health["components"]["llm_cache"] = get_llm_cache().stats()
+
+    # LLM 프로바이더별 동시 요청 제어
+    from src.llm.admission import admission_stats
+    health["components"]["llm_admission"] = admission_stats()
+
+    # 적응형 라우팅 provider/model별 EWMA 지연/오류율
+    from src.llm.stats import get_provider_stats
+    health["components"]["llm_routing"] = get_provider_stats().snapshot()
+
+    # 의도/모델별 누적 토큰 사용량과 비용
+    from src.llm.usage import get_usage_ledger
+    health["components"]["llm_usage"] = get_usage_ledger().summary()
+
+    # 의도 분류 추측 실행 적중률/절약 시간
+    from src.agents.speculation import get_speculation_stats
+    health["components"]["intent_speculation"] = get_speculation_stats().stats()
+
+    # 비동기 검색 executor
+    from src.rag.retriever import get_search_executor
+    health["components"]["retrieval_executor"] = get_search_executor().stats()
+
     return health
 
 
@@ -483,7 +533,8 @@ async def close_conversation(
 
 @app.get("/policies/search")
 async def policies_search(q: str = Query(..., min_length=1), top_k: int = 5) -> Dict[str, Any]:
-    hits = retriever.search_policy(q, top_k=top_k)
+    with get_index_manager().acquire() as retriever:
+        hits = await retriever.asearch_policy(q, top_k=top_k)
     return {
         "query": q,
         "hits": [
@@ -493,6 +544,20 @@ async def policies_search(q: str = Query(..., min_length=1), top_k: int = 5) ->
     }
 
 
+@app.post("/admin/index/reload")
+async def reload_policy_index(current_user: User = Depends(require_admin)) -> Dict[str, Any]:
+    """정책 인덱스 무중단 재로드 (관리자).
+
+    새 버전을 로드/검증한 뒤 교체합니다. 검증 실패 시 기존 버전을 유지합니다.
+    """
+    from src.rag.index_manager import IndexValidationError
+
+    try:
+        return await get_index_manager().areload()
+    except IndexValidationError as e:
+        raise HTTPException(status_code=409, detail=f"인덱스 검증 실패: {e}")
+
+
 # -------- Orders --------
 
 
@@ -784,6 +849,30 @@ async def oai_models() -> Dict[str, Any]:
     return {"object": "list", "data": [{"id": model, "object": "model"}]}
 
 
+async def _oai_state(user_msg: str) -> AgentState:
+    """OpenAI 호환 요청의 마지막 사용자 메시지로 의도 분류."""
+    result = await classify_intent_async(user_msg)
+    intent, sub_intent, payload = result.intent, result.sub_intent, result.payload
+    if intent == "unknown":
+        intent = "policy"
+        payload = {"query": user_msg, "top_k": 5}
+    return AgentState(user_id="oai", intent=intent, sub_intent=sub_intent, payload=payload)
+
+
+def _oai_text(final: Dict[str, Any]) -> str:
+    """오케스트레이터 응답을 assistant 메시지 텍스트로 변환."""
+    import json as _json
+
+    return (
+        final.get("response")
+        or (f"정책 검색 결과 {len(final.get('hits', []))}건" if final.get("hits") else None)
+        or (f"주문 {len(final.get('orders', []))}건" if final.get("orders") else None)
+        or (f"티켓 {final.get('ticket',{}).get('ticket_id','')} 처리" if final.get("ticket") else None)
+        or (f"상태: {final.get('status',{}).get('status','')}" if final.get("status") else None)
+        or _json.dumps(final, ensure_ascii=False)
+    )
+
+
 class _OAIMessage(BaseModel):
     role: str
     content: str
@@ -793,6 +882,7 @@ class _OAIChatRequest(BaseModel):
     model: Optional[str] = None
     messages: List[_OAIMessage]
     stream: Optional[bool] = False
+    stream_options: Optional[Dict[str, Any]] = None  # {"include_usage": true}면 마지막에 usage 청크 전송
 
 
 @app.post("/v1/chat/completions")
@@ -804,6 +894,8 @@ async def oai_chat(request: Request, body: _OAIChatRequest):
     import json as _json
     import time as _time
 
+    from src.llm.usage import meter_usage
+
     model = body.model or _oai_default_model()
     created = int(_time.time())
     # 마지막 user 메시지 추출
@@ -817,61 +909,52 @@ async def oai_chat(request: Request, body: _OAIChatRequest):
 
     # 스트리밍 모드 처리
     if body.stream:
+        include_usage = bool((body.stream_options or {}).get("include_usage"))
+
         async def generate_stream():
-            try:
-                if mode == "passthrough":
-                    # LLM 직접 스트리밍
-                    from src.llm.client import get_client
-                    client = get_client()
-                    messages = [{"role": m.role, "content": m.content} for m in (body.messages or [])]
-                    async for chunk in client.chat_stream(messages):
-                        data = {
-                            "id": f"chatcmpl-{created}",
-                            "object": "chat.completion.chunk",
-                            "created": created,
-                            "model": model,
-                            "choices": [{"index": 0, "delta": {"content": chunk}, "finish_reason": None}]
-                        }
-                        yield f"data: {_json.dumps(data, ensure_ascii=False)}\n\n"
-                else:
-                    # orchestrator 경유 (청크 단위로 분할)
-                    result = await classify_intent_async(user_msg)
-                    intent, sub_intent, payload = result.intent, result.sub_intent, result.payload
-                    if intent == "unknown":
-                        intent = "policy"
-                        payload = {"query": user_msg, "top_k": 5}
-                    st = AgentState(user_id="oai", intent=intent, sub_intent=sub_intent, payload=payload)
-                    st = await orchestrate(st)
-                    final = st.final_response or {}
-                    text = (
-                        final.get("response")
-                        or (f"정책 검색 결과 {len(final.get('hits', []))}건" if final.get("hits") else None)
-                        or (f"주문 {len(final.get('orders', []))}건" if final.get("orders") else None)
-                        or (f"티켓 {final.get('ticket',{}).get('ticket_id','')} 처리" if final.get("ticket") else None)
-                        or (f"상태: {final.get('status',{}).get('status','')}" if final.get("status") else None)
-                        or _json.dumps(final, ensure_ascii=False)
-                    )
-                    # 텍스트를 청크로 분할하여 스트리밍
-                    chunk_size = 10
-                    for i in range(0, len(text), chunk_size):
-                        chunk = text[i:i+chunk_size]
-                        data = {
-                            "id": f"chatcmpl-{created}",
-                            "object": "chat.completion.chunk",
-                            "created": created,
-                            "model": model,
-                            "choices": [{"index": 0, "delta": {"content": chunk}, "finish_reason": None}]
-                        }
-                        yield f"data: {_json.dumps(data, ensure_ascii=False)}\n\n"
-                # 종료 청크
+            def _chunk(delta: Dict[str, Any], finish_reason: Optional[str] = None) -> str:
                 data = {
                     "id": f"chatcmpl-{created}",
                     "object": "chat.completion.chunk",
                     "created": created,
                     "model": model,
-                    "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}]
+                    "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}]
                 }
-                yield f"data: {_json.dumps(data, ensure_ascii=False)}\n\n"
+                return f"data: {_json.dumps(data, ensure_ascii=False)}\n\n"
+
+            try:
+                with meter_usage() as usage:
+                    if mode == "passthrough":
+                        # LLM 직접 스트리밍
+                        from src.llm.client import get_client
+                        client = get_client()
+                        messages = [{"role": m.role, "content": m.content} for m in (body.messages or [])]
+                        async for chunk in client.chat_stream(messages):
+                            yield _chunk({"content": chunk})
+                    else:
+                        # orchestrator 경유 (도구 실행 후 LLM 토큰을 도착하는 대로 전달)
+                        st = await _oai_state(user_msg)
+                        streamed = False
+                        async for event in orchestrate_stream(st):
+                            if event["type"] == "token":
+                                streamed = True
+                                yield _chunk({"content": event["content"]})
+                            elif not streamed:
+                                # 토큰 없이 끝난 응답 (차단, 오류 등)은 요약 텍스트로 전달
+                                yield _chunk({"content": _oai_text(event["data"])})
+                # 종료 청크
+                yield _chunk({}, finish_reason="stop")
+                if include_usage:
+                    # OpenAI 규격: choices가 빈 마지막 청크에 요청 전체 usage
+                    data = {
+                        "id": f"chatcmpl-{created}",
+                        "object": "chat.completion.chunk",
+                        "created": created,
+                        "model": model,
+                        "choices": [],
+                        "usage": usage.to_openai(),
+                    }
+                    yield f"data: {_json.dumps(data, ensure_ascii=False)}\n\n"
                 yield "data: [DONE]\n\n"
             except Exception as e:
                 yield f"data: {_json.dumps({'error': str(e)}, ensure_ascii=False)}\n\n"
@@ -886,36 +969,23 @@ async def oai_chat(request: Request, body: _OAIChatRequest):
     # 비스트리밍 모드
     text = ""
 
-    if mode == "passthrough":
-        # LLM 직접 호출
-        from src.llm.client import get_client
-        client = get_client()
-        messages = [{"role": m.role, "content": m.content} for m in (body.messages or [])]
-        try:
-            text = await client.chat(messages)
-        except Exception as e:
-            raise HTTPException(status_code=500, detail=f"llm error: {e}")
-    else:
-        # orchestrator 경유
-        try:
-            result = await classify_intent_async(user_msg)
-            intent, sub_intent, payload = result.intent, result.sub_intent, result.payload
-            if intent == "unknown":
-                intent = "policy"
-                payload = {"query": user_msg, "top_k": 5}
-            st = AgentState(user_id="oai", intent=intent, sub_intent=sub_intent, payload=payload)
-            st = await orchestrate(st)
-            final = st.final_response or {}
-            text = (
-                final.get("response")
-                or (f"정책 검색 결과 {len(final.get('hits', []))}건" if final.get("hits") else None)
-                or (f"주문 {len(final.get('orders', []))}건" if final.get("orders") else None)
-                or (f"티켓 {final.get('ticket',{}).get('ticket_id','')} 처리" if final.get("ticket") else None)
-                or (f"상태: {final.get('status',{}).get('status','')}" if final.get("status") else None)
-                or _json.dumps(final, ensure_ascii=False)
-            )
-        except Exception as e:
-            raise HTTPException(status_code=500, detail=f"orchestrator error: {e}")
+    with meter_usage() as usage:
+        if mode == "passthrough":
+            # LLM 직접 호출
+            from src.llm.client import get_client
+            client = get_client()
+            messages = [{"role": m.role, "content": m.content} for m in (body.messages or [])]
+            try:
+                text = await client.chat(messages)
+            except Exception as e:
+                raise HTTPException(status_code=500, detail=f"llm error: {e}")
+        else:
+            # orchestrator 경유
+            try:
+                st = await orchestrate(await _oai_state(user_msg))
+                text = _oai_text(st.final_response or {})
+            except Exception as e:
+                raise HTTPException(status_code=500, detail=f"orchestrator error: {e}")
 
     return {
         "id": f"chatcmpl-{created}",
@@ -925,7 +995,7 @@ async def oai_chat(request: Request, body: _OAIChatRequest):
         "choices": [
             {"index": 0, "message": {"role": "assistant", "content": text}, "finish_reason": "stop"}
         ],
-        "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0},
+        "usage": usage.to_openai(),  # 이 요청에서 실제 호출한 LLM 사용량 합계 (캐시 적중은 0)
     }
 # -------- Chat (intent→orchestrator) --------
 
@@ -933,18 +1003,29 @@ async def oai_chat(request: Request, body: _OAIChatRequest):
 class ChatRequest(BaseModel):
     user_id: str
     message: str
+    bypass_cache: bool = False  # 정책 답변 시맨틱 캐시 우회
 
 
 @app.post("/chat")
 async def chat(req: ChatRequest) -> Dict[str, Any]:
-    result = await classify_intent_async(req.message)
+    # LLM 의도 분류 중 키워드 분류로 조회 도구를 먼저 시작 (LLM 결과와 다르면 취소)
+    result, prefetch = await classify_with_speculation(req.message, req.user_id)
     intent, sub_intent, payload = result.intent, result.sub_intent, result.payload
     if intent == "unknown":
         intent = "policy"
         payload = {"query": req.message, "top_k": 5}
     if intent == "order" and sub_intent in {"status", "detail", "cancel"} and not payload.get("order_id"):
+        if prefetch is not None:
+            prefetch.discard("unused")
         return {"need": "order_id", "message": "주문번호(ORD-...)를 알려주세요."}
-    state = AgentState(user_id=req.user_id, intent=intent, sub_intent=sub_intent, payload=payload)
+    state = AgentState(
+        user_id=req.user_id,
+        intent=intent,
+        sub_intent=sub_intent,
+        payload=payload,
+        bypass_cache=req.bypass_cache,
+        prefetch=prefetch,
+    )
     state = await orchestrate(state)
     return state.final_response or {}
 
@@ -952,31 +1033,73 @@ async def chat(req: ChatRequest) -> Dict[str, Any]:
 class ChatStreamRequest(BaseModel):
     """스트리밍 채팅 요청."""
     message: str
-    system_prompt: Optional[str] = None
+    user_id: str = "guest"
+    bypass_cache: bool = False
+    system_prompt: Optional[str] = None  # 지정 시 의도/도구 없이 LLM 직접 스트리밍 (이전 동작)
+
+
+def _sse(data: str, event: Optional[str] = None) -> str:
+    """SSE 이벤트 포맷 (여러 줄 데이터는 data 줄을 나눠 전송)."""
+    lines = [f"event: {event}"] if event else []
+    lines.extend(f"data: {line}" for line in data.split("\n"))
+    return "\n".join(lines) + "\n\n"
 
 
 @app.post("/chat/stream")
 async def chat_stream(req: ChatStreamRequest):
     """스트리밍 채팅 응답 (SSE).
 
-    Server-Sent Events 형식으로 응답을 스트리밍합니다.
-    각 청크는 `data: {text}\n\n` 형식으로 전송됩니다.
+    /chat과 같이 의도 분류 → 가드 → 도구 실행을 거친 뒤 LLM 토큰을 도착하는 대로
+    `data: {text}` 이벤트로 전송합니다. 마지막에 `event: final` 이벤트로 /chat과 같은
+    구조화 응답(JSON)을 보내고 `data: [DONE]`으로 종료합니다.
     """
-    from src.llm import get_client
+    import json as _json
+    import logging
 
     async def generate():
         try:
-            client = get_client()
-            messages = [{"role": "user", "content": req.message}]
+            if req.system_prompt:
+                from src.llm import get_client
 
-            async for chunk in client.chat_stream(messages, system_prompt=req.system_prompt):
-                # SSE 형식으로 전송
-                yield f"data: {chunk}\n\n"
+                client = get_client()
+                messages = [{"role": "user", "content": req.message}]
+                async for chunk in client.chat_stream(messages, system_prompt=req.system_prompt):
+                    yield _sse(chunk)
+                yield "data: [DONE]\n\n"
+                return
+
+            result, prefetch = await classify_with_speculation(req.message, req.user_id)
+            intent, sub_intent, payload = result.intent, result.sub_intent, result.payload
+            if intent == "unknown":
+                intent = "policy"
+                payload = {"query": req.message, "top_k": 5}
+            if intent == "order" and sub_intent in {"status", "detail", "cancel"} and not payload.get("order_id"):
+                if prefetch is not None:
+                    prefetch.discard("unused")
+                need = {"need": "order_id", "message": "주문번호(ORD-...)를 알려주세요."}
+                yield _sse(need["message"])
+                yield _sse(_json.dumps(need, ensure_ascii=False), event="final")
+                yield "data: [DONE]\n\n"
+                return
+
+            state = AgentState(
+                user_id=req.user_id,
+                intent=intent,
+                sub_intent=sub_intent,
+                payload=payload,
+                bypass_cache=req.bypass_cache,
+                prefetch=prefetch,
+            )
+            async for event in orchestrate_stream(state):
+                if event["type"] == "token":
+                    yield _sse(event["content"])
+                else:
+                    yield _sse(_json.dumps(event["data"], ensure_ascii=False, default=str), event="final")
 
             # 스트림 종료 신호
             yield "data: [DONE]\n\n"
         except Exception as e:
-            logger.error(f"스트리밍 오류: {e}")
+            logging.error(f"스트리밍 오류: {e}")
             yield f"data: [ERROR] {str(e)}\n\n"
 
     return StreamingResponse(
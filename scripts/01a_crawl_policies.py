@@ -5,8 +5,12 @@ from __future__ import annotations
 
 Networking is optional; if POLICY_LOCAL_HTML is set (comma-separated paths),
 the script will parse local HTML files. Otherwise, it writes a placeholder.
+
+With --incremental, crawled pages replace only their own url in policies.jsonl
+and the text/FAISS indexes are updated in place (no full rebuild).
 """
 
+import argparse
 import json
 import os
 from pathlib import Path
@@ -14,7 +18,9 @@ import sys
 sys.path.append(str(Path(__file__).resolve().parents[1]))
 from typing import List
 
+from src.config import get_config
 from src.data_prep.crawler import PolicyCrawler
+from src.rag.indexer import PolicyIndexer
 
 
 def load_local_html(paths: List[str]) -> List[tuple[str, str]]:
@@ -26,7 +32,60 @@ def load_local_html(paths: List[str]) -> List[tuple[str, str]]:
     return pairs
 
 
+def merge_by_url(out_path: Path, items: List[dict]) -> None:
+    """Replace records with the same url in policies.jsonl, keep the rest."""
+    merged: dict = {}
+    if out_path.exists():
+        with out_path.open("r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if line:
+                    rec = json.loads(line)
+                    merged[rec.get("url", "")] = rec
+    for it in items:
+        merged[it.get("url", "")] = it
+
+    tmp = out_path.with_suffix(out_path.suffix + ".tmp")
+    with tmp.open("w", encoding="utf-8") as f:
+        for rec in merged.values():
+            f.write(json.dumps(rec, ensure_ascii=False) + "\n")
+    tmp.replace(out_path)
+
+
+def update_index(items: List[dict], with_vectors: bool) -> None:
+    """Upsert crawled pages into the policy text/vector indexes."""
+    cfg = get_config().rag
+    vector_path = Path(cfg.paths.vector_index)
+    stats = PolicyIndexer().upsert_documents(
+        items,
+        index_jsonl=Path(cfg.paths.policies_index),
+        vector_path=vector_path if with_vectors and vector_path.exists() else None,
+        chunk_chars=cfg.index.chunk_size,
+        overlap=cfg.index.chunk_overlap,
+        dedup_threshold=cfg.index.dedup_threshold,
+        dedup_num_perm=cfg.index.dedup_num_perm,
+        dedup_shingle=cfg.index.dedup_shingle_size,
+    )
+    print(
+        f"Index updated: +{stats['added']} -{stats['removed']} "
+        f"~{stats['merged']} ={stats['unchanged']}"
+    )
+
+
 def main() -> None:
+    parser = argparse.ArgumentParser(description="Crawl policy pages")
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="merge by url and update indexes in place instead of overwriting",
+    )
+    parser.add_argument(
+        "--no-vectors",
+        action="store_true",
+        help="with --incremental, update the text index only",
+    )
+    args = parser.parse_args()
+
     out_dir = Path("data/processed")
     out_dir.mkdir(parents=True, exist_ok=True)
     out_path = out_dir / "policies.jsonl"
@@ -45,6 +104,12 @@ def main() -> None:
         doc = crawler.parse_html(url="https://example.com/refund", html=example_html, doc_type="refund", title="Refund Policy")
         items.append(doc.__dict__)
 
+    if args.incremental:
+        merge_by_url(out_path, items)
+        print(f"Merged {len(items)} policy docs → {out_path}")
+        update_index(items, with_vectors=not args.no_vectors)
+        return
+
     with out_path.open("w", encoding="utf-8") as f:
         for it in items:
             f.write(json.dumps(it, ensure_ascii=False) + "\n")
@@ -4,24 +4,33 @@
 텍스트 인덱스와 벡터 인덱스를 함께 생성합니다.
 
 사용법:
-    python scripts/04_build_index.py [--no-vectors]
+    python scripts/04_build_index.py [--no-vectors] [--workers N] [--batch-size N] [--shards]
+                                     [--tune [--target-recall R]]
 
 옵션:
     --no-vectors: 벡터 인덱스 생성 건너뛰기
+    --workers: 임베딩 프로세스 수 (청크 읽기/임베딩/FAISS 추가는 스트리밍으로 겹쳐 실행)
+    --batch-size: 임베딩 배치 크기
+    --shards: doc_type별 샤드 인덱스 생성 (index.sharding 사용 시 필요)
+    --tune: 벤치마크 쿼리 셋으로 nprobe/efSearch 자동 튜닝 (결과는 <vector_index>.params.json)
+    --target-recall: 자동 튜닝 목표 recall@10 (기본: index.tune_target_recall)
 """
 
 from __future__ import annotations
 
 import argparse
-import json
 import sys
 from pathlib import Path
+from typing import Optional
 
 import numpy as np
 
 sys.path.append(str(Path(__file__).resolve().parents[1]))
 
+from src.rag.build_pipeline import build_vector_index_streaming
+from src.rag.docstore import JsonlDocStore, MmapDocStore
 from src.rag.indexer import PolicyIndexer
+from src.rag.sharding import build_shards
 from src.config import get_config
 
 
@@ -35,82 +44,127 @@ def build_text_index() -> int:
         print(f"[SKIP] 정책 원본 파일 없음: {src}")
         return 0
 
-    n = PolicyIndexer().build_local_index(
+    indexer = PolicyIndexer()
+    n = indexer.build_local_index(
         src_jsonl=src,
         out_jsonl=out,
         chunk_chars=cfg.index.chunk_size,
         overlap=cfg.index.chunk_overlap,
+        dedup_threshold=cfg.index.dedup_threshold,
+        dedup_num_perm=cfg.index.dedup_num_perm,
+        dedup_shingle=cfg.index.dedup_shingle_size,
     )
     print(f"[OK] 텍스트 인덱스 생성: {n}개 청크 → {out}")
+
+    stats = indexer.last_dedup_stats
+    if stats and stats.duplicates:
+        print(
+            f"[OK] 근접 중복 제거: {stats.input_chunks} → {stats.output_chunks}개 청크 "
+            f"(-{stats.reduction:.1%}, 문자 {stats.input_chars} → {stats.output_chars})"
+        )
+
+    # 검색용 mmap 문서 저장소를 미리 생성 (워커 기동 시 재사용)
+    if cfg.index.docstore == "mmap":
+        mmap_dir = MmapDocStore.build(out)
+        print(f"[OK] mmap 문서 저장소 생성 → {mmap_dir}")
     return n
 
 
-def build_vector_index() -> int:
-    """벡터 인덱스 빌드."""
+def build_vector_index(workers: Optional[int] = None, batch_size: Optional[int] = None) -> int:
+    """벡터 인덱스 빌드 (스트리밍 파이프라인)."""
     try:
-        import faiss
+        import faiss  # noqa: F401
     except ImportError:
         print("[SKIP] faiss 미설치, 벡터 인덱스 건너뛰기")
         return 0
 
     cfg = get_config().rag
     index_path = Path(cfg.paths.policies_index)
-    vector_path = Path(cfg.paths.vector_index)
-    embeddings_path = Path(cfg.paths.embeddings_cache)
 
     if not index_path.exists():
         print(f"[SKIP] 텍스트 인덱스 없음: {index_path}")
         return 0
 
-    # 문서 로드
-    documents = []
-    with index_path.open("r", encoding="utf-8") as f:
-        for line in f:
-            line = line.strip()
-            if not line:
-                continue
-            obj = json.loads(line)
-            documents.append(obj.get("text", ""))
-
-    if not documents:
+    stats = build_vector_index_streaming(
+        index_jsonl=index_path,
+        vector_path=Path(cfg.paths.vector_index),
+        embeddings_path=Path(cfg.paths.embeddings_cache),
+        index_type=cfg.index.vector_index_type,
+        nlist=cfg.index.ivf_nlist,
+        pq_m=cfg.index.pq_m,
+        pq_nbits=cfg.index.pq_nbits,
+        hnsw_m=cfg.index.hnsw_m,
+        hnsw_ef_construction=cfg.index.hnsw_ef_construction,
+        batch_size=batch_size or cfg.index.build_batch_size,
+        workers=workers or cfg.index.build_workers,
+        queue_size=cfg.index.build_queue_size,
+        train_sample=cfg.index.ivf_train_sample,
+    )
+    if stats.documents == 0:
         print("[SKIP] 문서 없음")
-        return 0
-
-    print(f"[INFO] {len(documents)}개 문서 임베딩 생성 중...")
+    return stats.documents
 
-    # 임베딩 생성
-    from src.rag.embedder import Embedder
 
-    embedder = Embedder()
-    embeddings = embedder.encode_documents(documents, show_progress=True)
+def tune_vector_index(target_recall: Optional[float] = None, k: int = 10) -> None:
+    """벤치마크 쿼리 셋으로 검색 파라미터 자동 튜닝 후 사이드카 파일 저장."""
+    from src.evaluation.retrieval_benchmark import load_retrieval_queries
+    from src.rag.embedder import get_embedder
+    from src.rag.vector_index import autotune, read_vector_index, save_tuned_params
 
-    # 임베딩 저장
-    embeddings_path.parent.mkdir(parents=True, exist_ok=True)
-    np.save(str(embeddings_path), embeddings)
-    print(f"[OK] 임베딩 저장: {embeddings.shape} → {embeddings_path}")
-
-    # FAISS 인덱스 생성
-    dimension = embeddings.shape[1]
-    index_type = cfg.index.vector_index_type
+    cfg = get_config().rag
+    vector_path = Path(cfg.paths.vector_index)
+    if not vector_path.exists():
+        print(f"[SKIP] 벡터 인덱스 없음: {vector_path}")
+        return
+
+    target = target_recall if target_recall is not None else cfg.index.tune_target_recall
+    index = read_vector_index(vector_path)
+    embedder = get_embedder()
+    queries = np.vstack([
+        embedder.encode_query(q.query).astype(np.float32).reshape(1, -1)
+        for q in load_retrieval_queries()
+    ])
+
+    # 인덱스에 원본 벡터가 없으면(IVF-PQ) 빌드 때의 임베딩 캐시로 정확 검색 정답 계산
+    vectors = ids = None
+    embeddings_path = Path(cfg.paths.embeddings_cache)
+    if embeddings_path.exists():
+        matrix = np.load(embeddings_path, mmap_mode="r")
+        live_ids = np.fromiter(
+            (rec["int_id"] for rec in JsonlDocStore(Path(cfg.paths.policies_index)).iter_live()), dtype=np.int64
+        )
+        if len(live_ids) == matrix.shape[0]:
+            vectors, ids = matrix, live_ids
+
+    result = autotune(index, queries, k=k, target_recall=target, vectors=vectors, ids=ids)
+    if result.param is None:
+        print("[SKIP] flat 인덱스는 튜닝할 파라미터가 없습니다")
+        return
+
+    print(f"{result.param:>10} {'recall@' + str(k):>10} {'지연(ms)':>10}")
+    for point in result.points:
+        mark = " *" if point.value == result.value else ""
+        print(f"{point.value:>10} {point.recall:>10.3f} {point.latency_ms:>10.3f}{mark}")
+    if result.ground_truth != "exact":
+        print("[WARN] 원본 벡터가 없어 최대 탐색 결과를 정답으로 사용했습니다 (recall 과대평가 가능)")
+    out = save_tuned_params(vector_path, result)
+    status = "OK" if result.met_target else "WARN"
+    print(
+        f"[{status}] {result.param}={result.value} "
+        f"(recall {result.recall:.3f}, 목표 {target:.2f}) → {out}"
+    )
 
-    if index_type == "ivf":
-        # IVF 인덱스 (대용량용)
-        nlist = cfg.index.ivf_nlist
-        quantizer = faiss.IndexFlatIP(dimension)
-        index = faiss.IndexIVFFlat(quantizer, dimension, nlist, faiss.METRIC_INNER_PRODUCT)
-        index.train(embeddings.astype(np.float32))
-        index.add(embeddings.astype(np.float32))
-    else:
-        # Flat 인덱스 (소규모용, 정확)
-        index = faiss.IndexFlatIP(dimension)
-        index.add(embeddings.astype(np.float32))
 
-    # 인덱스 저장
-    vector_path.parent.mkdir(parents=True, exist_ok=True)
-    faiss.write_index(index, str(vector_path))
-    print(f"[OK] FAISS 인덱스 저장: {index.ntotal}개 벡터 → {vector_path}")
+def build_shard_index(with_vectors: bool) -> None:
+    """doc_type별 샤드 인덱스 빌드 (전체 벡터 인덱스에서 벡터 복원)."""
+    cfg = get_config().rag
+    index_path = Path(cfg.paths.policies_index)
+    if not index_path.exists():
+        print(f"[SKIP] 텍스트 인덱스 없음: {index_path}")
+        return
 
-    return len(documents)
+    vector_path = Path(cfg.paths.vector_index) if with_vectors else None
+    build_shards(index_path, vector_path=vector_path)
 
 
 def main() -> None:
@@ -120,6 +174,34 @@ def main() -> None:
         action="store_true",
         help="벡터 인덱스 생성 건너뛰기",
     )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="임베딩 프로세스 수 (기본: configs/rag.yaml index.build_workers)",
+    )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=None,
+        help="임베딩 배치 크기 (기본: index.build_batch_size)",
+    )
+    parser.add_argument(
+        "--shards",
+        action="store_true",
+        help="doc_type별 샤드 인덱스 생성 (configs/rag.yaml index.sharding)",
+    )
+    parser.add_argument(
+        "--tune",
+        action="store_true",
+        help="벤치마크 쿼리 셋으로 nprobe/efSearch 자동 튜닝",
+    )
+    parser.add_argument(
+        "--target-recall",
+        type=float,
+        default=None,
+        help="자동 튜닝 목표 recall@10 (기본: index.tune_target_recall)",
+    )
     args = parser.parse_args()
 
     print("=" * 50)
@@ -131,10 +213,18 @@ def main() -> None:
 
     # 벡터 인덱스
     if not args.no_vectors and n_text > 0:
-        n_vector = build_vector_index()
+        n_vector = build_vector_index(workers=args.workers, batch_size=args.batch_size)
     else:
         n_vector = 0
 
+    # 검색 파라미터 자동 튜닝
+    if args.tune:
+        tune_vector_index(args.target_recall)
+
+    # 샤드 인덱스
+    if (args.shards or get_config().rag.index.sharding) and n_text > 0:
+        build_shard_index(with_vectors=n_vector > 0)
+
     print("=" * 50)
     print(f"완료: 텍스트 {n_text}개, 벡터 {n_vector}개")
     print("=" * 50)
@@ -0,0 +1,347 @@
+#!/usr/bin/env python3
+"""임베딩/리랭커 모델 ONNX 내보내기 스크립트.
+
+sentence-transformers 모델을 ONNX로 내보내고 동적 int8 양자화를 적용한 뒤,
+torch 출력과의 동등성(코사인 유사도)과 지연/메모리/기동 시간을 비교합니다.
+
+사용법:
+    # 임베딩 + 리랭커 내보내기, 양자화, 동등성 검사, 벤치마크
+    python scripts/17_export_onnx.py --check --bench
+
+    # 임베딩 모델만
+    python scripts/17_export_onnx.py --target embedder
+
+    # 양자화 없이 fp32만
+    python scripts/17_export_onnx.py --no-quantize
+
+내보낸 모델 사용 (configs/rag.yaml):
+    embedding:
+      backend: "onnx"
+    reranker:
+      backend: "onnx"
+
+필요 패키지 (내보내기 시에만):
+    pip install sentence-transformers onnx onnxruntime tokenizers
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import subprocess
+import sys
+from pathlib import Path
+from typing import Any, Dict, List
+
+import numpy as np
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from src.config import get_config
+from src.rag.onnx_backend import (
+    CONFIG_FILE,
+    FP32_MODEL_FILE,
+    INT8_MODEL_FILE,
+)
+
+# 동등성 검사 최소 코사인 유사도
+MIN_COSINE = 0.99
+
+SAMPLE_TEXTS = [
+    "환불 정책: 상품 수령 후 7일 이내 환불 가능합니다.",
+    "배송 정책: 결제 완료 후 2-3 영업일 소요됩니다.",
+    "교환 정책: 불량품은 무료로 교환 가능합니다.",
+    "회원 등급에 따라 적립금과 쿠폰 혜택이 달라집니다.",
+    "무이자 할부는 5만원 이상 결제 시 최대 6개월까지 가능합니다.",
+    "Orders shipped overseas may take up to 14 business days.",
+]
+
+SAMPLE_QUERY = "반품하고 싶은데 며칠 안에 해야 하나요?"
+
+
+def _load_sample_texts(limit: int = 64) -> List[str]:
+    """정책 인덱스가 있으면 실제 청크를, 없으면 내장 샘플을 사용."""
+    index_path = Path(get_config().rag.paths.policies_index)
+    texts: List[str] = []
+    if index_path.exists():
+        with index_path.open("r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                text = json.loads(line).get("text", "")
+                if text:
+                    texts.append(text)
+                if len(texts) >= limit:
+                    break
+    return texts or list(SAMPLE_TEXTS)
+
+
+def _export(module, dummy_inputs: Dict[str, Any], output_name: str, out_path: Path) -> None:
+    """torch 모듈을 동적 축 ONNX 그래프로 내보내기."""
+    import torch
+
+    class _Wrapper(torch.nn.Module):
+        def __init__(self, inner, input_names):
+            super().__init__()
+            self.inner = inner
+            self.input_names = input_names
+
+        def forward(self, *args):
+            outputs = self.inner(**dict(zip(self.input_names, args)))
+            return outputs[0]
+
+    input_names = list(dummy_inputs.keys())
+    dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in input_names}
+    dynamic_axes[output_name] = {0: "batch"}
+
+    module.eval()
+    with torch.no_grad():
+        torch.onnx.export(
+            _Wrapper(module, input_names),
+            tuple(dummy_inputs[name] for name in input_names),
+            str(out_path),
+            input_names=input_names,
+            output_names=[output_name],
+            dynamic_axes=dynamic_axes,
+            opset_version=14,
+            do_constant_folding=True,
+        )
+
+
+def _quantize(out_dir: Path) -> None:
+    """동적 int8 양자화 (가중치 int8, 활성값은 런타임 양자화)."""
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+
+    quantize_dynamic(
+        str(out_dir / FP32_MODEL_FILE),
+        str(out_dir / INT8_MODEL_FILE),
+        weight_type=QuantType.QInt8,
+    )
+    fp32_mb = (out_dir / FP32_MODEL_FILE).stat().st_size / 1e6
+    int8_mb = (out_dir / INT8_MODEL_FILE).stat().st_size / 1e6
+    print(f"[OK] int8 양자화: {fp32_mb:.1f}MB → {int8_mb:.1f}MB")
+
+
+def export_embedder(quantize: bool) -> Path:
+    """임베딩 모델 내보내기."""
+    from sentence_transformers import SentenceTransformer
+
+    cfg = get_config().rag.embedding
+    out_dir = Path(cfg.onnx_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+
+    model = SentenceTransformer(cfg.model_name, device="cpu")
+    transformer = model[0]
+    tokenizer = transformer.tokenizer
+
+    pooling = "mean"
+    if len(model) > 1 and hasattr(model[1], "get_pooling_mode_str"):
+        pooling = model[1].get_pooling_mode_str()
+        if pooling not in ("mean", "cls"):
+            raise SystemExit(f"지원하지 않는 pooling 모드: {pooling}")
+
+    dummy = tokenizer(["dummy input"], return_tensors="pt")
+    _export(transformer.auto_model, dict(dummy), "last_hidden_state", out_dir / FP32_MODEL_FILE)
+    tokenizer.save_pretrained(str(out_dir))
+
+    onnx_config = {
+        "model_name": cfg.model_name,
+        "pooling": pooling,
+        "dimension": model.get_sentence_embedding_dimension(),
+        "max_seq_length": model.get_max_seq_length() or 512,
+    }
+    (out_dir / CONFIG_FILE).write_text(json.dumps(onnx_config, indent=2), encoding="utf-8")
+    print(f"[OK] 임베딩 모델 내보내기: {cfg.model_name} → {out_dir}")
+
+    if quantize:
+        _quantize(out_dir)
+    return out_dir
+
+
+def export_reranker(quantize: bool) -> Path:
+    """Cross-Encoder 리랭커 내보내기."""
+    from sentence_transformers import CrossEncoder
+
+    cfg = get_config().rag.reranker
+    out_dir = Path(cfg.onnx_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+
+    model = CrossEncoder(cfg.model_name, device="cpu")
+    tokenizer = model.tokenizer
+
+    dummy = tokenizer([("query", "document")], return_tensors="pt")
+    _export(model.model, dict(dummy), "logits", out_dir / FP32_MODEL_FILE)
+    tokenizer.save_pretrained(str(out_dir))
+
+    onnx_config = {
+        "model_name": cfg.model_name,
+        "max_seq_length": getattr(model, "max_length", None) or 512,
+    }
+    (out_dir / CONFIG_FILE).write_text(json.dumps(onnx_config, indent=2), encoding="utf-8")
+    print(f"[OK] 리랭커 내보내기: {cfg.model_name} → {out_dir}")
+
+    if quantize:
+        _quantize(out_dir)
+    return out_dir
+
+
+def check_embedder(quantized: bool) -> bool:
+    """torch 대비 ONNX 임베딩 코사인 유사도 검사."""
+    from src.rag.embedder import Embedder
+
+    texts = _load_sample_texts()
+    torch_emb = Embedder(backend="torch").encode_documents(texts, show_progress=False)
+
+    onnx_embedder = Embedder(backend="onnx")
+    onnx_embedder.onnx_quantized = quantized
+    onnx_emb = onnx_embedder.encode_documents(texts, show_progress=False)
+
+    torch_emb = torch_emb / np.linalg.norm(torch_emb, axis=1, keepdims=True)
+    onnx_emb = onnx_emb / np.linalg.norm(onnx_emb, axis=1, keepdims=True)
+    cosines = np.sum(torch_emb * onnx_emb, axis=1)
+
+    label = "int8" if quantized else "fp32"
+    ok = bool(cosines.min() >= MIN_COSINE)
+    status = "OK" if ok else "FAIL"
+    print(
+        f"[{status}] 임베딩 동등성 ({label}, n={len(texts)}): "
+        f"min={cosines.min():.4f} mean={cosines.mean():.4f} (기준 ≥ {MIN_COSINE})"
+    )
+    return ok
+
+
+def check_reranker(quantized: bool) -> bool:
+    """torch 대비 ONNX 리랭커 점수 순위 일치 검사."""
+    from src.rag.reranker import Reranker
+
+    texts = _load_sample_texts(limit=16)
+    documents = [(str(i), t, 0.0, {}) for i, t in enumerate(texts)]
+
+    torch_order = [r.id for r in Reranker(backend="torch").rerank(SAMPLE_QUERY, documents)]
+    onnx_reranker = Reranker(backend="onnx")
+    onnx_reranker.onnx_quantized = quantized
+    onnx_order = [r.id for r in onnx_reranker.rerank(SAMPLE_QUERY, documents)]
+
+    top_k = min(3, len(torch_order))
+    ok = set(torch_order[:top_k]) == set(onnx_order[:top_k])
+    status = "OK" if ok else "FAIL"
+    label = "int8" if quantized else "fp32"
+    print(f"[{status}] 리랭커 top-{top_k} 일치 ({label}): torch={torch_order[:top_k]} onnx={onnx_order[:top_k]}")
+    return ok
+
+
+# 별도 프로세스에서 실행: import/로드 시간, 쿼리 지연, 최대 RSS 측정
+_BENCH_SNIPPET = """
+import json, resource, sys, time
+t0 = time.perf_counter()
+sys.path.insert(0, {root!r})
+from src.rag.embedder import Embedder
+emb = Embedder(backend={backend!r})
+emb.onnx_quantized = {quantized!r}
+emb.encode_query("warmup")
+startup = time.perf_counter() - t0
+latencies = []
+for _ in range({iterations}):
+    t = time.perf_counter()
+    emb.encode_query({query!r})
+    latencies.append((time.perf_counter() - t) * 1000)
+latencies.sort()
+rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+print(json.dumps({{
+    "startup_s": round(startup, 3),
+    "p50_ms": round(latencies[len(latencies) // 2], 2),
+    "p95_ms": round(latencies[int(len(latencies) * 0.95) - 1], 2),
+    "max_rss_mb": round(rss_mb, 1),
+}}))
+"""
+
+
+def bench_embedder(iterations: int) -> Dict[str, Dict[str, Any]]:
+    """백엔드별 기동 시간/쿼리 지연/메모리 비교."""
+    root = str(Path(__file__).resolve().parents[1])
+    variants = [("torch", False), ("onnx", False), ("onnx", True)]
+    results: Dict[str, Dict[str, Any]] = {}
+
+    for backend, quantized in variants:
+        label = backend if backend == "torch" else f"onnx-{'int8' if quantized else 'fp32'}"
+        code = _BENCH_SNIPPET.format(
+            root=root,
+            backend=backend,
+            quantized=quantized,
+            iterations=iterations,
+            query=SAMPLE_QUERY,
+        )
+        proc = subprocess.run(
+            [sys.executable, "-c", code],
+            capture_output=True,
+            text=True,
+            cwd=root,
+        )
+        if proc.returncode != 0:
+            print(f"[SKIP] {label}: {proc.stderr.strip().splitlines()[-1:]}")
+            continue
+        results[label] = json.loads(proc.stdout.strip().splitlines()[-1])
+
+    print("-" * 66)
+    print(f"{'backend':<12}{'startup(s)':>12}{'p50(ms)':>10}{'p95(ms)':>10}{'max RSS(MB)':>14}")
+    print("-" * 66)
+    for label, r in results.items():
+        print(f"{label:<12}{r['startup_s']:>12}{r['p50_ms']:>10}{r['p95_ms']:>10}{r['max_rss_mb']:>14}")
+    print("-" * 66)
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="임베딩/리랭커 ONNX 내보내기")
+    parser.add_argument(
+        "--target",
+        choices=["embedder", "reranker", "all"],
+        default="all",
+        help="내보낼 모델 (기본: all)",
+    )
+    parser.add_argument("--no-quantize", action="store_true", help="int8 양자화 건너뛰기")
+    parser.add_argument("--skip-export", action="store_true", help="내보내기 없이 검사/벤치만 실행")
+    parser.add_argument("--check", action="store_true", help="torch 출력과 동등성 검사")
+    parser.add_argument("--bench", action="store_true", help="지연/메모리/기동 시간 비교")
+    parser.add_argument("--iterations", type=int, default=50, help="벤치마크 반복 횟수")
+    parser.add_argument("--output", type=str, help="벤치마크 결과 JSON 저장 경로")
+    args = parser.parse_args()
+
+    quantize = not args.no_quantize
+    do_embedder = args.target in ("embedder", "all")
+    do_reranker = args.target in ("reranker", "all")
+
+    print("=" * 50)
+    print("ONNX 모델 내보내기")
+    print("=" * 50)
+
+    if not args.skip_export:
+        if do_embedder:
+            export_embedder(quantize)
+        if do_reranker:
+            export_reranker(quantize)
+
+    ok = True
+    if args.check:
+        if do_embedder:
+            ok &= check_embedder(quantized=False)
+            if quantize:
+                ok &= check_embedder(quantized=True)
+        if do_reranker:
+            ok &= check_reranker(quantized=quantize)
+
+    if args.bench and do_embedder:
+        results = bench_embedder(args.iterations)
+        if args.output:
+            out = Path(args.output)
+            out.parent.mkdir(parents=True, exist_ok=True)
+            out.write_text(json.dumps(results, indent=2), encoding="utf-8")
+            print(f"[OK] 벤치마크 결과 저장 → {out}")
+
+    if not ok:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+#!/usr/bin/env python
+"""검색 벤치마크 실행 스크립트.
+
+라벨링된 쿼리 셋으로 검색 설정 조합을 스윕하고 JSON 보고서를 저장합니다.
+
+사용법:
+    # 기본 (keyword/embedding/hybrid, top_k=5)
+    python scripts/18_benchmark_retrieval.py
+
+    # hybrid_alpha, top_k, 리랭킹, 인덱스 타입 스윕
+    python scripts/18_benchmark_retrieval.py --modes hybrid --alphas 0.3 0.5 0.7 \\
+        --top-k 3 5 10 --rerank both --index-types flat ivf_flat ivf_pq hnsw
+
+    # 이전 보고서와 비교 (회귀가 있으면 종료 코드 1)
+    python scripts/18_benchmark_retrieval.py --compare outputs/benchmark/retrieval_prev.json
+"""
+
+import argparse
+import json
+import logging
+import sys
+from datetime import datetime
+from pathlib import Path
+
+# 프로젝트 루트 추가
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.evaluation.retrieval_benchmark import (
+    DEFAULT_QUERIES_PATH,
+    RetrievalBenchmark,
+    diff_reports,
+    load_retrieval_queries,
+    sweep,
+)
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="검색 벤치마크 (recall@k, MRR, 지연, QPS, 메모리)")
+    parser.add_argument("--queries", type=Path, default=DEFAULT_QUERIES_PATH, help="라벨링된 쿼리 셋 (JSONL)")
+    parser.add_argument("--modes", nargs="+", default=["keyword", "embedding", "hybrid"],
+                        choices=["keyword", "embedding", "hybrid"], help="검색 모드")
+    parser.add_argument("--alphas", nargs="+", type=float, default=[0.7], help="hybrid_alpha 값")
+    parser.add_argument("--top-k", nargs="+", type=int, default=[5], help="top_k 값")
+    parser.add_argument("--rerank", choices=["off", "on", "both"], default="off", help="리랭킹 사용")
+    parser.add_argument("--index-types", nargs="+", default=["flat"], help="벡터 인덱스 타입 (flat, ivf_flat, ivf_pq, hnsw)")
+    parser.add_argument("--clients", type=int, default=4, help="처리량 측정 동시 클라이언트 수")
+    parser.add_argument("--rounds", type=int, default=3, help="클라이언트별 쿼리 셋 반복 횟수")
+    parser.add_argument("--output", type=Path, default=None, help="보고서 경로 (기본: outputs/benchmark/retrieval_<시각>.json)")
+    parser.add_argument("--compare", type=Path, default=None, help="비교할 이전 보고서")
+    parser.add_argument("--tolerance", type=float, default=0.05, help="회귀 판정 허용 변화량")
+    args = parser.parse_args()
+
+    rerank = {"off": [False], "on": [True], "both": [False, True]}[args.rerank]
+    settings = sweep(args.modes, args.alphas, args.top_k, rerank, args.index_types)
+    queries = load_retrieval_queries(args.queries)
+
+    print("=" * 60)
+    print("검색 벤치마크")
+    print("=" * 60)
+    print(f"  쿼리: {len(queries)}개 ({args.queries})")
+    print(f"  설정 조합: {len(settings)}개")
+    print(f"  동시 클라이언트: {args.clients}")
+    print()
+
+    bench = RetrievalBenchmark(queries, clients=args.clients, rounds=args.rounds)
+    report = bench.run(settings)
+
+    print(f"{'설정':<32} {'recall':>7} {'MRR':>6} {'p50':>7} {'p95':>7} {'p99':>7} {'QPS':>8} {'mem MB':>7}")
+    for r in report["results"]:
+        print(
+            f"{r['label']:<32} {r['recall_at_k']:>7.3f} {r['mrr']:>6.3f} "
+            f"{r['p50_ms']:>7.1f} {r['p95_ms']:>7.1f} {r['p99_ms']:>7.1f} "
+            f"{r['qps']:>8.1f} {r['index_memory_mb']:>7.1f}"
+        )
+
+    output = args.output or Path("outputs/benchmark") / f"retrieval_{datetime.now():%Y%m%d_%H%M%S}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with output.open("w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print()
+    print(f"[OK] 보고서 저장 → {output}")
+
+    if args.compare:
+        with args.compare.open("r", encoding="utf-8") as f:
+            previous = json.load(f)
+        rows = diff_reports(previous, report, tolerance=args.tolerance)
+        regressions = [row for row in rows if row["regression"]]
+        print()
+        print(f"이전 보고서 대비: {len(rows)}개 지표 비교, 회귀 {len(regressions)}개")
+        for row in regressions:
+            print(f"  - [{row['label']}] {row['metric']}: {row['old']} → {row['new']} ({row['change']:+.1%})")
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,103 @@
+#!/usr/bin/env python
+"""LLM 세션 풀 벤치마크.
+
+로컬 OpenAI 호환 스텁 서버에 대해, 요청마다 세션을 새로 만드는 방식(기존 라우터)과
+(provider, base_url)별 공유 세션 풀을 쓰는 방식의 첫 바이트까지 시간(TTFB)을 비교합니다.
+
+사용법:
+    python scripts/19_benchmark_llm_pool.py --requests 200 --concurrency 8 --latency-ms 20
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List
+
+# 프로젝트 루트 추가
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.evaluation.retrieval_benchmark import percentile
+from src.llm.client import LLMClient, LLMConfig
+from src.llm.pool import LLMSessionPool
+from src.llm.stub_server import StubLLMServer
+
+
+async def _ttfb(client: LLMClient) -> float:
+    """첫 토큰까지 시간 (ms)."""
+    start = time.perf_counter()
+    first = None
+    async for _chunk in client.chat_stream([{"role": "user", "content": "주문 상태 알려줘"}]):
+        if first is None:
+            first = time.perf_counter()
+    return ((first or time.perf_counter()) - start) * 1000
+
+
+async def _run(config: LLMConfig, pooled: bool, requests: int, concurrency: int) -> List[float]:
+    shared = LLMSessionPool() if pooled else None
+    samples: List[float] = []
+    sem = asyncio.Semaphore(concurrency)
+
+    async def one() -> None:
+        async with sem:
+            # 기존 방식: 요청마다 새 세션(연결)을 만들고 닫음
+            pool = shared or LLMSessionPool()
+            try:
+                samples.append(await _ttfb(LLMClient(config, pool=pool)))
+            finally:
+                if shared is None:
+                    await pool.close()
+
+    await asyncio.gather(*(one() for _ in range(requests)))
+    if shared is not None:
+        await shared.close()
+    return samples
+
+
+def _summary(samples: List[float]) -> Dict[str, float]:
+    return {
+        "p50_ms": percentile(samples, 50),
+        "p95_ms": percentile(samples, 95),
+        "mean_ms": sum(samples) / len(samples) if samples else 0.0,
+    }
+
+
+async def main_async(args: argparse.Namespace) -> int:
+    async with StubLLMServer(host="127.0.0.1", latency_ms=args.latency_ms) as server:
+        # localhost 이름으로 접속해 DNS 조회 비용도 포함
+        config = LLMConfig(
+            provider="local",
+            api_key="",
+            model="stub",
+            temperature=0.0,
+            max_tokens=64,
+            timeout=30,
+            base_url=f"http://localhost:{server.port}/v1",
+        )
+        await _run(config, True, min(10, args.requests), args.concurrency)  # 워밍업
+
+        results = {}
+        for label, pooled in (("per-request", False), ("pooled", True)):
+            results[label] = _summary(await _run(config, pooled, args.requests, args.concurrency))
+
+    print(f"{'방식':<14} {'p50':>9} {'p95':>9} {'mean':>9}  (TTFB, ms)")
+    for label, r in results.items():
+        print(f"{label:<14} {r['p50_ms']:>9.2f} {r['p95_ms']:>9.2f} {r['mean_ms']:>9.2f}")
+    base, pooled = results["per-request"]["p50_ms"], results["pooled"]["p50_ms"]
+    if base > 0:
+        print(f"\n풀 사용 시 TTFB p50 {base - pooled:+.2f}ms 절약 ({(base - pooled) / base:.1%})")
+    return 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="LLM 세션 풀 TTFB 벤치마크 (로컬 스텁 서버)")
+    parser.add_argument("--requests", type=int, default=200, help="방식별 요청 수")
+    parser.add_argument("--concurrency", type=int, default=8, help="동시 요청 수")
+    parser.add_argument("--latency-ms", type=float, default=20.0, help="스텁 서버 첫 바이트 지연")
+    args = parser.parse_args()
+    return asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,123 @@
+#!/usr/bin/env python
+"""LLM 프롬프트 컨텍스트 압축 벤치마크.
+
+의도별 도구 결과를 이전 방식(dict repr)과 컨텍스트 빌더(projection + 토큰 예산 +
+표 렌더링)로 각각 시스템 프롬프트에 넣어 프롬프트 토큰 수와 LLM 호출 지연을 비교합니다.
+지연은 프롬프트 길이에 비례해 느려지는 로컬 스텁 서버(--prompt-ms-per-1k)로 측정합니다.
+
+사용법:
+    python scripts/20_benchmark_llm_context.py --requests 20 --prompt-ms-per-1k 200
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+# 프로젝트 루트 추가
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.agents.nodes.order_agent import handle_order_query
+from src.agents.nodes.recommend_agent import handle_recommendation
+from src.evaluation.retrieval_benchmark import percentile
+from src.llm.client import LLMClient, LLMConfig
+from src.llm.context import count_tokens, get_context_builder, legacy_format_context
+from src.llm.pool import LLMSessionPool
+from src.llm.prompts import get_prompt_registry
+from src.llm.stub_server import StubLLMServer
+
+# 정책 인덱스가 없을 때 사용할 예시 청크 (실제 크롤링 청크와 비슷한 길이)
+_SAMPLE_POLICY_TEXT = (
+    "교환 및 반품은 상품 수령 후 7일 이내에 신청할 수 있습니다. 단, 고객의 책임 있는 사유로 상품이 "
+    "멸실 또는 훼손된 경우, 포장을 개봉하여 상품 가치가 현저히 감소한 경우에는 교환 및 반품이 "
+    "제한됩니다. 단순 변심에 의한 반품 시 왕복 배송비는 고객 부담이며, 상품 하자 또는 오배송의 경우 "
+    "배송비는 판매자가 부담합니다. 환불은 반품 상품 회수 및 검수 완료 후 3영업일 이내에 결제 수단으로 "
+    "처리됩니다. "
+) * 3
+
+
+async def _sample_contexts(user_id: str) -> List[Tuple[str, str, Dict[str, Any]]]:
+    """(라벨, 의도, 도구 결과) 목록."""
+    samples: List[Tuple[str, str, Dict[str, Any]]] = []
+    orders = await handle_order_query(user_id, "list", {"limit": 10})
+    samples.append(("order/list", "order", orders))
+    if orders.get("orders"):
+        oid = orders["orders"][0]["order_id"]
+        samples.append(("order/detail", "order", await handle_order_query(user_id, "detail", {"order_id": oid})))
+    # 티켓을 실제로 만들지 않도록 생성 결과와 같은 형태의 예시 사용
+    ticket = {
+        "ticket_id": "TICKET_SAMPLE0001", "user_id": user_id, "order_id": orders["orders"][0]["order_id"] if orders.get("orders") else None,
+        "issue_type": "refund", "description": "상품 불량으로 환불 요청합니다.", "status": "open",
+        "priority": "normal", "created_at": "2025-01-01T09:00:00",
+    }
+    samples.append(("claim", "claim", {"ticket": ticket}))
+
+    hits = [
+        {
+            "id": f"policy_{i}",
+            "score": round(0.9 - i * 0.05, 3),
+            "text": _SAMPLE_POLICY_TEXT,
+            "metadata": {"title": f"교환/반품 정책 {i + 1}", "url": f"https://example.com/policy/{i}", "doc_type": "policy"},
+        }
+        for i in range(5)
+    ]
+    samples.append(("policy", "policy", {"query": "환불 정책 알려줘", "hits": hits}))
+    samples.append(("recommend", "recommend", await handle_recommendation(user_id, "personal", {"top_k": 10})))
+    return samples
+
+
+async def _latencies(client: LLMClient, system_prompt: str, requests: int) -> List[float]:
+    samples = []
+    for _ in range(requests):
+        start = time.perf_counter()
+        await client._chat([{"role": "user", "content": "안내 부탁드립니다."}], system_prompt=system_prompt)
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+async def main_async(args: argparse.Namespace) -> int:
+    registry = get_prompt_registry()
+    builder = get_context_builder()
+    samples = await _sample_contexts(args.user_id)
+
+    rows = []
+    async with StubLLMServer(latency_ms=args.latency_ms, prompt_ms_per_1k_tokens=args.prompt_ms_per_1k) as server:
+        config = LLMConfig(
+            provider="local", api_key="", model="stub", temperature=0.0,
+            max_tokens=64, timeout=30, base_url=server.base_url,
+        )
+        pool = LLMSessionPool()
+        client = LLMClient(config, pool=pool)
+        for label, intent, data in samples:
+            legacy = registry.render_system(intent, f"\n\n[제공된 데이터]\n{legacy_format_context(data)}")
+            built = builder.build(data, intent)
+            compact = registry.render_system(intent, f"\n\n[제공된 데이터]\n{built.text}")
+            legacy_ms = percentile(await _latencies(client, legacy, args.requests), 50)
+            compact_ms = percentile(await _latencies(client, compact, args.requests), 50)
+            rows.append((label, count_tokens(legacy), count_tokens(compact), legacy_ms, compact_ms, built.truncated))
+        await pool.close()
+
+    print(f"{'의도':<14} {'이전 tok':>9} {'압축 tok':>9} {'감소':>7} {'이전 p50':>10} {'압축 p50':>10}  잘린 섹션")
+    for label, legacy_tok, compact_tok, legacy_ms, compact_ms, truncated in rows:
+        reduction = 1 - compact_tok / legacy_tok if legacy_tok else 0.0
+        print(
+            f"{label:<14} {legacy_tok:>9} {compact_tok:>9} {reduction:>7.1%} "
+            f"{legacy_ms:>8.1f}ms {compact_ms:>8.1f}ms  {', '.join(truncated) or '-'}"
+        )
+    return 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="LLM 컨텍스트 압축 토큰/지연 벤치마크")
+    parser.add_argument("--user-id", default="user_001", help="샘플 도구 결과를 만들 사용자")
+    parser.add_argument("--requests", type=int, default=20, help="방식별 호출 수")
+    parser.add_argument("--latency-ms", type=float, default=20.0, help="스텁 서버 기본 지연")
+    parser.add_argument("--prompt-ms-per-1k", type=float, default=200.0, help="프롬프트 1천 토큰당 추가 지연")
+    args = parser.parse_args()
+    return asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,138 @@
+#!/usr/bin/env python
+"""LLM 폴백/헤징 오프라인 벤치마크.
+
+실제 LLM 비용 없이 두 개의 스텁 서버(1순위: OpenAI 형식, 꼬리 지연이 긴 lognormal 분포와
+오류 주입 / 2순위: Anthropic 형식, 안정적인 지연)를 띄우고, 순차 폴백과 헤징의
+응답 지연 분포(p50/p95/p99)와 실패 수를 비교합니다.
+
+사용법:
+    python scripts/21_benchmark_llm_hedging.py --requests 200 --concurrency 8 \\
+        --primary-ms 300 --primary-sigma 0.8 --primary-429 0.05 --hedge-ms 600
+"""
+
+import argparse
+import asyncio
+import logging
+import sys
+import time
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, List, Tuple
+
+# 프로젝트 루트 추가
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.evaluation.retrieval_benchmark import percentile
+from src.llm.client import LLMClient, LLMConfig
+from src.llm.hedging import AllProvidersFailed, HedgePolicy, hedged_call
+from src.llm.pool import LLMSessionPool
+from src.llm.stats import LatencyTracker
+from src.llm.stub_server import LatencyProfile, StubLLMServer
+
+
+async def _run(
+    call: Callable[[int], Awaitable[str]], requests: int, concurrency: int
+) -> Tuple[List[float], int]:
+    samples: List[float] = []
+    failures = 0
+    sem = asyncio.Semaphore(concurrency)
+
+    async def one(i: int) -> None:
+        nonlocal failures
+        async with sem:
+            start = time.perf_counter()
+            try:
+                await call(i)
+                samples.append((time.perf_counter() - start) * 1000)
+            except Exception:
+                failures += 1
+
+    await asyncio.gather(*(one(i) for i in range(requests)))
+    return samples, failures
+
+
+def _row(label: str, samples: List[float], failures: int) -> str:
+    return (
+        f"{label:<10} {percentile(samples, 50):>9.1f} {percentile(samples, 95):>9.1f} "
+        f"{percentile(samples, 99):>9.1f} {failures:>6}"
+    )
+
+
+async def main_async(args: argparse.Namespace) -> int:
+    primary = StubLLMServer(
+        latency=LatencyProfile("lognormal", args.primary_ms, args.primary_sigma),
+        faults={"429": args.primary_429, "500": args.primary_500},
+        tokens_per_second=args.tokens_per_second,
+        seed=args.seed,
+    )
+    secondary = StubLLMServer(
+        latency=LatencyProfile("normal", args.secondary_ms, args.secondary_ms * 0.1),
+        tokens_per_second=args.tokens_per_second,
+        seed=args.seed,
+    )
+    async with primary, secondary:
+        configs: Dict[str, LLMConfig] = {
+            "openai": LLMConfig(
+                provider="openai", api_key="stub", model="gpt-4o-mini", temperature=0.0,
+                max_tokens=64, timeout=30, base_url=primary.base_url,
+            ),
+            "anthropic": LLMConfig(
+                provider="anthropic", api_key="stub", model="claude-3-haiku-20240307", temperature=0.0,
+                max_tokens=64, timeout=30, base_url=secondary.anthropic_base_url,
+            ),
+        }
+        pool = LLMSessionPool()
+        providers = list(configs)
+
+        async def chat(provider: str, i: int) -> str:
+            # 요청마다 다른 메시지 (동일 요청 병합 방지)
+            messages = [{"role": "user", "content": f"주문 상태 알려줘 #{i}"}]
+            return await LLMClient(configs[provider], pool=pool).chat(messages, system_prompt="주문 관련 질문에 답변합니다.")
+
+        async def sequential(i: int) -> str:
+            for provider in providers:
+                try:
+                    return await chat(provider, i)
+                except Exception:
+                    continue
+            raise AllProvidersFailed([])
+
+        policy = HedgePolicy(delay_ms=args.hedge_ms, adaptive=False, min_delay_ms=0, tracker=LatencyTracker())
+
+        async def hedged(i: int) -> str:
+            _, response = await hedged_call(providers, lambda p: chat(p, i), policy)
+            return response
+
+        rows = []
+        for label, call in (("sequential", sequential), ("hedged", hedged)):
+            samples, failures = await _run(call, args.requests, args.concurrency)
+            rows.append(_row(label, samples, failures))
+        await pool.close()
+
+    print(f"{'방식':<10} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'실패':>6}")
+    for row in rows:
+        print(row)
+    print(f"1순위 스텁: {primary.stats()}")
+    print(f"2순위 스텁: {secondary.stats()}")
+    return 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="LLM 순차 폴백 vs 헤징 지연 벤치마크 (스텁 서버)")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--primary-ms", type=float, default=300.0, help="1순위 지연 중앙값")
+    parser.add_argument("--primary-sigma", type=float, default=0.8, help="1순위 lognormal sigma (꼬리 길이)")
+    parser.add_argument("--primary-429", type=float, default=0.05, help="1순위 429 비율")
+    parser.add_argument("--primary-500", type=float, default=0.0, help="1순위 500 비율")
+    parser.add_argument("--secondary-ms", type=float, default=500.0, help="2순위 평균 지연")
+    parser.add_argument("--hedge-ms", type=float, default=600.0, help="헤징 임계값")
+    parser.add_argument("--tokens-per-second", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+    # 주입한 429/500 오류 로그가 결과 표를 가리지 않도록 함
+    logging.disable(logging.CRITICAL)
+    return asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
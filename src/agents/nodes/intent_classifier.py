@@ -5,6 +5,7 @@ LLM 기반 의도 분류를 지원하며, 실패 시 키워드 기반 폴백을
 
 from __future__ import annotations
 
+import copy
 import json
 import logging
 import re
@@ -12,6 +13,7 @@ from dataclasses import dataclass
 from typing import Any, Dict, Optional, Tuple
 
 from src.config import get_config
+from src.core.singleflight import SingleFlight
 
 logger = logging.getLogger(__name__)
 
@@ -321,20 +323,29 @@ def classify_intent_keyword(message: str) -> IntentResult:
 # LLM 기반 의도 분류
 # ============================================
 
+_llm_flight = SingleFlight("intent_llm")
+
+
 async def classify_intent_llm(message: str) -> Optional[IntentResult]:
     """LLM 기반 의도 분류.
 
+    같은 메시지의 분류가 진행 중이면 그 결과를 공유합니다.
+
     Returns:
         IntentResult or None if LLM call fails
     """
-    from src.llm.client import get_client, load_prompt
-
     cfg = _get_intent_config()
-    llm_cfg = cfg.llm_classification
-
-    if not llm_cfg.enabled:
+    if not cfg.llm_classification.enabled:
         return None
 
+    result = await _llm_flight.do(message, lambda: _classify_intent_llm(message))
+    # 호출자별로 payload를 수정할 수 있으므로 복사본 반환
+    return copy.deepcopy(result)
+
+
+async def _classify_intent_llm(message: str) -> Optional[IntentResult]:
+    from src.llm.client import get_client, load_prompt
+
     try:
         client = get_client()
         prompt = load_prompt("intent_classification")
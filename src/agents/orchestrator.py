@@ -5,26 +5,31 @@ from __future__ import annotations
 import json
 import logging
 import time
-from typing import Any, Dict, Optional
+from dataclasses import dataclass, field
+from typing import Any, AsyncGenerator, Awaitable, Callable, Dict, List, Optional
 
 from .state import AgentState
 from .nodes.order_agent import handle_order_query
 from .nodes.claim_agent import handle_claim
 from .nodes.recommend_agent import handle_recommendation
-from src.rag.retriever import PolicyRetriever
+from .speculation import run_tool
+from src.rag.answer_cache import get_answer_cache
+from src.rag.index_manager import get_index_manager
+from src.monitoring.metrics import track_semantic_cache
+from src.guardrails.output_guards import StreamingOutputGuard
 from src.guardrails.pipeline import apply_guards, process_input, get_guard_summary
-from src.llm.client import generate_response, get_llm_config
+from src.llm.client import generate_response, generate_response_stream, get_llm_config
+from src.core.exceptions import RequestTimeoutError, ServiceUnavailableError
 from src.core.tracer import add_trace, Tracer
 
 try:
-    from src.llm.router import generate_routed_response
+    from src.llm.router import generate_routed_response, generate_routed_response_stream
 except Exception:
     generate_routed_response = None
+    generate_routed_response_stream = None
 
 logger = logging.getLogger(__name__)
 
-retriever = PolicyRetriever()
-
 
 def _is_llm_available() -> bool:
     """LLM 사용 가능 여부 확인"""
@@ -242,162 +247,144 @@ def _format_template_response(data: Dict[str, Any], intent: str, sub_intent: Opt
     return json.dumps(data, ensure_ascii=False, indent=2)
 
 
-async def run(state: AgentState) -> AgentState:
-    """의도별 처리 및 응답 생성"""
-    start_time = time.time()
-    use_llm = _is_llm_available()
-    user_message = state.payload.get("query") or state.payload.get("description", "")
+@dataclass
+class _Prepared:
+    """LLM 응답 생성 직전까지의 처리 결과 (입력 가드 + 도구 실행)."""
+
+    data: Dict[str, Any] = field(default_factory=dict)
+    llm_message: str = ""
+    # 생성 없이 바로 반환할 응답 (입력 차단, 캐시 적중, 검색 실패 등)
+    final: Optional[Dict[str, Any]] = None
+    # 최종 응답 텍스트 콜백 (정책 시맨틱 캐시 저장, LLM 실패 폴백 응답에는 호출하지 않음)
+    on_answer: Optional[Callable[[str], Awaitable[None]]] = None
+
+
+def _input_guard(user_message: str) -> Optional[Dict[str, Any]]:
+    """입력 가드레일 적용 (차단 시 최종 응답 반환)."""
+    guard_start = time.time()
+    input_guard_result = process_input(user_message, strict_mode=True)
+    guard_duration = (time.time() - guard_start) * 1000
 
     add_trace(
-        "orchestrator", "시작",
-        input_data={"intent": state.intent, "sub_intent": state.sub_intent, "user_id": state.user_id},
-        metadata={"llm_available": use_llm}
+        "guard", "입력 가드레일",
+        input_data={"message_length": len(user_message)},
+        output_data={
+            "blocked": input_guard_result.blocked,
+            "pii_count": len(input_guard_result.pii_detected),
+            "warnings": input_guard_result.warnings[:3] if input_guard_result.warnings else []
+        },
+        duration_ms=guard_duration,
+        success=not input_guard_result.blocked
     )
 
-    if user_message:
-        guard_start = time.time()
-        input_guard_result = process_input(user_message, strict_mode=True)
-        guard_duration = (time.time() - guard_start) * 1000
+    if input_guard_result.blocked:
+        return apply_guards({
+            "error": input_guard_result.block_reason or "입력이 차단되었습니다.",
+            "blocked": True,
+        })
 
-        add_trace(
-            "guard", "입력 가드레일",
-            input_data={"message_length": len(user_message)},
-            output_data={
-                "blocked": input_guard_result.blocked,
-                "pii_count": len(input_guard_result.pii_detected),
-                "warnings": input_guard_result.warnings[:3] if input_guard_result.warnings else []
-            },
-            duration_ms=guard_duration,
-            success=not input_guard_result.blocked
-        )
+    if input_guard_result.pii_detected:
+        logger.info(f"PII detected and masked: {len(input_guard_result.pii_detected)} items")
 
-        if input_guard_result.blocked:
-            state.final_response = apply_guards({
-                "error": input_guard_result.block_reason or "입력이 차단되었습니다.",
-                "blocked": True,
-            })
-            return state
+    if input_guard_result.warnings:
+        logger.warning(f"Input guard warnings: {input_guard_result.warnings}")
+    return None
 
-        if input_guard_result.pii_detected:
-            logger.info(f"PII detected and masked: {len(input_guard_result.pii_detected)} items")
 
-        if input_guard_result.warnings:
-            logger.warning(f"Input guard warnings: {input_guard_result.warnings}")
+async def _prepare_order(state: AgentState, user_message: str) -> _Prepared:
+    tool_start = time.time()
+    res = await run_tool(
+        state.prefetch, state.intent, state.sub_intent, state.payload,
+        lambda: handle_order_query(state.user_id, state.sub_intent or "list", state.payload),
+    )
+    tool_duration = (time.time() - tool_start) * 1000
 
-    if state.intent == "order":
-        tool_start = time.time()
-        res = await handle_order_query(state.user_id, state.sub_intent or "list", state.payload)
-        tool_duration = (time.time() - tool_start) * 1000
-        
-        add_trace(
-            "tool", f"주문 도구: {state.sub_intent or 'list'}",
-            input_data={"user_id": state.user_id, "payload": state.payload},
-            output_data={"order_count": len(res.get("orders", [])) if isinstance(res, dict) else 0},
-            duration_ms=tool_duration
-        )
-        try:
-            if (state.sub_intent in (None, "list")) and isinstance(res, dict) and "orders" in res and state.payload.get("include_items"):
-                orders = res.get("orders", [])
-                limit = int(state.payload.get("limit", 5) or 5)
-                orders = orders[: max(0, limit)]
-
-                aggregated: dict[str, int] = {}
-                for o in orders:
-                    oid = o.get("order_id") if isinstance(o, dict) else None
-                    if not oid:
+    add_trace(
+        "tool", f"주문 도구: {state.sub_intent or 'list'}",
+        input_data={"user_id": state.user_id, "payload": state.payload},
+        output_data={"order_count": len(res.get("orders", [])) if isinstance(res, dict) else 0},
+        duration_ms=tool_duration
+    )
+    try:
+        if (state.sub_intent in (None, "list")) and isinstance(res, dict) and "orders" in res and state.payload.get("include_items"):
+            orders = res.get("orders", [])
+            limit = int(state.payload.get("limit", 5) or 5)
+            orders = orders[: max(0, limit)]
+
+            aggregated: dict[str, int] = {}
+            for o in orders:
+                oid = o.get("order_id") if isinstance(o, dict) else None
+                if not oid:
+                    continue
+                detail = await handle_order_query(state.user_id, "detail", {"order_id": oid})
+                items = (detail.get("detail", {}) or {}).get("items", []) if isinstance(detail, dict) else []
+                for it in items:
+                    title = (it.get("title") or it.get("product_name") or it.get("product_id") or "").strip()
+                    if not title:
                         continue
-                    detail = await handle_order_query(state.user_id, "detail", {"order_id": oid})
-                    items = (detail.get("detail", {}) or {}).get("items", []) if isinstance(detail, dict) else []
-                    for it in items:
-                        title = (it.get("title") or it.get("product_name") or it.get("product_id") or "").strip()
-                        if not title:
-                            continue
-                        qty = int(it.get("quantity", 1) or 1)
-                        aggregated[title] = aggregated.get(title, 0) + qty
-
-                # 상위 항목 10개 정렬
-                top_items = sorted(aggregated.items(), key=lambda x: x[1], reverse=True)[:10]
-                res["recent_items"] = [{"title": k, "quantity": v} for k, v in top_items]
-        except Exception as e:
-            logger.warning(f"아이템 요약 생성 실패: {e}")
-
-        if use_llm:
-            try:
-                llm_start = time.time()
-                llm_config = get_llm_config()
-                if generate_routed_response:
-                    llm_response = await generate_routed_response(
-                        context=res,
-                        user_message=user_message or f"주문 {state.sub_intent} 정보를 알려주세요.",
-                        intent="order",
-                    )
-                else:
-                    llm_response = await generate_response(
-                        context=res,
-                        user_message=user_message or f"주문 {state.sub_intent} 정보를 알려주세요.",
-                        intent="order",
-                    )
-                llm_duration = (time.time() - llm_start) * 1000
-                add_trace(
-                    "llm", "LLM 응답 생성",
-                    input_data={"intent": "order", "context_size": len(str(res))},
-                    output_data={"response_length": len(llm_response)},
-                    metadata={"provider": llm_config.provider, "model": llm_config.model},
-                    duration_ms=llm_duration
-                )
-                state.final_response = apply_guards({
-                    "response": llm_response,
-                    "data": res,
-                })
-            except Exception as e:
-                logger.warning(f"LLM 응답 생성 실패, 템플릿 응답 사용: {e}")
-                add_trace("llm", "LLM 실패 - 템플릿 폴백", success=False, error=str(e))
-                template_response = _format_template_response(res, "order", state.sub_intent)
-                state.final_response = apply_guards({"response": template_response, "data": res})
-        else:
-            add_trace("orchestrator", "템플릿 응답 사용", metadata={"reason": "LLM 미사용"})
-            template_response = _format_template_response(res, "order", state.sub_intent)
-            state.final_response = apply_guards({"response": template_response, "data": res})
+                    qty = int(it.get("quantity", 1) or 1)
+                    aggregated[title] = aggregated.get(title, 0) + qty
 
-        return state
+            # 상위 항목 10개 정렬
+            top_items = sorted(aggregated.items(), key=lambda x: x[1], reverse=True)[:10]
+            res["recent_items"] = [{"title": k, "quantity": v} for k, v in top_items]
+    except Exception as e:
+        logger.warning(f"아이템 요약 생성 실패: {e}")
 
-    if state.intent == "claim":
-        tool_start = time.time()
-        res = await handle_claim(state.user_id, state.payload)
-        add_trace("tool", "클레임 도구", input_data=state.payload, duration_ms=(time.time() - tool_start) * 1000)
-
-        if use_llm:
-            try:
-                if generate_routed_response:
-                    llm_response = await generate_routed_response(
-                        context=res,
-                        user_message=user_message or "클레임 접수 결과를 알려주세요.",
-                        intent="claim",
-                    )
-                else:
-                    llm_response = await generate_response(
-                        context=res,
-                        user_message=user_message or "클레임 접수 결과를 알려주세요.",
-                        intent="claim",
-                    )
-                state.final_response = apply_guards({
-                    "response": llm_response,
-                    "data": res,
-                })
-            except Exception as e:
-                logger.warning(f"LLM 응답 생성 실패, 템플릿 응답 사용: {e}")
-                template_response = _format_template_response(res, "claim", state.sub_intent)
-                state.final_response = apply_guards({"response": template_response, "data": res})
-        else:
-            template_response = _format_template_response(res, "claim", state.sub_intent)
-            state.final_response = apply_guards({"response": template_response, "data": res})
+    return _Prepared(data=res, llm_message=user_message or f"주문 {state.sub_intent} 정보를 알려주세요.")
 
-        return state
 
-    if state.intent == "policy":
+async def _prepare_claim(state: AgentState, user_message: str) -> _Prepared:
+    tool_start = time.time()
+    res = await handle_claim(state.user_id, state.payload)
+    add_trace("tool", "클레임 도구", input_data=state.payload, duration_ms=(time.time() - tool_start) * 1000)
+    return _Prepared(data=res, llm_message=user_message or "클레임 접수 결과를 알려주세요.")
+
+
+async def _prepare_policy(state: AgentState) -> _Prepared:
+    # 요청 동안 같은 인덱스 버전 사용 (재로드 중에도 유지)
+    with get_index_manager().acquire() as retriever:
         q = state.payload.get("query", "")
+        top_k = int(state.payload.get("top_k", 5))
+        policy_start = time.time()
+
+        # 시맨틱 캐시: 비슷한 질문이면 검색/생성 생략
+        answer_cache = get_answer_cache()
+        bypass = bool(state.bypass_cache or state.payload.get("bypass_cache"))
+        use_cache = answer_cache.enabled and not bypass
+        if answer_cache.enabled and bypass:
+            track_semantic_cache("bypass")
+        elif use_cache:
+            cached = await answer_cache.alookup(q, retriever.index_version, top_k)
+            if cached is not None:
+                add_trace(
+                    "cache", "정책 시맨틱 캐시 적중",
+                    input_data={"query": q},
+                    output_data={"cached_query": cached.query, "hit_count": len(cached.data.get("hits", []))},
+                    metadata={"similarity": round(cached.similarity, 4), "saved_ms": cached.latency * 1000},
+                    duration_ms=(time.time() - policy_start) * 1000,
+                )
+                return _Prepared(final=apply_guards({"response": cached.response, "data": cached.data}))
+
         rag_start = time.time()
-        hits = retriever.search_policy(q, top_k=int(state.payload.get("top_k", 5)))
+        rag_timings: Dict[str, float] = {}
+        try:
+            hits = await run_tool(
+                state.prefetch, state.intent, state.sub_intent, state.payload,
+                lambda: retriever.asearch_policy(q, top_k=top_k, timings=rag_timings),
+            )
+        except (RequestTimeoutError, ServiceUnavailableError) as e:
+            # 검색 지연/포화: 사과 응답 (캐시하지 않음)
+            add_trace(
+                "tool", "정책 RAG 검색 실패",
+                input_data={"query": q, "top_k": top_k},
+                output_data={"error": e.error_code},
+                duration_ms=(time.time() - rag_start) * 1000,
+            )
+            return _Prepared(final=apply_guards({
+                "response": "정책 검색이 지연되고 있습니다. 잠시 후 다시 시도해 주세요.",
+                "data": {"query": q, "hits": [], "error": e.error_code},
+            }))
         rag_duration = (time.time() - rag_start) * 1000
         res = {
             "query": q,
@@ -407,74 +394,182 @@ async def run(state: AgentState) -> AgentState:
             "tool", "정책 RAG 검색",
             input_data={"query": q, "top_k": state.payload.get("top_k", 5)},
             output_data={"hit_count": len(hits)},
+            metadata={"mode": retriever.mode, "timings_ms": rag_timings},
             duration_ms=rag_duration
         )
+        index_version = retriever.index_version
+
+    on_answer = None
+    if use_cache and hits:
+        async def on_answer(response_text: str) -> None:
+            await answer_cache.astore(
+                q, index_version, top_k, res, response_text,
+                latency=time.time() - policy_start,
+            )
 
-        if use_llm:
-            try:
-                if generate_routed_response:
-                    llm_response = await generate_routed_response(
-                        context=res,
-                        user_message=q,
-                        intent="policy",
-                    )
-                else:
-                    llm_response = await generate_response(
-                        context=res,
-                        user_message=q,
-                        intent="policy",
-                    )
-                state.final_response = apply_guards({
-                    "response": llm_response,
-                    "data": res,
-                })
-            except Exception as e:
-                logger.warning(f"LLM 응답 생성 실패, 템플릿 응답 사용: {e}")
-                template_response = _format_template_response(res, "policy", state.sub_intent)
-                state.final_response = apply_guards({"response": template_response, "data": res})
-        else:
-            template_response = _format_template_response(res, "policy", state.sub_intent)
-            state.final_response = apply_guards({"response": template_response, "data": res})
+    return _Prepared(data=res, llm_message=q, on_answer=on_answer)
 
-        return state
 
+async def _prepare_recommend(state: AgentState, user_message: str) -> _Prepared:
+    tool_start = time.time()
+    res = await handle_recommendation(state.user_id, state.sub_intent, state.payload)
+    add_trace(
+        "tool", f"추천 도구: {state.sub_intent}",
+        input_data={"user_id": state.user_id, "type": state.sub_intent},
+        output_data={"product_count": len(res.get("products", [])) if isinstance(res, dict) else 0},
+        duration_ms=(time.time() - tool_start) * 1000
+    )
+    return _Prepared(data=res, llm_message=user_message or "상품 추천을 알려주세요.")
+
+
+async def _prepare(state: AgentState, user_message: str) -> _Prepared:
+    """입력 가드와 의도별 도구 실행 (쓰이지 않은 선행 도구 호출은 취소)."""
+    try:
+        return await _prepare_tools(state, user_message)
+    finally:
+        if state.prefetch is not None:
+            state.prefetch.discard("unused")
+            state.prefetch = None
+
+
+async def _prepare_tools(state: AgentState, user_message: str) -> _Prepared:
+    if user_message:
+        blocked = _input_guard(user_message)
+        if blocked is not None:
+            return _Prepared(final=blocked)
+
+    if state.intent == "order":
+        return await _prepare_order(state, user_message)
+    if state.intent == "claim":
+        return await _prepare_claim(state, user_message)
+    if state.intent == "policy":
+        return await _prepare_policy(state)
     if state.intent == "recommend":
-        tool_start = time.time()
-        res = await handle_recommendation(state.user_id, state.sub_intent, state.payload)
-        add_trace(
-            "tool", f"추천 도구: {state.sub_intent}",
-            input_data={"user_id": state.user_id, "type": state.sub_intent},
-            output_data={"product_count": len(res.get("products", [])) if isinstance(res, dict) else 0},
-            duration_ms=(time.time() - tool_start) * 1000
-        )
+        return await _prepare_recommend(state, user_message)
+    return _Prepared(final=apply_guards({"error": f"unknown intent: {state.intent}"}))
 
-        if use_llm:
-            try:
-                if generate_routed_response:
-                    llm_response = await generate_routed_response(
-                        context=res,
-                        user_message=user_message or "상품 추천을 알려주세요.",
-                        intent="recommend",
-                    )
-                else:
-                    llm_response = await generate_response(
-                        context=res,
-                        user_message=user_message or "상품 추천을 알려주세요.",
-                        intent="recommend",
-                    )
-                state.final_response = apply_guards({
-                    "response": llm_response,
-                    "data": res,
-                })
-            except Exception as e:
-                logger.warning(f"LLM 응답 생성 실패, 템플릿 응답 사용: {e}")
-                template_response = _format_template_response(res, "recommend", state.sub_intent)
-                state.final_response = apply_guards({"response": template_response, "data": res})
-        else:
-            template_response = _format_template_response(res, "recommend", state.sub_intent)
-            state.final_response = apply_guards({"response": template_response, "data": res})
 
+def _start_trace(state: AgentState, use_llm: bool) -> None:
+    add_trace(
+        "orchestrator", "시작",
+        input_data={"intent": state.intent, "sub_intent": state.sub_intent, "user_id": state.user_id},
+        metadata={"llm_available": use_llm}
+    )
+
+
+def _trace_llm(intent: str, context: Dict[str, Any], response: str, llm_start: float, streamed: bool = False) -> None:
+    llm_config = get_llm_config()
+    add_trace(
+        "llm", "LLM 스트리밍 응답 생성" if streamed else "LLM 응답 생성",
+        input_data={"intent": intent, "context_size": len(str(context))},
+        output_data={"response_length": len(response)},
+        metadata={"provider": llm_config.provider, "model": llm_config.model},
+        duration_ms=(time.time() - llm_start) * 1000
+    )
+
+
+async def run(state: AgentState) -> AgentState:
+    """의도별 처리 및 응답 생성"""
+    use_llm = _is_llm_available()
+    user_message = state.payload.get("query") or state.payload.get("description", "")
+    _start_trace(state, use_llm)
+
+    prepared = await _prepare(state, user_message)
+    if prepared.final is not None:
+        state.final_response = prepared.final
         return state
 
-    state.final_response = apply_guards({"error": f"unknown intent: {state.intent}"})
+    intent, res = state.intent, prepared.data
+    cacheable = True
+    if use_llm:
+        try:
+            llm_start = time.time()
+            generate = generate_routed_response or generate_response
+            response_text = await generate(context=res, user_message=prepared.llm_message, intent=intent)
+            _trace_llm(intent, res, response_text, llm_start)
+        except Exception as e:
+            logger.warning(f"LLM 응답 생성 실패, 템플릿 응답 사용: {e}")
+            add_trace("llm", "LLM 실패 - 템플릿 폴백", success=False, error=str(e))
+            response_text = _format_template_response(res, intent, state.sub_intent)
+            cacheable = False  # LLM 실패 폴백 응답은 캐시하지 않음
+    else:
+        add_trace("orchestrator", "템플릿 응답 사용", metadata={"reason": "LLM 미사용"})
+        response_text = _format_template_response(res, intent, state.sub_intent)
+
+    state.final_response = apply_guards({"response": response_text, "data": res})
+    if cacheable and prepared.on_answer is not None:
+        await prepared.on_answer(response_text)
     return state
+
+
+async def run_stream(state: AgentState) -> AsyncGenerator[Dict[str, Any], None]:
+    """의도별 처리 후 LLM 토큰을 도착하는 대로 스트리밍.
+
+    입력 가드와 도구 실행은 run()과 같고, 응답 생성만 generate_routed_response_stream
+    (라우터를 쓸 수 없으면 generate_response_stream)으로 토큰 단위로 전달합니다. 출력 가드는 슬라이딩 윈도우로 청크마다 적용합니다.
+
+    Yields:
+        {"type": "token", "content": str}: 가드 적용된 응답 텍스트 조각
+        {"type": "final", "data": dict}: run()의 final_response와 같은 구조화 응답
+            (전체 텍스트 기준 가드 결과 포함, state.final_response에도 저장)
+    """
+    use_llm = _is_llm_available()
+    user_message = state.payload.get("query") or state.payload.get("description", "")
+    _start_trace(state, use_llm)
+
+    prepared = await _prepare(state, user_message)
+    if prepared.final is not None:
+        state.final_response = prepared.final
+        if prepared.final.get("response"):
+            yield {"type": "token", "content": prepared.final["response"]}
+        yield {"type": "final", "data": prepared.final}
+        return
+
+    intent, res = state.intent, prepared.data
+    guard = StreamingOutputGuard()
+    parts: List[str] = []
+    cacheable = True
+
+    def _emit(text: str) -> Optional[Dict[str, Any]]:
+        parts.append(text)
+        safe = guard.feed(text)
+        return {"type": "token", "content": safe} if safe else None
+
+    if use_llm:
+        llm_start = time.time()
+        stream = generate_routed_response_stream or generate_response_stream
+        try:
+            async for chunk in stream(
+                context=res, user_message=prepared.llm_message, intent=intent
+            ):
+                event = _emit(chunk)
+                if event:
+                    yield event
+            _trace_llm(intent, res, "".join(parts), llm_start, streamed=True)
+        except Exception as e:
+            cacheable = False
+            add_trace("llm", "LLM 스트리밍 실패", success=False, error=str(e))
+            if parts:
+                # 이미 일부를 전송했으므로 이어서 안내 문구만 추가
+                logger.warning(f"LLM 스트리밍 중단: {e}")
+                event = _emit("\n\n(응답 생성이 중단되었습니다. 잠시 후 다시 시도해 주세요.)")
+            else:
+                logger.warning(f"LLM 스트리밍 실패, 템플릿 응답 사용: {e}")
+                event = _emit(_format_template_response(res, intent, state.sub_intent))
+            if event:
+                yield event
+    else:
+        add_trace("orchestrator", "템플릿 응답 사용", metadata={"reason": "LLM 미사용"})
+        event = _emit(_format_template_response(res, intent, state.sub_intent))
+        if event:
+            yield event
+
+    tail = guard.flush()
+    if tail:
+        yield {"type": "token", "content": tail}
+
+    response_text = "".join(parts)
+    state.final_response = apply_guards({"response": response_text, "data": res})
+    if cacheable and prepared.on_answer is not None:
+        await prepared.on_answer(response_text)
+    yield {"type": "final", "data": state.final_response}
@@ -8,7 +8,7 @@ from __future__ import annotations
 from typing import Any, Dict, List
 
 from .base import AgentContext, AgentResponse, BaseAgent
-from src.rag.retriever import PolicyRetriever
+from src.rag.index_manager import get_index_manager
 
 
 class PolicySpecialist(BaseAgent):
@@ -18,17 +18,14 @@ class PolicySpecialist(BaseAgent):
     description = "환불, 배송, 교환 정책 등 FAQ 질문을 담당합니다."
     supported_intents = ["policy", "faq", "general"]
 
-    def __init__(self):
-        super().__init__()
-        self.retriever = PolicyRetriever()
-
     async def handle(self, context: AgentContext) -> AgentResponse:
         """정책 질문 처리."""
         query = context.message
 
         try:
-            # RAG 검색
-            hits = self.retriever.search_policy(query, top_k=3)
+            # RAG 검색 (현재 인덱스 버전)
+            with get_index_manager().acquire() as retriever:
+                hits = await retriever.asearch_policy(query, top_k=3)
 
             if not hits:
                 return await self._handle_no_results(context)
@@ -0,0 +1,214 @@
+"""의도 분류 추측 실행 (speculative tool prefetch).
+
+LLM 의도 분류는 LLM 왕복 한 번이 걸리고, 주문 조회나 정책 검색은 그 뒤에야 시작됩니다.
+키워드 분류는 즉시 끝나므로 LLM 분류와 함께 실행해, 결과가 충분히 확실하면 해당 도구를
+먼저 호출해 둡니다.
+
+- LLM 분류 결과의 (의도, 하위 의도, payload)가 같으면 먼저 받은 도구 결과를 사용 (hit)
+- 다르면 선행 호출을 취소하고 버림 (miss)
+- 부작용 없는 조회 도구만 대상: 주문 상태/상세/목록, 정책 검색 (주문 취소, 클레임 접수 제외)
+- LLM 분류가 꺼져 있으면 키워드 결과가 곧 최종 결과이므로 추측하지 않음
+- 메트릭: intent_speculation_total{intent, outcome},
+  intent_speculation_saved_seconds_total{intent}
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple, TypeVar
+
+from src.agents.nodes.intent_classifier import (
+    IntentResult,
+    classify_intent_async,
+    classify_intent_keyword,
+)
+from src.config import get_config
+from src.core.tracer import add_trace
+from src.monitoring.metrics import track_intent_speculation
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+_CONFIDENCE_ORDER = {"low": 0, "medium": 1, "high": 2}
+_READ_ONLY_ORDER = ("status", "detail", "list")
+
+
+def speculation_key(intent: str, sub_intent: Optional[str], payload: Dict[str, Any]) -> Optional[str]:
+    """선행 호출 가능한 도구 호출의 키 (대상이 아니면 None)."""
+    if intent == "order":
+        sub_intent = sub_intent or "list"
+        if sub_intent not in _READ_ONLY_ORDER:
+            return None
+        if sub_intent != "list" and not payload.get("order_id"):
+            return None
+    elif intent == "policy":
+        if not payload.get("query"):
+            return None
+    else:
+        return None
+    return json.dumps([intent, sub_intent, payload], sort_keys=True, ensure_ascii=False, default=str)
+
+
+class Prefetch:
+    """진행 중인 선행 도구 호출."""
+
+    def __init__(self, intent: str, key: str, task: asyncio.Task) -> None:
+        self.intent = intent
+        self.key = key
+        self.task = task
+        self.started = time.perf_counter()
+        self.finished: Optional[float] = None
+        self.outcome: Optional[str] = None
+        task.add_done_callback(self._on_done)
+
+    def _on_done(self, task: asyncio.Task) -> None:
+        self.finished = time.perf_counter()
+        if not task.cancelled():
+            task.exception()  # 버려진 호출의 예외 경고 방지
+
+    def _record(self, outcome: str, saved: float = 0.0) -> None:
+        if self.outcome is not None:
+            return
+        self.outcome = outcome
+        track_intent_speculation(self.intent, outcome, saved)
+        get_speculation_stats().record(outcome, saved)
+
+    def discard(self, outcome: str = "miss") -> None:
+        """선행 호출 취소 (miss: LLM 분류 불일치, unused: 일치했지만 쓰이지 않음)."""
+        if not self.task.done():
+            self.task.cancel()
+        self._record(outcome)
+
+    async def result(self) -> Any:
+        """선행 결과 반환 (도구 예외는 그대로 전파)."""
+        # 도구가 필요해진 시점까지 LLM 분류와 겹쳐 실행된 시간
+        saved = (self.finished or time.perf_counter()) - self.started
+        self._record("hit", saved)
+        add_trace(
+            "speculation", "추측 실행 적중",
+            metadata={"intent": self.intent, "saved_ms": round(saved * 1000, 1), "done": self.task.done()},
+        )
+        return await self.task
+
+
+def start_prefetch(user_id: str, guess: IntentResult) -> Optional[Prefetch]:
+    """키워드 분류 결과가 설정 기준을 넘으면 해당 조회 도구를 백그라운드로 시작."""
+    cfg = get_config().intents.speculation
+    if guess.intent not in cfg.intents:
+        return None
+    if _CONFIDENCE_ORDER.get(guess.confidence, 0) < _CONFIDENCE_ORDER.get(cfg.min_confidence, 1):
+        return None
+    key = speculation_key(guess.intent, guess.sub_intent, guess.payload)
+    if key is None:
+        return None
+
+    payload = dict(guess.payload)
+    if guess.intent == "order":
+        from src.agents.nodes.order_agent import handle_order_query
+
+        call = handle_order_query(user_id, guess.sub_intent or "list", payload)
+    else:
+        call = _search_policy(payload["query"], int(payload.get("top_k", 5)))
+    return Prefetch(guess.intent, key, asyncio.ensure_future(call))
+
+
+async def _search_policy(query: str, top_k: int) -> Any:
+    from src.rag.index_manager import get_index_manager
+
+    with get_index_manager().acquire() as retriever:
+        return await retriever.asearch_policy(query, top_k=top_k)
+
+
+async def classify_with_speculation(message: str, user_id: str) -> Tuple[IntentResult, Optional[Prefetch]]:
+    """LLM 의도 분류와 키워드 분류 기반 선행 도구 호출을 함께 실행.
+
+    Returns:
+        (최종 분류 결과, LLM 분류와 일치한 선행 호출 또는 None)
+    """
+    cfg = get_config().intents
+    if not (cfg.speculation.enabled and cfg.llm_classification.enabled):
+        return await classify_intent_async(message), None
+
+    prefetch = start_prefetch(user_id, classify_intent_keyword(message))
+    if prefetch is None:
+        return await classify_intent_async(message), None
+
+    try:
+        result = await classify_intent_async(message)
+    except BaseException:
+        prefetch.discard()
+        raise
+
+    if speculation_key(result.intent, result.sub_intent, result.payload) == prefetch.key:
+        return result, prefetch
+
+    logger.info(f"[speculation] 키워드 추측({prefetch.intent}) 불일치 → {result.intent}/{result.sub_intent}, 선행 호출 취소")
+    add_trace(
+        "speculation", "추측 실행 취소",
+        input_data={"guess": prefetch.intent},
+        output_data={"intent": result.intent, "sub_intent": result.sub_intent},
+    )
+    prefetch.discard("miss")
+    return result, None
+
+
+async def run_tool(
+    prefetch: Optional[Prefetch],
+    intent: str,
+    sub_intent: Optional[str],
+    payload: Dict[str, Any],
+    call: Callable[[], Awaitable[T]],
+) -> T:
+    """같은 도구 호출이 선행 실행 중이면 그 결과를, 아니면 call()을 실행."""
+    if prefetch is not None:
+        if speculation_key(intent, sub_intent, payload) == prefetch.key:
+            return await prefetch.result()
+        prefetch.discard("unused")
+    return await call()
+
+
+class SpeculationStats:
+    """프로세스 내 추측 실행 누적 통계 (/health용)."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._counts = {"hit": 0, "miss": 0, "unused": 0}
+        self._saved = 0.0
+
+    def record(self, outcome: str, saved: float = 0.0) -> None:
+        with self._lock:
+            self._counts[outcome] = self._counts.get(outcome, 0) + 1
+            self._saved += saved
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            started = sum(self._counts.values())
+            hits = self._counts["hit"]
+            return {
+                "started": started,
+                **self._counts,
+                "hit_rate": round(hits / started, 4) if started else 0.0,
+                "saved_ms_total": round(self._saved * 1000, 1),
+                "avg_saved_ms": round(self._saved * 1000 / hits, 1) if hits else 0.0,
+            }
+
+
+_stats: Optional[SpeculationStats] = None
+
+
+def get_speculation_stats() -> SpeculationStats:
+    global _stats
+    if _stats is None:
+        _stats = SpeculationStats()
+    return _stats
+
+
+def reset_speculation_stats() -> None:
+    """전역 통계 리셋 (테스트용)."""
+    global _stats
+    _stats = None
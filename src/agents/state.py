@@ -1,7 +1,10 @@
 from __future__ import annotations
 
 from dataclasses import dataclass, field
-from typing import Any, Dict, Optional
+from typing import TYPE_CHECKING, Any, Dict, Optional
+
+if TYPE_CHECKING:
+    from .speculation import Prefetch
 
 
 @dataclass
@@ -11,4 +14,6 @@ class AgentState:
     sub_intent: Optional[str] = None
     payload: Dict[str, Any] = field(default_factory=dict)
     final_response: Optional[Dict[str, Any]] = None
+    bypass_cache: bool = False  # 시맨틱 캐시 우회 (요청 단위)
+    prefetch: Optional["Prefetch"] = None  # 의도 분류 중 먼저 시작한 조회 도구 호출
 
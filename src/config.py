@@ -56,6 +56,102 @@ class AppConfig:
     log_level: str = "INFO"
 
 
+@dataclass
+class LLMCacheConfig:
+    """LLM 응답 캐시 설정."""
+
+    enabled: bool = True
+    max_entries: int = 2048
+    default_ttl: float = 0.0  # intent_ttl에 없는 의도의 TTL (초, 0 = 캐시 안 함)
+    intent_ttl: Dict[str, float] = field(default_factory=lambda: {"order": 60.0, "claim": 300.0, "policy": 3600.0})
+    allow_nonzero_temperature: bool = False  # temperature > 0 응답도 캐시
+    # temperature > 0이어도 캐시할 의도 (도구 결과를 템플릿처럼 전달하는 답변)
+    nonzero_temperature_intents: List[str] = field(default_factory=lambda: ["order", "claim", "policy"])
+    sqlite_path: str = ""  # 영속 캐시 DB 경로 (빈 값 = 메모리만)
+
+
+@dataclass
+class LLMPoolConfig:
+    """LLM HTTP 세션 풀 설정."""
+
+    limit: int = 100  # 세션별 전체 연결 수
+    limit_per_host: int = 32  # 호스트별 연결 수
+    keepalive_timeout: float = 60.0  # 유휴 연결 유지 시간 (초)
+    dns_ttl: int = 300  # DNS 캐시 유지 시간 (초)
+    connect_timeout: float = 10.0  # 연결 수립 제한 시간 (초)
+
+
+@dataclass
+class LLMHedgeConfig:
+    """LLM 프로바이더 헤징 설정."""
+
+    enabled: bool = False
+    delay_ms: float = 3000.0  # 고정 헤징 임계값 (첫 바이트 대기 시간)
+    adaptive: bool = True  # 관측 TTFB 백분위를 임계값으로 사용
+    percentile: float = 95.0
+    min_samples: int = 20  # 학습 임계값을 쓰기 위한 최소 샘플 수
+    min_delay_ms: float = 300.0  # 임계값 하한
+    max_parallel: int = 2  # 동시에 진행하는 요청 수
+
+
+@dataclass
+class LLMAdaptiveRoutingConfig:
+    """지연 기반 적응형 LLM 라우팅 설정."""
+
+    enabled: bool = False  # False면 routing.rules 정적 라우팅
+    alpha: float = 0.2  # EWMA 가중치
+    explore: float = 0.05  # 최선이 아닌 프로바이더를 먼저 시도할 확률
+    error_penalty: float = 10.0  # 오류율 1.0당 추가 예상 지연 (초)
+    prior_latency: float = 2.0  # 샘플이 부족한 프로바이더의 예상 지연 (초)
+    min_samples: int = 3
+
+
+@dataclass
+class LLMContextConfig:
+    """LLM 프롬프트 컨텍스트 빌더 설정."""
+
+    enabled: bool = True  # False면 이전 방식(dict repr)으로 렌더링
+    tokenizer: str = "cl100k_base"  # tiktoken 인코딩 (미설치 시 근사)
+    default_budget: int = 800  # budgets에 없는 의도의 컨텍스트 토큰 예산
+    budgets: Dict[str, int] = field(
+        default_factory=lambda: {"order": 600, "claim": 300, "policy": 1200, "recommend": 500}
+    )
+    max_cell_chars: int = 300  # 필드 값 최대 문자 수
+    fields: Dict[str, Dict[str, List[str]]] = field(default_factory=dict)  # 의도별 projection 오버라이드
+
+
+@dataclass
+class LLMUsageConfig:
+    """LLM 토큰 사용량/비용 집계 설정."""
+
+    estimate_missing: bool = True  # usage 미보고 시 토큰 수 근사
+    # 모델별 가격 (USD / 1M 토큰, 정확히 일치하지 않으면 가장 긴 접두사)
+    pricing: Dict[str, Dict[str, float]] = field(
+        default_factory=lambda: {
+            "gpt-4o-mini": {"prompt": 0.15, "completion": 0.60},
+            "gpt-4o": {"prompt": 2.50, "completion": 10.00},
+            "claude-3-haiku": {"prompt": 0.25, "completion": 1.25},
+            "claude-3-5-sonnet": {"prompt": 3.00, "completion": 15.00},
+            "gemini-1.5-flash": {"prompt": 0.075, "completion": 0.30},
+        }
+    )
+
+
+@dataclass
+class LLMAdmissionConfig:
+    """LLM 프로바이더별 동시 요청 제어 설정."""
+
+    enabled: bool = True
+    max_concurrency: int = 16  # 동시 요청 상한의 최댓값
+    min_concurrency: int = 1
+    initial_concurrency: int = 8  # 시작 상한 (AIMD로 조정)
+    max_queue: int = 64  # 대기열 최대 길이
+    queue_timeout: float = 2.0  # 대기 제한 시간 (초)
+    tpm_limit: int = 0  # 분당 토큰 한도 (0이면 무제한)
+    latency_target: float = 10.0  # 초과 시 상한 감소 (초)
+    providers: Dict[str, Dict[str, Any]] = field(default_factory=dict)  # 프로바이더별 오버라이드
+
+
 @dataclass
 class LLMConfig:
     """LLM 설정."""
@@ -68,6 +164,13 @@ class LLMConfig:
     max_tokens: int = 1024
     timeout: int = 30
     api_version: str = "2024-01-01"  # Anthropic용
+    cache: LLMCacheConfig = field(default_factory=LLMCacheConfig)
+    pool: LLMPoolConfig = field(default_factory=LLMPoolConfig)
+    hedge: LLMHedgeConfig = field(default_factory=LLMHedgeConfig)
+    adaptive_routing: LLMAdaptiveRoutingConfig = field(default_factory=LLMAdaptiveRoutingConfig)
+    context: LLMContextConfig = field(default_factory=LLMContextConfig)
+    admission: LLMAdmissionConfig = field(default_factory=LLMAdmissionConfig)
+    usage: LLMUsageConfig = field(default_factory=LLMUsageConfig)
 
 
 @dataclass
@@ -80,6 +183,8 @@ class GuardrailsConfig:
     # 출력 제한
     max_output_length: int = 4000
     min_output_length: int = 1
+    # 스트리밍 출력 가드: 전송을 보류하는 마지막 문자 수 (패턴이 청크 경계에 걸치는 경우 대비)
+    stream_window: int = 64
     # 톤 검증
     min_polite_ratio: float = 0.5
     polite_endings: List[str] = field(default_factory=lambda: ["니다", "세요", "습니다", "십시오", "시죠", "시요"])
@@ -106,6 +211,15 @@ class LLMClassificationConfig:
     max_retries: int = 1
 
 
+@dataclass
+class IntentSpeculationConfig:
+    """키워드 분류 기반 선행 도구 호출 설정."""
+
+    enabled: bool = True
+    min_confidence: str = "medium"  # 키워드 분류 최소 신뢰도 (low/medium/high)
+    intents: List[str] = field(default_factory=lambda: ["order", "policy"])  # 조회성 도구만
+
+
 @dataclass
 class IntentsConfig:
     """의도 분류 설정."""
@@ -117,6 +231,7 @@ class IntentsConfig:
     intents: Dict[str, Dict[str, Any]] = field(default_factory=dict)
     fallback_intent: str = "unknown"
     llm_classification: LLMClassificationConfig = field(default_factory=LLMClassificationConfig)
+    speculation: IntentSpeculationConfig = field(default_factory=IntentSpeculationConfig)
 
 
 @dataclass
@@ -146,6 +261,10 @@ class EmbeddingConfig:
     batch_size: int = 32
     normalize: bool = True
     device: str = "auto"
+    backend: str = "torch"  # torch, onnx
+    onnx_dir: str = "models/onnx/multilingual-e5-small"
+    onnx_quantized: bool = True
+    onnx_threads: int = 0  # 0 = 자동
 
 
 @dataclass
@@ -156,8 +275,47 @@ class RetrievalConfig:
     default_top_k: int = 5
     max_top_k: int = 20
     hybrid_alpha: float = 0.7  # 임베딩 가중치
+    fusion: str = "score"  # score (정규화 점수 가중합), rrf (Reciprocal Rank Fusion)
+    rrf_k: int = 60
     min_score: float = 0.0
     use_reranking: bool = False
+    search_workers: int = 4  # 검색 전용 스레드 수
+    search_queue_size: int = 64  # 대기 가능한 검색 수 (초과 시 503)
+    search_timeout: float = 5.0  # 검색 1회 제한 시간 (초, 0 = 무제한)
+
+
+@dataclass
+class RerankerConfig:
+    """리랭커 설정."""
+
+    model_name: str = "cross-encoder/ms-marco-MiniLM-L-6-v2"
+    backend: str = "torch"  # torch, onnx
+    onnx_dir: str = "models/onnx/ms-marco-MiniLM-L-6-v2"
+    onnx_quantized: bool = True
+    workers: int = 2  # 전용 executor 동시 실행 수
+    cache_size: int = 4096  # (쿼리, 문서) 점수 LRU 크기, 0 = 비활성
+    token_budget: int = 2048  # 후보 텍스트 토큰 상한, 0 = 무제한
+    batch_wait_ms: float = 5.0  # 요청 간 배치 수집 대기 시간
+    max_batch_pairs: int = 64  # 배치당 최대 쌍 수
+
+
+@dataclass
+class AnswerCacheConfig:
+    """정책 답변 시맨틱 캐시 설정."""
+
+    enabled: bool = True
+    similarity_threshold: float = 0.92  # 코사인 유사도
+    max_entries: int = 1000
+    ttl_seconds: float = 3600.0  # 0 이하 = 무제한
+
+
+@dataclass
+class IndexReloadConfig:
+    """인덱스 무중단 재로드 설정."""
+
+    watch: bool = False  # 인덱스 파일 변경 감시 여부
+    poll_interval: float = 5.0  # 감시 주기 (초)
+    validate: bool = True  # 교체 전 새 버전 검증
 
 
 @dataclass
@@ -166,8 +324,26 @@ class RAGIndexConfig:
 
     chunk_size: int = 1000
     chunk_overlap: int = 100
-    vector_index_type: str = "flat"
+    vector_index_type: str = "flat"  # flat, ivf_flat, ivf_pq, hnsw
     ivf_nlist: int = 100
+    ivf_nprobe: int = 16  # IVF 검색 시 탐색할 클러스터 수
+    pq_m: int = 16  # IVF-PQ 서브 양자화기 수
+    pq_nbits: int = 8  # IVF-PQ 서브 양자화기당 비트 수
+    hnsw_m: int = 32  # HNSW 노드당 이웃 수
+    hnsw_ef_construction: int = 200  # HNSW 빌드 탐색 후보 수
+    hnsw_ef_search: int = 64  # HNSW 검색 탐색 후보 수
+    vector_mmap: bool = False  # FAISS 인덱스 memory-map 로드 (IO_FLAG_MMAP)
+    tune_target_recall: float = 0.95  # nprobe/efSearch 자동 튜닝 목표 recall
+    build_batch_size: int = 256  # 스트리밍 빌드 임베딩 배치 크기
+    build_workers: int = 1  # 임베딩 프로세스 수 (1 = 현재 프로세스)
+    build_queue_size: int = 8  # producer 큐 최대 배치 수
+    ivf_train_sample: int = 50000  # IVF 학습 reservoir sample 크기
+    docstore: str = "mmap"  # mmap (memory-map, 프로세스 간 공유), memory
+    dedup_threshold: float = 0.9  # 근접 중복 청크 Jaccard 임계값 (0 = 비활성)
+    dedup_num_perm: int = 128  # MinHash 순열 수
+    dedup_shingle_size: int = 5  # 문자 shingle 길이
+    sharding: bool = False  # doc_type별 샤드 검색
+    shard_workers: int = 4  # 샤드 동시 검색 스레드 수
 
 
 @dataclass
@@ -186,6 +362,9 @@ class RAGConfig:
 
     embedding: EmbeddingConfig = field(default_factory=EmbeddingConfig)
     retrieval: RetrievalConfig = field(default_factory=RetrievalConfig)
+    reranker: RerankerConfig = field(default_factory=RerankerConfig)
+    answer_cache: AnswerCacheConfig = field(default_factory=AnswerCacheConfig)
+    reload: IndexReloadConfig = field(default_factory=IndexReloadConfig)
     index: RAGIndexConfig = field(default_factory=RAGIndexConfig)
     paths: RAGPathsConfig = field(default_factory=RAGPathsConfig)
 
@@ -261,6 +440,15 @@ class Config:
             # API 키는 환경변수 우선
             api_key_env = f"{provider.upper()}_API_KEY"
             api_key = get_env_or_default(api_key_env, provider_cfg.get("api_key", ""))
+            cache_cfg = raw.get("cache", {})
+            pool_cfg = raw.get("pool", {})
+            hedge_cfg = (raw.get("routing", {}) or {}).get("hedge", {}) or {}
+            adaptive_cfg = (raw.get("routing", {}) or {}).get("adaptive", {}) or {}
+            context_cfg = raw.get("context", {})
+            admission_cfg = raw.get("admission", {}) or {}
+            usage_cfg = raw.get("usage", {}) or {}
+            default_cache = LLMCacheConfig()
+            default_context = LLMContextConfig()
 
             self._llm = LLMConfig(
                 provider=provider,
@@ -271,6 +459,64 @@ class Config:
                 max_tokens=provider_cfg.get("max_tokens", 1024),
                 timeout=provider_cfg.get("timeout", 30),
                 api_version=provider_cfg.get("api_version", "2024-01-01"),
+                cache=LLMCacheConfig(
+                    enabled=get_env_or_default("LLM_CACHE", cache_cfg.get("enabled", True)),
+                    max_entries=cache_cfg.get("max_entries", 2048),
+                    default_ttl=cache_cfg.get("default_ttl", 0.0),
+                    intent_ttl=cache_cfg.get("intent_ttl", default_cache.intent_ttl),
+                    allow_nonzero_temperature=cache_cfg.get("allow_nonzero_temperature", False),
+                    nonzero_temperature_intents=cache_cfg.get(
+                        "nonzero_temperature_intents", default_cache.nonzero_temperature_intents
+                    ),
+                    sqlite_path=get_env_or_default("LLM_CACHE_DB", cache_cfg.get("sqlite_path", "")),
+                ),
+                pool=LLMPoolConfig(
+                    limit=pool_cfg.get("limit", 100),
+                    limit_per_host=pool_cfg.get("limit_per_host", 32),
+                    keepalive_timeout=pool_cfg.get("keepalive_timeout", 60.0),
+                    dns_ttl=pool_cfg.get("dns_ttl", 300),
+                    connect_timeout=pool_cfg.get("connect_timeout", 10.0),
+                ),
+                hedge=LLMHedgeConfig(
+                    enabled=get_env_or_default("LLM_HEDGING", hedge_cfg.get("enabled", False)),
+                    delay_ms=hedge_cfg.get("delay_ms", 3000.0),
+                    adaptive=hedge_cfg.get("adaptive", True),
+                    percentile=hedge_cfg.get("percentile", 95.0),
+                    min_samples=hedge_cfg.get("min_samples", 20),
+                    min_delay_ms=hedge_cfg.get("min_delay_ms", 300.0),
+                    max_parallel=hedge_cfg.get("max_parallel", 2),
+                ),
+                adaptive_routing=LLMAdaptiveRoutingConfig(
+                    enabled=get_env_or_default("LLM_ADAPTIVE_ROUTING", adaptive_cfg.get("enabled", False)),
+                    alpha=adaptive_cfg.get("alpha", 0.2),
+                    explore=adaptive_cfg.get("explore", 0.05),
+                    error_penalty=adaptive_cfg.get("error_penalty", 10.0),
+                    prior_latency=adaptive_cfg.get("prior_latency", 2.0),
+                    min_samples=adaptive_cfg.get("min_samples", 3),
+                ),
+                context=LLMContextConfig(
+                    enabled=get_env_or_default("LLM_CONTEXT_COMPACT", context_cfg.get("enabled", True)),
+                    tokenizer=context_cfg.get("tokenizer", "cl100k_base"),
+                    default_budget=context_cfg.get("default_budget", 800),
+                    budgets=context_cfg.get("budgets", default_context.budgets),
+                    max_cell_chars=context_cfg.get("max_cell_chars", 300),
+                    fields=context_cfg.get("fields", {}) or {},
+                ),
+                admission=LLMAdmissionConfig(
+                    enabled=get_env_or_default("LLM_ADMISSION", admission_cfg.get("enabled", True)),
+                    max_concurrency=admission_cfg.get("max_concurrency", 16),
+                    min_concurrency=admission_cfg.get("min_concurrency", 1),
+                    initial_concurrency=admission_cfg.get("initial_concurrency", 8),
+                    max_queue=admission_cfg.get("max_queue", 64),
+                    queue_timeout=admission_cfg.get("queue_timeout", 2.0),
+                    tpm_limit=admission_cfg.get("tpm_limit", 0),
+                    latency_target=admission_cfg.get("latency_target", 10.0),
+                    providers=admission_cfg.get("providers", {}) or {},
+                ),
+                usage=LLMUsageConfig(
+                    estimate_missing=usage_cfg.get("estimate_missing", True),
+                    pricing=usage_cfg.get("pricing", LLMUsageConfig().pricing),
+                ),
             )
         return self._llm
 
@@ -289,6 +535,7 @@ class Config:
                 min_input_length=input_cfg.get("min_length", 1),
                 max_output_length=output_cfg.get("max_length", 4000),
                 min_output_length=output_cfg.get("min_length", 1),
+                stream_window=output_cfg.get("stream_window", 64),
                 min_polite_ratio=tone_cfg.get("min_polite_ratio", 0.5),
                 polite_endings=tone_cfg.get("polite_endings", ["니다", "세요", "습니다"]),
                 strict_mode=policy_cfg.get("strict_mode", False),
@@ -310,6 +557,7 @@ class Config:
             patterns = raw.get("patterns", {})
             fallback = raw.get("fallback", {})
             llm_cfg = raw.get("llm_classification", {})
+            speculation_cfg = raw.get("speculation", {}) or {}
 
             llm_classification = LLMClassificationConfig(
                 enabled=llm_cfg.get("enabled", True),
@@ -326,6 +574,11 @@ class Config:
                 intents=raw.get("intents", {}),
                 fallback_intent=fallback.get("intent", "unknown"),
                 llm_classification=llm_classification,
+                speculation=IntentSpeculationConfig(
+                    enabled=get_env_or_default("INTENT_SPECULATION", speculation_cfg.get("enabled", True)),
+                    min_confidence=speculation_cfg.get("min_confidence", "medium"),
+                    intents=speculation_cfg.get("intents", IntentSpeculationConfig().intents),
+                ),
             )
         return self._intents
 
@@ -363,6 +616,9 @@ class Config:
             raw = self._raw.get("rag", {})
             emb_cfg = raw.get("embedding", {})
             ret_cfg = raw.get("retrieval", {})
+            rerank_cfg = raw.get("reranker", {})
+            cache_cfg = raw.get("answer_cache", {})
+            reload_cfg = raw.get("reload", {})
             idx_cfg = raw.get("index", {})
             paths_cfg = raw.get("paths", {})
 
@@ -371,6 +627,10 @@ class Config:
                 batch_size=emb_cfg.get("batch_size", 32),
                 normalize=emb_cfg.get("normalize", True),
                 device=emb_cfg.get("device", "auto"),
+                backend=get_env_or_default("EMBEDDING_BACKEND", emb_cfg.get("backend", "torch")),
+                onnx_dir=emb_cfg.get("onnx_dir", "models/onnx/multilingual-e5-small"),
+                onnx_quantized=emb_cfg.get("onnx_quantized", True),
+                onnx_threads=get_env_or_default("ONNX_NUM_THREADS", emb_cfg.get("onnx_threads", 0)),
             )
 
             retrieval = RetrievalConfig(
@@ -378,8 +638,41 @@ class Config:
                 default_top_k=ret_cfg.get("default_top_k", 5),
                 max_top_k=ret_cfg.get("max_top_k", 20),
                 hybrid_alpha=ret_cfg.get("hybrid_alpha", 0.7),
+                fusion=ret_cfg.get("fusion", "score"),
+                rrf_k=ret_cfg.get("rrf_k", 60),
                 min_score=ret_cfg.get("min_score", 0.0),
                 use_reranking=ret_cfg.get("use_reranking", False),
+                search_workers=get_env_or_default("RETRIEVAL_WORKERS", ret_cfg.get("search_workers", 4)),
+                search_queue_size=ret_cfg.get("search_queue_size", 64),
+                search_timeout=ret_cfg.get("search_timeout", 5.0),
+            )
+
+            reranker = RerankerConfig(
+                model_name=rerank_cfg.get(
+                    "model_name",
+                    ret_cfg.get("reranker_model", "cross-encoder/ms-marco-MiniLM-L-6-v2"),
+                ),
+                backend=rerank_cfg.get("backend", "torch"),
+                onnx_dir=rerank_cfg.get("onnx_dir", "models/onnx/ms-marco-MiniLM-L-6-v2"),
+                onnx_quantized=rerank_cfg.get("onnx_quantized", True),
+                workers=get_env_or_default("RERANKER_WORKERS", rerank_cfg.get("workers", 2)),
+                cache_size=rerank_cfg.get("cache_size", 4096),
+                token_budget=rerank_cfg.get("token_budget", 2048),
+                batch_wait_ms=rerank_cfg.get("batch_wait_ms", 5.0),
+                max_batch_pairs=rerank_cfg.get("max_batch_pairs", 64),
+            )
+
+            answer_cache = AnswerCacheConfig(
+                enabled=get_env_or_default("ANSWER_CACHE_ENABLED", cache_cfg.get("enabled", True)),
+                similarity_threshold=cache_cfg.get("similarity_threshold", 0.92),
+                max_entries=cache_cfg.get("max_entries", 1000),
+                ttl_seconds=cache_cfg.get("ttl_seconds", 3600.0),
+            )
+
+            reload = IndexReloadConfig(
+                watch=get_env_or_default("INDEX_WATCH", reload_cfg.get("watch", False)),
+                poll_interval=reload_cfg.get("poll_interval", 5.0),
+                validate=reload_cfg.get("validate", True),
             )
 
             index = RAGIndexConfig(
@@ -387,6 +680,24 @@ class Config:
                 chunk_overlap=idx_cfg.get("chunk_overlap", 100),
                 vector_index_type=idx_cfg.get("vector_index_type", "flat"),
                 ivf_nlist=idx_cfg.get("ivf_nlist", 100),
+                ivf_nprobe=idx_cfg.get("ivf_nprobe", 16),
+                pq_m=idx_cfg.get("pq_m", 16),
+                pq_nbits=idx_cfg.get("pq_nbits", 8),
+                hnsw_m=idx_cfg.get("hnsw_m", 32),
+                hnsw_ef_construction=idx_cfg.get("hnsw_ef_construction", 200),
+                hnsw_ef_search=idx_cfg.get("hnsw_ef_search", 64),
+                vector_mmap=get_env_or_default("RAG_VECTOR_MMAP", idx_cfg.get("vector_mmap", False)),
+                tune_target_recall=idx_cfg.get("tune_target_recall", 0.95),
+                build_batch_size=idx_cfg.get("build_batch_size", 256),
+                build_workers=get_env_or_default("INDEX_BUILD_WORKERS", idx_cfg.get("build_workers", 1)),
+                build_queue_size=idx_cfg.get("build_queue_size", 8),
+                ivf_train_sample=idx_cfg.get("ivf_train_sample", 50000),
+                docstore=get_env_or_default("RAG_DOCSTORE", idx_cfg.get("docstore", "mmap")),
+                dedup_threshold=idx_cfg.get("dedup_threshold", 0.9),
+                dedup_num_perm=idx_cfg.get("dedup_num_perm", 128),
+                dedup_shingle_size=idx_cfg.get("dedup_shingle_size", 5),
+                sharding=get_env_or_default("RAG_SHARDING", idx_cfg.get("sharding", False)),
+                shard_workers=idx_cfg.get("shard_workers", 4),
             )
 
             paths = RAGPathsConfig(
@@ -399,6 +710,9 @@ class Config:
             self._rag = RAGConfig(
                 embedding=embedding,
                 retrieval=retrieval,
+                reranker=reranker,
+                answer_cache=answer_cache,
+                reload=reload,
                 index=index,
                 paths=paths,
             )
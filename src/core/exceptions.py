@@ -103,3 +103,11 @@ class ServiceUnavailableError(AppError):
     status_code = 503
     error_code = "SERVICE_UNAVAILABLE"
     message = "서비스를 일시적으로 사용할 수 없습니다"
+
+
+class RequestTimeoutError(AppError):
+    """처리 시간 초과 예외."""
+
+    status_code = 504
+    error_code = "TIMEOUT"
+    message = "요청 처리 시간이 초과되었습니다"
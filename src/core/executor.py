@@ -0,0 +1,130 @@
+"""비동기 핸들러용 제한 스레드 풀.
+
+CPU를 쓰는 동기 작업(검색 점수 계산, FAISS 조회 등)을 이벤트 루프 밖의 전용
+스레드에서 실행합니다. 대기열이 가득 차면 즉시 ServiceUnavailableError(503)로
+거부하고, 호출별 제한 시간을 넘기면 RequestTimeoutError(504)를 발생시킵니다.
+
+시간 초과 시 호출자는 바로 반환되지만 이미 실행 중인 스레드 작업은 끝까지 진행됩니다.
+아직 시작 전인 작업은 취소되어 스레드를 차지하지 않습니다.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, TypeVar
+
+from src.core.exceptions import RequestTimeoutError, ServiceUnavailableError
+
+T = TypeVar("T")
+
+# (대기 수, 실행 수) 변경 시 호출되는 콜백 (메트릭 기록용)
+ChangeCallback = Callable[[int, int], None]
+
+
+class BoundedExecutor:
+    """대기열 길이가 제한된 ThreadPoolExecutor 래퍼."""
+
+    def __init__(
+        self,
+        max_workers: int = 4,
+        max_queue: int = 64,
+        name: str = "bounded",
+        on_change: Optional[ChangeCallback] = None,
+    ) -> None:
+        """executor 초기화.
+
+        Args:
+            max_workers: 스레드 수
+            max_queue: 스레드를 기다릴 수 있는 작업 수 (초과 시 거부)
+            name: 스레드 이름 접두사
+            on_change: (대기 수, 실행 수) 변경 콜백
+        """
+        self.max_workers = max(1, int(max_workers))
+        self.max_queue = max(0, int(max_queue))
+        self.name = name
+        self._on_change = on_change
+        self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix=name)
+        self._lock = threading.Lock()
+        self._pending = 0  # 제출됐지만 끝나지 않은 작업 (대기 + 실행)
+        self._running = 0
+        self._completed = 0
+        self._timeouts = 0
+        self._rejected = 0
+
+    @property
+    def capacity(self) -> int:
+        return self.max_workers + self.max_queue
+
+    def _notify(self) -> None:
+        if self._on_change is not None:
+            self._on_change(self._pending - self._running, self._running)
+
+    def _release(self, _future: Any) -> None:
+        with self._lock:
+            self._pending -= 1
+            self._completed += 1
+        self._notify()
+
+    async def run(self, fn: Callable[..., T], *args: Any, timeout: Optional[float] = None) -> T:
+        """fn(*args)를 전용 스레드에서 실행하고 결과를 기다림.
+
+        Args:
+            fn: 실행할 동기 함수
+            timeout: 제한 시간 (초, None/0이면 무제한)
+
+        Raises:
+            ServiceUnavailableError: 대기열이 가득 찬 경우
+            RequestTimeoutError: 제한 시간을 넘긴 경우
+        """
+        with self._lock:
+            if self._pending >= self.capacity:
+                self._rejected += 1
+                raise ServiceUnavailableError(
+                    "요청이 많아 잠시 후 다시 시도해 주세요",
+                    details={"executor": self.name, "pending": self._pending},
+                )
+            self._pending += 1
+
+        def _call() -> T:
+            with self._lock:
+                self._running += 1
+            self._notify()
+            try:
+                return fn(*args)
+            finally:
+                with self._lock:
+                    self._running -= 1
+
+        cf = self._pool.submit(_call)
+        # 시작 전 취소된 작업도 done 콜백은 호출되므로 pending이 항상 정리됨
+        cf.add_done_callback(self._release)
+        self._notify()
+
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(cf), timeout or None)
+        except asyncio.TimeoutError:
+            cf.cancel()
+            with self._lock:
+                self._timeouts += 1
+            raise RequestTimeoutError(
+                details={"executor": self.name, "timeout": timeout},
+            ) from None
+
+    def stats(self) -> Dict[str, Any]:
+        """현재 상태."""
+        with self._lock:
+            return {
+                "workers": self.max_workers,
+                "max_queue": self.max_queue,
+                "queued": self._pending - self._running,
+                "running": self._running,
+                "completed": self._completed,
+                "timeouts": self._timeouts,
+                "rejected": self._rejected,
+            }
+
+    def shutdown(self, wait: bool = False) -> None:
+        """스레드 풀 종료."""
+        self._pool.shutdown(wait=wait)
@@ -0,0 +1,159 @@
+"""동일 요청 병합 (single-flight).
+
+장애 공지 직후처럼 여러 사용자가 같은 질문을 동시에 보내면 같은 시스템
+프롬프트/컨텍스트로 같은 LLM 호출과 검색이 중복 실행됩니다. 같은 키의 호출이
+진행 중이면 새로 실행하지 않고 진행 중인 결과를 함께 기다립니다.
+
+- 결과와 예외는 기다리는 모든 호출자에게 그대로 전달됩니다
+- 비동기: 작업은 별도 태스크에서 실행되므로 한 호출자가 취소돼도 나머지는 영향받지
+  않으며, 기다리는 호출자가 모두 취소되면 작업도 취소됩니다
+- 동기: 먼저 들어온 스레드가 실행하고 나머지 스레드는 완료를 기다립니다
+- 완료 즉시 키를 제거하므로 결과를 캐시하지 않습니다 (캐시는 src.llm.cache 참조)
+- 작업은 리더의 contextvars 안에서 실행되므로, 호출자별 상태(첫 바이트 이벤트, 사용량 미터 등)는
+  리더가 shared로 넘긴 객체에 나머지 호출자가 join(shared)로 합류해 전달받습니다
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import threading
+from typing import Any, Awaitable, Callable, Dict, Optional, TypeVar
+
+from src.monitoring.metrics import track_singleflight
+
+T = TypeVar("T")
+
+
+def make_key(*parts: Any) -> str:
+    """호출 인자로 병합 키 생성 (JSON 직렬화 후 SHA-256)."""
+    payload = json.dumps(parts, ensure_ascii=False, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class _AsyncCall:
+    def __init__(self, task: asyncio.Task, shared: Any = None) -> None:
+        self.task = task
+        self.loop = task.get_loop()
+        self.shared = shared
+        self.waiters = 0
+
+
+class _SyncCall:
+    def __init__(self) -> None:
+        self.event = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """키별 진행 중 호출 병합기."""
+
+    def __init__(self, name: str) -> None:
+        """병합기 초기화.
+
+        Args:
+            name: 작업 이름 (메트릭 라벨)
+        """
+        self.name = name
+        self._lock = threading.Lock()
+        self._calls: Dict[str, _AsyncCall] = {}
+        self._sync_calls: Dict[str, _SyncCall] = {}
+        self._leaders = 0
+        self._shared = 0
+
+    def _record(self, shared: bool) -> None:
+        with self._lock:
+            if shared:
+                self._shared += 1
+            else:
+                self._leaders += 1
+        track_singleflight(self.name, "shared" if shared else "leader")
+
+    def _forget(self, key: str, call: Any, calls: Dict[str, Any]) -> None:
+        with self._lock:
+            if calls.get(key) is call:
+                del calls[key]
+
+    async def do(
+        self,
+        key: str,
+        fn: Callable[[], Awaitable[T]],
+        shared: Any = None,
+        join: Optional[Callable[[Any], None]] = None,
+    ) -> T:
+        """같은 key의 호출이 진행 중이면 그 결과를, 아니면 fn()을 실행해 반환.
+
+        Args:
+            key: 병합 키
+            fn: 리더가 실행할 작업
+            shared: 리더가 실행할 때 작업과 함께 보관할 호출 단위 상태
+            join: 진행 중인 호출에 합류할 때 리더의 shared로 호출되는 콜백
+        """
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            call = self._calls.get(key)
+            # 다른 이벤트 루프의 태스크는 기다릴 수 없으므로 새로 실행
+            shared_call = call is not None and call.loop is loop and not call.task.done()
+            if shared_call:
+                if join is not None:
+                    join(call.shared)
+            else:
+                call = _AsyncCall(loop.create_task(fn()), shared)
+                self._calls[key] = call
+                call.task.add_done_callback(self._on_done(key, call))
+            call.waiters += 1
+        self._record(shared_call)
+
+        try:
+            return await asyncio.shield(call.task)
+        finally:
+            with self._lock:
+                call.waiters -= 1
+                abandoned = call.waiters == 0 and not call.task.done()
+            if abandoned:
+                # 기다리는 호출자가 없으면 작업 취소 (이후 호출은 새로 실행)
+                self._forget(key, call, self._calls)
+                call.task.cancel()
+
+    def _on_done(self, key: str, call: _AsyncCall) -> Callable[[asyncio.Task], None]:
+        def _done(task: asyncio.Task) -> None:
+            self._forget(key, call, self._calls)
+            if not task.cancelled():
+                task.exception()  # 기다리는 호출자가 없을 때 "never retrieved" 경고 방지
+        return _done
+
+    def do_sync(self, key: str, fn: Callable[[], T]) -> T:
+        """동기 버전 (스레드 간 병합)."""
+        with self._lock:
+            call = self._sync_calls.get(key)
+            shared = call is not None
+            if not shared:
+                call = self._sync_calls[key] = _SyncCall()
+        self._record(shared)
+
+        if shared:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            self._forget(key, call, self._sync_calls)
+            call.event.set()
+
+    def stats(self) -> Dict[str, Any]:
+        """실행/병합 횟수와 진행 중 키 수."""
+        with self._lock:
+            return {
+                "leaders": self._leaders,
+                "shared": self._shared,
+                "in_flight": len(self._calls) + len(self._sync_calls),
+            }
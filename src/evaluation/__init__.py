@@ -7,6 +7,14 @@ from .scenarios import TestScenario, load_scenarios
 from .evaluator import LLMEvaluator, RuleBasedEvaluator, EvaluationResult
 from .benchmark import BenchmarkRunner, BenchmarkResult
 from .runner import run_evaluation
+from .retrieval_benchmark import (
+    RetrievalBenchmark,
+    RetrievalQuery,
+    RetrievalSetting,
+    diff_reports,
+    load_retrieval_queries,
+    sweep,
+)
 
 __all__ = [
     "TestScenario",
@@ -17,4 +25,10 @@ __all__ = [
     "BenchmarkRunner",
     "BenchmarkResult",
     "run_evaluation",
+    "RetrievalBenchmark",
+    "RetrievalQuery",
+    "RetrievalSetting",
+    "diff_reports",
+    "load_retrieval_queries",
+    "sweep",
 ]
@@ -0,0 +1,449 @@
+"""검색(PolicyRetriever) 벤치마크.
+
+라벨링된 쿼리 셋(data/benchmark/retrieval_queries.jsonl)으로 검색 설정 조합
+(mode, hybrid_alpha, top_k, 리랭킹, 벡터 인덱스 타입)을 스윕하며 다음을 측정합니다.
+
+- 품질: recall@k, hit@k, MRR
+- 지연: 단일 클라이언트 p50/p95/p99
+- 처리량: N개 동시 클라이언트 QPS
+- 메모리: 리트리버 로드 전후 RSS
+
+정답 라벨은 청크 ID가 아니라 조건(answer_terms, doc_types)으로 지정하므로
+인덱스를 다시 빌드해도 같은 쿼리 셋을 쓸 수 있습니다. 보고서는 JSON이며
+diff_reports()로 버전 간 회귀를 비교합니다.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import platform
+import subprocess
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from itertools import product
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Set
+
+import numpy as np
+
+from src.config import get_config
+from src.rag.retriever import PolicyRetriever
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_QUERIES_PATH = Path("data/benchmark/retrieval_queries.jsonl")
+REPORT_VERSION = 1
+
+
+@dataclass
+class RetrievalQuery:
+    """라벨링된 검색 쿼리.
+
+    relevant_ids가 있으면 그 청크만 정답이고, 없으면 doc_types와
+    answer_terms(모두 포함)를 만족하는 청크가 정답입니다.
+    """
+
+    id: str
+    query: str
+    relevant_ids: List[str] = field(default_factory=list)
+    doc_types: List[str] = field(default_factory=list)
+    answer_terms: List[str] = field(default_factory=list)
+    category: str = ""
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "RetrievalQuery":
+        return cls(
+            id=data["id"],
+            query=data["query"],
+            relevant_ids=list(data.get("relevant_ids", [])),
+            doc_types=list(data.get("doc_types", [])),
+            answer_terms=list(data.get("answer_terms", [])),
+            category=data.get("category", ""),
+        )
+
+    def is_relevant(self, doc_id: str, text: str, metadata: Dict[str, Any]) -> bool:
+        """청크가 이 쿼리의 정답인지 여부."""
+        if self.relevant_ids:
+            return doc_id in self.relevant_ids
+        if not (self.doc_types or self.answer_terms):
+            return False
+        if self.doc_types and (metadata or {}).get("doc_type") not in self.doc_types:
+            return False
+        return all(term in text for term in self.answer_terms)
+
+
+def load_retrieval_queries(path: Optional[Path] = None) -> List[RetrievalQuery]:
+    """라벨링된 쿼리 셋 로드 (JSONL)."""
+    path = Path(path or DEFAULT_QUERIES_PATH)
+    queries: List[RetrievalQuery] = []
+    with path.open("r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                queries.append(RetrievalQuery.from_dict(json.loads(line)))
+    return queries
+
+
+@dataclass(frozen=True)
+class RetrievalSetting:
+    """스윕할 검색 설정 한 조합."""
+
+    mode: str = "hybrid"
+    hybrid_alpha: float = 0.7
+    top_k: int = 5
+    rerank: bool = False
+    index_type: str = "flat"
+
+    @property
+    def label(self) -> str:
+        parts = [self.mode]
+        if self.mode == "hybrid":
+            parts.append(f"a{self.hybrid_alpha}")
+        if self.mode != "keyword":
+            parts.append(self.index_type)
+        parts.append(f"k{self.top_k}")
+        if self.rerank:
+            parts.append("rerank")
+        return "-".join(parts)
+
+
+def sweep(
+    modes: Sequence[str] = ("keyword", "embedding", "hybrid"),
+    alphas: Sequence[float] = (0.7,),
+    top_ks: Sequence[int] = (5,),
+    rerank: Sequence[bool] = (False,),
+    index_types: Sequence[str] = ("flat",),
+) -> List[RetrievalSetting]:
+    """설정 조합 생성 (의미 없는 조합은 제외).
+
+    hybrid_alpha는 hybrid에서만, index_type은 벡터를 쓰는 모드에서만 바뀝니다.
+    """
+    settings: List[RetrievalSetting] = []
+    for mode, alpha, k, rr, itype in product(modes, alphas, top_ks, rerank, index_types):
+        setting = RetrievalSetting(
+            mode=mode,
+            hybrid_alpha=alpha if mode == "hybrid" else alphas[0],
+            top_k=k,
+            rerank=rr,
+            index_type=itype if mode != "keyword" else index_types[0],
+        )
+        if setting not in settings:
+            settings.append(setting)
+    return settings
+
+
+@dataclass
+class RetrievalBenchResult:
+    """설정 한 조합의 측정 결과."""
+
+    setting: RetrievalSetting
+    effective_mode: str = ""
+    queries: int = 0
+    labeled_queries: int = 0
+
+    recall_at_k: float = 0.0
+    hit_at_k: float = 0.0
+    mrr: float = 0.0
+
+    mean_ms: float = 0.0
+    p50_ms: float = 0.0
+    p95_ms: float = 0.0
+    p99_ms: float = 0.0
+
+    clients: int = 1
+    qps: float = 0.0
+
+    load_ms: float = 0.0
+    index_memory_mb: float = 0.0
+    rss_mb: float = 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = asdict(self)
+        data["setting"] = asdict(self.setting)
+        data["label"] = self.setting.label
+        return {k: round(v, 4) if isinstance(v, float) else v for k, v in data.items()}
+
+
+def percentile(values: Sequence[float], percent: float) -> float:
+    """백분위수 (선형 보간)."""
+    if not values:
+        return 0.0
+    return float(np.percentile(np.asarray(values, dtype=np.float64), percent))
+
+
+def rss_mb() -> float:
+    """현재 프로세스 RSS (MB)."""
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss / (1024 * 1024)
+    except ImportError:
+        pass
+    try:
+        with open("/proc/self/statm", "r") as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError, AttributeError):
+        import resource
+        # 최대 RSS (Linux: KB)
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, timeout=5
+        )
+        return out.stdout.strip() or None
+    except Exception:
+        return None
+
+
+class RetrievalBenchmark:
+    """검색 벤치마크 실행기."""
+
+    def __init__(
+        self,
+        queries: List[RetrievalQuery],
+        index_path: Optional[Path] = None,
+        vector_path: Optional[Path] = None,
+        clients: int = 4,
+        rounds: int = 3,
+        warmup: int = 3,
+    ) -> None:
+        """초기화.
+
+        Args:
+            queries: 라벨링된 쿼리 목록
+            index_path: 텍스트 인덱스 경로 (기본: 설정값)
+            vector_path: 설정된 인덱스 타입의 벡터 인덱스 경로 (기본: 설정값)
+            clients: 처리량 측정 동시 클라이언트 수
+            rounds: 처리량 측정 시 클라이언트별 쿼리 셋 반복 횟수
+            warmup: 측정 전 워밍업 쿼리 수
+        """
+        cfg = get_config().rag
+        self.queries = queries
+        self.index_path = Path(index_path or cfg.paths.policies_index)
+        self.vector_path = Path(vector_path or cfg.paths.vector_index)
+        self.default_index_type = cfg.index.vector_index_type
+        self.clients = max(1, clients)
+        self.rounds = max(1, rounds)
+        self.warmup = warmup
+        self._vector_paths: Dict[str, Path] = {self.default_index_type: self.vector_path}
+        self._tmpdir: Optional[tempfile.TemporaryDirectory] = None
+        self._relevant: Optional[Dict[str, Set[str]]] = None
+
+    def _vector_path_for(self, index_type: str) -> Path:
+        """인덱스 타입별 벡터 인덱스 (설정과 다르면 임시 디렉토리에 빌드)."""
+        if index_type in self._vector_paths:
+            return self._vector_paths[index_type]
+
+        from src.rag.build_pipeline import build_vector_index_streaming
+
+        cfg = get_config().rag
+        if self._tmpdir is None:
+            self._tmpdir = tempfile.TemporaryDirectory(prefix="retrieval-bench-")
+        out_dir = Path(self._tmpdir.name)
+        path = out_dir / f"vectors_{index_type}.faiss"
+        build_vector_index_streaming(
+            index_jsonl=self.index_path,
+            vector_path=path,
+            embeddings_path=out_dir / f"embeddings_{index_type}.npy",
+            index_type=index_type,
+            nlist=cfg.index.ivf_nlist,
+            pq_m=cfg.index.pq_m,
+            pq_nbits=cfg.index.pq_nbits,
+            hnsw_m=cfg.index.hnsw_m,
+            hnsw_ef_construction=cfg.index.hnsw_ef_construction,
+            batch_size=cfg.index.build_batch_size,
+            train_sample=cfg.index.ivf_train_sample,
+            progress=None,
+        )
+        self._vector_paths[index_type] = path
+        return path
+
+    def _make_retriever(self, setting: RetrievalSetting) -> PolicyRetriever:
+        vector_path = self.vector_path if setting.mode == "keyword" else self._vector_path_for(setting.index_type)
+        retriever = PolicyRetriever(index_path=self.index_path, vector_path=vector_path, mode=setting.mode)
+        retriever.hybrid_alpha = setting.hybrid_alpha
+        retriever.use_reranking = setting.rerank
+        return retriever
+
+    def _relevant_sets(self, retriever: PolicyRetriever) -> Dict[str, Set[str]]:
+        """코퍼스를 한 번 훑어 쿼리별 정답 청크 ID 집합 계산."""
+        if self._relevant is None:
+            relevant: Dict[str, Set[str]] = {q.id: set() for q in self.queries}
+            for doc_id, text, meta in retriever._docs:
+                for q in self.queries:
+                    if q.is_relevant(doc_id, text, meta):
+                        relevant[q.id].add(doc_id)
+            self._relevant = relevant
+        return self._relevant
+
+    def run_setting(self, setting: RetrievalSetting) -> RetrievalBenchResult:
+        """설정 한 조합 측정."""
+        result = RetrievalBenchResult(setting=setting, clients=self.clients, queries=len(self.queries))
+
+        rss_before = rss_mb()
+        load_start = time.perf_counter()
+        retriever = self._make_retriever(setting)
+        result.load_ms = (time.perf_counter() - load_start) * 1000
+        result.index_memory_mb = max(0.0, rss_mb() - rss_before)
+        result.effective_mode = retriever.mode
+
+        relevant = self._relevant_sets(retriever)
+        k = setting.top_k
+
+        def search(query: str) -> List[Any]:
+            # 동시 클라이언트가 같은 쿼리를 같은 순서로 보내므로 요청 병합(single-flight)을 거치지 않음
+            return retriever._search_policy(query, k, None) if retriever._docs else []
+
+        for q in self.queries[: self.warmup]:
+            search(q.query)
+
+        # 품질 + 단일 클라이언트 지연
+        latencies: List[float] = []
+        recalls: List[float] = []
+        hits_at_k: List[float] = []
+        reciprocal_ranks: List[float] = []
+        for q in self.queries:
+            start = time.perf_counter()
+            hits = search(q.query)
+            latencies.append((time.perf_counter() - start) * 1000)
+
+            rel = relevant.get(q.id) or set()
+            if not rel:
+                continue
+            ranked = [h.id for h in hits[:k]]
+            found = [i for i, doc_id in enumerate(ranked) if doc_id in rel]
+            recalls.append(len(found) / min(len(rel), k))
+            hits_at_k.append(1.0 if found else 0.0)
+            reciprocal_ranks.append(1.0 / (found[0] + 1) if found else 0.0)
+
+        result.labeled_queries = len(recalls)
+        if recalls:
+            result.recall_at_k = float(np.mean(recalls))
+            result.hit_at_k = float(np.mean(hits_at_k))
+            result.mrr = float(np.mean(reciprocal_ranks))
+        if latencies:
+            result.mean_ms = float(np.mean(latencies))
+            result.p50_ms = percentile(latencies, 50)
+            result.p95_ms = percentile(latencies, 95)
+            result.p99_ms = percentile(latencies, 99)
+
+        # 동시 클라이언트 처리량
+        def _client() -> int:
+            n = 0
+            for _ in range(self.rounds):
+                for q in self.queries:
+                    search(q.query)
+                    n += 1
+            return n
+
+        wall_start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.clients) as pool:
+            total = sum(pool.map(lambda _: _client(), range(self.clients)))
+        wall = time.perf_counter() - wall_start
+        result.qps = total / wall if wall > 0 else 0.0
+        result.rss_mb = rss_mb()
+
+        logger.info(
+            f"[{setting.label}] recall@{k}={result.recall_at_k:.3f} mrr={result.mrr:.3f} "
+            f"p95={result.p95_ms:.1f}ms qps={result.qps:.1f}"
+        )
+        return result
+
+    def run(self, settings: Iterable[RetrievalSetting]) -> Dict[str, Any]:
+        """설정 목록을 측정하고 JSON 보고서(dict) 반환."""
+        results: List[RetrievalBenchResult] = []
+        try:
+            for setting in settings:
+                try:
+                    results.append(self.run_setting(setting))
+                except Exception as e:
+                    logger.error(f"[{setting.label}] 측정 실패: {e}")
+        finally:
+            if self._tmpdir is not None:
+                self._tmpdir.cleanup()
+                self._tmpdir = None
+
+        corpus_size = 0
+        if self.index_path.exists():
+            from src.rag.docstore import JsonlDocStore
+            corpus_size = JsonlDocStore(self.index_path).count_live()
+
+        return {
+            "report_version": REPORT_VERSION,
+            "meta": {
+                "timestamp": datetime.now().isoformat(timespec="seconds"),
+                "git_commit": _git_commit(),
+                "app_version": get_config().app.version,
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "cpu_count": os.cpu_count(),
+                "index_path": str(self.index_path),
+                "corpus_chunks": corpus_size,
+                "queries": len(self.queries),
+                "clients": self.clients,
+                "rounds": self.rounds,
+                "singleflight": False,  # 검색 요청 병합 없이 측정 (병합 시 QPS가 부풀려짐)
+            },
+            "results": [r.to_dict() for r in results],
+        }
+
+
+# 회귀 비교 대상 지표와 방향 (+1: 클수록 좋음, -1: 작을수록 좋음)
+DIFF_METRICS = {
+    "recall_at_k": 1,
+    "hit_at_k": 1,
+    "mrr": 1,
+    "p50_ms": -1,
+    "p95_ms": -1,
+    "p99_ms": -1,
+    "qps": 1,
+    "index_memory_mb": -1,
+}
+
+
+def diff_reports(
+    old: Dict[str, Any],
+    new: Dict[str, Any],
+    tolerance: float = 0.05,
+) -> List[Dict[str, Any]]:
+    """두 보고서를 설정(label)별로 비교.
+
+    Args:
+        old: 기준 보고서
+        new: 새 보고서
+        tolerance: 회귀로 볼 상대 변화량 (품질 지표는 절대 변화량)
+
+    Returns:
+        [{"label", "metric", "old", "new", "change", "regression"}] 목록
+    """
+    old_by_label = {r["label"]: r for r in old.get("results", [])}
+    rows: List[Dict[str, Any]] = []
+    for r in new.get("results", []):
+        base = old_by_label.get(r["label"])
+        if base is None:
+            continue
+        for metric, direction in DIFF_METRICS.items():
+            a, b = base.get(metric), r.get(metric)
+            if a is None or b is None:
+                continue
+            if metric in ("recall_at_k", "hit_at_k", "mrr"):
+                change = b - a
+            else:
+                change = (b - a) / a if a else 0.0
+            rows.append({
+                "label": r["label"],
+                "metric": metric,
+                "old": a,
+                "new": b,
+                "change": round(change, 4),
+                "regression": change * direction < -tolerance,
+            })
+    return rows
@@ -15,6 +15,7 @@ from .input_guards import (
 )
 from .output_guards import (
     OutputGuardResult,
+    StreamingOutputGuard,
     apply_output_guards,
     format_safe_response,
 )
@@ -39,6 +40,7 @@ __all__ = [
     "mask_pii_in_response",
     # Output guards
     "OutputGuardResult",
+    "StreamingOutputGuard",
     "apply_output_guards",
     "format_safe_response",
     # Pipeline
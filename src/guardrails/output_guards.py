@@ -277,6 +277,68 @@ def apply_output_guards(
     )
 
 
+class StreamingOutputGuard:
+    """스트리밍 응답용 출력 가드 (슬라이딩 윈도우).
+
+    청크를 받을 때마다 보류 중인 원문과 합쳐 PII/민감 정보 마스킹을 적용하고,
+    마지막 window자 앞의 공백까지만 내보냅니다. 공백 없는 패턴은 청크 경계에
+    걸쳐도 마스킹된 뒤 전송됩니다. 전체 텍스트 검증(길이, 톤, 사실)은
+    스트림이 끝난 뒤 apply_output_guards로 수행합니다.
+    """
+
+    def __init__(self, window: Optional[int] = None) -> None:
+        """가드 초기화.
+
+        Args:
+            window: 보류할 마지막 문자 수 (기본: guardrails.output.stream_window)
+        """
+        self.window = max(0, _get_guardrails_config().stream_window if window is None else window)
+        self._pending = ""
+        self.modifications: List[str] = []
+
+    def _sanitize(self, text: str) -> str:
+        sanitized, mods = sanitize_response(text)
+        for mod in mods:
+            if mod not in self.modifications:
+                self.modifications.append(mod)
+        return sanitized
+
+    def feed(self, chunk: str) -> str:
+        """청크 추가 후 전송해도 안전한 텍스트 반환 (없으면 빈 문자열).
+
+        보류 텍스트는 원문으로 유지합니다. 마스킹된 텍스트를 다시 검사하면 앞부분만 도착한
+        패턴이 다른 패턴으로 잘못 마스킹되어 나머지가 노출될 수 있기 때문입니다.
+        """
+        self._pending += chunk
+        cut = len(self._pending) - self.window
+        if cut <= 0:
+            return ""
+        # 단어 중간에서 자르지 않도록 윈도우 앞의 마지막 공백에서 자름
+        # (공백이 없으면 보류: 윈도우보다 긴 이메일/URL 등이 중간에서 잘려 노출되지 않도록)
+        cut = self._boundary_before(cut)
+
+        masked = sanitize_response(self._pending)[0]
+        while cut > 0:
+            head = sanitize_response(self._pending[:cut])[0]
+            # 경계에 걸친 패턴이 없어야 앞부분 마스킹 결과가 전체 마스킹 결과와 같음
+            if head + sanitize_response(self._pending[cut:])[0] == masked:
+                break
+            cut = self._boundary_before(cut - 1)
+        if cut <= 0:
+            return ""
+        safe, self._pending = self._sanitize(self._pending[:cut]), self._pending[cut:]
+        return safe
+
+    def _boundary_before(self, end: int) -> int:
+        """end 이전 마지막 공백/줄바꿈 다음 위치 (없으면 0)."""
+        return max(self._pending.rfind(" ", 0, end), self._pending.rfind("\n", 0, end)) + 1
+
+    def flush(self) -> str:
+        """스트림 종료 시 남은 텍스트 반환."""
+        safe, self._pending = self._sanitize(self._pending), ""
+        return safe
+
+
 def format_safe_response(
     response: str,
     context: Optional[Dict[str, Any]] = None,
@@ -9,6 +9,13 @@ from .client import (
     load_prompt,
     get_llm_config,
 )
+from .admission import AdmissionController, ProviderOverloadedError, admission_stats, get_admission
+from .cache import LLMResponseCache, get_llm_cache, reset_llm_cache
+from .context import ContextBuilder, count_tokens, get_context_builder
+from .hedging import AllProvidersFailed, HedgePolicy, hedged_call
+from .usage import TokenUsage, get_usage_ledger, meter_usage, usage_intent
+from .pool import LLMSessionPool, close_llm_pool, get_llm_pool
+from .prompts import PromptRegistry, get_prompt_registry, reset_prompt_registry
 
 __all__ = [
     "LLMClient",
@@ -18,4 +25,27 @@ __all__ = [
     "generate_response_stream",
     "load_prompt",
     "get_llm_config",
+    "AdmissionController",
+    "ProviderOverloadedError",
+    "admission_stats",
+    "get_admission",
+    "LLMResponseCache",
+    "get_llm_cache",
+    "reset_llm_cache",
+    "ContextBuilder",
+    "count_tokens",
+    "get_context_builder",
+    "AllProvidersFailed",
+    "HedgePolicy",
+    "hedged_call",
+    "TokenUsage",
+    "get_usage_ledger",
+    "meter_usage",
+    "usage_intent",
+    "LLMSessionPool",
+    "get_llm_pool",
+    "close_llm_pool",
+    "PromptRegistry",
+    "get_prompt_registry",
+    "reset_prompt_registry",
 ]
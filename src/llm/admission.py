@@ -0,0 +1,337 @@
+"""LLM 프로바이더별 동시 요청 제어 (admission control).
+
+트래픽이 몰리면 프로바이더가 429를 반환하고, 라우터는 폴백 체인을 연달아 소모합니다.
+프로바이더마다 동시에 보내는 요청 수를 제한하고 초과분은 짧게 대기시킵니다.
+
+- 동시 요청 상한 (AIMD 적응): 성공하면 조금씩 늘리고, 429나 목표 지연 초과 시 절반으로 줄임
+  (스트리밍은 전체 시간 대신 첫 토큰까지의 시간으로 판정)
+- 대기열: 최대 길이와 대기 제한 시간이 있으며, 가득 차거나 시간을 넘기면 즉시
+  ProviderOverloadedError(503)를 발생시켜 다음 프로바이더 또는 템플릿 응답으로 넘어감
+- 분당 토큰(TPM): 응답 usage 기준으로 최근 60초 사용량을 집계해 한도를 넘지 않도록 대기
+- 메트릭: llm_admission_in_flight/queue_depth/limit{provider}, llm_admission_wait_seconds,
+  llm_admission_rejected_total{provider, reason}
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import threading
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Deque, Dict, List, Optional
+
+from src.config import get_config
+from src.core.exceptions import ServiceUnavailableError
+from src.monitoring.metrics import (
+    track_llm_admission,
+    track_llm_admission_rejected,
+    track_llm_admission_wait,
+)
+
+logger = logging.getLogger(__name__)
+
+TPM_WINDOW = 60.0  # 토큰 집계 구간 (초)
+
+
+class ProviderOverloadedError(ServiceUnavailableError):
+    """프로바이더 대기열 포화 또는 대기 시간 초과."""
+
+    error_code = "LLM_OVERLOADED"
+    message = "LLM 요청이 많아 잠시 후 다시 시도해 주세요"
+
+
+class AdmissionTicket:
+    """허가된 요청 (응답 usage로 예약 토큰을 보정)."""
+
+    def __init__(self, reserved_tokens: int, entry: Optional[List[float]] = None) -> None:
+        self.reserved_tokens = reserved_tokens
+        self.usage: Dict[str, int] = {}
+        self.first_token: Optional[float] = None  # 스트리밍 첫 토큰 시각 (perf_counter)
+        self._entry = entry  # TPM 기록 [시각, 토큰 수]
+
+    def mark_first_token(self) -> None:
+        """스트리밍 첫 토큰 수신 (AIMD 지연은 전체 스트림 대신 TTFT로 판정)."""
+        if self.first_token is None:
+            self.first_token = time.perf_counter()
+
+    @property
+    def total_tokens(self) -> int:
+        """실제 사용 토큰 (usage가 없으면 예약값)."""
+        return int(self.usage.get("total_tokens") or self.reserved_tokens)
+
+
+class AdmissionController:
+    """단일 프로바이더의 동시 요청/대기열/TPM 제어기."""
+
+    def __init__(
+        self,
+        provider: str,
+        max_concurrency: int = 16,
+        min_concurrency: int = 1,
+        initial_concurrency: Optional[int] = None,
+        max_queue: int = 64,
+        queue_timeout: float = 2.0,
+        tpm_limit: int = 0,
+        latency_target: float = 10.0,
+        decrease_cooldown: float = 1.0,
+    ) -> None:
+        """제어기 초기화.
+
+        Args:
+            provider: 프로바이더 이름 (메트릭 라벨)
+            max_concurrency: 동시 요청 상한의 최댓값
+            min_concurrency: 동시 요청 상한의 최솟값
+            initial_concurrency: 시작 상한 (기본: max_concurrency)
+            max_queue: 대기열 최대 길이 (초과 시 즉시 거부)
+            queue_timeout: 대기 제한 시간 (초)
+            tpm_limit: 분당 토큰 한도 (0이면 무제한)
+            latency_target: 목표 응답 시간 (초, 초과 시 상한 감소)
+            decrease_cooldown: 상한 감소 최소 간격 (초, 동시 실패로 연속 감소 방지)
+        """
+        self.provider = provider
+        self.max_concurrency = max(1, int(max_concurrency))
+        self.min_concurrency = max(1, min(int(min_concurrency), self.max_concurrency))
+        initial = self.max_concurrency if initial_concurrency is None else initial_concurrency
+        self.limit = float(min(max(initial, self.min_concurrency), self.max_concurrency))
+        self.max_queue = max(0, int(max_queue))
+        self.queue_timeout = queue_timeout
+        self.tpm_limit = max(0, int(tpm_limit))
+        self.latency_target = latency_target
+        self.decrease_cooldown = decrease_cooldown
+
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+        self._tokens: Deque[List[float]] = deque()  # [시각, 토큰 수]
+        self._last_decrease = 0.0
+        self._admitted = 0
+        self._queued_total = 0
+        self._rejected = 0
+
+    # 아래 _로 시작하는 메서드는 모두 lock 보유 상태에서 호출
+
+    def _tokens_in_window(self) -> int:
+        now = time.time()
+        while self._tokens and now - self._tokens[0][0] > TPM_WINDOW:
+            self._tokens.popleft()
+        return int(sum(t for _, t in self._tokens))
+
+    def _has_capacity(self, tokens: int) -> bool:
+        if self._in_flight >= int(self.limit):
+            return False
+        if not self.tpm_limit:
+            return True
+        used = self._tokens_in_window()
+        # 기록이 없으면 한 건은 허용 (예약값이 한도보다 큰 경우 대비)
+        return used == 0 or used + tokens <= self.tpm_limit
+
+    def _tpm_retry_after(self) -> Optional[float]:
+        """TPM 때문에 막혀 있으면 가장 오래된 기록이 구간에서 빠지기까지 남은 시간."""
+        if not self.tpm_limit or not self._tokens or self._in_flight >= int(self.limit):
+            return None
+        return max(0.0, TPM_WINDOW - (time.time() - self._tokens[0][0])) + 0.01
+
+    def _admit(self, tokens: int) -> AdmissionTicket:
+        self._in_flight += 1
+        self._admitted += 1
+        entry = None
+        if self.tpm_limit and tokens:
+            entry = [time.time(), float(tokens)]
+            self._tokens.append(entry)
+        return AdmissionTicket(tokens, entry)
+
+    def _wake_next(self) -> None:
+        """대기 중인 첫 요청을 깨움."""
+        if self._waiters and not self._waiters[0].done():
+            fut = self._waiters[0]
+            fut.get_loop().call_soon_threadsafe(_resolve, fut)
+
+    def _publish(self) -> None:
+        track_llm_admission(self.provider, self._in_flight, len(self._waiters), self.limit)
+
+    def _reject(self, reason: str) -> ProviderOverloadedError:
+        self._rejected += 1
+        track_llm_admission_rejected(self.provider, reason)
+        return ProviderOverloadedError(details={"provider": self.provider, "reason": reason})
+
+    # ---- 획득/반환 ----
+
+    async def acquire(self, tokens: int = 0) -> AdmissionTicket:
+        """요청 허가 (대기열 포화/대기 시간 초과 시 ProviderOverloadedError).
+
+        Args:
+            tokens: 예상 토큰 수 (TPM 예약, 응답 후 usage로 보정)
+        """
+        start = time.monotonic()
+        deadline = start + self.queue_timeout
+        loop = asyncio.get_running_loop()
+
+        with self._lock:
+            if not self._waiters and self._has_capacity(tokens):
+                ticket = self._admit(tokens)
+                self._publish()
+                track_llm_admission_wait(self.provider, 0.0)
+                return ticket
+            if len(self._waiters) >= self.max_queue:
+                self._publish()
+                raise self._reject("queue_full")
+            fut = loop.create_future()
+            self._waiters.append(fut)
+            self._queued_total += 1
+            self._publish()
+
+        try:
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    with self._lock:
+                        raise self._reject("timeout")
+                with self._lock:
+                    retry_after = self._tpm_retry_after()
+                wait = remaining if retry_after is None else min(remaining, retry_after)
+                try:
+                    await asyncio.wait_for(asyncio.shield(fut), timeout=wait)
+                except asyncio.TimeoutError:
+                    pass
+
+                with self._lock:
+                    # 먼저 온 대기 요청을 앞지르지 않음
+                    if self._waiters and self._waiters[0] is fut and self._has_capacity(tokens):
+                        self._waiters.popleft()
+                        ticket = self._admit(tokens)
+                        self._wake_next()  # 자리가 더 있으면 다음 대기 요청도 진행
+                        self._publish()
+                        break
+                    if fut.done():
+                        # 깨어났지만 자리가 없음: 같은 순서로 새로 대기
+                        replacement = loop.create_future()
+                        self._waiters[self._waiters.index(fut)] = replacement
+                        fut = replacement
+        except BaseException:
+            with self._lock:
+                if fut in self._waiters:
+                    self._waiters.remove(fut)
+                self._wake_next()
+                self._publish()
+            raise
+
+        track_llm_admission_wait(self.provider, time.monotonic() - start)
+        return ticket
+
+    def release(
+        self,
+        ticket: AdmissionTicket,
+        latency: Optional[float] = None,
+        overloaded: bool = False,
+    ) -> None:
+        """요청 완료 처리 및 AIMD 상한 조정.
+
+        Args:
+            ticket: acquire()가 반환한 티켓
+            latency: 응답 시간 (초, 실패 시 None)
+            overloaded: 프로바이더 429 응답 여부
+        """
+        with self._lock:
+            self._in_flight = max(0, self._in_flight - 1)
+            self._record_usage(ticket)
+            if overloaded or (latency is not None and latency > self.latency_target):
+                now = time.monotonic()
+                if now - self._last_decrease >= self.decrease_cooldown:
+                    self._last_decrease = now
+                    self.limit = max(float(self.min_concurrency), self.limit / 2)
+                    reason = "429" if overloaded else f"지연 {latency:.1f}s"
+                    logger.warning(f"[llm_admission] {self.provider} 동시 요청 상한 감소 → {int(self.limit)} ({reason})")
+            elif latency is not None:
+                # 상한 1 증가에 현재 상한만큼의 성공이 필요 (가산 증가)
+                self.limit = min(float(self.max_concurrency), self.limit + 1.0 / max(self.limit, 1.0))
+            self._wake_next()
+            self._publish()
+
+    def _record_usage(self, ticket: AdmissionTicket) -> None:
+        """예약 토큰을 실제 usage로 교체."""
+        if not self.tpm_limit:
+            return
+        if ticket._entry is not None:
+            ticket._entry[1] = float(ticket.total_tokens)
+        elif ticket.total_tokens:
+            self._tokens.append([time.time(), float(ticket.total_tokens)])
+
+    @asynccontextmanager
+    async def slot(self, tokens: int = 0) -> AsyncIterator[AdmissionTicket]:
+        """acquire/release 컨텍스트 (status 429 예외는 overloaded로 기록).
+
+        스트리밍은 응답 길이와 소비자 속도에 따라 전체 시간이 길어지므로, 티켓에 첫 토큰이
+        기록되어 있으면 그때까지의 시간(TTFT)을 지연으로 사용합니다.
+        """
+        ticket = await self.acquire(tokens)
+        start = time.perf_counter()
+        latency: Optional[float] = None
+        overloaded = False
+        try:
+            yield ticket
+            latency = (ticket.first_token or time.perf_counter()) - start
+        except BaseException as e:
+            overloaded = getattr(e, "status", None) == 429
+            raise
+        finally:
+            self.release(ticket, latency=latency, overloaded=overloaded)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "limit": int(self.limit),
+                "max_concurrency": self.max_concurrency,
+                "in_flight": self._in_flight,
+                "queued": len(self._waiters),
+                "tokens_last_minute": self._tokens_in_window(),
+                "tpm_limit": self.tpm_limit,
+                "admitted": self._admitted,
+                "queued_total": self._queued_total,
+                "rejected": self._rejected,
+            }
+
+
+def _resolve(fut: asyncio.Future) -> None:
+    if not fut.done():
+        fut.set_result(None)
+
+
+_controllers: Dict[str, AdmissionController] = {}
+_controllers_lock = threading.Lock()
+
+
+def get_admission(provider: str) -> Optional[AdmissionController]:
+    """프로바이더 제어기 반환 (admission.enabled=false면 None)."""
+    cfg = get_config().llm.admission
+    if not cfg.enabled:
+        return None
+    with _controllers_lock:
+        controller = _controllers.get(provider)
+        if controller is None:
+            opts = dict(
+                max_concurrency=cfg.max_concurrency,
+                min_concurrency=cfg.min_concurrency,
+                initial_concurrency=cfg.initial_concurrency,
+                max_queue=cfg.max_queue,
+                queue_timeout=cfg.queue_timeout,
+                tpm_limit=cfg.tpm_limit,
+                latency_target=cfg.latency_target,
+            )
+            opts.update(cfg.providers.get(provider, {}) or {})
+            controller = _controllers[provider] = AdmissionController(provider, **opts)
+        return controller
+
+
+def admission_stats() -> Dict[str, Dict[str, Any]]:
+    """프로바이더별 제어기 상태 (/health용)."""
+    with _controllers_lock:
+        controllers = list(_controllers.values())
+    return {c.provider: c.stats() for c in controllers}
+
+
+def reset_admission() -> None:
+    """전역 제어기 리셋 (테스트용)."""
+    with _controllers_lock:
+        _controllers.clear()
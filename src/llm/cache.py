@@ -0,0 +1,335 @@
+"""LLM 응답 캐시.
+
+같은 도구 결과에 대한 같은 질문(주문 상태, 티켓 생성, 정책 답변 등)은 거의 같은
+LLM 호출을 만듭니다. (provider, model, temperature, 시스템 프롬프트, 컨텍스트,
+사용자 메시지)의 안정 해시를 키로 응답을 재사용합니다.
+
+- 의도별 TTL (configs/llm.yaml cache.intent_ttl, 0이면 캐시 안 함)
+- 메모리 LRU + 선택적 SQLite 영속화 (재시작 후에도 유지)
+- temperature > 0 호출은 allow_nonzero_temperature 또는 nonzero_temperature_intents에
+  속한 의도(템플릿성 답변: 주문/클레임/정책)가 아니면 캐시하지 않음 (bypass)
+- SQLite를 쓰면 조회/저장을 검색 executor에서 실행 (이벤트 루프 블로킹 방지)
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, Iterable, Optional
+
+from src.config import get_config
+from src.core.exceptions import RequestTimeoutError, ServiceUnavailableError
+from src.monitoring.metrics import track_llm_cache
+
+logger = logging.getLogger(__name__)
+
+_WS_RE = re.compile(r"\s+")
+
+
+def normalize_text(text: str) -> str:
+    """키 생성용 공백 정규화."""
+    return _WS_RE.sub(" ", text or "").strip()
+
+
+def make_cache_key(
+    provider: str,
+    model: str,
+    temperature: float,
+    system_prompt: str,
+    context: str,
+    user_message: str,
+) -> str:
+    """캐시 키 (입력 전체의 SHA-256)."""
+    payload = json.dumps(
+        [
+            provider,
+            model,
+            round(float(temperature), 4),
+            system_prompt,
+            normalize_text(context),
+            normalize_text(user_message),
+        ],
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+@dataclass
+class CachedCompletion:
+    """캐시된 LLM 응답."""
+
+    response: str
+    intent: str
+    created_at: float
+    expires_at: float
+    latency: float  # 원래 호출에 걸린 시간 (초)
+
+
+class LLMResponseCache:
+    """LRU + TTL LLM 응답 캐시 (스레드 안전)."""
+
+    def __init__(
+        self,
+        enabled: Optional[bool] = None,
+        max_entries: Optional[int] = None,
+        default_ttl: Optional[float] = None,
+        intent_ttl: Optional[Dict[str, float]] = None,
+        allow_nonzero_temperature: Optional[bool] = None,
+        nonzero_temperature_intents: Optional[Iterable[str]] = None,
+        sqlite_path: Optional[str] = None,
+    ) -> None:
+        """캐시 초기화 (인자가 None이면 configs/llm.yaml cache 값 사용).
+
+        Args:
+            enabled: 사용 여부
+            max_entries: 메모리 최대 엔트리 수
+            default_ttl: intent_ttl에 없는 의도의 TTL (초)
+            intent_ttl: 의도별 TTL (초, 0이면 캐시 안 함)
+            allow_nonzero_temperature: temperature > 0 응답도 캐시
+            nonzero_temperature_intents: temperature > 0이어도 캐시할 의도
+            sqlite_path: 영속 캐시 DB 경로 (빈 값이면 메모리만)
+        """
+        cfg = get_config().llm.cache
+        self.enabled = cfg.enabled if enabled is None else enabled
+        self.max_entries = max(1, cfg.max_entries if max_entries is None else max_entries)
+        self.default_ttl = cfg.default_ttl if default_ttl is None else default_ttl
+        self.intent_ttl = dict(cfg.intent_ttl if intent_ttl is None else intent_ttl)
+        self.allow_nonzero_temperature = (
+            cfg.allow_nonzero_temperature if allow_nonzero_temperature is None else allow_nonzero_temperature
+        )
+        self.nonzero_temperature_intents = set(
+            cfg.nonzero_temperature_intents if nonzero_temperature_intents is None else nonzero_temperature_intents
+        )
+
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, CachedCompletion]" = OrderedDict()
+        self._hits = 0
+        self._misses = 0
+        self._bypass = 0
+        self._saved_seconds = 0.0
+
+        self._db: Optional[sqlite3.Connection] = None
+        path = cfg.sqlite_path if sqlite_path is None else sqlite_path
+        if path:
+            self._open_db(Path(path))
+
+    def _open_db(self, path: Path) -> None:
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            self._db = sqlite3.connect(str(path), check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS llm_cache ("
+                "key TEXT PRIMARY KEY, intent TEXT, response TEXT, "
+                "created_at REAL, expires_at REAL, latency REAL)"
+            )
+            self._db.execute("DELETE FROM llm_cache WHERE expires_at < ?", (time.time(),))
+            self._db.commit()
+        except sqlite3.Error as e:
+            logger.warning(f"LLM 캐시 DB 사용 불가, 메모리 캐시만 사용: {e}")
+            self._db = None
+
+    def ttl_for(self, intent: str) -> float:
+        """의도별 TTL (초)."""
+        return float(self.intent_ttl.get(intent, self.default_ttl))
+
+    def eligible(self, intent: str, temperature: float) -> bool:
+        """이 호출을 캐시할 수 있는지 여부."""
+        if not self.enabled or self.ttl_for(intent) <= 0:
+            return False
+        return (
+            temperature <= 0
+            or self.allow_nonzero_temperature
+            or intent in self.nonzero_temperature_intents
+        )
+
+    def get(self, key: str) -> Optional[CachedCompletion]:
+        """캐시 조회 (메모리 → SQLite 순, 적중/미스 기록)."""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.expires_at < now:
+                del self._entries[key]
+                entry = None
+            if entry is None and self._db is not None:
+                entry = self._db_get(key, now)
+                if entry is not None:
+                    self._remember(key, entry)
+            if entry is None:
+                self._misses += 1
+            else:
+                self._entries.move_to_end(key)
+                self._hits += 1
+                self._saved_seconds += entry.latency
+
+        if entry is None:
+            track_llm_cache("miss")
+        else:
+            track_llm_cache("hit", saved_seconds=entry.latency)
+        return entry
+
+    def put(self, key: str, intent: str, response: str, latency: float) -> None:
+        """응답 저장."""
+        ttl = self.ttl_for(intent)
+        if not self.enabled or ttl <= 0 or not response:
+            return
+        now = time.time()
+        entry = CachedCompletion(
+            response=response, intent=intent, created_at=now, expires_at=now + ttl, latency=latency
+        )
+        with self._lock:
+            self._remember(key, entry)
+            if self._db is not None:
+                try:
+                    self._db.execute(
+                        "INSERT OR REPLACE INTO llm_cache VALUES (?, ?, ?, ?, ?, ?)",
+                        (key, intent, response, entry.created_at, entry.expires_at, latency),
+                    )
+                    self._db.commit()
+                except sqlite3.Error as e:
+                    logger.warning(f"LLM 캐시 DB 저장 실패: {e}")
+
+    async def aget(self, key: str) -> Optional[CachedCompletion]:
+        """get()의 비동기 버전 (SQLite 조회는 executor에서, 포화/시간 초과 시 미적중)."""
+        if self._db is None:
+            return self.get(key)
+        try:
+            return await _executor().run(self.get, key, timeout=_timeout())
+        except (ServiceUnavailableError, RequestTimeoutError) as e:
+            logger.warning(f"LLM 캐시 조회 건너뛰기: {e.error_code}")
+            return None
+
+    async def aput(self, key: str, intent: str, response: str, latency: float) -> None:
+        """put()의 비동기 버전 (SQLite 저장은 executor에서, 포화/시간 초과 시 생략)."""
+        if self._db is None:
+            self.put(key, intent, response, latency)
+            return
+        try:
+            await _executor().run(self.put, key, intent, response, latency, timeout=_timeout())
+        except (ServiceUnavailableError, RequestTimeoutError) as e:
+            logger.warning(f"LLM 캐시 저장 건너뛰기: {e.error_code}")
+
+    def record_bypass(self) -> None:
+        with self._lock:
+            self._bypass += 1
+        track_llm_cache("bypass")
+
+    def _remember(self, key: str, entry: CachedCompletion) -> None:
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _db_get(self, key: str, now: float) -> Optional[CachedCompletion]:
+        try:
+            row = self._db.execute(
+                "SELECT response, intent, created_at, expires_at, latency FROM llm_cache "
+                "WHERE key = ? AND expires_at >= ?",
+                (key, now),
+            ).fetchone()
+        except sqlite3.Error as e:
+            logger.warning(f"LLM 캐시 DB 조회 실패: {e}")
+            return None
+        if row is None:
+            return None
+        return CachedCompletion(
+            response=row[0], intent=row[1], created_at=row[2], expires_at=row[3], latency=row[4]
+        )
+
+    def clear(self) -> None:
+        """모든 엔트리 삭제 (SQLite 포함)."""
+        with self._lock:
+            self._entries.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM llm_cache")
+                self._db.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+    def stats(self) -> Dict[str, Any]:
+        """적중률 및 절약 시간 통계."""
+        with self._lock:
+            total = self._hits + self._misses
+            return {
+                "enabled": self.enabled,
+                "entries": len(self._entries),
+                "persistent": self._db is not None,
+                "hits": self._hits,
+                "misses": self._misses,
+                "bypass": self._bypass,
+                "hit_rate": self._hits / total if total else 0.0,
+                "saved_seconds": round(self._saved_seconds, 3),
+            }
+
+
+async def cached_chat(
+    call: Callable[[], Awaitable[str]],
+    *,
+    provider: str,
+    model: str,
+    temperature: float,
+    intent: str,
+    system_prompt: str,
+    context: str,
+    user_message: str,
+    cache: Optional[LLMResponseCache] = None,
+) -> str:
+    """캐시를 거쳐 LLM 호출.
+
+    캐시 대상이 아니면(비활성, TTL 0, 허용되지 않은 temperature > 0) 바로 call()을 실행합니다.
+    """
+    cache = cache or get_llm_cache()
+    if not cache.eligible(intent, temperature):
+        if cache.enabled:
+            cache.record_bypass()
+        return await call()
+
+    key = make_cache_key(provider, model, temperature, system_prompt, context, user_message)
+    hit = await cache.aget(key)
+    if hit is not None:
+        return hit.response
+
+    start = time.perf_counter()
+    response = await call()
+    await cache.aput(key, intent, response, latency=time.perf_counter() - start)
+    return response
+
+
+def _executor():
+    from src.rag.retriever import get_search_executor
+
+    return get_search_executor()
+
+
+def _timeout() -> float:
+    return get_config().rag.retrieval.search_timeout
+
+
+_cache: Optional[LLMResponseCache] = None
+
+
+def get_llm_cache() -> LLMResponseCache:
+    """전역 LLM 응답 캐시 반환."""
+    global _cache
+    if _cache is None:
+        _cache = LLMResponseCache()
+    return _cache
+
+
+def reset_llm_cache() -> None:
+    """전역 LLM 응답 캐시 리셋 (테스트용)."""
+    global _cache
+    if _cache is not None:
+        _cache.close()
+    _cache = None
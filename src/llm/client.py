@@ -2,18 +2,121 @@
 
 from __future__ import annotations
 
+import asyncio
 import json
 import logging
-from pathlib import Path
-from typing import Any, AsyncGenerator, Dict, List, Optional
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, AsyncGenerator, Dict, Iterator, List, Optional, Tuple
 from dataclasses import dataclass
 
 import aiohttp
 
 from src.config import get_config
+from src.core.singleflight import SingleFlight, make_key
+from src.llm.admission import AdmissionTicket, get_admission
+from src.llm.cache import cached_chat
+from src.llm.context import count_tokens, record_prompt_tokens, render_context
+from src.llm.pool import LLMSessionPool, close_llm_pool, get_llm_pool
+from src.llm.prompts import get_prompt_registry
+from src.llm.usage import (
+    TokenUsage,
+    begin_call,
+    current_call,
+    current_meter,
+    finish_call,
+    meter_usage,
+    usage_intent,
+)
 
 logger = logging.getLogger(__name__)
 
+# 현재 태스크의 첫 바이트(응답 헤더) 수신 이벤트 (헤징/TTFB 측정용, 바깥 감시자 포함)
+_first_byte: ContextVar[Tuple[asyncio.Event, ...]] = ContextVar("llm_first_byte", default=())
+
+
+@contextmanager
+def watch_first_byte() -> Iterator[asyncio.Event]:
+    """블록 안의 LLM 호출이 첫 바이트를 받으면 set되는 이벤트.
+
+    이미 감시 중인 이벤트(예: 헤징)가 있으면 함께 알립니다.
+    """
+    event = asyncio.Event()
+    token = _first_byte.set(_first_byte.get() + (event,))
+    try:
+        yield event
+    finally:
+        _first_byte.reset(token)
+
+
+class _FlightWaiters:
+    """병합된 chat 호출을 기다리는 호출자들의 첫 바이트 이벤트와 사용량 미터.
+
+    병합된 작업은 리더의 contextvars로 실행되므로, 나머지 호출자의 이벤트/미터는
+    여기에 모아 두고 첫 바이트와 사용량을 모두에게 전달합니다.
+    """
+
+    def __init__(self) -> None:
+        self.events: List[asyncio.Event] = list(_first_byte.get())
+        meter = current_meter()
+        self.meters: List[TokenUsage] = [meter] if meter is not None else []
+        self.first_byte = False
+
+    def join(self, other: "_FlightWaiters") -> None:
+        self.events.extend(other.events)
+        self.meters.extend(other.meters)
+        if self.first_byte:
+            for event in other.events:
+                event.set()
+
+    def mark_first_byte(self) -> None:
+        self.first_byte = True
+        for event in self.events:
+            event.set()
+
+    def add_usage(self, usage: TokenUsage) -> None:
+        for meter in self.meters:
+            meter.add(usage)
+
+
+# 현재 태스크가 실행 중인 병합 chat 호출의 대기자
+_flight: ContextVar[Optional[_FlightWaiters]] = ContextVar("llm_flight", default=None)
+
+
+def _mark_first_byte() -> None:
+    flight = _flight.get()
+    if flight is not None:
+        flight.mark_first_byte()
+    else:
+        for event in _first_byte.get():
+            event.set()
+    call = current_call()
+    if call is not None:
+        call.mark_first_byte()
+
+
+def _record_usage(usage: Optional[Dict[str, Any]]) -> None:
+    """현재 호출에 프로바이더 usage 반영 (src.llm.usage에서 정규화)."""
+    call = current_call()
+    if call is not None:
+        call.update_usage(usage)
+
+
+def _prompt_text(messages: List[Dict[str, str]], system_prompt: Optional[str]) -> str:
+    return (system_prompt or "") + "".join(str(m.get("content", "")) for m in messages)
+
+
+class LLMAPIError(RuntimeError):
+    """프로바이더 API 오류 응답 (status: HTTP 상태 코드)."""
+
+    def __init__(self, message: str, status: Optional[int] = None) -> None:
+        super().__init__(message)
+        self.status = status
+
+
+# 동일한 진행 중 chat 호출 병합
+_chat_flight = SingleFlight("llm_chat")
+
 
 @dataclass
 class LLMConfig:
@@ -38,11 +141,11 @@ def get_llm_config() -> LLMConfig:
     cfg = get_config()
     llm_cfg = cfg.llm
 
-    # 프로바이더별 base_url 설정
+    # 프로바이더별 base_url 설정 (configs/llm.yaml에 base_url이 있으면 우선, 예: 스텁 서버)
     base_urls = {
-        "openai": "https://api.openai.com/v1",
-        "anthropic": "https://api.anthropic.com",
-        "google": "https://generativelanguage.googleapis.com/v1beta",
+        "openai": llm_cfg.base_url or "https://api.openai.com/v1",
+        "anthropic": llm_cfg.base_url or "https://api.anthropic.com",
+        "google": llm_cfg.base_url or "https://generativelanguage.googleapis.com/v1beta",
         "local": llm_cfg.base_url or "http://localhost:8080/v1",
     }
 
@@ -61,48 +164,99 @@ def get_llm_config() -> LLMConfig:
 
 
 def load_prompt(prompt_name: str) -> str:
-    """프롬프트 파일 로드"""
-    config = load_config()
-    prompts_config = config.get("prompts", {})
-    prompt_path = prompts_config.get(prompt_name)
-
-    if not prompt_path:
-        return ""
-
-    path = Path(prompt_path)
-    if path.exists():
-        return path.read_text(encoding="utf-8")
-    return ""
+    """프롬프트 로드 (프롬프트 레지스트리 캐시 사용)"""
+    return get_prompt_registry().get(prompt_name)
 
 
 class LLMClient:
     """LLM 클라이언트"""
 
-    def __init__(self, config: Optional[LLMConfig] = None):
+    def __init__(self, config: Optional[LLMConfig] = None, pool: Optional[LLMSessionPool] = None):
         self.config = config or get_llm_config()
-        self._session: Optional[aiohttp.ClientSession] = None
+        self._pool = pool
 
     async def _get_session(self) -> aiohttp.ClientSession:
-        try:
-            if self._session is None or self._session.closed:
-                timeout = aiohttp.ClientTimeout(total=self.config.timeout)
-                self._session = aiohttp.ClientSession(timeout=timeout)
-        except RuntimeError:
-            # 이벤트 루프가 닫힌 경우 새로 생성
-            timeout = aiohttp.ClientTimeout(total=self.config.timeout)
-            self._session = aiohttp.ClientSession(timeout=timeout)
-        return self._session
+        """(provider, base_url) 공유 세션 (연결 재사용)."""
+        pool = self._pool or get_llm_pool()
+        return pool.session(self.config.provider, self.config.base_url, self.config.timeout)
 
     async def close(self):
-        if self._session and not self._session.closed:
-            await self._session.close()
+        """공유 세션은 풀이 관리하므로 닫지 않음 (close_llm_pool 참조)."""
 
     async def chat(
         self,
         messages: List[Dict[str, str]],
         system_prompt: Optional[str] = None,
     ) -> str:
-        """채팅 완성 요청"""
+        """채팅 완성 요청 (같은 요청이 진행 중이면 그 결과를 공유)"""
+        cfg = self.config
+        key = make_key(
+            cfg.provider, cfg.base_url, cfg.model, cfg.temperature, cfg.max_tokens, system_prompt, messages
+        )
+        waiters = _FlightWaiters()
+        return await _chat_flight.do(
+            key,
+            lambda: self._chat_shared(messages, system_prompt, waiters),
+            shared=waiters,
+            join=lambda leader: leader.join(waiters),
+        )
+
+    async def _chat_shared(
+        self,
+        messages: List[Dict[str, str]],
+        system_prompt: Optional[str],
+        waiters: _FlightWaiters,
+    ) -> str:
+        """병합 작업: 첫 바이트와 사용량을 기다리는 모든 호출자에게 전달."""
+        token = _flight.set(waiters)
+        try:
+            with meter_usage() as usage:
+                try:
+                    return await self._chat(messages, system_prompt)
+                finally:
+                    waiters.add_usage(usage)
+        finally:
+            _flight.reset(token)
+
+    def _estimate_tokens(self, messages: List[Dict[str, str]], system_prompt: Optional[str]) -> int:
+        """TPM 예약용 예상 토큰 (프롬프트 + max_tokens, 응답 usage로 보정)."""
+        return count_tokens(_prompt_text(messages, system_prompt)) + int(self.config.max_tokens or 0)
+
+    async def _chat(
+        self,
+        messages: List[Dict[str, str]],
+        system_prompt: Optional[str] = None,
+    ) -> str:
+        admission = get_admission(self.config.provider)
+        if admission is None:
+            return await self._metered(messages, system_prompt)
+        async with admission.slot(self._estimate_tokens(messages, system_prompt)) as ticket:
+            return await self._metered(messages, system_prompt, ticket)
+
+    async def _metered(
+        self,
+        messages: List[Dict[str, str]],
+        system_prompt: Optional[str] = None,
+        ticket: Optional[AdmissionTicket] = None,
+    ) -> str:
+        """프로바이더 호출 후 사용량/비용/지연/TTFT 기록."""
+        call = begin_call(self.config.provider, self.config.model)
+        try:
+            result = await self._dispatch(messages, system_prompt)
+        except Exception:
+            finish_call(call, "error")
+            raise
+        finally:
+            if ticket is not None:
+                ticket.usage = call.usage
+        finish_call(call, "success", _prompt_text(messages, system_prompt), result)
+        return result
+
+    async def _dispatch(
+        self,
+        messages: List[Dict[str, str]],
+        system_prompt: Optional[str] = None,
+    ) -> str:
         if self.config.provider == "openai":
             return await self._chat_openai(messages, system_prompt)
         elif self.config.provider == "anthropic":
@@ -128,6 +282,44 @@ class LLMClient:
         Yields:
             응답 텍스트 청크
         """
+        admission = get_admission(self.config.provider)
+        if admission is None:
+            async for chunk in self._metered_stream(messages, system_prompt):
+                yield chunk
+            return
+        async with admission.slot(self._estimate_tokens(messages, system_prompt)) as ticket:
+            async for chunk in self._metered_stream(messages, system_prompt, ticket):
+                yield chunk
+
+    async def _metered_stream(
+        self,
+        messages: List[Dict[str, str]],
+        system_prompt: Optional[str] = None,
+        ticket: Optional[AdmissionTicket] = None,
+    ) -> AsyncGenerator[str, None]:
+        """스트리밍 호출 후 사용량/비용/지연/TTFT(첫 청크) 기록."""
+        call = begin_call(self.config.provider, self.config.model)
+        parts: List[str] = []
+        try:
+            async for chunk in self._dispatch_stream(messages, system_prompt):
+                call.mark_first_token()
+                if ticket is not None:
+                    ticket.mark_first_token()
+                parts.append(chunk)
+                yield chunk
+        except Exception:
+            finish_call(call, "error")
+            raise
+        finally:
+            if ticket is not None:
+                ticket.usage = call.usage
+        finish_call(call, "success", _prompt_text(messages, system_prompt), "".join(parts))
+
+    async def _dispatch_stream(
+        self,
+        messages: List[Dict[str, str]],
+        system_prompt: Optional[str] = None,
+    ) -> AsyncGenerator[str, None]:
         if self.config.provider == "openai":
             async for chunk in self._chat_openai_stream(messages, system_prompt):
                 yield chunk
@@ -177,12 +369,14 @@ class LLMClient:
                 json=payload,
                 headers=headers,
             ) as resp:
+                _mark_first_byte()
                 if resp.status != 200:
                     error_text = await resp.text()
                     logger.error(f"OpenAI API 오류: {resp.status} - {error_text}")
-                    raise RuntimeError(f"OpenAI API 오류: {resp.status}")
+                    raise LLMAPIError(f"OpenAI API 오류: {resp.status}", status=resp.status)
 
                 data = await resp.json()
+                _record_usage(data.get("usage"))
                 return data["choices"][0]["message"]["content"]
         except aiohttp.ClientError as e:
             logger.error(f"OpenAI API 연결 오류: {e}")
@@ -210,6 +404,7 @@ class LLMClient:
             "temperature": self.config.temperature,
             "max_tokens": self.config.max_tokens,
             "stream": True,
+            "stream_options": {"include_usage": True},
         }
 
         headers = {
@@ -223,10 +418,11 @@ class LLMClient:
                 json=payload,
                 headers=headers,
             ) as resp:
+                _mark_first_byte()
                 if resp.status != 200:
                     error_text = await resp.text()
                     logger.error(f"OpenAI API 오류: {resp.status} - {error_text}")
-                    raise RuntimeError(f"OpenAI API 오류: {resp.status}")
+                    raise LLMAPIError(f"OpenAI API 오류: {resp.status}", status=resp.status)
 
                 async for line in resp.content:
                     line = line.decode("utf-8").strip()
@@ -235,7 +431,8 @@ class LLMClient:
                     if line.startswith("data: "):
                         try:
                             data = json.loads(line[6:])
-                            delta = data.get("choices", [{}])[0].get("delta", {})
+                            _record_usage(data.get("usage"))  # 마지막 청크 (choices 비어 있음)
+                            delta = (data.get("choices") or [{}])[0].get("delta", {})
                             content = delta.get("content", "")
                             if content:
                                 yield content
@@ -281,12 +478,14 @@ class LLMClient:
                 json=payload,
                 headers=headers,
             ) as resp:
+                _mark_first_byte()
                 if resp.status != 200:
                     error_text = await resp.text()
                     logger.error(f"Anthropic API 오류: {resp.status} - {error_text}")
-                    raise RuntimeError(f"Anthropic API 오류: {resp.status}")
+                    raise LLMAPIError(f"Anthropic API 오류: {resp.status}", status=resp.status)
 
                 data = await resp.json()
+                _record_usage(data.get("usage"))
                 return data["content"][0]["text"]
         except aiohttp.ClientError as e:
             logger.error(f"Anthropic API 연결 오류: {e}")
@@ -328,10 +527,11 @@ class LLMClient:
                 json=payload,
                 headers=headers,
             ) as resp:
+                _mark_first_byte()
                 if resp.status != 200:
                     error_text = await resp.text()
                     logger.error(f"Anthropic API 오류: {resp.status} - {error_text}")
-                    raise RuntimeError(f"Anthropic API 오류: {resp.status}")
+                    raise LLMAPIError(f"Anthropic API 오류: {resp.status}", status=resp.status)
 
                 async for line in resp.content:
                     line = line.decode("utf-8").strip()
@@ -341,7 +541,11 @@ class LLMClient:
                         try:
                             data = json.loads(line[6:])
                             event_type = data.get("type", "")
-                            if event_type == "content_block_delta":
+                            if event_type == "message_start":
+                                _record_usage(data.get("message", {}).get("usage"))
+                            elif event_type == "message_delta":
+                                _record_usage(data.get("usage"))
+                            elif event_type == "content_block_delta":
                                 delta = data.get("delta", {})
                                 text = delta.get("text", "")
                                 if text:
@@ -394,12 +598,14 @@ class LLMClient:
                 json=payload,
                 headers={"Content-Type": "application/json"},
             ) as resp:
+                _mark_first_byte()
                 if resp.status != 200:
                     error_text = await resp.text()
                     logger.error(f"Google API 오류: {resp.status} - {error_text}")
-                    raise RuntimeError(f"Google API 오류: {resp.status}")
+                    raise LLMAPIError(f"Google API 오류: {resp.status}", status=resp.status)
 
                 data = await resp.json()
+                _record_usage(data.get("usageMetadata"))
                 # Google API 응답에서 텍스트 추출
                 candidates = data.get("candidates", [])
                 if candidates:
@@ -454,10 +660,11 @@ class LLMClient:
                 json=payload,
                 headers={"Content-Type": "application/json"},
             ) as resp:
+                _mark_first_byte()
                 if resp.status != 200:
                     error_text = await resp.text()
                     logger.error(f"Google API 오류: {resp.status} - {error_text}")
-                    raise RuntimeError(f"Google API 오류: {resp.status}")
+                    raise LLMAPIError(f"Google API 오류: {resp.status}", status=resp.status)
 
                 async for line in resp.content:
                     line = line.decode("utf-8").strip()
@@ -466,6 +673,7 @@ class LLMClient:
                     if line.startswith("data: "):
                         try:
                             data = json.loads(line[6:])
+                            _record_usage(data.get("usageMetadata"))  # 청크마다 누적값
                             candidates = data.get("candidates", [])
                             if candidates:
                                 content = candidates[0].get("content", {})
@@ -505,12 +713,14 @@ class LLMClient:
                 f"{self.config.base_url}/chat/completions",
                 json=payload,
             ) as resp:
+                _mark_first_byte()
                 if resp.status != 200:
                     error_text = await resp.text()
                     logger.error(f"로컬 LLM API 오류: {resp.status} - {error_text}")
-                    raise RuntimeError(f"로컬 LLM API 오류: {resp.status}")
+                    raise LLMAPIError(f"로컬 LLM API 오류: {resp.status}", status=resp.status)
 
                 data = await resp.json()
+                _record_usage(data.get("usage"))
                 return data["choices"][0]["message"]["content"]
         except aiohttp.ClientError as e:
             logger.error(f"로컬 LLM API 연결 오류: {e}")
@@ -542,10 +752,11 @@ class LLMClient:
                 f"{self.config.base_url}/chat/completions",
                 json=payload,
             ) as resp:
+                _mark_first_byte()
                 if resp.status != 200:
                     error_text = await resp.text()
                     logger.error(f"로컬 LLM API 오류: {resp.status} - {error_text}")
-                    raise RuntimeError(f"로컬 LLM API 오류: {resp.status}")
+                    raise LLMAPIError(f"로컬 LLM API 오류: {resp.status}", status=resp.status)
 
                 async for line in resp.content:
                     line = line.decode("utf-8").strip()
@@ -554,7 +765,8 @@ class LLMClient:
                     if line.startswith("data: "):
                         try:
                             data = json.loads(line[6:])
-                            delta = data.get("choices", [{}])[0].get("delta", {})
+                            _record_usage(data.get("usage"))  # 마지막 청크 (choices 비어 있음)
+                            delta = (data.get("choices") or [{}])[0].get("delta", {})
                             content = delta.get("content", "")
                             if content:
                                 yield content
@@ -583,14 +795,13 @@ def get_client(reset: bool = False) -> LLMClient:
 
 
 async def cleanup_client():
-    """클라이언트 정리 (앱 종료 시 호출)"""
+    """클라이언트와 세션 풀 정리 (앱 종료 시 호출)"""
     global _client
-    if _client is not None:
-        try:
-            await _client.close()
-        except Exception:
-            pass
-        _client = None
+    _client = None
+    try:
+        await close_llm_pool()
+    except Exception:
+        pass
 
 
 async def generate_response(
@@ -601,21 +812,24 @@ async def generate_response(
     """컨텍스트 기반 응답 생성"""
     client = get_client()
 
-    system_prompt = load_prompt("system")
-    intent_prompt = load_prompt(intent)
-
-    if intent_prompt:
-        system_prompt = f"{system_prompt}\n\n{intent_prompt}"
-
-    context_str = ""
-    if context:
-        context_str = f"\n\n[제공된 데이터]\n{_format_context(context)}"
-
-    full_system = f"{system_prompt}{context_str}"
+    context_str = render_context(context, intent)
+    registry = get_prompt_registry()
+    full_system = registry.render_system(intent, context_str)
+    record_prompt_tokens(intent, full_system, user_message)
 
     messages = [{"role": "user", "content": user_message}]
 
-    return await client.chat(messages, system_prompt=full_system)
+    with usage_intent(intent):
+        return await cached_chat(
+            lambda: client.chat(messages, system_prompt=full_system),
+            provider=client.config.provider,
+            model=client.config.model,
+            temperature=client.config.temperature,
+            intent=intent,
+            system_prompt=registry.system_prompt(intent),
+            context=context_str,
+            user_message=user_message,
+        )
 
 
 async def generate_response_stream(
@@ -635,37 +849,13 @@ async def generate_response_stream(
     """
     client = get_client()
 
-    system_prompt = load_prompt("system")
-    intent_prompt = load_prompt(intent)
-
-    if intent_prompt:
-        system_prompt = f"{system_prompt}\n\n{intent_prompt}"
-
-    context_str = ""
-    if context:
-        context_str = f"\n\n[제공된 데이터]\n{_format_context(context)}"
-
-    full_system = f"{system_prompt}{context_str}"
+    context_str = render_context(context, intent)
+    full_system = get_prompt_registry().render_system(intent, context_str)
+    record_prompt_tokens(intent, full_system, user_message)
 
     messages = [{"role": "user", "content": user_message}]
 
-    async for chunk in client.chat_stream(messages, system_prompt=full_system):
-        yield chunk
-
-
-def _format_context(context: Dict[str, Any]) -> str:
-    """컨텍스트를 문자열로 포맷"""
-    lines = []
-    for key, value in context.items():
-        if isinstance(value, list):
-            lines.append(f"{key}:")
-            for item in value[:10]:  # 최대 10개
-                if isinstance(item, dict):
-                    lines.append(f"  - {item}")
-                else:
-                    lines.append(f"  - {item}")
-        elif isinstance(value, dict):
-            lines.append(f"{key}: {value}")
-        else:
-            lines.append(f"{key}: {value}")
-    return "\n".join(lines)
+    with usage_intent(intent):
+        async for chunk in client.chat_stream(messages, system_prompt=full_system):
+            yield chunk
+
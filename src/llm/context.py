@@ -0,0 +1,308 @@
+"""LLM 프롬프트 컨텍스트 빌더.
+
+도구 결과 dict를 그대로 repr로 넣으면 주문 상품 목록 전체, 정책 청크 원문, 중첩
+메타데이터가 시스템 프롬프트에 들어가 프롬프트 토큰(지연/비용)이 크게 늘어납니다.
+
+- 의도별 필드 projection: 응답에 필요한 키/컬럼만 우선순위 순서로 선택
+- 간결한 표 형식 렌더링: dict 리스트는 헤더 1줄 + 행마다 `a | b | c`
+- 의도별 토큰 예산: 우선순위가 낮은 섹션/행부터 잘라내고 `... 외 N건`으로 표시
+  (예산에 걸린 행은 남은 예산만큼 잘라서 포함)
+- 토큰 수: tiktoken이 있으면 사용, 없으면 한글 1자 = 1토큰 기준 근사
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import math
+import re
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from src.config import get_config
+from src.monitoring.metrics import track_llm_prompt_tokens
+
+logger = logging.getLogger(__name__)
+
+# 의도별 기본 projection: {섹션 경로: 컬럼 목록} (앞쪽일수록 우선, 빈 목록 = 값 전체)
+DEFAULT_PROJECTIONS: Dict[str, Dict[str, List[str]]] = {
+    "order": {
+        "error": [],
+        "cancel_result": ["success", "order_id", "error"],
+        "status": ["order_id", "status", "estimated_delivery"],
+        "detail.order": ["order_id", "status", "order_date", "total_amount", "delivery_date"],
+        "detail.items": ["title", "quantity", "unit_price"],
+        "orders": ["order_id", "status", "order_date", "total_amount", "delivery_date"],
+        "recent_items": ["title", "quantity"],
+    },
+    "claim": {
+        "error": [],
+        "ticket": ["ticket_id", "status", "priority", "issue_type", "order_id", "description", "created_at"],
+    },
+    "policy": {
+        "hits": ["metadata.title", "text"],
+    },
+    "recommend": {
+        "error": [],
+        "recommendations": ["name", "price", "brand", "avg_rating", "reason"],
+        "is_fallback": [],
+    },
+}
+
+# 컬럼별 셀 최대 문자 수 ({의도: {섹션.컬럼: 문자 수}}, 0 = 제한 없음)
+# 정책 청크 본문은 답이 뒷부분에 있을 수 있으므로 셀 단위로 자르지 않고 토큰 예산으로만 자름
+DEFAULT_CELL_LIMITS: Dict[str, Dict[str, int]] = {
+    "policy": {"hits.text": 0},
+}
+
+# 예산에 걸린 행을 잘라서라도 넣을 최소 남은 토큰 수
+_MIN_PARTIAL_TOKENS = 32
+
+_WORD_RE = re.compile(r"[가-힣ㄱ-ㆎ一-鿿]|[^\s가-힣ㄱ-ㆎ一-鿿]+")
+_CJK_RE = re.compile(r"[가-힣ㄱ-ㆎ一-鿿]")
+
+_encoders: Dict[str, Any] = {}
+
+
+def approx_tokens(text: str) -> int:
+    """tiktoken 없이 근사 (한글/한자 1자 = 1토큰, 그 외 연속 문자열 4자 = 1토큰)."""
+    count = 0
+    for piece in _WORD_RE.findall(text):
+        count += 1 if _CJK_RE.match(piece) else math.ceil(len(piece) / 4)
+    return count
+
+
+def _get_encoder(name: str) -> Optional[Any]:
+    if name not in _encoders:
+        try:
+            import tiktoken
+
+            _encoders[name] = tiktoken.get_encoding(name)
+        except Exception:
+            # 미설치 또는 인코딩 파일 다운로드 불가 → 근사 사용
+            _encoders[name] = None
+    return _encoders[name]
+
+
+def count_tokens(text: str, encoding: Optional[str] = None) -> int:
+    """텍스트 토큰 수 (tiktoken 인코딩 또는 근사)."""
+    if not text:
+        return 0
+    encoder = _get_encoder(encoding or get_config().llm.context.tokenizer)
+    if encoder is not None:
+        return len(encoder.encode(text))
+    return approx_tokens(text)
+
+
+@dataclass
+class BuiltContext:
+    """렌더링된 컨텍스트."""
+
+    text: str
+    tokens: int
+    budget: int
+    truncated: List[str] = field(default_factory=list)  # 잘리거나 생략된 섹션
+
+
+def _resolve(data: Any, path: str) -> Any:
+    """점 경로로 중첩 값 조회 (없으면 None)."""
+    for part in path.split("."):
+        if not isinstance(data, dict):
+            return None
+        data = data.get(part)
+    return data
+
+
+def _format_value(value: Any, max_chars: int) -> str:
+    if value is None:
+        return "-"
+    if isinstance(value, datetime):
+        return value.strftime("%Y-%m-%d %H:%M")
+    if isinstance(value, date):
+        return value.isoformat()
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    if isinstance(value, (dict, list)):
+        value = json.dumps(value, ensure_ascii=False, default=str)
+    text = " ".join(str(value).split())
+    if max_chars and len(text) > max_chars:
+        text = text[: max_chars - 1] + "…"
+    return text
+
+
+class ContextBuilder:
+    """의도별 projection과 토큰 예산으로 컨텍스트 렌더링."""
+
+    def __init__(
+        self,
+        budgets: Optional[Dict[str, int]] = None,
+        default_budget: Optional[int] = None,
+        projections: Optional[Dict[str, Dict[str, List[str]]]] = None,
+        max_cell_chars: Optional[int] = None,
+        counter: Optional[Callable[[str], int]] = None,
+    ) -> None:
+        """빌더 초기화 (인자가 None이면 configs/llm.yaml context 값 사용).
+
+        Args:
+            budgets: 의도별 컨텍스트 토큰 예산
+            default_budget: budgets에 없는 의도의 예산
+            projections: 의도별 projection (지정한 의도만 기본값을 대체)
+            max_cell_chars: 셀(필드 값) 최대 문자 수
+            counter: 토큰 카운터 (기본: count_tokens)
+        """
+        cfg = get_config().llm.context
+        self.budgets = dict(cfg.budgets if budgets is None else budgets)
+        self.default_budget = cfg.default_budget if default_budget is None else default_budget
+        self.projections = dict(DEFAULT_PROJECTIONS)
+        self.projections.update(cfg.fields if projections is None else projections)
+        self.max_cell_chars = cfg.max_cell_chars if max_cell_chars is None else max_cell_chars
+        self.cell_limits = dict(DEFAULT_CELL_LIMITS)
+        self.count = counter or count_tokens
+
+    def budget_for(self, intent: str) -> int:
+        return int(self.budgets.get(intent, self.default_budget))
+
+    def _sections(self, context: Dict[str, Any], intent: str) -> List[Tuple[str, Any, List[str]]]:
+        projection = self.projections.get(intent)
+        if projection is None:
+            # projection 없는 의도는 모든 최상위 키를 순서대로 사용
+            return [(key, value, []) for key, value in context.items()]
+        sections = []
+        for path, columns in projection.items():
+            value = _resolve(context, path)
+            if value is not None and value != [] and value != {}:
+                sections.append((path, value, list(columns or [])))
+        return sections
+
+    def _render_section(
+        self, path: str, value: Any, columns: Sequence[str], intent: str = ""
+    ) -> Tuple[List[str], List[str]]:
+        """섹션을 (헤더 줄, 행 목록)으로 렌더링."""
+        name = path.split(".")[-1]
+        limits = self.cell_limits.get(intent, {})
+
+        def cell(column: str) -> int:
+            return limits.get(f"{path}.{column}", self.max_cell_chars)
+
+        if isinstance(value, list):
+            if value and all(isinstance(v, dict) for v in value):
+                cols = list(columns) or list(dict.fromkeys(k for v in value for k in v))
+                header = f"{name} ({len(value)}건): " + " | ".join(c.split(".")[-1] for c in cols)
+                rows = [" | ".join(_format_value(_resolve(v, c), cell(c)) for c in cols) for v in value]
+                return [header], rows
+            return [f"{name} ({len(value)}건):"], [f"- {_format_value(v, cell(''))}" for v in value]
+        if isinstance(value, dict):
+            cols = list(columns) or list(value)
+            pairs = [f"{c.split('.')[-1]}={_format_value(_resolve(value, c), cell(c))}" for c in cols]
+            return [f"{name}: " + ", ".join(pairs)], []
+        return [f"{name}: {_format_value(value, cell(''))}"], []
+
+    def _fit(self, row: str, tokens: int) -> str:
+        """행을 tokens 이하로 잘라냄 (뒷부분 생략)."""
+        lo, hi = 0, len(row)
+        while lo < hi:
+            mid = (lo + hi + 1) // 2
+            if self.count(row[:mid] + "…") + 1 <= tokens:
+                lo = mid
+            else:
+                hi = mid - 1
+        return row[:lo] + "…"
+
+    def build(self, context: Dict[str, Any], intent: str) -> BuiltContext:
+        """컨텍스트를 예산 안에서 렌더링."""
+        budget = self.budget_for(intent)
+        lines: List[str] = []
+        truncated: List[str] = []
+        used = 0
+
+        for name, value, columns in self._sections(context or {}, intent):
+            header, rows = self._render_section(name, value, columns, intent)
+            header_text = "\n".join(header)
+            header_tokens = self.count(header_text) + 1
+            if used + header_tokens > budget:
+                truncated.append(name)
+                continue
+
+            kept: List[str] = []
+            section_tokens = header_tokens
+            partial = False
+            for i, row in enumerate(rows):
+                row_tokens = self.count(row) + 1
+                remaining = budget - used - section_tokens
+                if row_tokens > remaining:
+                    # 남은 예산이 충분하면 행 앞부분이라도 포함 (뒤따르는 "... 외 N건" 자리는 남김)
+                    rest = len(rows) - i - 1
+                    if rest:
+                        remaining -= self.count(f"... 외 {rest}건") + 1
+                    if remaining >= _MIN_PARTIAL_TOKENS:
+                        row = self._fit(row, remaining)
+                        kept.append(row)
+                        section_tokens += self.count(row) + 1
+                        partial = True
+                    break
+                kept.append(row)
+                section_tokens += row_tokens
+            if rows and not kept:
+                truncated.append(name)
+                continue
+
+            lines.extend(header)
+            lines.extend(kept)
+            used += section_tokens
+            if len(kept) < len(rows):
+                lines.append(f"... 외 {len(rows) - len(kept)}건")
+            if len(kept) < len(rows) or partial:
+                truncated.append(name)
+
+        text = "\n".join(lines)
+        return BuiltContext(text=text, tokens=self.count(text), budget=budget, truncated=truncated)
+
+
+def legacy_format_context(context: Dict[str, Any]) -> str:
+    """이전 방식 컨텍스트 (dict repr, context.enabled=false 또는 비교용)."""
+    lines = []
+    for key, value in context.items():
+        if isinstance(value, list):
+            lines.append(f"{key}:")
+            for item in value[:10]:  # 최대 10개
+                lines.append(f"  - {item}")
+        else:
+            lines.append(f"{key}: {value}")
+    return "\n".join(lines)
+
+
+def render_context(context: Dict[str, Any], intent: str) -> str:
+    """시스템 프롬프트에 붙일 컨텍스트 블록 (없으면 빈 문자열)."""
+    if not context:
+        return ""
+    if not get_config().llm.context.enabled:
+        return f"\n\n[제공된 데이터]\n{legacy_format_context(context)}"
+    built = get_context_builder().build(context, intent)
+    if built.truncated:
+        logger.debug(f"컨텍스트 예산 초과로 잘림 ({intent}, {built.budget} tokens): {built.truncated}")
+    return f"\n\n[제공된 데이터]\n{built.text}" if built.text else ""
+
+
+def record_prompt_tokens(intent: str, system_prompt: str, user_message: str) -> int:
+    """프롬프트 토큰 수 기록 (llm_prompt_tokens 히스토그램)."""
+    tokens = count_tokens(system_prompt) + count_tokens(user_message)
+    track_llm_prompt_tokens(intent, tokens)
+    return tokens
+
+
+_builder: Optional[ContextBuilder] = None
+
+
+def get_context_builder() -> ContextBuilder:
+    """전역 컨텍스트 빌더 반환."""
+    global _builder
+    if _builder is None:
+        _builder = ContextBuilder()
+    return _builder
+
+
+def reset_context_builder() -> None:
+    """전역 컨텍스트 빌더 리셋 (테스트용)."""
+    global _builder
+    _builder = None
@@ -0,0 +1,165 @@
+"""프로바이더 폴백 체인 헤징.
+
+순차 폴백은 느린 1순위 프로바이더가 타임아웃(기본 30초)될 때까지 기다린 뒤에야
+다음 프로바이더를 시도합니다. 헤징은 1순위가 임계값 안에 첫 바이트를 보내지
+않으면 다음 프로바이더 요청을 병렬로 시작하고, 먼저 성공한 응답을 쓰며 나머지는
+취소합니다.
+
+- 임계값: 고정(delay_ms) 또는 프로바이더별 관측 TTFB p95 (샘플이 충분할 때)
+- 동시에 진행하는 요청은 max_parallel개까지, 실패하면 다음 프로바이더로 폴백
+- 메트릭: llm_hedge_total{provider}(헤지 요청 시작), llm_hedge_wins_total{provider}(헤지 후 승리)
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence, Tuple
+
+from src.config import get_config
+from src.llm.client import watch_first_byte
+from src.llm.stats import LatencyTracker, get_ttfb_tracker
+from src.monitoring.metrics import track_llm_hedge
+
+logger = logging.getLogger(__name__)
+
+
+class AllProvidersFailed(RuntimeError):
+    """헤징한 모든 프로바이더가 실패."""
+
+    def __init__(self, errors: List[str]) -> None:
+        self.errors = errors
+        super().__init__(" | ".join(errors) if errors else "unknown error")
+
+
+@dataclass
+class HedgePolicy:
+    """헤징 임계값 정책."""
+
+    delay_ms: float = 3000.0
+    adaptive: bool = True
+    percentile: float = 95.0
+    min_samples: int = 20
+    min_delay_ms: float = 300.0
+    max_parallel: int = 2
+    tracker: LatencyTracker = field(default_factory=get_ttfb_tracker)
+
+    @classmethod
+    def from_config(cls) -> "HedgePolicy":
+        cfg = get_config().llm.hedge
+        return cls(
+            delay_ms=cfg.delay_ms,
+            adaptive=cfg.adaptive,
+            percentile=cfg.percentile,
+            min_samples=cfg.min_samples,
+            min_delay_ms=cfg.min_delay_ms,
+            max_parallel=cfg.max_parallel,
+        )
+
+    def delay_for(self, provider: str) -> float:
+        """provider 요청 후 다음 프로바이더를 시작하기까지 기다릴 시간 (초)."""
+        delay = self.delay_ms / 1000
+        if self.adaptive:
+            learned = self.tracker.percentile(provider, self.percentile, self.min_samples)
+            if learned is not None:
+                delay = learned
+        return max(delay, self.min_delay_ms / 1000)
+
+
+async def hedged_call(
+    providers: Sequence[str],
+    call: Callable[[str], Awaitable[Any]],
+    policy: Optional[HedgePolicy] = None,
+) -> Tuple[str, Any]:
+    """providers 순서로 헤징하며 call(provider) 실행.
+
+    Args:
+        providers: 시도할 프로바이더 (우선순위 순)
+        call: 프로바이더 이름을 받아 응답을 반환하는 코루틴 함수
+        policy: 헤징 정책 (기본: configs/llm.yaml hedge)
+
+    Returns:
+        (성공한 프로바이더, 응답)
+
+    Raises:
+        AllProvidersFailed: 모든 프로바이더 실패
+    """
+    policy = policy or HedgePolicy.from_config()
+    tracker = policy.tracker
+    pending: Dict[asyncio.Task, str] = {}
+    first_bytes: Dict[asyncio.Task, asyncio.Event] = {}
+    errors: List[str] = []
+    next_index = 0
+    hedged = False
+
+    async def _run(provider: str, ready: asyncio.Future) -> Any:
+        with watch_first_byte() as event:
+            ready.set_result(event)
+            start = time.perf_counter()
+
+            async def _record_ttfb() -> None:
+                await event.wait()
+                tracker.record(provider, time.perf_counter() - start)
+
+            recorder = asyncio.ensure_future(_record_ttfb())
+            try:
+                return await call(provider)
+            finally:
+                recorder.cancel()
+
+    async def _launch(is_hedge: bool) -> None:
+        nonlocal next_index
+        provider = providers[next_index]
+        next_index += 1
+        ready: asyncio.Future = asyncio.get_running_loop().create_future()
+        task = asyncio.ensure_future(_run(provider, ready))
+        pending[task] = provider
+        first_bytes[task] = await ready
+        if is_hedge:
+            track_llm_hedge(provider, "hedge")
+            logger.info(f"[llm_hedge] {provider} 헤지 요청 시작")
+
+    if not providers:
+        raise AllProvidersFailed([])
+
+    await _launch(is_hedge=False)
+    last_launch = time.perf_counter()
+    try:
+        while pending:
+            timeout = None
+            can_hedge = next_index < len(providers) and len(pending) < max(1, policy.max_parallel)
+            waiting = not any(first_bytes[t].is_set() for t in pending)
+            if can_hedge and waiting:
+                newest = list(pending.values())[-1]
+                timeout = max(0.0, policy.delay_for(newest) - (time.perf_counter() - last_launch))
+
+            done, _ = await asyncio.wait(list(pending), timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+            if not done:
+                if not any(first_bytes[t].is_set() for t in pending):
+                    hedged = True
+                    await _launch(is_hedge=True)
+                    last_launch = time.perf_counter()
+                continue
+
+            for task in done:
+                provider = pending.pop(task)
+                first_bytes.pop(task, None)
+                exc = task.exception()
+                if exc is None:
+                    if hedged:
+                        track_llm_hedge(provider, "win")
+                    return provider, task.result()
+                errors.append(f"{provider}: {type(exc).__name__}: {str(exc)[:100]}")
+                logger.warning(f"[llm_hedge] {provider} 실패: {exc}")
+
+            # 진행 중인 요청이 없으면 다음 프로바이더로 폴백
+            if not pending and next_index < len(providers):
+                await _launch(is_hedge=False)
+                last_launch = time.perf_counter()
+    finally:
+        for task in pending:
+            task.cancel()
+
+    raise AllProvidersFailed(errors)
@@ -0,0 +1,137 @@
+"""LLM 프로바이더별 HTTP 세션 풀.
+
+(provider, base_url)마다 오래 유지되는 aiohttp.ClientSession을 하나씩 두고
+모든 LLMClient가 공유합니다. 요청마다 세션을 새로 만들면 DNS 조회, TCP/TLS
+핸드셰이크를 매번 다시 하므로 첫 바이트까지의 시간이 그만큼 늘어납니다.
+
+- TCPConnector: 전체/호스트별 연결 수 제한, keep-alive, DNS 캐시
+- FastAPI lifespan에서 warmup() 후 종료 시 close()
+- 세션은 생성한 이벤트 루프에 묶이므로 루프가 바뀌면 새로 만듭니다
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+import aiohttp
+
+from src.config import get_config
+
+logger = logging.getLogger(__name__)
+
+SessionKey = Tuple[str, str]  # (provider, base_url)
+
+
+class LLMSessionPool:
+    """(provider, base_url)별 장수명 세션 레지스트리."""
+
+    def __init__(
+        self,
+        limit: Optional[int] = None,
+        limit_per_host: Optional[int] = None,
+        keepalive_timeout: Optional[float] = None,
+        dns_ttl: Optional[int] = None,
+        connect_timeout: Optional[float] = None,
+    ) -> None:
+        """풀 초기화 (인자가 None이면 configs/llm.yaml pool 값 사용).
+
+        Args:
+            limit: 세션별 전체 연결 수 상한
+            limit_per_host: 호스트별 연결 수 상한
+            keepalive_timeout: 유휴 연결 유지 시간 (초)
+            dns_ttl: DNS 캐시 유지 시간 (초)
+            connect_timeout: 연결 수립 제한 시간 (초)
+        """
+        cfg = get_config().llm.pool
+        self.limit = cfg.limit if limit is None else limit
+        self.limit_per_host = cfg.limit_per_host if limit_per_host is None else limit_per_host
+        self.keepalive_timeout = cfg.keepalive_timeout if keepalive_timeout is None else keepalive_timeout
+        self.dns_ttl = cfg.dns_ttl if dns_ttl is None else dns_ttl
+        self.connect_timeout = cfg.connect_timeout if connect_timeout is None else connect_timeout
+
+        self._sessions: Dict[SessionKey, Tuple[asyncio.AbstractEventLoop, aiohttp.ClientSession]] = {}
+        self.created = 0
+
+    def _new_session(self, total_timeout: float) -> aiohttp.ClientSession:
+        connector = aiohttp.TCPConnector(
+            limit=self.limit,
+            limit_per_host=self.limit_per_host,
+            keepalive_timeout=self.keepalive_timeout,
+            ttl_dns_cache=self.dns_ttl,
+            use_dns_cache=True,
+        )
+        timeout = aiohttp.ClientTimeout(total=total_timeout, connect=self.connect_timeout)
+        self.created += 1
+        return aiohttp.ClientSession(connector=connector, timeout=timeout)
+
+    def session(self, provider: str, base_url: Optional[str], timeout: float = 30) -> aiohttp.ClientSession:
+        """(provider, base_url) 세션 반환 (없거나 닫혔거나 루프가 다르면 생성).
+
+        Args:
+            timeout: 새 세션의 요청 전체 제한 시간 (초)
+        """
+        loop = asyncio.get_running_loop()
+        key = (provider, base_url or "")
+        entry = self._sessions.get(key)
+        if entry is not None and entry[0] is loop and not entry[1].closed:
+            return entry[1]
+
+        session = self._new_session(timeout)
+        self._sessions[key] = (loop, session)
+        return session
+
+    async def warmup(self, configs: Iterable[Any]) -> None:
+        """설정된 프로바이더 세션을 미리 생성 (lifespan 시작 시)."""
+        for cfg in configs:
+            if cfg.base_url:
+                self.session(cfg.provider, cfg.base_url, cfg.timeout)
+
+    async def close(self) -> None:
+        """현재 루프에 속한 세션 닫기 (다른 루프의 세션은 참조만 제거)."""
+        loop = asyncio.get_running_loop()
+        sessions, self._sessions = self._sessions, {}
+        for owner, session in sessions.values():
+            if owner is loop and not session.closed:
+                try:
+                    await session.close()
+                except Exception as e:
+                    logger.debug(f"LLM 세션 종료 실패: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        """세션별 연결 상태."""
+        sessions = {}
+        for (provider, base_url), (_loop, session) in self._sessions.items():
+            connector = session.connector
+            sessions[f"{provider}:{base_url}"] = {
+                "closed": session.closed,
+                "limit": connector.limit if connector else 0,
+                "limit_per_host": connector.limit_per_host if connector else 0,
+            }
+        return {"sessions": sessions, "created": self.created}
+
+
+_pool: Optional[LLMSessionPool] = None
+
+
+def get_llm_pool() -> LLMSessionPool:
+    """전역 LLM 세션 풀 반환."""
+    global _pool
+    if _pool is None:
+        _pool = LLMSessionPool()
+    return _pool
+
+
+async def close_llm_pool() -> None:
+    """전역 LLM 세션 풀 종료 (앱 종료 시 호출)."""
+    global _pool
+    if _pool is not None:
+        await _pool.close()
+        _pool = None
+
+
+def reset_llm_pool() -> None:
+    """전역 LLM 세션 풀 리셋 (테스트용, 세션은 닫지 않음)."""
+    global _pool
+    _pool = None
@@ -0,0 +1,165 @@
+"""프롬프트 레지스트리.
+
+configs/llm.yaml의 prompts 경로를 한 번만 읽고, 프롬프트 파일을 검증/캐시합니다.
+파일 mtime이 바뀌면 다음 조회 때 다시 읽으므로(확인 주기 check_interval)
+서버를 재시작하지 않고 프롬프트를 수정할 수 있습니다.
+
+의도별 시스템 프롬프트("system" + 의도 프롬프트)는 미리 합쳐 두어
+요청마다 파일 I/O나 문자열 조합이 일어나지 않습니다.
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from src.config import get_config
+
+logger = logging.getLogger(__name__)
+
+SYSTEM_PROMPT = "system"
+
+
+@dataclass
+class PromptTemplate:
+    """로드한 프롬프트 파일."""
+
+    name: str
+    path: Optional[Path]
+    text: str = ""
+    mtime_ns: int = 0
+    error: Optional[str] = None
+
+
+class PromptRegistry:
+    """프롬프트 템플릿 캐시 (mtime 기반 핫 리로드)."""
+
+    def __init__(
+        self,
+        prompt_paths: Optional[Dict[str, str]] = None,
+        check_interval: float = 1.0,
+    ) -> None:
+        """레지스트리 초기화.
+
+        Args:
+            prompt_paths: 프롬프트 이름 → 파일 경로 (기본: llm.yaml의 prompts)
+            check_interval: 파일 변경 확인 최소 간격 (초, 0이면 매번 확인)
+        """
+        if prompt_paths is None:
+            prompt_paths = (get_config().get_raw("llm") or {}).get("prompts", {}) or {}
+        self._paths: Dict[str, Path] = {name: Path(p) for name, p in prompt_paths.items() if p}
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._templates: Dict[str, PromptTemplate] = {}
+        self._checked_at: Dict[str, float] = {}
+        # intent → ((system mtime, intent mtime), 합친 프롬프트)
+        self._combined: Dict[str, Tuple[Tuple[int, int], str]] = {}
+        self.loads = 0
+
+        for problem in self.validate():
+            logger.warning(f"프롬프트 검증 실패: {problem}")
+
+    @property
+    def names(self) -> List[str]:
+        return sorted(self._paths)
+
+    def validate(self) -> List[str]:
+        """모든 프롬프트 파일을 로드하고 문제 목록 반환 (없음/빈 파일/인코딩 오류)."""
+        problems = []
+        for name in self.names:
+            template = self._template(name, force=True)
+            if template.error:
+                problems.append(f"{name}: 읽기 실패 ({self._paths[name]}: {template.error})")
+            elif template.mtime_ns == 0:
+                problems.append(f"{name}: 파일 없음 ({self._paths[name]})")
+            elif not template.text.strip():
+                problems.append(f"{name}: 빈 프롬프트 ({self._paths[name]})")
+        return problems
+
+    def _template(self, name: str, force: bool = False) -> PromptTemplate:
+        path = self._paths.get(name)
+        if path is None:
+            return PromptTemplate(name=name, path=None)
+
+        now = time.monotonic()
+        cached = self._templates.get(name)
+        if (
+            cached is not None
+            and not force
+            and now - self._checked_at.get(name, 0.0) < self.check_interval
+        ):
+            return cached
+
+        with self._lock:
+            self._checked_at[name] = now
+            try:
+                mtime_ns = path.stat().st_mtime_ns
+            except OSError:
+                mtime_ns = 0
+            if cached is not None and cached.mtime_ns == mtime_ns:
+                return cached
+
+            text, error = "", None
+            if mtime_ns:
+                try:
+                    text = path.read_text(encoding="utf-8")
+                except (OSError, UnicodeDecodeError) as e:
+                    error = str(e)
+                    logger.error(f"프롬프트 읽기 실패: {name} ({path}): {e}")
+            template = PromptTemplate(name=name, path=path, text=text, mtime_ns=mtime_ns, error=error)
+            self._templates[name] = template
+            self.loads += 1
+            if cached is not None:
+                logger.info(f"프롬프트 다시 로드: {name} ({path})")
+            return template
+
+    def get(self, name: str) -> str:
+        """프롬프트 텍스트 (없으면 빈 문자열)."""
+        return self._template(name).text
+
+    def system_prompt(self, intent: str) -> str:
+        """공통 시스템 프롬프트 + 의도 프롬프트."""
+        base = self._template(SYSTEM_PROMPT)
+        extra = self._template(intent) if intent != SYSTEM_PROMPT else PromptTemplate(name=intent, path=None)
+        key = (base.mtime_ns, extra.mtime_ns)
+
+        cached = self._combined.get(intent)
+        if cached is not None and cached[0] == key:
+            return cached[1]
+
+        combined = f"{base.text}\n\n{extra.text}" if extra.text else base.text
+        self._combined[intent] = (key, combined)
+        return combined
+
+    def render_system(self, intent: str, context_block: str = "") -> str:
+        """시스템 프롬프트 뒤에 컨텍스트 블록을 붙인 최종 시스템 메시지."""
+        return f"{self.system_prompt(intent)}{context_block}"
+
+    def reload(self) -> List[str]:
+        """모든 프롬프트를 강제로 다시 로드하고 검증 결과 반환."""
+        with self._lock:
+            self._templates.clear()
+            self._checked_at.clear()
+            self._combined.clear()
+        return self.validate()
+
+
+_registry: Optional[PromptRegistry] = None
+
+
+def get_prompt_registry() -> PromptRegistry:
+    """전역 프롬프트 레지스트리 반환."""
+    global _registry
+    if _registry is None:
+        _registry = PromptRegistry()
+    return _registry
+
+
+def reset_prompt_registry() -> None:
+    """전역 프롬프트 레지스트리 리셋 (테스트용)."""
+    global _registry
+    _registry = None
@@ -1,11 +1,22 @@
 from __future__ import annotations
 
+import asyncio
 import logging
 import os
-from typing import Any, Dict, List, Optional
+import time
+from dataclasses import dataclass, field
+from typing import Any, AsyncGenerator, Awaitable, Dict, List, Optional, Tuple
 
 from src.config import get_config
-from .client import LLMClient, LLMConfig, load_prompt
+from src.core.tracer import add_trace
+from src.monitoring.metrics import track_llm_route
+from .cache import cached_chat
+from .context import record_prompt_tokens, render_context
+from .client import LLMClient, LLMConfig, watch_first_byte
+from .hedging import AllProvidersFailed, hedged_call
+from .prompts import get_prompt_registry
+from .stats import ProviderStats, get_provider_stats
+from .usage import usage_intent
 
 logger = logging.getLogger(__name__)
 
@@ -29,10 +40,11 @@ def _build_llm_config(provider: str) -> LLMConfig:
     llm = get_config().llm
     pcfg = _provider_cfg(provider)
 
+    # provider 설정에 base_url이 있으면 우선 (예: 스텁 서버)
     base_urls = {
-        "openai": "https://api.openai.com/v1",
-        "anthropic": "https://api.anthropic.com",
-        "google": "https://generativelanguage.googleapis.com",
+        "openai": pcfg.get("base_url") or "https://api.openai.com/v1",
+        "anthropic": pcfg.get("base_url") or "https://api.anthropic.com",
+        "google": pcfg.get("base_url") or "https://generativelanguage.googleapis.com/v1beta",
         "local": pcfg.get("base_url") or getattr(llm, 'base_url', None) or "http://localhost:8080/v1",
     }
 
@@ -72,6 +84,64 @@ def _select_provider(intent: str) -> str:
     return fb.get("provider") or get_config().llm.provider
 
 
+def _eligible_providers(intent: str) -> List[str]:
+    """의도에 쓸 수 있는 provider 목록 (규칙의 providers 또는 선택 provider + 폴백 체인)."""
+    raw = get_config().get_raw("llm") or {}
+    routing = raw.get("routing", {}) or {}
+    if routing.get("enabled", False):
+        for r in routing.get("rules", []):
+            intents = (r.get("when", {}) or {}).get("intents", [])
+            if intents and intent in intents and r.get("providers"):
+                return list(dict.fromkeys(r["providers"]))
+
+    first = _select_provider(intent)
+    fb_chain = (routing.get("fallback", {}) or {}).get("chain", [])
+    return [first] + [p for p in fb_chain if p != first]
+
+
+def _rank_providers(intent: str, available: Dict[str, LLMConfig]) -> Dict[str, LLMConfig]:
+    """예상 지연(EWMA) 순으로 provider 정렬 후 결정/점수를 트레이서에 기록."""
+    cfg = get_config().llm.adaptive_routing
+    keys = {ProviderStats.key(p, c.model): p for p, c in available.items()}
+    order, scores, explored = get_provider_stats().rank(list(keys), explore=cfg.explore)
+    ranked = {keys[k]: available[keys[k]] for k in order}
+
+    first = next(iter(ranked))
+    track_llm_route(first, "explore" if explored else "best", scores)
+    add_trace(
+        "llm", "LLM 라우팅",
+        input_data={"intent": intent, "mode": "adaptive"},
+        output_data={"provider_chain": list(ranked)},
+        metadata={"scores_ms": {k: round(v * 1000, 1) for k, v in scores.items()}, "explored": explored},
+    )
+    logger.info(f"[llm_router] adaptive: chain={list(ranked)}, explored={explored}")
+    return ranked
+
+
+async def _observed(key: str, call: Awaitable[str]) -> str:
+    """호출 결과(응답 시간, 첫 바이트 시간, 오류)를 프로바이더 통계에 기록."""
+    stats = get_provider_stats()
+    start = time.perf_counter()
+    ttft: List[float] = []
+
+    with watch_first_byte() as event:
+
+        async def _wait_first_byte() -> None:
+            await event.wait()
+            ttft.append(time.perf_counter() - start)
+
+        waiter = asyncio.ensure_future(_wait_first_byte())
+        try:
+            result = await call
+        except Exception:
+            stats.record(key, ttft=ttft[0] if ttft else None, error=True)
+            raise
+        finally:
+            waiter.cancel()
+    stats.record(key, latency=time.perf_counter() - start, ttft=ttft[0] if ttft else None)
+    return result
+
+
 def _provider_available(cfg: LLMConfig) -> bool:
     if cfg.provider in ("openai", "anthropic", "google"):
         return bool(cfg.api_key)
@@ -80,6 +150,82 @@ def _provider_available(cfg: LLMConfig) -> bool:
     return True
 
 
+def configured_provider_configs() -> List[LLMConfig]:
+    """라우팅에 쓰일 수 있는 provider 설정 목록 (세션 풀 warmup용)."""
+    raw = get_config().get_raw("llm") or {}
+    routing = raw.get("routing", {}) or {}
+    names = [get_config().llm.provider]
+    names += [r.get("provider") for r in routing.get("rules", []) if r.get("provider")]
+    fb = routing.get("fallback", {}) or {}
+    names += [fb.get("provider")] + list(fb.get("chain", []))
+
+    configs: List[LLMConfig] = []
+    for name in dict.fromkeys(n for n in names if n):
+        cfg = _build_llm_config(name)
+        if _provider_available(cfg):
+            configs.append(cfg)
+    return configs
+
+
+@dataclass
+class _RoutePlan:
+    """라우팅 한 번에 쓸 provider 순서와 프롬프트."""
+
+    providers: List[str]
+    available: Dict[str, LLMConfig]
+    system_prompt: str
+    context_str: str
+    full_system: str
+    messages: List[Dict[str, str]]
+    adaptive: bool
+    errors: List[str] = field(default_factory=list)
+
+
+def _plan_route(context: Dict[str, Any], user_message: str, intent: str) -> _RoutePlan:
+    """선택 provider + fallback 체인 (적응형 라우팅이면 예상 지연 순)과 프롬프트 준비."""
+    providers = _eligible_providers(intent)
+    adaptive = get_config().llm.adaptive_routing.enabled
+
+    logger.info(f"[llm_router] intent={intent}, provider_chain={providers}")
+
+    # 의도별 projection/토큰 예산으로 컨텍스트 압축 (시스템 프롬프트는 레지스트리에서 미리 합친 값 사용)
+    context_str = render_context(context, intent)
+    system_prompt = get_prompt_registry().system_prompt(intent)
+    full_system = f"{system_prompt}{context_str}"
+    record_prompt_tokens(intent, full_system, user_message)
+
+    errors: List[str] = []
+    available: Dict[str, LLMConfig] = {}
+    for prov in providers:
+        cfg = _build_llm_config(prov)
+        if not _provider_available(cfg):
+            err_msg = f"{prov}: API 키/URL 없음"
+            errors.append(err_msg)
+            logger.warning(f"[llm_router] {err_msg}, 다음 provider로 폴백")
+            continue
+        available[prov] = cfg
+
+    if adaptive and available:
+        available = _rank_providers(intent, available)
+
+    return _RoutePlan(
+        providers=providers,
+        available=available,
+        system_prompt=system_prompt,
+        context_str=context_str,
+        full_system=full_system,
+        messages=[{"role": "user", "content": user_message}],
+        adaptive=adaptive,
+        errors=errors,
+    )
+
+
+def _routing_failed(plan: _RoutePlan) -> RuntimeError:
+    error_detail = " | ".join(plan.errors) if plan.errors else "unknown error"
+    logger.error(f"[llm_router] 모든 provider 실패: {error_detail}")
+    return RuntimeError(f"LLM 라우팅 실패 (시도: {plan.providers}): {error_detail}")
+
+
 async def generate_routed_response(
     context: Dict[str, Any],
     user_message: str,
@@ -98,59 +244,133 @@ async def generate_routed_response(
     Raises:
         RuntimeError: 모든 provider가 실패한 경우
     """
-    raw = get_config().get_raw("llm") or {}
-    routing = raw.get("routing", {})
+    plan = _plan_route(context, user_message, intent)
+    available, errors, adaptive = plan.available, plan.errors, plan.adaptive
 
-    # 선택 provider + fallback 체인 순서대로 시도
-    first = _select_provider(intent)
-    fb_chain = (routing.get("fallback", {}) or {}).get("chain", [])
-    providers: List[str] = [first] + [p for p in fb_chain if p != first]
+    async def _call(prov: str) -> str:
+        cfg = available[prov]
+        client = LLMClient(cfg)  # 세션은 (provider, base_url) 풀에서 공유
+        logger.info(f"[llm_router] {prov}/{cfg.model} 호출 시도...")
 
-    logger.info(f"[llm_router] intent={intent}, provider_chain={providers}")
+        def _chat() -> Awaitable[str]:
+            call = client.chat(plan.messages, system_prompt=plan.full_system)
+            # 캐시 적중은 provider 지연이 아니므로 실제 호출만 기록
+            return _observed(ProviderStats.key(prov, cfg.model), call) if adaptive else call
 
-    errors: List[str] = []
-    last_err: Optional[Exception] = None
-
-    # 공통 프롬프트 구성
-    system_prompt = load_prompt("system")
-    intent_prompt = load_prompt(intent)
-    if intent_prompt:
-        system_prompt = f"{system_prompt}\n\n{intent_prompt}"
-
-    # 간단 컨텍스트 플래튼
-    ctx_lines: List[str] = []
-    for k, v in (context or {}).items():
-        ctx_lines.append(f"{k}: {v}")
-    context_str = "\n\n[제공된 데이터]\n" + "\n".join(ctx_lines) if ctx_lines else ""
-    full_system = f"{system_prompt}{context_str}"
-    messages = [{"role": "user", "content": user_message}]
+        return await cached_chat(
+            _chat,
+            provider=cfg.provider,
+            model=cfg.model,
+            temperature=cfg.temperature,
+            intent=intent,
+            system_prompt=plan.system_prompt,
+            context=plan.context_str,
+            user_message=user_message,
+        )
 
-    for prov in providers:
-        cfg = _build_llm_config(prov)
-        if not _provider_available(cfg):
-            err_msg = f"{prov}: API 키/URL 없음"
-            errors.append(err_msg)
-            logger.warning(f"[llm_router] {err_msg}, 다음 provider로 폴백")
-            continue
+    with usage_intent(intent):
+        # 헤징: 느린 provider를 기다리지 않고 다음 provider를 병렬로 시작
+        if get_config().llm.hedge.enabled and len(available) > 1:
+            try:
+                prov, response = await hedged_call(list(available), _call)
+                logger.info(f"[llm_router] {prov} 성공 (hedging)")
+                return response
+            except AllProvidersFailed as e:
+                errors.extend(e.errors)
+        else:
+            for prov in available:
+                try:
+                    response = await _call(prov)
+                    logger.info(f"[llm_router] {prov} 성공")
+                    return response
+                except Exception as e:
+                    err_msg = f"{prov}: {type(e).__name__}: {str(e)[:100]}"
+                    errors.append(err_msg)
+                    logger.warning(f"[llm_router] {err_msg}, 다음 provider로 폴백")
 
-        client = LLMClient(cfg)
+    # 모든 provider 실패
+    raise _routing_failed(plan)
+
+
+async def generate_routed_response_stream(
+    context: Dict[str, Any],
+    user_message: str,
+    intent: str,
+) -> AsyncGenerator[str, None]:
+    """의도 기반 LLM 라우팅으로 스트리밍 응답 생성.
+
+    generate_routed_response와 같은 provider 순서(폴백 체인, 적응형 라우팅)로
+    스트림을 열고, 첫 토큰이 도착한 provider의 스트림을 이어서 전달합니다.
+    첫 토큰 전에 실패하면 다음 provider로 폴백하고(헤징이 켜져 있으면 첫 토큰이
+    늦을 때 다음 provider 스트림을 병렬로 시작), 첫 토큰 이후의 오류는 그대로
+    전파합니다. 응답 캐시는 거치지 않습니다.
+
+    Args:
+        context: 도구 실행 결과 등 컨텍스트 데이터
+        user_message: 사용자 메시지
+        intent: 분류된 의도
+
+    Yields:
+        응답 텍스트 청크
+
+    Raises:
+        RuntimeError: 모든 provider가 첫 토큰 전에 실패한 경우
+    """
+    plan = _plan_route(context, user_message, intent)
+    available, errors, adaptive = plan.available, plan.errors, plan.adaptive
+    stats = get_provider_stats()
+
+    async def _open(prov: str) -> Tuple[AsyncGenerator[str, None], str, float]:
+        """스트림을 열고 첫 청크까지 읽음 (첫 청크 전 실패는 예외로 전달)."""
+        cfg = available[prov]
+        logger.info(f"[llm_router] {prov}/{cfg.model} 스트리밍 시도...")
+        stream = LLMClient(cfg).chat_stream(plan.messages, system_prompt=plan.full_system)
+        start = time.perf_counter()
         try:
-            logger.info(f"[llm_router] {prov}/{cfg.model} 호출 시도...")
-            response = await client.chat(messages, system_prompt=full_system)
-            logger.info(f"[llm_router] {prov} 성공")
-            return response
-        except Exception as e:
-            err_msg = f"{prov}: {type(e).__name__}: {str(e)[:100]}"
-            errors.append(err_msg)
-            last_err = e
-            logger.warning(f"[llm_router] {err_msg}, 다음 provider로 폴백")
-        finally:
+            first = await stream.__anext__()
+        except StopAsyncIteration:
+            first = ""
+        except BaseException as e:
+            await stream.aclose()
+            if adaptive and isinstance(e, Exception):
+                stats.record(ProviderStats.key(prov, cfg.model), error=True)
+            raise
+        return stream, first, start
+
+    with usage_intent(intent):
+        opened: Optional[Tuple[str, Tuple[AsyncGenerator[str, None], str, float]]] = None
+        if get_config().llm.hedge.enabled and len(available) > 1:
             try:
-                await client.close()
-            except Exception:
-                pass
+                opened = await hedged_call(list(available), _open)
+            except AllProvidersFailed as e:
+                errors.extend(e.errors)
+        else:
+            for prov in available:
+                try:
+                    opened = prov, await _open(prov)
+                    break
+                except Exception as e:
+                    err_msg = f"{prov}: {type(e).__name__}: {str(e)[:100]}"
+                    errors.append(err_msg)
+                    logger.warning(f"[llm_router] {err_msg}, 다음 provider로 폴백")
 
-    # 모든 provider 실패
-    error_detail = " | ".join(errors) if errors else "unknown error"
-    logger.error(f"[llm_router] 모든 provider 실패: {error_detail}")
-    raise RuntimeError(f"LLM 라우팅 실패 (시도: {providers}): {error_detail}")
+        if opened is None:
+            raise _routing_failed(plan)
+
+        prov, (stream, first, start) = opened
+        key = ProviderStats.key(prov, available[prov].model)
+        ttft = time.perf_counter() - start
+        logger.info(f"[llm_router] {prov} 스트리밍 시작")
+        try:
+            if first:
+                yield first
+            async for chunk in stream:
+                yield chunk
+        except Exception:
+            if adaptive:
+                stats.record(key, ttft=ttft, error=True)
+            raise
+        finally:
+            await stream.aclose()
+        if adaptive:
+            stats.record(key, latency=time.perf_counter() - start, ttft=ttft)
@@ -0,0 +1,225 @@
+"""LLM 프로바이더별 지연 통계.
+
+- LatencyTracker: 최근 N개의 첫 바이트까지 시간(TTFB)을 보관하고 백분위를 계산
+  (헤징 지연 임계값을 관측된 p95로 학습)
+- ProviderStats: (provider, model)별 응답 시간/TTFT/오류율 EWMA와 예상 지연 점수
+  (적응형 라우팅에서 사용)
+"""
+
+from __future__ import annotations
+
+import random
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Deque, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from src.config import get_config
+
+
+class LatencyTracker:
+    """프로바이더별 최근 지연 샘플 (스레드 안전)."""
+
+    def __init__(self, window: int = 200) -> None:
+        """트래커 초기화.
+
+        Args:
+            window: 프로바이더별 보관할 최근 샘플 수
+        """
+        self.window = window
+        self._lock = threading.Lock()
+        self._samples: Dict[str, Deque[float]] = {}
+
+    def record(self, provider: str, seconds: float) -> None:
+        """지연 샘플 추가 (초)."""
+        with self._lock:
+            samples = self._samples.get(provider)
+            if samples is None:
+                samples = self._samples[provider] = deque(maxlen=self.window)
+            samples.append(seconds)
+
+    def count(self, provider: str) -> int:
+        with self._lock:
+            return len(self._samples.get(provider, ()))
+
+    def percentile(self, provider: str, percent: float, min_samples: int = 1) -> Optional[float]:
+        """지연 백분위 (초, 샘플이 min_samples보다 적으면 None)."""
+        with self._lock:
+            samples = list(self._samples.get(provider, ()))
+        if len(samples) < max(1, min_samples):
+            return None
+        return float(np.percentile(samples, percent))
+
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        """프로바이더별 샘플 수와 p50/p95 (ms)."""
+        with self._lock:
+            items = {p: list(s) for p, s in self._samples.items()}
+        return {
+            p: {
+                "samples": len(s),
+                "p50_ms": float(np.percentile(s, 50)) * 1000,
+                "p95_ms": float(np.percentile(s, 95)) * 1000,
+            }
+            for p, s in items.items()
+            if s
+        }
+
+    def reset(self) -> None:
+        with self._lock:
+            self._samples.clear()
+
+
+_ttfb_tracker: Optional[LatencyTracker] = None
+
+
+def get_ttfb_tracker() -> LatencyTracker:
+    """전역 TTFB 트래커 반환."""
+    global _ttfb_tracker
+    if _ttfb_tracker is None:
+        _ttfb_tracker = LatencyTracker()
+    return _ttfb_tracker
+
+
+def reset_ttfb_tracker() -> None:
+    """전역 TTFB 트래커 리셋 (테스트용)."""
+    global _ttfb_tracker
+    _ttfb_tracker = None
+
+
+@dataclass
+class _EWMA:
+    latency: Optional[float] = None  # 성공 응답 시간 (초)
+    ttft: Optional[float] = None  # 첫 바이트까지 시간 (초)
+    error_rate: float = 0.0
+    samples: int = 0
+    updated_at: float = 0.0
+
+
+class ProviderStats:
+    """(provider, model)별 EWMA 지연/오류율 (스레드 안전)."""
+
+    def __init__(
+        self,
+        alpha: float = 0.2,
+        error_penalty: float = 10.0,
+        prior_latency: float = 2.0,
+        min_samples: int = 3,
+    ) -> None:
+        """통계 초기화.
+
+        Args:
+            alpha: EWMA 가중치 (클수록 최근 관측 반영이 빠름)
+            error_penalty: 오류 1회당 추가되는 예상 지연 (초, 폴백 비용)
+            prior_latency: 샘플이 min_samples보다 적은 대상의 예상 지연 (초)
+            min_samples: 관측값으로 점수를 매기기 위한 최소 샘플 수
+        """
+        self.alpha = alpha
+        self.error_penalty = error_penalty
+        self.prior_latency = prior_latency
+        self.min_samples = min_samples
+        self._lock = threading.Lock()
+        self._stats: Dict[str, _EWMA] = {}
+
+    @staticmethod
+    def key(provider: str, model: str) -> str:
+        return f"{provider}/{model}"
+
+    def _mix(self, old: Optional[float], value: float) -> float:
+        return value if old is None else (1 - self.alpha) * old + self.alpha * value
+
+    def record(
+        self,
+        key: str,
+        latency: Optional[float] = None,
+        ttft: Optional[float] = None,
+        error: bool = False,
+    ) -> None:
+        """호출 결과 기록 (실패 시 latency 없이 error=True)."""
+        with self._lock:
+            entry = self._stats.get(key)
+            if entry is None:
+                entry = self._stats[key] = _EWMA()
+            entry.samples += 1
+            entry.updated_at = time.time()
+            entry.error_rate = self._mix(entry.error_rate, 1.0 if error else 0.0)
+            if not error and latency is not None:
+                entry.latency = self._mix(entry.latency, latency)
+            if ttft is not None:
+                entry.ttft = self._mix(entry.ttft, ttft)
+
+    def _score(self, entry: Optional[_EWMA]) -> float:
+        if entry is None or entry.samples < self.min_samples:
+            return self.prior_latency
+        latency = entry.latency if entry.latency is not None else self.prior_latency
+        return latency + entry.error_rate * self.error_penalty
+
+    def score(self, key: str) -> float:
+        """예상 지연 (초) = EWMA 응답 시간 + 오류율 × error_penalty."""
+        with self._lock:
+            return self._score(self._stats.get(key))
+
+    def rank(
+        self,
+        keys: Sequence[str],
+        explore: float = 0.0,
+        rng: Optional[random.Random] = None,
+    ) -> Tuple[List[str], Dict[str, float], bool]:
+        """예상 지연 순으로 정렬 (explore 확률로 최선이 아닌 대상을 맨 앞으로).
+
+        Returns:
+            (정렬된 키, 키별 점수, 탐색 여부)
+        """
+        with self._lock:
+            scores = {k: self._score(self._stats.get(k)) for k in keys}
+        # 동점이면 설정 순서 유지
+        order = sorted(keys, key=lambda k: scores[k])
+        rng = rng or random
+        explored = len(order) > 1 and explore > 0 and rng.random() < explore
+        if explored:
+            order.insert(0, order.pop(rng.randrange(1, len(order))))
+        return order, scores, explored
+
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        """대상별 EWMA 값과 점수 (ms)."""
+        with self._lock:
+            items = list(self._stats.items())
+            return {
+                k: {
+                    "samples": e.samples,
+                    "latency_ms": round(e.latency * 1000, 1) if e.latency is not None else None,
+                    "ttft_ms": round(e.ttft * 1000, 1) if e.ttft is not None else None,
+                    "error_rate": round(e.error_rate, 3),
+                    "score_ms": round(self._score(e) * 1000, 1),
+                }
+                for k, e in items
+            }
+
+    def reset(self) -> None:
+        with self._lock:
+            self._stats.clear()
+
+
+_provider_stats: Optional[ProviderStats] = None
+
+
+def get_provider_stats() -> ProviderStats:
+    """전역 프로바이더 통계 반환 (configs/llm.yaml routing.adaptive 값 사용)."""
+    global _provider_stats
+    if _provider_stats is None:
+        cfg = get_config().llm.adaptive_routing
+        _provider_stats = ProviderStats(
+            alpha=cfg.alpha,
+            error_penalty=cfg.error_penalty,
+            prior_latency=cfg.prior_latency,
+            min_samples=cfg.min_samples,
+        )
+    return _provider_stats
+
+
+def reset_provider_stats() -> None:
+    """전역 프로바이더 통계 리셋 (테스트용)."""
+    global _provider_stats
+    _provider_stats = None
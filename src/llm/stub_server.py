@@ -0,0 +1,456 @@
+"""LLM 스텁 서버 (OpenAI / Anthropic / Gemini 형식).
+
+실제 모델 없이 LLM API 형식으로 답하는 부하/지연 테스트용 서버입니다. 연결 풀, 캐시,
+라우팅, 헤징, 스트리밍 등 LLM 호출 경로를 비용 없이 오프라인으로 벤치마크할 수 있습니다.
+
+- OpenAI: POST /v1/chat/completions (일반/스트리밍, stream_options.include_usage)
+- Anthropic: POST /v1/messages (일반/스트리밍 이벤트)
+- Gemini: POST /v1beta/models/{model}:generateContent, :streamGenerateContent?alt=sse
+- 지연 분포: fixed / uniform / normal / lognormal (seed로 재현 가능)
+- 토큰 속도: 스트리밍 토큰 간 지연(token_delay_ms) 또는 초당 토큰 수(tokens_per_second)
+- 오류 주입: 확률별 429(Retry-After) / 500 / timeout, 요청 헤더 X-Stub-Fault로 강제 가능
+- 의도별 고정 응답: 시스템 프롬프트로 의도를 판별 (헤더 X-Stub-Intent로 지정 가능)
+
+사용법:
+    python -m src.llm.stub_server --port 8080 --latency-ms 50
+    python -m src.llm.stub_server --latency-dist lognormal --latency-ms 800 --latency-spread 0.6 \\
+        --tokens-per-second 40 --fault 429=0.05 --fault timeout=0.01 --seed 7
+    # configs/llm.yaml: local.base_url http://localhost:8080/v1
+    #                   openai/anthropic/google.base_url로 각 형식을 스텁에 연결할 수 있음
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import math
+import random
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+from aiohttp import web
+
+from src.llm.context import approx_tokens
+
+DEFAULT_RESPONSE = "안녕하세요, 고객님. 문의하신 내용을 확인했습니다."
+
+# 의도별 고정 응답 (response를 지정하면 모든 의도에 그 응답 사용)
+DEFAULT_RESPONSES: Dict[str, str] = {
+    "order": "고객님의 주문은 현재 배송 중이며 1~2일 내 도착 예정입니다.",
+    "claim": "문의하신 내용으로 티켓이 접수되었습니다. 담당자가 확인 후 안내드리겠습니다.",
+    "policy": "환불은 상품 수령 후 7일 이내에 신청하실 수 있으며, 검수 후 3영업일 이내 처리됩니다.",
+    "recommend": "고객님의 구매 이력을 바탕으로 추천 상품을 안내해 드립니다.",
+    "intent_classification": json.dumps(
+        {"intent": "general", "sub_intent": None, "confidence": "low", "entities": {}, "reason": "stub"},
+        ensure_ascii=False,
+    ),
+    "general": DEFAULT_RESPONSE,
+}
+
+# 시스템 프롬프트(configs/prompts/*.txt)에 포함된 의도 표식 (앞쪽이 우선)
+INTENT_MARKERS: List[Tuple[str, str]] = [
+    ("intent_classification", "의도 분류기"),
+    ("claim", "클레임(환불/교환/불량) 관련 질문"),
+    ("order", "주문 관련 질문"),
+    ("policy", "정책 및 FAQ 관련 질문"),
+    ("recommend", "recommendations"),
+]
+
+FAULTS = ("429", "500", "timeout")
+
+
+@dataclass
+class LatencyProfile:
+    """첫 바이트까지의 지연 분포."""
+
+    dist: str = "fixed"  # fixed, uniform, normal, lognormal
+    mean_ms: float = 0.0  # lognormal은 중앙값
+    spread: float = 0.0  # uniform/normal: ms (반폭/표준편차), lognormal: sigma
+
+    def sample(self, rng: random.Random) -> float:
+        """지연 샘플 (ms, 0 이상)."""
+        if self.dist == "uniform":
+            value = rng.uniform(self.mean_ms - self.spread, self.mean_ms + self.spread)
+        elif self.dist == "normal":
+            value = rng.gauss(self.mean_ms, self.spread)
+        elif self.dist == "lognormal":
+            value = self.mean_ms * math.exp(rng.gauss(0.0, self.spread))
+        elif self.dist == "fixed":
+            value = self.mean_ms
+        else:
+            raise ValueError(f"지원하지 않는 지연 분포: {self.dist}")
+        return max(0.0, value)
+
+
+class StubLLMServer:
+    """aiohttp 기반 LLM API 스텁 서버."""
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        latency_ms: float = 0.0,
+        token_delay_ms: float = 0.0,
+        response: Optional[str] = None,
+        prompt_ms_per_1k_tokens: float = 0.0,
+        latency: Optional[LatencyProfile] = None,
+        tokens_per_second: float = 0.0,
+        responses: Optional[Dict[str, str]] = None,
+        faults: Optional[Dict[str, float]] = None,
+        timeout_s: float = 30.0,
+        seed: Optional[int] = None,
+    ) -> None:
+        """서버 초기화.
+
+        Args:
+            host: 바인드 주소
+            port: 포트 (0이면 임의 포트)
+            latency_ms: 첫 바이트까지의 고정 지연 (ms, latency 미지정 시)
+            token_delay_ms: 스트리밍 토큰 간 지연 (ms)
+            response: 모든 요청에 쓸 응답 텍스트 (None이면 의도별 응답)
+            prompt_ms_per_1k_tokens: 프롬프트 1천 토큰당 추가 지연 (ms, 프롬프트 처리 비용 모사)
+            latency: 첫 바이트 지연 분포 (지정 시 latency_ms 무시)
+            tokens_per_second: 스트리밍 초당 토큰 수 (0보다 크면 token_delay_ms 대신 사용)
+            responses: 의도별 응답 (DEFAULT_RESPONSES에 덮어씀)
+            faults: 오류 주입 확률 {"429": 0.05, "500": 0.01, "timeout": 0.01}
+            timeout_s: timeout 오류 시 응답 없이 기다리는 시간 (초, 이후 504)
+            seed: 지연/오류 난수 시드 (재현용)
+        """
+        self.host = host
+        self.port = port
+        self.latency = latency or LatencyProfile("fixed", latency_ms)
+        self.token_delay_ms = 1000.0 / tokens_per_second if tokens_per_second > 0 else token_delay_ms
+        self.response = response
+        self.responses = dict(DEFAULT_RESPONSES, **(responses or {}))
+        self.prompt_ms_per_1k_tokens = prompt_ms_per_1k_tokens
+        self.faults = {str(k): float(v) for k, v in (faults or {}).items()}
+        unknown = set(self.faults) - set(FAULTS)
+        if unknown:
+            raise ValueError(f"지원하지 않는 오류 유형: {sorted(unknown)} (가능: {FAULTS})")
+        self.timeout_s = timeout_s
+        self._rng = random.Random(seed)
+        self.requests = 0
+        self.intents: Dict[str, int] = {}
+        self.faults_injected: Dict[str, int] = {}
+        self._runner: Optional[web.AppRunner] = None
+
+    @property
+    def latency_ms(self) -> float:
+        return self.latency.mean_ms
+
+    @property
+    def base_url(self) -> str:
+        """OpenAI 형식 (openai/local provider base_url)."""
+        return f"http://{self.host}:{self.port}/v1"
+
+    @property
+    def anthropic_base_url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    @property
+    def google_base_url(self) -> str:
+        return f"http://{self.host}:{self.port}/v1beta"
+
+    def create_app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_post("/v1/chat/completions", self._chat_completions)
+        app.router.add_post("/v1/messages", self._messages)
+        app.router.add_post("/v1beta/models/{target}", self._generate_content)
+        return app
+
+    async def start(self) -> "StubLLMServer":
+        self._runner = web.AppRunner(self.create_app())
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self.host, self.port)
+        await site.start()
+        if self.port == 0:
+            self.port = self._runner.addresses[0][1]
+        return self
+
+    async def stop(self) -> None:
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def __aenter__(self) -> "StubLLMServer":
+        return await self.start()
+
+    async def __aexit__(self, *exc: Any) -> None:
+        await self.stop()
+
+    def stats(self) -> Dict[str, Any]:
+        return {"requests": self.requests, "intents": dict(self.intents), "faults": dict(self.faults_injected)}
+
+    # ---- 공통 처리 ----
+
+    def _intent(self, request: web.Request, prompt: str) -> str:
+        forced = request.headers.get("X-Stub-Intent")
+        if forced:
+            return forced
+        for intent, marker in INTENT_MARKERS:
+            if marker in prompt:
+                return intent
+        return "general"
+
+    def _text(self, intent: str) -> str:
+        if self.response is not None:
+            return self.response
+        return self.responses.get(intent) or self.responses.get("general") or DEFAULT_RESPONSE
+
+    @staticmethod
+    def _tokens(text: str) -> List[str]:
+        # 공백 단위로 나누되 공백을 보존해 합치면 원문이 되도록 함
+        words = text.split(" ")
+        return [w if i == 0 else f" {w}" for i, w in enumerate(words)]
+
+    def _pick_fault(self, request: web.Request) -> Optional[str]:
+        forced = request.headers.get("X-Stub-Fault")
+        if forced in FAULTS:
+            return forced
+        roll = self._rng.random()
+        for fault in FAULTS:
+            rate = self.faults.get(fault, 0.0)
+            if roll < rate:
+                return fault
+            roll -= rate
+        return None
+
+    async def _begin(self, request: web.Request, prompt: str) -> Tuple[str, int, Optional[web.Response]]:
+        """요청 집계, 지연 적용, 오류 주입. (의도, 프롬프트 토큰 수, 오류 응답)"""
+        self.requests += 1
+        intent = self._intent(request, prompt)
+        self.intents[intent] = self.intents.get(intent, 0) + 1
+        prompt_tokens = approx_tokens(prompt)
+
+        delay_ms = self.latency.sample(self._rng)
+        if self.prompt_ms_per_1k_tokens > 0:
+            delay_ms += prompt_tokens / 1000 * self.prompt_ms_per_1k_tokens
+
+        fault = self._pick_fault(request)
+        if fault is not None:
+            self.faults_injected[fault] = self.faults_injected.get(fault, 0) + 1
+            if fault == "timeout":
+                await asyncio.sleep(self.timeout_s)
+                return intent, prompt_tokens, web.json_response({"error": {"message": "stub timeout"}}, status=504)
+            if delay_ms > 0:
+                await asyncio.sleep(delay_ms / 1000)
+            if fault == "429":
+                return intent, prompt_tokens, web.json_response(
+                    {"error": {"type": "rate_limit_error", "message": "stub rate limit"}},
+                    status=429, headers={"Retry-After": "1"},
+                )
+            return intent, prompt_tokens, web.json_response(
+                {"error": {"type": "server_error", "message": "stub server error"}}, status=500,
+            )
+
+        if delay_ms > 0:
+            await asyncio.sleep(delay_ms / 1000)
+        return intent, prompt_tokens, None
+
+    async def _stream(self, request: web.Request, events: List[str]) -> web.StreamResponse:
+        """SSE 이벤트를 토큰 간 지연을 두고 전송 (events는 토큰 청크 사이사이에 지연)."""
+        resp = web.StreamResponse(headers={"Content-Type": "text/event-stream"})
+        await resp.prepare(request)
+        for i, event in enumerate(events):
+            if i > 0 and self.token_delay_ms > 0:
+                await asyncio.sleep(self.token_delay_ms / 1000)
+            await resp.write(event.encode("utf-8"))
+        await resp.write_eof()
+        return resp
+
+    @staticmethod
+    def _sse(data: Dict[str, Any], event: Optional[str] = None) -> str:
+        prefix = f"event: {event}\n" if event else ""
+        return f"{prefix}data: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+    # ---- OpenAI ----
+
+    def _usage(self, prompt_tokens: int, completion_tokens: int) -> Dict[str, int]:
+        return {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+        }
+
+    async def _chat_completions(self, request: web.Request) -> web.StreamResponse:
+        body = await request.json()
+        model = body.get("model", "stub")
+        prompt = "\n".join(str(m.get("content", "")) for m in body.get("messages", []))
+        intent, prompt_tokens, error = await self._begin(request, prompt)
+        if error is not None:
+            return error
+
+        text = self._text(intent)
+        tokens = self._tokens(text)
+        if not body.get("stream"):
+            return web.json_response({
+                "id": f"stub-{self.requests}",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": model,
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": text},
+                    "finish_reason": "stop",
+                }],
+                "usage": self._usage(prompt_tokens, len(tokens)),
+            })
+
+        events = [
+            self._sse({
+                "object": "chat.completion.chunk",
+                "model": model,
+                "choices": [{"index": 0, "delta": {"content": token}, "finish_reason": None}],
+            })
+            for token in tokens
+        ]
+        if (body.get("stream_options") or {}).get("include_usage"):
+            events.append(self._sse({
+                "object": "chat.completion.chunk", "model": model, "choices": [],
+                "usage": self._usage(prompt_tokens, len(tokens)),
+            }))
+        events.append("data: [DONE]\n\n")
+        return await self._stream(request, events)
+
+    # ---- Anthropic ----
+
+    async def _messages(self, request: web.Request) -> web.StreamResponse:
+        body = await request.json()
+        model = body.get("model", "stub")
+        system = body.get("system") or ""
+        if isinstance(system, list):
+            system = "\n".join(str(b.get("text", "")) for b in system)
+        prompt = "\n".join([system] + [str(m.get("content", "")) for m in body.get("messages", [])])
+        intent, prompt_tokens, error = await self._begin(request, prompt)
+        if error is not None:
+            return error
+
+        text = self._text(intent)
+        tokens = self._tokens(text)
+        message_id = f"msg_stub{self.requests}"
+        if not body.get("stream"):
+            return web.json_response({
+                "id": message_id,
+                "type": "message",
+                "role": "assistant",
+                "model": model,
+                "content": [{"type": "text", "text": text}],
+                "stop_reason": "end_turn",
+                "usage": {"input_tokens": prompt_tokens, "output_tokens": len(tokens)},
+            })
+
+        events = [
+            self._sse({
+                "type": "message_start",
+                "message": {
+                    "id": message_id, "type": "message", "role": "assistant", "model": model, "content": [],
+                    "usage": {"input_tokens": prompt_tokens, "output_tokens": 1},
+                },
+            }, "message_start")
+            + self._sse({"type": "content_block_start", "index": 0, "content_block": {"type": "text", "text": ""}},
+                        "content_block_start"),
+        ]
+        events += [
+            self._sse({"type": "content_block_delta", "index": 0, "delta": {"type": "text_delta", "text": token}},
+                      "content_block_delta")
+            for token in tokens
+        ]
+        events.append(
+            self._sse({"type": "content_block_stop", "index": 0}, "content_block_stop")
+            + self._sse({
+                "type": "message_delta",
+                "delta": {"stop_reason": "end_turn"},
+                "usage": {"output_tokens": len(tokens)},
+            }, "message_delta")
+            + self._sse({"type": "message_stop"}, "message_stop")
+        )
+        return await self._stream(request, events)
+
+    # ---- Gemini ----
+
+    async def _generate_content(self, request: web.Request) -> web.StreamResponse:
+        model, _, method = request.match_info["target"].partition(":")
+        if method not in ("generateContent", "streamGenerateContent"):
+            return web.json_response({"error": {"message": f"unknown method: {method}"}}, status=404)
+        body = await request.json()
+        parts = [
+            str(p.get("text", ""))
+            for c in ([body.get("systemInstruction")] if body.get("systemInstruction") else []) + body.get("contents", [])
+            for p in c.get("parts", [])
+        ]
+        intent, prompt_tokens, error = await self._begin(request, "\n".join(parts))
+        if error is not None:
+            return error
+
+        text = self._text(intent)
+        tokens = self._tokens(text)
+
+        def _chunk(chunk_text: str, done: int, finished: bool) -> Dict[str, Any]:
+            candidate: Dict[str, Any] = {"content": {"role": "model", "parts": [{"text": chunk_text}]}, "index": 0}
+            if finished:
+                candidate["finishReason"] = "STOP"
+            return {
+                "candidates": [candidate],
+                "usageMetadata": {
+                    "promptTokenCount": prompt_tokens,
+                    "candidatesTokenCount": done,
+                    "totalTokenCount": prompt_tokens + done,
+                },
+                "modelVersion": model,
+            }
+
+        if method == "generateContent":
+            return web.json_response(_chunk(text, len(tokens), True))
+        events = [self._sse(_chunk(token, i + 1, i == len(tokens) - 1)) for i, token in enumerate(tokens)]
+        return await self._stream(request, events)
+
+
+def _parse_faults(values: List[str]) -> Dict[str, float]:
+    faults: Dict[str, float] = {}
+    for value in values:
+        kind, _, rate = value.partition("=")
+        faults[kind] = float(rate)
+    return faults
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="LLM 스텁 서버 (OpenAI / Anthropic / Gemini 형식)")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="첫 바이트까지의 지연 (lognormal은 중앙값)")
+    parser.add_argument("--latency-dist", default="fixed", choices=["fixed", "uniform", "normal", "lognormal"])
+    parser.add_argument("--latency-spread", type=float, default=0.0, help="uniform/normal: ms, lognormal: sigma")
+    parser.add_argument("--token-delay-ms", type=float, default=0.0, help="스트리밍 토큰 간 지연")
+    parser.add_argument("--tokens-per-second", type=float, default=0.0, help="스트리밍 초당 토큰 수")
+    parser.add_argument("--prompt-ms-per-1k", type=float, default=0.0, help="프롬프트 1천 토큰당 추가 지연")
+    parser.add_argument("--fault", action="append", default=[], help="오류 주입 확률 (예: 429=0.05, timeout=0.01)")
+    parser.add_argument("--timeout-s", type=float, default=30.0, help="timeout 오류 시 대기 시간")
+    parser.add_argument("--response", default=None, help="모든 요청에 쓸 응답 (기본: 의도별 응답)")
+    parser.add_argument("--responses-file", default=None, help="의도별 응답 JSON 파일 ({의도: 응답})")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    responses = None
+    if args.responses_file:
+        with open(args.responses_file, encoding="utf-8") as f:
+            responses = json.load(f)
+
+    server = StubLLMServer(
+        args.host, args.port,
+        token_delay_ms=args.token_delay_ms,
+        response=args.response,
+        prompt_ms_per_1k_tokens=args.prompt_ms_per_1k,
+        latency=LatencyProfile(args.latency_dist, args.latency_ms, args.latency_spread),
+        tokens_per_second=args.tokens_per_second,
+        responses=responses,
+        faults=_parse_faults(args.fault),
+        timeout_s=args.timeout_s,
+        seed=args.seed,
+    )
+    web.run_app(server.create_app(), host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
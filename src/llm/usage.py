@@ -0,0 +1,231 @@
+"""LLM 토큰 사용량/비용 집계.
+
+프로바이더 응답의 usage 블록(OpenAI/로컬 usage, Anthropic usage, Google usageMetadata)을
+prompt/completion 토큰으로 정규화하고, 호출마다 지연/TTFT와 함께 메트릭으로 기록합니다.
+
+- 비용: configs/llm.yaml usage.pricing 가격표(USD / 1M 토큰)로 모델별 계산
+- 의도별 집계: usage_intent(intent) 안의 호출은 해당 의도로 기록
+- 요청 단위 합계: meter_usage() 안의 모든 LLM 호출 사용량을 합산 (OpenAI 호환 응답의 usage)
+- provider가 usage를 보내지 않으면(일부 로컬 서버 스트리밍 등) 토큰 수를 근사하고 estimated로 표시
+- 캐시 적중 호출은 토큰을 쓰지 않으므로 집계하지 않습니다
+- 병합된(single-flight) 호출은 메트릭/누적에는 한 번만 기록하고, 요청 합계에는 기다린 요청마다 반영
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, Iterator, Optional
+
+from src.config import get_config
+from src.llm.context import count_tokens
+from src.monitoring.metrics import track_llm_request, track_llm_usage
+
+
+@dataclass
+class TokenUsage:
+    """토큰 사용량 합계."""
+
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    total_tokens: int = 0
+    cost_usd: float = 0.0
+    calls: int = 0
+    estimated: bool = False  # 근사값이 포함됨
+
+    def add(self, other: "TokenUsage") -> None:
+        self.prompt_tokens += other.prompt_tokens
+        self.completion_tokens += other.completion_tokens
+        self.total_tokens += other.total_tokens
+        self.cost_usd += other.cost_usd
+        self.calls += other.calls
+        self.estimated = self.estimated or other.estimated
+
+    def to_openai(self) -> Dict[str, int]:
+        """OpenAI 호환 usage 블록."""
+        return {
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "total_tokens": self.total_tokens,
+        }
+
+
+@dataclass
+class LLMCall:
+    """진행 중인 단일 LLM 호출 기록."""
+
+    provider: str
+    model: str
+    started: float = field(default_factory=time.perf_counter)
+    first_byte: Optional[float] = None  # 응답 헤더 수신
+    first_token: Optional[float] = None  # 스트리밍 첫 토큰 수신
+    usage: Dict[str, int] = field(default_factory=dict)
+
+    def mark_first_byte(self) -> None:
+        if self.first_byte is None:
+            self.first_byte = time.perf_counter()
+
+    def mark_first_token(self) -> None:
+        if self.first_token is None:
+            self.first_token = time.perf_counter()
+
+    @property
+    def ttft(self) -> Optional[float]:
+        """첫 토큰(비스트리밍은 첫 바이트)까지 시간 (초)."""
+        mark = self.first_token or self.first_byte
+        return None if mark is None else mark - self.started
+
+    def update_usage(self, raw: Optional[Dict[str, Any]]) -> None:
+        """프로바이더 usage를 정규화해 반영 (스트리밍 중간 보고는 값이 있는 필드만 갱신)."""
+        if not raw:
+            return
+        prompt = raw.get("prompt_tokens") or raw.get("input_tokens") or raw.get("promptTokenCount")
+        completion = raw.get("completion_tokens") or raw.get("output_tokens") or raw.get("candidatesTokenCount")
+        if prompt:
+            self.usage["prompt_tokens"] = int(prompt)
+        if completion:
+            self.usage["completion_tokens"] = int(completion)
+        total = raw.get("total_tokens") or raw.get("totalTokenCount")
+        self.usage["total_tokens"] = int(total or 0) or (
+            self.usage.get("prompt_tokens", 0) + self.usage.get("completion_tokens", 0)
+        )
+
+
+_current_call: ContextVar[Optional[LLMCall]] = ContextVar("llm_call", default=None)
+_intent: ContextVar[str] = ContextVar("llm_usage_intent", default="unknown")
+_meter: ContextVar[Optional[TokenUsage]] = ContextVar("llm_usage_meter", default=None)
+
+
+def begin_call(provider: str, model: str) -> LLMCall:
+    """현재 태스크의 LLM 호출 기록 시작 (호출마다 새로 설정하므로 복원하지 않음)."""
+    call = LLMCall(provider=provider, model=model)
+    _current_call.set(call)
+    return call
+
+
+def current_call() -> Optional[LLMCall]:
+    return _current_call.get()
+
+
+def current_meter() -> Optional[TokenUsage]:
+    """현재 태스크의 meter_usage() 합계 (없으면 None)."""
+    return _meter.get()
+
+
+@contextmanager
+def _scoped(var: ContextVar, value: Any) -> Iterator[None]:
+    token = var.set(value)
+    try:
+        yield
+    finally:
+        try:
+            var.reset(token)
+        except ValueError:
+            pass  # 다른 컨텍스트에서 닫힌 스트리밍 제너레이터
+
+
+@contextmanager
+def usage_intent(intent: str) -> Iterator[None]:
+    """블록 안의 LLM 호출을 intent로 집계."""
+    with _scoped(_intent, intent or "unknown"):
+        yield
+
+
+@contextmanager
+def meter_usage() -> Iterator[TokenUsage]:
+    """블록 안의 모든 LLM 호출 사용량 합계 (하위 태스크 포함)."""
+    usage = TokenUsage()
+    with _scoped(_meter, usage):
+        yield usage
+
+
+def price_for(model: str) -> Optional[Dict[str, float]]:
+    """모델 가격 (정확히 일치하지 않으면 가장 긴 접두사, 예: gpt-4o-mini-2024-07-18 → gpt-4o-mini)."""
+    pricing = get_config().llm.usage.pricing
+    if model in pricing:
+        return pricing[model]
+    matches = [name for name in pricing if model.startswith(name)]
+    return pricing[max(matches, key=len)] if matches else None
+
+
+def cost_usd(model: str, prompt_tokens: int, completion_tokens: int) -> float:
+    """가격표 기준 비용 (USD, 가격이 없으면 0)."""
+    price = price_for(model)
+    if not price:
+        return 0.0
+    return (
+        prompt_tokens * float(price.get("prompt", 0.0)) + completion_tokens * float(price.get("completion", 0.0))
+    ) / 1_000_000
+
+
+class UsageLedger:
+    """프로세스 내 의도/모델별 누적 사용량 (/health용)."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._totals: Dict[str, Dict[str, TokenUsage]] = {}
+
+    def add(self, intent: str, model: str, usage: TokenUsage) -> None:
+        with self._lock:
+            per_model = self._totals.setdefault(intent, {})
+            per_model.setdefault(model, TokenUsage()).add(usage)
+
+    def summary(self) -> Dict[str, Dict[str, Dict[str, Any]]]:
+        with self._lock:
+            return {
+                intent: {model: asdict(u) for model, u in per_model.items()}
+                for intent, per_model in self._totals.items()
+            }
+
+    def reset(self) -> None:
+        with self._lock:
+            self._totals.clear()
+
+
+_ledger = UsageLedger()
+
+
+def get_usage_ledger() -> UsageLedger:
+    return _ledger
+
+
+def finish_call(
+    call: LLMCall,
+    status: str,
+    prompt_text: str = "",
+    completion_text: str = "",
+) -> TokenUsage:
+    """호출 종료: 사용량/비용 계산 후 메트릭, 의도별 누적, 요청 합계에 반영.
+
+    Args:
+        call: begin_call()이 반환한 기록
+        status: success, error
+        prompt_text: usage 미보고 시 프롬프트 토큰 근사용 텍스트
+        completion_text: usage 미보고 시 완성 토큰 근사용 텍스트
+    """
+    latency = time.perf_counter() - call.started
+    prompt = call.usage.get("prompt_tokens", 0)
+    completion = call.usage.get("completion_tokens", 0)
+    estimated = False
+    if status == "success" and not call.usage and get_config().llm.usage.estimate_missing:
+        prompt, completion, estimated = count_tokens(prompt_text), count_tokens(completion_text), True
+
+    usage = TokenUsage(
+        prompt_tokens=prompt,
+        completion_tokens=completion,
+        total_tokens=call.usage.get("total_tokens") or prompt + completion,
+        cost_usd=cost_usd(call.model, prompt, completion),
+        calls=1,
+        estimated=estimated,
+    )
+    intent = _intent.get()
+    track_llm_request(call.model, status, latency, prompt, completion)
+    track_llm_usage(intent, call.model, usage.prompt_tokens, usage.completion_tokens, usage.cost_usd, call.ttft)
+    _ledger.add(intent, call.model, usage)
+    meter = _meter.get()
+    if meter is not None:
+        meter.add(usage)
+    return usage
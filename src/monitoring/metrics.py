@@ -8,7 +8,7 @@ from __future__ import annotations
 import time
 from contextlib import contextmanager
 from functools import wraps
-from typing import Any, Callable, Optional
+from typing import Any, Callable, Dict, Optional
 
 from prometheus_client import Counter, Histogram, Gauge, Info
 
@@ -52,6 +52,18 @@ AGENT_ERRORS_TOTAL = Counter(
     ["agent_type", "error_type"],
 )
 
+INTENT_SPECULATION_TOTAL = Counter(
+    "intent_speculation_total",
+    "Speculative tool calls started from keyword intent classification",
+    ["intent", "outcome"],  # outcome: hit, miss (LLM 분류 불일치), unused (일치했지만 미사용)
+)
+
+INTENT_SPECULATION_SAVED_SECONDS = Counter(
+    "intent_speculation_saved_seconds_total",
+    "Tool time overlapped with LLM intent classification by speculative calls",
+    ["intent"],
+)
+
 # ============================================
 # LLM 메트릭
 # ============================================
@@ -75,6 +87,157 @@ LLM_LATENCY = Histogram(
     buckets=(0.1, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0),
 )
 
+LLM_TTFT = Histogram(
+    "llm_ttft_seconds",
+    "Time to first token (first byte for non-streaming calls)",
+    ["model"],
+    buckets=(0.1, 0.25, 0.5, 1.0, 2.0, 3.0, 5.0, 10.0, 30.0),
+)
+
+LLM_INTENT_TOKENS = Counter(
+    "llm_intent_tokens_total",
+    "LLM tokens used per intent",
+    ["intent", "token_type"],  # token_type: prompt, completion
+)
+
+LLM_COST_USD = Counter(
+    "llm_cost_usd_total",
+    "Estimated LLM cost in USD (configs/llm.yaml usage.pricing)",
+    ["intent", "model"],
+)
+
+LLM_PROMPT_TOKENS = Histogram(
+    "llm_prompt_tokens",
+    "Prompt tokens per LLM call (system prompt + context + user message)",
+    ["intent"],
+    buckets=(100, 250, 500, 750, 1000, 1500, 2000, 3000, 4000, 8000),
+)
+
+LLM_ADMISSION_IN_FLIGHT = Gauge(
+    "llm_admission_in_flight",
+    "LLM requests currently admitted per provider",
+    ["provider"],
+)
+
+LLM_ADMISSION_QUEUE_DEPTH = Gauge(
+    "llm_admission_queue_depth",
+    "LLM requests waiting for admission per provider",
+    ["provider"],
+)
+
+LLM_ADMISSION_LIMIT = Gauge(
+    "llm_admission_limit",
+    "Current adaptive concurrency limit per provider",
+    ["provider"],
+)
+
+LLM_ADMISSION_WAIT = Histogram(
+    "llm_admission_wait_seconds",
+    "Time spent waiting for LLM admission",
+    ["provider"],
+    buckets=(0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.0, 5.0),
+)
+
+LLM_ADMISSION_REJECTED_TOTAL = Counter(
+    "llm_admission_rejected_total",
+    "LLM requests rejected by admission control",
+    ["provider", "reason"],  # reason: queue_full, timeout
+)
+
+# ============================================
+# RAG 메트릭
+# ============================================
+
+RERANK_CACHE_TOTAL = Counter(
+    "rerank_cache_total",
+    "Reranker pair score cache lookups",
+    ["result"],  # result: hit, miss
+)
+
+RERANK_BATCH_PAIRS = Histogram(
+    "rerank_batch_pairs",
+    "Number of (query, doc) pairs per cross-encoder forward batch",
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128, 256),
+)
+
+RERANK_LATENCY = Histogram(
+    "rerank_latency_seconds",
+    "Cross-encoder forward pass latency in seconds",
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5),
+)
+
+RETRIEVAL_EXECUTOR_QUEUE = Gauge(
+    "retrieval_executor_queue_depth",
+    "Retrieval calls waiting for a search executor thread",
+)
+
+RETRIEVAL_EXECUTOR_RUNNING = Gauge(
+    "retrieval_executor_running",
+    "Retrieval calls currently running on the search executor",
+)
+
+RETRIEVAL_REJECTED_TOTAL = Counter(
+    "retrieval_rejected_total",
+    "Retrieval calls that did not complete on the search executor",
+    ["reason"],  # reason: timeout, saturated
+)
+
+SEMANTIC_CACHE_TOTAL = Counter(
+    "semantic_cache_total",
+    "Policy answer semantic cache lookups",
+    ["result"],  # result: hit, miss, bypass
+)
+
+SEMANTIC_CACHE_SAVED_SECONDS = Counter(
+    "semantic_cache_saved_seconds_total",
+    "Retrieval + generation time saved by semantic cache hits",
+)
+
+LLM_CACHE_TOTAL = Counter(
+    "llm_cache_total",
+    "LLM response cache lookups",
+    ["result"],  # result: hit, miss, bypass
+)
+
+LLM_CACHE_SAVED_SECONDS = Counter(
+    "llm_cache_saved_seconds_total",
+    "LLM call time saved by response cache hits",
+)
+
+LLM_HEDGE_TOTAL = Counter(
+    "llm_hedge_total",
+    "Hedged LLM requests started because the previous provider was slow",
+    ["provider"],
+)
+
+LLM_HEDGE_WINS_TOTAL = Counter(
+    "llm_hedge_wins_total",
+    "Hedged LLM races won",
+    ["provider"],
+)
+
+LLM_ROUTE_TOTAL = Counter(
+    "llm_route_total",
+    "Adaptive LLM routing decisions (first provider tried)",
+    ["provider", "reason"],  # reason: best, explore
+)
+
+LLM_PROVIDER_SCORE = Gauge(
+    "llm_provider_expected_latency_seconds",
+    "Expected latency used by adaptive routing (EWMA latency + error penalty)",
+    ["provider"],  # provider/model
+)
+
+# ============================================
+# 요청 병합 (single-flight) 메트릭
+# ============================================
+
+SINGLEFLIGHT_CALLS_TOTAL = Counter(
+    "singleflight_calls_total",
+    "Calls through single-flight coalescing",
+    ["operation", "role"],  # role: leader (실행), shared (진행 중 결과 공유)
+)
+
 # ============================================
 # 데이터베이스 메트릭
 # ============================================
@@ -156,6 +319,19 @@ def track_agent_request(agent_type: str, intent: str, duration: float, error: Op
         AGENT_ERRORS_TOTAL.labels(agent_type=agent_type, error_type=error).inc()
 
 
+def track_intent_speculation(intent: str, outcome: str, saved_seconds: float = 0.0) -> None:
+    """의도 추측 실행 결과 기록.
+
+    Args:
+        intent: 키워드 분류 의도
+        outcome: hit, miss, unused
+        saved_seconds: 적중 시 LLM 분류와 겹쳐 절약된 도구 실행 시간 (초)
+    """
+    INTENT_SPECULATION_TOTAL.labels(intent=intent, outcome=outcome).inc()
+    if saved_seconds > 0:
+        INTENT_SPECULATION_SAVED_SECONDS.labels(intent=intent).inc(saved_seconds)
+
+
 def track_llm_request(
     model: str,
     status: str,
@@ -181,6 +357,172 @@ def track_llm_request(
         LLM_TOKENS_USED.labels(model=model, token_type="completion").inc(completion_tokens)
 
 
+def track_llm_usage(
+    intent: str,
+    model: str,
+    prompt_tokens: int,
+    completion_tokens: int,
+    cost_usd: float,
+    ttft: Optional[float] = None,
+) -> None:
+    """의도별 LLM 토큰/비용과 TTFT 기록.
+
+    Args:
+        intent: 의도
+        model: 모델명
+        prompt_tokens: 프롬프트 토큰 수
+        completion_tokens: 완성 토큰 수
+        cost_usd: 비용 (USD)
+        ttft: 첫 토큰까지 시간 (초, 없으면 생략)
+    """
+    if prompt_tokens > 0:
+        LLM_INTENT_TOKENS.labels(intent=intent, token_type="prompt").inc(prompt_tokens)
+    if completion_tokens > 0:
+        LLM_INTENT_TOKENS.labels(intent=intent, token_type="completion").inc(completion_tokens)
+    if cost_usd > 0:
+        LLM_COST_USD.labels(intent=intent, model=model).inc(cost_usd)
+    if ttft is not None:
+        LLM_TTFT.labels(model=model).observe(ttft)
+
+
+def track_rerank_batch(pairs: int, latency: float) -> None:
+    """리랭커 배치 메트릭 기록.
+
+    Args:
+        pairs: 배치 내 (query, doc) 쌍 수
+        latency: forward pass 소요 시간 (초)
+    """
+    RERANK_BATCH_PAIRS.observe(pairs)
+    RERANK_LATENCY.observe(latency)
+
+
+def track_rerank_cache(hits: int, misses: int) -> None:
+    """리랭커 캐시 조회 메트릭 기록."""
+    if hits > 0:
+        RERANK_CACHE_TOTAL.labels(result="hit").inc(hits)
+    if misses > 0:
+        RERANK_CACHE_TOTAL.labels(result="miss").inc(misses)
+
+
+def track_retrieval_executor(queued: int, running: int) -> None:
+    """검색 executor 대기/실행 수 기록."""
+    RETRIEVAL_EXECUTOR_QUEUE.set(queued)
+    RETRIEVAL_EXECUTOR_RUNNING.set(running)
+
+
+def track_retrieval_rejected(reason: str) -> None:
+    """검색 시간 초과/거부 기록.
+
+    Args:
+        reason: timeout, saturated
+    """
+    RETRIEVAL_REJECTED_TOTAL.labels(reason=reason).inc()
+
+
+def track_semantic_cache(result: str, saved_seconds: float = 0.0) -> None:
+    """시맨틱 캐시 조회 메트릭 기록.
+
+    Args:
+        result: hit, miss, bypass
+        saved_seconds: 적중 시 절약된 처리 시간 (초)
+    """
+    SEMANTIC_CACHE_TOTAL.labels(result=result).inc()
+    if saved_seconds > 0:
+        SEMANTIC_CACHE_SAVED_SECONDS.inc(saved_seconds)
+
+
+def track_llm_prompt_tokens(intent: str, tokens: int) -> None:
+    """LLM 프롬프트 토큰 수 기록.
+
+    Args:
+        intent: 의도
+        tokens: 시스템 프롬프트(컨텍스트 포함) + 사용자 메시지 토큰 수
+    """
+    LLM_PROMPT_TOKENS.labels(intent=intent).observe(tokens)
+
+
+def track_llm_admission(provider: str, in_flight: int, queued: int, limit: float) -> None:
+    """LLM 동시 요청 제어 상태 기록.
+
+    Args:
+        provider: 프로바이더 이름
+        in_flight: 진행 중 요청 수
+        queued: 대기 중 요청 수
+        limit: 현재 동시 요청 상한
+    """
+    LLM_ADMISSION_IN_FLIGHT.labels(provider=provider).set(in_flight)
+    LLM_ADMISSION_QUEUE_DEPTH.labels(provider=provider).set(queued)
+    LLM_ADMISSION_LIMIT.labels(provider=provider).set(int(limit))
+
+
+def track_llm_admission_wait(provider: str, seconds: float) -> None:
+    """LLM 허가 대기 시간 기록.
+
+    Args:
+        provider: 프로바이더 이름
+        seconds: 대기 시간 (초)
+    """
+    LLM_ADMISSION_WAIT.labels(provider=provider).observe(seconds)
+
+
+def track_llm_admission_rejected(provider: str, reason: str) -> None:
+    """LLM 허가 거부 기록.
+
+    Args:
+        provider: 프로바이더 이름
+        reason: queue_full, timeout
+    """
+    LLM_ADMISSION_REJECTED_TOTAL.labels(provider=provider, reason=reason).inc()
+
+
+def track_llm_cache(result: str, saved_seconds: float = 0.0) -> None:
+    """LLM 응답 캐시 조회 메트릭 기록.
+
+    Args:
+        result: hit, miss, bypass
+        saved_seconds: 적중 시 절약된 LLM 호출 시간 (초)
+    """
+    LLM_CACHE_TOTAL.labels(result=result).inc()
+    if saved_seconds > 0:
+        LLM_CACHE_SAVED_SECONDS.inc(saved_seconds)
+
+
+def track_llm_hedge(provider: str, event: str) -> None:
+    """LLM 헤징 메트릭 기록.
+
+    Args:
+        provider: 프로바이더
+        event: hedge (헤지 요청 시작), win (헤징된 경쟁에서 승리)
+    """
+    if event == "win":
+        LLM_HEDGE_WINS_TOTAL.labels(provider=provider).inc()
+    else:
+        LLM_HEDGE_TOTAL.labels(provider=provider).inc()
+
+
+def track_llm_route(provider: str, reason: str, scores: Dict[str, float]) -> None:
+    """적응형 라우팅 결정 기록.
+
+    Args:
+        provider: 먼저 시도한 프로바이더
+        reason: best (예상 지연 최소), explore (탐색)
+        scores: provider/model별 예상 지연 (초)
+    """
+    LLM_ROUTE_TOTAL.labels(provider=provider, reason=reason).inc()
+    for key, score in scores.items():
+        LLM_PROVIDER_SCORE.labels(provider=key).set(score)
+
+
+def track_singleflight(operation: str, role: str) -> None:
+    """요청 병합 메트릭 기록.
+
+    Args:
+        operation: 작업 이름 (llm_chat, intent_llm, policy_search)
+        role: leader (직접 실행), shared (진행 중 호출 결과 공유)
+    """
+    SINGLEFLIGHT_CALLS_TOTAL.labels(operation=operation, role=role).inc()
+
+
 def track_db_query(table: str, operation: str, duration: float) -> None:
     """DB 쿼리 메트릭 기록.
 
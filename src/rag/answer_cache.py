@@ -0,0 +1,261 @@
+"""정책 답변 시맨틱 캐시.
+
+정책 질문은 표현만 다른 반복 질문이 많으므로, 쿼리 임베딩이 최근 질문과
+충분히 비슷하면(코사인 유사도 ≥ threshold) 검색 결과와 생성된 답변을 재사용합니다.
+
+- 엔트리는 생성 당시의 인덱스 버전을 기록하며, 버전이 바뀌면 무효입니다.
+- 용량을 넘으면 가장 오래된 엔트리부터 교체합니다 (ring buffer).
+- 임베딩 모델을 쓸 수 없으면 캐시는 자동으로 비활성화됩니다.
+- 비동기 코드에서는 alookup/astore를 사용합니다. 쿼리 임베딩(첫 호출 시 모델 로드 포함)을
+  검색 executor에서 실행해 이벤트 루프를 막지 않습니다.
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+
+from src.config import get_config
+from src.core.exceptions import RequestTimeoutError, ServiceUnavailableError
+from src.monitoring.metrics import track_semantic_cache
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class CachedAnswer:
+    """캐시된 정책 답변."""
+
+    query: str
+    top_k: int
+    data: Dict[str, Any]  # {"query", "hits"}
+    response: str
+    index_version: str
+    created_at: float
+    latency: float  # 원래 처리(검색 + 생성)에 걸린 시간 (초)
+    similarity: float = 1.0
+
+
+class SemanticAnswerCache:
+    """임베딩 유사도 기반 답변 캐시 (스레드 안전)."""
+
+    def __init__(
+        self,
+        embed_fn: Optional[Callable[[str], np.ndarray]] = None,
+        similarity_threshold: Optional[float] = None,
+        max_entries: Optional[int] = None,
+        ttl_seconds: Optional[float] = None,
+        enabled: Optional[bool] = None,
+    ) -> None:
+        """캐시 초기화.
+
+        Args:
+            embed_fn: 쿼리 → 정규화 임베딩 함수 (None이면 Embedder.encode_query)
+            similarity_threshold: 적중 판정 코사인 유사도
+            max_entries: 최대 엔트리 수
+            ttl_seconds: 엔트리 유효 시간 (0 이하면 무제한)
+            enabled: 사용 여부
+        """
+        cfg = get_config().rag.answer_cache
+        self.enabled = cfg.enabled if enabled is None else enabled
+        self.similarity_threshold = (
+            cfg.similarity_threshold if similarity_threshold is None else similarity_threshold
+        )
+        self.max_entries = max(1, cfg.max_entries if max_entries is None else max_entries)
+        self.ttl_seconds = cfg.ttl_seconds if ttl_seconds is None else ttl_seconds
+
+        self._embed_fn = embed_fn
+        self._lock = threading.Lock()
+        self._vectors: Optional[np.ndarray] = None
+        self._entries: List[Optional[CachedAnswer]] = [None] * self.max_entries
+        self._next = 0
+        self._hits = 0
+        self._misses = 0
+        self._saved_seconds = 0.0
+
+    def _embed(self, query: str) -> Optional[np.ndarray]:
+        """쿼리 임베딩 (실패 시 캐시 비활성화)."""
+        if self._embed_fn is None:
+            from src.rag.embedder import get_embedder
+            self._embed_fn = get_embedder().encode_query
+        try:
+            vec = np.asarray(self._embed_fn(query), dtype=np.float32).reshape(-1)
+        except Exception as e:
+            logger.warning(f"시맨틱 캐시 비활성화 (임베딩 실패): {e}")
+            self.enabled = False
+            return None
+        norm = float(np.linalg.norm(vec))
+        return vec / norm if norm > 0 else vec
+
+    def _is_valid(self, entry: Optional[CachedAnswer], index_version: str, now: float) -> bool:
+        if entry is None or entry.index_version != index_version:
+            return False
+        return self.ttl_seconds <= 0 or now - entry.created_at <= self.ttl_seconds
+
+    def lookup(self, query: str, index_version: str, top_k: int) -> Optional[CachedAnswer]:
+        """유사한 질문의 캐시된 답변 조회.
+
+        Returns:
+            적중 시 CachedAnswer (similarity 포함), 아니면 None
+        """
+        if not self.enabled or not query.strip():
+            return None
+
+        vec = self._embed(query)
+        if vec is None:
+            return None
+
+        now = time.time()
+        with self._lock:
+            if self._vectors is None:
+                self._misses += 1
+                track_semantic_cache("miss")
+                return None
+
+            sims = self._vectors @ vec
+            best: Optional[CachedAnswer] = None
+            best_sim = self.similarity_threshold
+            for i in np.argsort(-sims):
+                sim = float(sims[i])
+                if sim < best_sim:
+                    break
+                entry = self._entries[i]
+                if self._is_valid(entry, index_version, now) and entry.top_k == top_k:
+                    best, best_sim = entry, sim
+                    break
+
+            if best is None:
+                self._misses += 1
+                track_semantic_cache("miss")
+                return None
+
+            self._hits += 1
+            self._saved_seconds += best.latency
+        track_semantic_cache("hit", saved_seconds=best.latency)
+
+        return CachedAnswer(
+            query=best.query,
+            top_k=best.top_k,
+            data=best.data,
+            response=best.response,
+            index_version=best.index_version,
+            created_at=best.created_at,
+            latency=best.latency,
+            similarity=best_sim,
+        )
+
+    def store(
+        self,
+        query: str,
+        index_version: str,
+        top_k: int,
+        data: Dict[str, Any],
+        response: str,
+        latency: float,
+    ) -> None:
+        """답변 저장."""
+        if not self.enabled or not query.strip():
+            return
+
+        vec = self._embed(query)
+        if vec is None:
+            return
+
+        entry = CachedAnswer(
+            query=query,
+            top_k=top_k,
+            data=data,
+            response=response,
+            index_version=index_version,
+            created_at=time.time(),
+            latency=latency,
+        )
+        with self._lock:
+            if self._vectors is None:
+                self._vectors = np.zeros((self.max_entries, vec.shape[0]), dtype=np.float32)
+            slot = self._next
+            self._vectors[slot] = vec
+            self._entries[slot] = entry
+            self._next = (slot + 1) % self.max_entries
+
+    async def alookup(self, query: str, index_version: str, top_k: int) -> Optional[CachedAnswer]:
+        """lookup()의 비동기 버전 (executor 포화/시간 초과 시 미적중으로 처리)."""
+        if not self.enabled or not query.strip():
+            return None
+        try:
+            return await _executor().run(self.lookup, query, index_version, top_k, timeout=_timeout())
+        except (ServiceUnavailableError, RequestTimeoutError) as e:
+            logger.warning(f"시맨틱 캐시 조회 건너뛰기: {e.error_code}")
+            return None
+
+    async def astore(
+        self,
+        query: str,
+        index_version: str,
+        top_k: int,
+        data: Dict[str, Any],
+        response: str,
+        latency: float,
+    ) -> None:
+        """store()의 비동기 버전 (executor 포화/시간 초과 시 저장 생략)."""
+        if not self.enabled or not query.strip():
+            return
+        try:
+            await _executor().run(
+                self.store, query, index_version, top_k, data, response, latency, timeout=_timeout()
+            )
+        except (ServiceUnavailableError, RequestTimeoutError) as e:
+            logger.warning(f"시맨틱 캐시 저장 건너뛰기: {e.error_code}")
+
+    def invalidate(self) -> None:
+        """모든 엔트리 삭제."""
+        with self._lock:
+            self._vectors = None
+            self._entries = [None] * self.max_entries
+            self._next = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """적중률 및 절약 시간 통계."""
+        with self._lock:
+            total = self._hits + self._misses
+            return {
+                "enabled": self.enabled,
+                "entries": sum(1 for e in self._entries if e is not None),
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": self._hits / total if total else 0.0,
+                "saved_seconds": round(self._saved_seconds, 3),
+            }
+
+
+def _executor():
+    from src.rag.retriever import get_search_executor
+
+    return get_search_executor()
+
+
+def _timeout() -> float:
+    return get_config().rag.retrieval.search_timeout
+
+
+# 전역 캐시 인스턴스
+_answer_cache: Optional[SemanticAnswerCache] = None
+
+
+def get_answer_cache() -> SemanticAnswerCache:
+    """전역 시맨틱 캐시 반환."""
+    global _answer_cache
+    if _answer_cache is None:
+        _answer_cache = SemanticAnswerCache()
+    return _answer_cache
+
+
+def reset_answer_cache() -> None:
+    """전역 시맨틱 캐시 리셋 (테스트용)."""
+    global _answer_cache
+    _answer_cache = None
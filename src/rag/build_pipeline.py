@@ -0,0 +1,318 @@
+"""스트리밍 벡터 인덱스 빌드 파이프라인.
+
+청크 읽기 → 임베딩 → FAISS 추가를 겹쳐서 실행합니다.
+
+    [producer 스레드] --(bounded queue)--> [임베딩: 메인 또는 프로세스 풀] --> [FAISS add]
+
+- 텍스트 인덱스는 JsonlDocStore.iter_live()로 스트리밍하므로 전체를 메모리에 올리지 않습니다.
+- 임베딩은 embeddings_cache 경로의 .npy memmap에 순서대로 기록합니다.
+- Flat/HNSW 인덱스는 배치가 나올 때마다 바로 추가합니다.
+- IVF(ivf_flat, ivf_pq) 인덱스는 reservoir sample로 학습한 뒤 memmap에서 청크 단위로 추가합니다.
+"""
+
+from __future__ import annotations
+
+import logging
+import queue
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Deque, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from src.rag.docstore import JsonlDocStore
+
+logger = logging.getLogger(__name__)
+
+# producer 종료 신호
+_DONE = object()
+
+Batch = Tuple[List[str], np.ndarray]  # (texts, int64 ids)
+
+
+@dataclass
+class BuildStats:
+    """빌드 결과 통계."""
+
+    documents: int = 0
+    batches: int = 0
+    dimension: int = 0
+    index_type: str = "flat"
+    train_sample: int = 0
+    embed_seconds: float = 0.0
+    add_seconds: float = 0.0
+    total_seconds: float = 0.0
+    extra: dict = field(default_factory=dict)
+
+    @property
+    def docs_per_second(self) -> float:
+        return self.documents / self.total_seconds if self.total_seconds > 0 else 0.0
+
+
+class ReservoirSampler:
+    """고정 크기 균등 표본 (Algorithm R)."""
+
+    def __init__(self, capacity: int, seed: int = 42) -> None:
+        self.capacity = capacity
+        self._rng = random.Random(seed)
+        self._sample: Optional[np.ndarray] = None
+        self._seen = 0
+
+    def add(self, rows: np.ndarray) -> None:
+        if self.capacity <= 0:
+            return
+        if self._sample is None:
+            self._sample = np.empty((self.capacity, rows.shape[1]), dtype=np.float32)
+        for row in rows:
+            if self._seen < self.capacity:
+                self._sample[self._seen] = row
+            else:
+                j = self._rng.randint(0, self._seen)
+                if j < self.capacity:
+                    self._sample[j] = row
+            self._seen += 1
+
+    @property
+    def sample(self) -> np.ndarray:
+        if self._sample is None:
+            return np.empty((0, 0), dtype=np.float32)
+        return self._sample[: min(self._seen, self.capacity)]
+
+
+# ---------------------------------------------------------------------------
+# 프로세스 풀 임베딩 워커
+# ---------------------------------------------------------------------------
+
+_worker_embedder = None
+
+
+def _init_worker() -> None:
+    """워커 프로세스별 임베더 로드."""
+    global _worker_embedder
+    from src.rag.embedder import Embedder
+
+    _worker_embedder = Embedder()
+
+
+def _embed_in_worker(texts: List[str]) -> np.ndarray:
+    return np.asarray(_worker_embedder.encode_documents(texts, show_progress=False), dtype=np.float32)
+
+
+# ---------------------------------------------------------------------------
+# 파이프라인
+# ---------------------------------------------------------------------------
+
+
+def _produce(store: JsonlDocStore, batch_size: int, out: "queue.Queue[Any]", stop: threading.Event) -> None:
+    """청크를 배치로 묶어 bounded queue에 넣음 (가득 차면 대기)."""
+    try:
+        texts: List[str] = []
+        ids: List[int] = []
+        for rec in store.iter_live():
+            if stop.is_set():
+                return
+            texts.append(rec.get("text", ""))
+            ids.append(rec["int_id"])
+            if len(texts) >= batch_size:
+                out.put((texts, np.asarray(ids, dtype=np.int64)))
+                texts, ids = [], []
+        if texts:
+            out.put((texts, np.asarray(ids, dtype=np.int64)))
+    except Exception as e:  # 소비자 쪽에서 다시 발생시킴
+        out.put(e)
+    finally:
+        out.put(_DONE)
+
+
+def _iter_batches(store: JsonlDocStore, batch_size: int, queue_size: int) -> Iterator[Batch]:
+    """producer 스레드에서 배치를 받아 순서대로 반환."""
+    q: "queue.Queue[Any]" = queue.Queue(maxsize=max(1, queue_size))
+    stop = threading.Event()
+    producer = threading.Thread(
+        target=_produce, args=(store, batch_size, q, stop), name="index-producer", daemon=True
+    )
+    producer.start()
+    try:
+        while True:
+            item = q.get()
+            if item is _DONE:
+                break
+            if isinstance(item, Exception):
+                raise item
+            yield item
+    finally:
+        stop.set()
+        # producer가 put에서 막히지 않도록 비움
+        while producer.is_alive():
+            try:
+                q.get_nowait()
+            except queue.Empty:
+                producer.join(timeout=0.1)
+
+
+def _iter_embedded(
+    batches: Iterator[Batch],
+    embedder: Any,
+    workers: int,
+) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+    """(embeddings, ids)를 입력 순서대로 반환.
+
+    workers > 1 이면 프로세스 풀에서 임베딩하며 최대 workers*2 배치를 동시에 처리합니다.
+    """
+    if workers <= 1:
+        for texts, ids in batches:
+            emb = embedder.encode_documents(texts, show_progress=False)
+            yield np.asarray(emb, dtype=np.float32), ids
+        return
+
+    import multiprocessing
+
+    ctx = multiprocessing.get_context("spawn")
+    in_flight: Deque[Tuple[Future, np.ndarray]] = deque()
+    with ProcessPoolExecutor(max_workers=workers, mp_context=ctx, initializer=_init_worker) as pool:
+        for texts, ids in batches:
+            in_flight.append((pool.submit(_embed_in_worker, texts), ids))
+            if len(in_flight) >= workers * 2:
+                fut, fids = in_flight.popleft()
+                yield fut.result(), fids
+        while in_flight:
+            fut, fids = in_flight.popleft()
+            yield fut.result(), fids
+
+
+def build_vector_index_streaming(
+    index_jsonl: Path,
+    vector_path: Path,
+    embeddings_path: Path,
+    index_type: str = "flat",
+    nlist: int = 100,
+    pq_m: int = 16,
+    pq_nbits: int = 8,
+    hnsw_m: int = 32,
+    hnsw_ef_construction: int = 200,
+    batch_size: int = 256,
+    workers: int = 1,
+    queue_size: int = 8,
+    train_sample: int = 50_000,
+    embedder: Any = None,
+    progress: Optional[Callable[[str], None]] = print,
+    progress_every: int = 10,
+) -> BuildStats:
+    """텍스트 인덱스에서 FAISS 인덱스를 스트리밍 방식으로 빌드.
+
+    Args:
+        index_jsonl: 텍스트 인덱스 경로
+        vector_path: 저장할 FAISS 인덱스 경로
+        embeddings_path: 임베딩 memmap(.npy) 경로
+        index_type: flat, ivf_flat(ivf), ivf_pq, hnsw
+        nlist: IVF 클러스터 수 (표본 수를 넘지 않도록 조정)
+        pq_m: IVF-PQ 서브 양자화기 수
+        pq_nbits: IVF-PQ 서브 양자화기당 비트 수
+        hnsw_m: HNSW 노드당 이웃 수
+        hnsw_ef_construction: HNSW 빌드 시 탐색 후보 수
+        batch_size: 임베딩 배치 크기
+        workers: 임베딩 프로세스 수 (1이면 현재 프로세스)
+        queue_size: producer 큐 최대 배치 수
+        train_sample: IVF 학습용 reservoir sample 크기
+        embedder: encode_documents()를 가진 임베더 (workers=1일 때 사용)
+        progress: 진행 상황 출력 함수 (None이면 출력 안 함)
+        progress_every: 진행 상황 출력 주기 (배치 수)
+
+    Returns:
+        BuildStats
+    """
+    import faiss
+
+    from src.rag.indexer import wrap_id_index
+    from src.rag.vector_index import create_index, needs_training, normalize_index_type
+
+    index_type = normalize_index_type(index_type)
+    trained = needs_training(index_type)
+    index_params = dict(
+        index_type=index_type,
+        nlist=nlist,
+        pq_m=pq_m,
+        pq_nbits=pq_nbits,
+        hnsw_m=hnsw_m,
+        hnsw_ef_construction=hnsw_ef_construction,
+    )
+    stats = BuildStats(index_type=index_type)
+    start = time.perf_counter()
+    store = JsonlDocStore(index_jsonl)
+    total = store.count_live()
+    if total == 0:
+        return stats
+
+    if embedder is None and workers <= 1:
+        from src.rag.embedder import Embedder
+        embedder = Embedder()
+
+    embeddings_path.parent.mkdir(parents=True, exist_ok=True)
+    matrix: Optional[np.ndarray] = None
+    ids_all = np.empty(total, dtype=np.int64)
+    index = None
+    sampler = ReservoirSampler(train_sample if trained else 0)
+
+    offset = 0
+    embed_start = time.perf_counter()
+    for emb, ids in _iter_embedded(_iter_batches(store, batch_size, queue_size), embedder, workers):
+        if matrix is None:
+            stats.dimension = emb.shape[1]
+            matrix = np.lib.format.open_memmap(
+                str(embeddings_path), mode="w+", dtype=np.float32, shape=(total, stats.dimension)
+            )
+            if not trained:
+                index = wrap_id_index(create_index(stats.dimension, **index_params))
+
+        n = emb.shape[0]
+        matrix[offset : offset + n] = emb
+        ids_all[offset : offset + n] = ids
+        if index is not None:
+            add_start = time.perf_counter()
+            index.add_with_ids(emb, ids)
+            stats.add_seconds += time.perf_counter() - add_start
+        else:
+            sampler.add(emb)
+
+        offset += n
+        stats.batches += 1
+        if progress and stats.batches % progress_every == 0:
+            elapsed = time.perf_counter() - start
+            progress(f"[INFO] {offset}/{total} 임베딩 ({offset / elapsed:.1f} docs/s)")
+
+    stats.embed_seconds = time.perf_counter() - embed_start - stats.add_seconds
+    stats.documents = offset
+    matrix.flush()
+
+    if index is None:
+        # IVF: 표본으로 학습 후 memmap에서 청크 단위 추가
+        sample = sampler.sample
+        stats.train_sample = len(sample)
+        index = create_index(stats.dimension, train_size=len(sample), **index_params)
+        index.train(np.ascontiguousarray(sample))
+        index = wrap_id_index(index)
+
+        add_start = time.perf_counter()
+        for s in range(0, offset, batch_size):
+            index.add_with_ids(np.ascontiguousarray(matrix[s : s + batch_size]), ids_all[s : s + batch_size])
+        stats.add_seconds += time.perf_counter() - add_start
+
+    # 임시 파일에 쓴 뒤 교체 (IndexWatcher가 쓰는 중인 파일을 읽지 않도록, 실패 시 기존 인덱스 유지)
+    vector_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = vector_path.with_suffix(vector_path.suffix + ".tmp")
+    faiss.write_index(index, str(tmp))
+    tmp.replace(vector_path)
+
+    stats.total_seconds = time.perf_counter() - start
+    if progress:
+        progress(
+            f"[OK] FAISS {index_type} 인덱스: {index.ntotal}개 벡터 → {vector_path} "
+            f"(임베딩 {stats.embed_seconds:.1f}s, 추가 {stats.add_seconds:.1f}s, "
+            f"{stats.docs_per_second:.1f} docs/s)"
+        )
+    return stats
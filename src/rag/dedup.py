@@ -0,0 +1,208 @@
+"""MinHash/LSH 기반 근접 중복 청크 제거.
+
+크롤링한 정책 페이지에는 헤더/푸터, 판매자 공통 약관 등 반복 문구가 많아
+거의 같은 청크가 인덱스에 여러 번 들어갑니다. 인덱스 빌드 시 문자 k-shingle의
+MinHash 서명을 만들고, LSH 밴드 버킷으로 후보를 찾은 뒤 추정 Jaccard 유사도가
+threshold 이상이면 먼저 나온 청크(canonical)로 합칩니다.
+
+합쳐진 청크의 metadata에는 원래 출처 목록(sources)과 중복 수(duplicates)가 추가됩니다.
+증분 갱신 시에는 source_urls/detach_source로 출처 단위로 청크 소유권을 판단합니다.
+"""
+
+from __future__ import annotations
+
+import re
+import zlib
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64((1 << 32) - 1)
+_WS_RE = re.compile(r"\s+")
+
+# 출처 목록에 남길 metadata 키
+SOURCE_KEYS = ("url", "title", "doc_type", "source")
+
+
+def shingles(text: str, k: int = 5) -> List[str]:
+    """공백 정규화 후 문자 k-shingle (한국어는 단어보다 문자 단위가 안정적)."""
+    norm = _WS_RE.sub(" ", text or "").strip().lower()
+    if not norm:
+        return []
+    if len(norm) <= k:
+        return [norm]
+    return [norm[i : i + k] for i in range(len(norm) - k + 1)]
+
+
+class MinHasher:
+    """MinHash 서명 생성기 (고정 시드, 프로세스 간 동일)."""
+
+    def __init__(self, num_perm: int = 128, seed: int = 1) -> None:
+        self.num_perm = num_perm
+        rng = np.random.RandomState(seed)
+        self._a = rng.randint(1, 1 << 32, size=num_perm, dtype=np.uint64)
+        self._b = rng.randint(0, 1 << 32, size=num_perm, dtype=np.uint64)
+
+    def signature(self, tokens: Sequence[str]) -> np.ndarray:
+        """토큰 집합의 MinHash 서명 (num_perm,)."""
+        if not tokens:
+            return np.full(self.num_perm, _MAX_HASH, dtype=np.uint64)
+        hv = np.fromiter(
+            {zlib.crc32(t.encode("utf-8")) for t in tokens}, dtype=np.uint64
+        )
+        # (a*x + b) mod p 를 각 순열로 적용 (uint64 overflow는 해시로서 무해)
+        with np.errstate(over="ignore"):
+            perm = (np.outer(self._a, hv) + self._b[:, None]) % _MERSENNE_PRIME
+        return (perm & _MAX_HASH).min(axis=1)
+
+
+def estimate_jaccard(sig_a: np.ndarray, sig_b: np.ndarray) -> float:
+    """두 서명의 추정 Jaccard 유사도."""
+    return float(np.mean(sig_a == sig_b))
+
+
+def optimal_bands(threshold: float, num_perm: int) -> Tuple[int, int]:
+    """threshold에서 거짓 양성/음성 확률 합이 최소인 (bands, rows).
+
+    밴드 b개 × 행 r개일 때 유사도 s의 후보 확률은 1 - (1 - s^r)^b 입니다.
+    """
+    grid = np.linspace(0.0, 1.0, 201)
+    best: Tuple[float, int, int] = (float("inf"), 1, num_perm)
+    for b in range(1, num_perm + 1):
+        r = num_perm // b
+        if r == 0:
+            break
+        prob = 1 - (1 - grid ** r) ** b
+        fp = prob[grid < threshold].sum()
+        fn = (1 - prob[grid >= threshold]).sum()
+        err = fp + fn
+        if err < best[0]:
+            best = (err, b, r)
+    return best[1], best[2]
+
+
+@dataclass
+class DedupStats:
+    """중복 제거 통계."""
+
+    input_chunks: int = 0
+    output_chunks: int = 0
+    input_chars: int = 0
+    output_chars: int = 0
+
+    @property
+    def duplicates(self) -> int:
+        return self.input_chunks - self.output_chunks
+
+    @property
+    def reduction(self) -> float:
+        """청크 수 감소 비율 (0.0~1.0)."""
+        return self.duplicates / self.input_chunks if self.input_chunks else 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "input_chunks": self.input_chunks,
+            "output_chunks": self.output_chunks,
+            "duplicates": self.duplicates,
+            "reduction": round(self.reduction, 4),
+            "input_chars": self.input_chars,
+            "output_chars": self.output_chars,
+        }
+
+
+class NearDuplicateFilter:
+    """스트리밍 근접 중복 판정기 (LSH 후보 + 서명 검증)."""
+
+    def __init__(self, threshold: float = 0.9, num_perm: int = 128, shingle_size: int = 5) -> None:
+        """필터 초기화.
+
+        Args:
+            threshold: 중복으로 볼 Jaccard 유사도
+            num_perm: MinHash 순열 수
+            shingle_size: 문자 shingle 길이
+        """
+        self.threshold = threshold
+        self.shingle_size = shingle_size
+        self.hasher = MinHasher(num_perm)
+        self.bands, self.rows = optimal_bands(threshold, num_perm)
+        self._buckets: List[Dict[bytes, List[int]]] = [{} for _ in range(self.bands)]
+        self._signatures: List[np.ndarray] = []
+
+    def _band_keys(self, sig: np.ndarray) -> List[bytes]:
+        return [sig[i * self.rows : (i + 1) * self.rows].tobytes() for i in range(self.bands)]
+
+    def add(self, text: str) -> Optional[int]:
+        """텍스트 등록.
+
+        Returns:
+            중복이면 canonical 항목 번호, 새 항목이면 None
+        """
+        sig = self.hasher.signature(shingles(text, self.shingle_size))
+        keys = self._band_keys(sig)
+
+        seen = set()
+        best: Optional[int] = None
+        best_sim = self.threshold
+        for band, key in enumerate(keys):
+            for cand in self._buckets[band].get(key, ()):
+                if cand in seen:
+                    continue
+                seen.add(cand)
+                sim = estimate_jaccard(sig, self._signatures[cand])
+                if sim >= best_sim:
+                    best, best_sim = cand, sim
+        if best is not None:
+            return best
+
+        pos = len(self._signatures)
+        self._signatures.append(sig)
+        for band, key in enumerate(keys):
+            self._buckets[band].setdefault(key, []).append(pos)
+        return None
+
+
+def merge_source(canonical_meta: Dict[str, Any], duplicate_meta: Dict[str, Any]) -> Dict[str, Any]:
+    """중복 청크의 출처를 canonical metadata에 합친 새 dict 반환."""
+    merged = dict(canonical_meta)
+    sources = list(merged.get("sources") or [{k: canonical_meta.get(k, "") for k in SOURCE_KEYS}])
+    entry = {k: duplicate_meta.get(k, "") for k in SOURCE_KEYS}
+    if entry not in sources:
+        sources.append(entry)
+    merged["sources"] = sources
+    merged["duplicates"] = int(merged.get("duplicates", 0)) + 1
+    return merged
+
+
+def source_urls(meta: Dict[str, Any]) -> List[str]:
+    """청크를 공유하는 출처 url 목록 (합쳐지지 않은 청크는 자기 url 하나)."""
+    sources = meta.get("sources")
+    if sources:
+        return [s.get("url", "") for s in sources]
+    return [meta.get("url", "")]
+
+
+def detach_source(meta: Dict[str, Any], url: str) -> Optional[Dict[str, Any]]:
+    """url을 출처에서 뺀 새 metadata 반환 (남은 출처가 없으면 None).
+
+    대표 출처(metadata.url)가 빠지면 남은 첫 출처로 대표 정보를 바꿉니다.
+    """
+    sources = list(meta.get("sources") or [{k: meta.get(k, "") for k in SOURCE_KEYS}])
+    remaining = [s for s in sources if s.get("url", "") != url]
+    if not remaining:
+        return None
+
+    detached = dict(meta)
+    if meta.get("url", "") == url:
+        detached.update(remaining[0])
+    duplicates = int(meta.get("duplicates", 0)) - (len(sources) - len(remaining))
+    if len(remaining) > 1:
+        detached["sources"] = remaining
+    else:
+        detached.pop("sources", None)
+    if duplicates > 0:
+        detached["duplicates"] = duplicates
+    else:
+        detached.pop("duplicates", None)
+    return detached
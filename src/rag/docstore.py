@@ -0,0 +1,462 @@
+"""정책 청크 문서 저장소 (JSONL, tombstone 지원).
+
+텍스트 인덱스(policies_index.jsonl)를 추가 전용 로그로 다룹니다.
+- 문서 레코드: {"id", "int_id", "text", "metadata"}
+- 삭제 레코드: {"id", "int_id", "deleted": true}
+
+같은 int_id의 마지막 레코드가 유효하며, 삭제 레코드가 마지막이면 제외됩니다.
+int_id가 없는 기존 인덱스 파일은 id에서 동일 규칙으로 계산합니다.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+_INT64_MASK = 0x7FFF_FFFF_FFFF_FFFF
+
+
+def stable_int_id(doc_id: str) -> int:
+    """문서 ID에서 FAISS용 양의 int64 ID 생성.
+
+    16자리 hex(청크 해시) ID는 그대로 정수로 변환하고,
+    그 외 문자열은 sha1 해시 앞 16자리를 사용합니다.
+    """
+    try:
+        if len(doc_id) == 16:
+            return int(doc_id, 16) & _INT64_MASK
+    except ValueError:
+        pass
+    digest = hashlib.sha1(doc_id.encode("utf-8", errors="ignore")).hexdigest()[:16]
+    return int(digest, 16) & _INT64_MASK
+
+
+class JsonlDocStore:
+    """tombstone 기반 JSONL 문서 저장소."""
+
+    def __init__(self, path: Path) -> None:
+        self.path = Path(path)
+        self._records: Dict[int, Dict[str, Any]] = {}
+        self._tombstones = 0
+        self._loaded = False
+
+    def load(self) -> "JsonlDocStore":
+        """파일에서 유효 레코드 로드."""
+        self._records = {}
+        self._tombstones = 0
+        self._loaded = True
+        if not self.path.exists():
+            return self
+
+        with self.path.open("r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                obj = json.loads(line)
+                int_id = obj.get("int_id")
+                if int_id is None:
+                    int_id = stable_int_id(obj.get("id", ""))
+                if obj.get("deleted"):
+                    self._tombstones += 1
+                    self._records.pop(int_id, None)
+                    continue
+                obj["int_id"] = int_id
+                self._records[int_id] = obj
+        return self
+
+    def iter_live(self) -> Iterator[Dict[str, Any]]:
+        """유효 레코드를 파일 순서대로 스트리밍 (전체를 메모리에 올리지 않음).
+
+        첫 번째 패스에서 int_id별 마지막 줄 번호만 기록하고,
+        두 번째 패스에서 해당 줄만 파싱해 반환합니다.
+        """
+        if not self.path.exists():
+            return
+
+        last_line: Dict[int, int] = {}
+        with self.path.open("r", encoding="utf-8") as f:
+            for lineno, line in enumerate(f):
+                line = line.strip()
+                if not line:
+                    continue
+                obj = json.loads(line)
+                int_id = obj.get("int_id")
+                if int_id is None:
+                    int_id = stable_int_id(obj.get("id", ""))
+                last_line[int_id] = -1 if obj.get("deleted") else lineno
+
+        live_lines = {n for n in last_line.values() if n >= 0}
+        del last_line
+        with self.path.open("r", encoding="utf-8") as f:
+            for lineno, line in enumerate(f):
+                if lineno not in live_lines:
+                    continue
+                obj = json.loads(line)
+                obj.setdefault("int_id", stable_int_id(obj.get("id", "")))
+                yield obj
+
+    def count_live(self) -> int:
+        """유효 레코드 수 (스트리밍 계산)."""
+        return sum(1 for _ in self.iter_live())
+
+    def _ensure_loaded(self) -> None:
+        if not self._loaded:
+            self.load()
+
+    def __len__(self) -> int:
+        self._ensure_loaded()
+        return len(self._records)
+
+    def __contains__(self, int_id: int) -> bool:
+        self._ensure_loaded()
+        return int_id in self._records
+
+    @property
+    def tombstones(self) -> int:
+        return self._tombstones
+
+    def records(self) -> List[Dict[str, Any]]:
+        """유효 레코드 목록 (최초 기록 순서)."""
+        self._ensure_loaded()
+        return list(self._records.values())
+
+    def get(self, int_id: int) -> Optional[Dict[str, Any]]:
+        self._ensure_loaded()
+        return self._records.get(int_id)
+
+    def ids_where(self, key: str, value: Any) -> List[int]:
+        """metadata[key] == value 인 레코드의 int_id 목록."""
+        self._ensure_loaded()
+        return [
+            int_id for int_id, rec in self._records.items()
+            if (rec.get("metadata") or {}).get(key) == value
+        ]
+
+    def _append(self, lines: Iterable[Dict[str, Any]]) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self.path.open("a", encoding="utf-8") as f:
+            for obj in lines:
+                f.write(json.dumps(obj, ensure_ascii=False) + "\n")
+
+    def upsert(self, records: Iterable[Dict[str, Any]]) -> int:
+        """레코드 추가/갱신 (내용이 같으면 기록하지 않음).
+
+        Returns:
+            실제 기록된 레코드 수
+        """
+        self._ensure_loaded()
+        changed = []
+        for rec in records:
+            rec = dict(rec)
+            rec.setdefault("int_id", stable_int_id(rec.get("id", "")))
+            if self._records.get(rec["int_id"]) == rec:
+                continue
+            self._records[rec["int_id"]] = rec
+            changed.append(rec)
+        if changed:
+            self._append(changed)
+        return len(changed)
+
+    def delete(self, int_ids: Iterable[int]) -> int:
+        """tombstone 기록.
+
+        Returns:
+            삭제된 레코드 수
+        """
+        self._ensure_loaded()
+        tombstones = []
+        for int_id in int_ids:
+            rec = self._records.pop(int_id, None)
+            if rec is None:
+                continue
+            tombstones.append({"id": rec.get("id", ""), "int_id": int_id, "deleted": True})
+        if tombstones:
+            self._append(tombstones)
+            self._tombstones += len(tombstones)
+        return len(tombstones)
+
+    def compact(self) -> None:
+        """유효 레코드만 남기도록 파일 재작성 (원자적 교체)."""
+        self._ensure_loaded()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(self.path.suffix + ".tmp")
+        with tmp.open("w", encoding="utf-8") as f:
+            for rec in self._records.values():
+                f.write(json.dumps(rec, ensure_ascii=False) + "\n")
+        os.replace(tmp, self.path)
+        self._tombstones = 0
+        logger.info(f"문서 저장소 압축: {len(self._records)}개 → {self.path}")
+
+
+# ---------------------------------------------------------------------------
+# 검색용 읽기 전용 문서 테이블
+# ---------------------------------------------------------------------------
+
+# (id, text, metadata)
+DocTuple = Tuple[str, str, Dict[str, Any]]
+
+
+class InMemoryDocStore:
+    """JSONL 유효 레코드를 파이썬 리스트로 보관하는 문서 테이블."""
+
+    def __init__(self, source: Path) -> None:
+        self._docs: List[DocTuple] = []
+        self._id_to_pos: Dict[int, int] = {}
+        for obj in JsonlDocStore(source).records():
+            self._id_to_pos[obj["int_id"]] = len(self._docs)
+            self._docs.append((obj.get("id", ""), obj.get("text", ""), obj.get("metadata", {})))
+
+    def __len__(self) -> int:
+        return len(self._docs)
+
+    def __getitem__(self, pos: int) -> DocTuple:
+        return self._docs[pos]
+
+    def __iter__(self) -> Iterator[DocTuple]:
+        return iter(self._docs)
+
+    def position_of(self, int_id: int) -> Optional[int]:
+        return self._id_to_pos.get(int_id)
+
+
+# 파일 이름
+_MANIFEST_FILE = "manifest.json"
+_TEXTS_FILE = "texts.bin"
+_TEXT_OFFSETS_FILE = "text_offsets.npy"
+_IDS_FILE = "ids.bin"
+_ID_OFFSETS_FILE = "id_offsets.npy"
+_META_IDX_FILE = "meta_idx.npy"
+_METADATA_FILE = "metadata.json"
+_SORTED_INT_IDS_FILE = "sorted_int_ids.npy"
+_SORTED_POS_FILE = "sorted_pos.npy"
+MMAP_FORMAT_VERSION = 1
+# 새 버전 빌드 후에도 남겨 둘 직전 버전 수 (이전 버전을 쓰는 검색/워커용)
+_KEEP_PREVIOUS_VERSIONS = 1
+
+
+def source_fingerprint(source: Path) -> str:
+    """파일 버전 식별자 (mtime_ns-size)."""
+    st = Path(source).stat()
+    return f"{st.st_mtime_ns}-{st.st_size}"
+
+
+def _open_blob(path: Path) -> Any:
+    import numpy as np
+
+    if path.stat().st_size == 0:
+        return np.zeros(0, dtype=np.uint8)
+    return np.memmap(path, dtype=np.uint8, mode="r")
+
+
+class MmapDocStore:
+    """memory-map 기반 읽기 전용 문서 테이블.
+
+    디렉토리 구성 (mmap_dir_for()로 결정):
+        texts.bin / text_offsets.npy   # UTF-8 본문 blob + 오프셋 (N+1)
+        ids.bin / id_offsets.npy       # 문서 ID blob + 오프셋
+        meta_idx.npy / metadata.json   # 중복 제거된 메타데이터 테이블 + 문서별 인덱스
+        sorted_int_ids.npy / sorted_pos.npy  # 안정 ID → 위치 (이진 검색)
+        postings_*.npy / vocab.json    # 키워드 역색인 (InvertedIndex.save)
+
+    파일은 첫 접근 시 열리며, 조회된 문서만 파이썬 객체로 만들어집니다.
+    여러 프로세스가 같은 파일을 열면 OS 페이지 캐시를 공유합니다.
+    """
+
+    def __init__(self, directory: Path) -> None:
+        self.directory = Path(directory)
+        self._opened = False
+        self._count = 0
+
+    # ----- 빌드 -----
+
+    @staticmethod
+    def mmap_dir_for(source: Path) -> Path:
+        """원본 JSONL의 현재 버전에 해당하는 mmap 디렉토리."""
+        source = Path(source)
+        return source.parent / f"{source.name}.mmap" / source_fingerprint(source)
+
+    @classmethod
+    def build(cls, source: Path, directory: Optional[Path] = None) -> Path:
+        """원본 JSONL(tombstone 반영)에서 mmap 파일 생성.
+
+        임시 디렉토리에 만든 뒤 이름을 바꾸므로 여러 프로세스가 동시에
+        빌드해도 안전합니다. 이미 있으면 그대로 사용합니다.
+        """
+        import shutil
+        import tempfile
+
+        import numpy as np
+
+        from src.rag.inverted_index import InvertedIndex
+        from src.rag.retriever import _tokenize
+
+        source = Path(source)
+        directory = Path(directory) if directory else cls.mmap_dir_for(source)
+        if (directory / _MANIFEST_FILE).exists():
+            return directory
+
+        directory.parent.mkdir(parents=True, exist_ok=True)
+        tmp = Path(tempfile.mkdtemp(prefix=".build-", dir=directory.parent))
+        try:
+            text_offsets = [0]
+            id_offsets = [0]
+            meta_idx: List[int] = []
+            int_ids: List[int] = []
+            meta_table: List[Dict[str, Any]] = []
+            meta_lookup: Dict[str, int] = {}
+            tokens: List[List[str]] = []
+
+            with (tmp / _TEXTS_FILE).open("wb") as ft, (tmp / _IDS_FILE).open("wb") as fi:
+                for obj in JsonlDocStore(source).iter_live():
+                    text = obj.get("text", "").encode("utf-8")
+                    ft.write(text)
+                    text_offsets.append(text_offsets[-1] + len(text))
+
+                    doc_id = obj.get("id", "").encode("utf-8")
+                    fi.write(doc_id)
+                    id_offsets.append(id_offsets[-1] + len(doc_id))
+
+                    meta = obj.get("metadata", {}) or {}
+                    key = json.dumps(meta, ensure_ascii=False, sort_keys=True)
+                    if key not in meta_lookup:
+                        meta_lookup[key] = len(meta_table)
+                        meta_table.append(meta)
+                    meta_idx.append(meta_lookup[key])
+                    int_ids.append(obj["int_id"])
+                    tokens.append(_tokenize(obj.get("text", "")))
+
+            ids_arr = np.asarray(int_ids, dtype=np.int64)
+            order = np.argsort(ids_arr, kind="stable")
+            np.save(tmp / _TEXT_OFFSETS_FILE, np.asarray(text_offsets, dtype=np.int64))
+            np.save(tmp / _ID_OFFSETS_FILE, np.asarray(id_offsets, dtype=np.int64))
+            np.save(tmp / _META_IDX_FILE, np.asarray(meta_idx, dtype=np.int32))
+            np.save(tmp / _SORTED_INT_IDS_FILE, ids_arr[order])
+            np.save(tmp / _SORTED_POS_FILE, order.astype(np.int64))
+            with (tmp / _METADATA_FILE).open("w", encoding="utf-8") as f:
+                json.dump(meta_table, f, ensure_ascii=False)
+
+            InvertedIndex.build(tokens).save(tmp)
+            del tokens
+
+            with (tmp / _MANIFEST_FILE).open("w", encoding="utf-8") as f:
+                json.dump({
+                    "version": MMAP_FORMAT_VERSION,
+                    "source": str(source),
+                    "count": len(int_ids),
+                }, f)
+
+            try:
+                os.rename(tmp, directory)
+            except OSError:
+                # 다른 프로세스가 먼저 완료
+                if not (directory / _MANIFEST_FILE).exists():
+                    raise
+        finally:
+            if tmp.exists():
+                shutil.rmtree(tmp, ignore_errors=True)
+
+        cls._cleanup_old_versions(directory)
+        logger.info(f"mmap 문서 저장소 생성: {len(int_ids)}개 → {directory}")
+        return directory
+
+    @staticmethod
+    def _cleanup_old_versions(current: Path, keep_previous: int = _KEEP_PREVIOUS_VERSIONS) -> None:
+        """current보다 오래된 버전 디렉토리 정리.
+
+        직전 버전(keep_previous개)은 남겨 둡니다. 다른 워커나 IndexManager가 유지하는
+        이전 리트리버가 아직 그 파일을 열고 있거나 곧 열 수 있기 때문입니다.
+        current보다 새 버전(다른 프로세스가 방금 빌드)은 건드리지 않습니다.
+        """
+        import shutil
+
+        def built_at(directory: Path) -> float:
+            manifest = directory / _MANIFEST_FILE
+            return (manifest if manifest.exists() else directory).stat().st_mtime
+
+        current_time = built_at(current)
+        older = sorted(
+            (
+                sibling for sibling in current.parent.iterdir()
+                if sibling != current and sibling.is_dir() and not sibling.name.startswith(".build-")
+                and built_at(sibling) <= current_time
+            ),
+            key=built_at,
+            reverse=True,
+        )
+        for sibling in older[keep_previous:]:
+            shutil.rmtree(sibling, ignore_errors=True)
+
+    @classmethod
+    def open_for(cls, source: Path) -> "MmapDocStore":
+        """원본 JSONL에 맞는 mmap 저장소를 열기 (없거나 오래됐으면 빌드)."""
+        return cls(cls.build(source))
+
+    # ----- 조회 -----
+
+    def _open(self) -> None:
+        import numpy as np
+
+        with (self.directory / _MANIFEST_FILE).open("r", encoding="utf-8") as f:
+            manifest = json.load(f)
+        if manifest.get("version") != MMAP_FORMAT_VERSION:
+            raise ValueError(f"지원하지 않는 mmap 형식: {manifest.get('version')}")
+
+        self._texts = _open_blob(self.directory / _TEXTS_FILE)
+        self._ids = _open_blob(self.directory / _IDS_FILE)
+        self._text_offsets = np.load(self.directory / _TEXT_OFFSETS_FILE, mmap_mode="r")
+        self._id_offsets = np.load(self.directory / _ID_OFFSETS_FILE, mmap_mode="r")
+        self._meta_idx = np.load(self.directory / _META_IDX_FILE, mmap_mode="r")
+        self._sorted_int_ids = np.load(self.directory / _SORTED_INT_IDS_FILE, mmap_mode="r")
+        self._sorted_pos = np.load(self.directory / _SORTED_POS_FILE, mmap_mode="r")
+        with (self.directory / _METADATA_FILE).open("r", encoding="utf-8") as f:
+            self._metadata: List[Dict[str, Any]] = json.load(f)
+        self._count = int(manifest.get("count", len(self._meta_idx)))
+        self._opened = True
+
+    def _ensure_open(self) -> None:
+        if not self._opened:
+            self._open()
+
+    def __len__(self) -> int:
+        self._ensure_open()
+        return self._count
+
+    def __getitem__(self, pos: int) -> DocTuple:
+        self._ensure_open()
+        if pos < 0:
+            pos += self._count
+        if not 0 <= pos < self._count:
+            raise IndexError(pos)
+        t0, t1 = int(self._text_offsets[pos]), int(self._text_offsets[pos + 1])
+        i0, i1 = int(self._id_offsets[pos]), int(self._id_offsets[pos + 1])
+        text = bytes(self._texts[t0:t1]).decode("utf-8")
+        doc_id = bytes(self._ids[i0:i1]).decode("utf-8")
+        meta = dict(self._metadata[int(self._meta_idx[pos])])
+        return doc_id, text, meta
+
+    def __iter__(self) -> Iterator[DocTuple]:
+        for pos in range(len(self)):
+            yield self[pos]
+
+    def position_of(self, int_id: int) -> Optional[int]:
+        """안정 ID → 문서 위치 (이진 검색)."""
+        import numpy as np
+
+        self._ensure_open()
+        i = int(np.searchsorted(self._sorted_int_ids, int_id))
+        if i < len(self._sorted_int_ids) and int(self._sorted_int_ids[i]) == int_id:
+            return int(self._sorted_pos[i])
+        return None
+
+    def keyword_index(self):
+        """함께 저장된 역색인 로드."""
+        from src.rag.inverted_index import InvertedIndex
+
+        return InvertedIndex.load(self.directory)
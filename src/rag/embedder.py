@@ -6,6 +6,8 @@
 from __future__ import annotations
 
 import logging
+import threading
+from collections import OrderedDict
 from pathlib import Path
 from typing import List, Optional, Union
 
@@ -15,11 +17,15 @@ from src.config import get_config
 
 logger = logging.getLogger(__name__)
 
+# 최근 쿼리 임베딩 캐시 크기 (시맨틱 캐시와 하이브리드 검색이 같은 쿼리를 재사용)
+_QUERY_CACHE_SIZE = 256
+
 
 class Embedder:
     """텍스트 임베딩 생성기.
 
-    sentence-transformers를 사용하여 텍스트를 벡터로 변환합니다.
+    sentence-transformers(torch) 또는 ONNX Runtime(onnx) 백엔드로
+    텍스트를 벡터로 변환합니다.
     """
 
     _instance: Optional["Embedder"] = None
@@ -29,6 +35,7 @@ class Embedder:
         model_name: Optional[str] = None,
         device: Optional[str] = None,
         normalize: bool = True,
+        backend: Optional[str] = None,
     ):
         """임베딩 모델 초기화.
 
@@ -36,6 +43,7 @@ class Embedder:
             model_name: 모델 이름 (기본값: config에서 로드)
             device: 디바이스 (auto, cpu, cuda)
             normalize: 벡터 정규화 여부
+            backend: 추론 백엔드 (torch, onnx)
         """
         cfg = get_config().rag.embedding
 
@@ -43,9 +51,15 @@ class Embedder:
         self.device = device or cfg.device
         self.normalize = normalize if normalize is not None else cfg.normalize
         self.batch_size = cfg.batch_size
+        self.backend = backend or cfg.backend
+        self.onnx_dir = cfg.onnx_dir
+        self.onnx_quantized = cfg.onnx_quantized
+        self.onnx_threads = cfg.onnx_threads
 
         self._model = None
         self._dimension: Optional[int] = None
+        self._query_cache: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._query_cache_lock = threading.Lock()
 
     @classmethod
     def get_instance(cls) -> "Embedder":
@@ -64,6 +78,10 @@ class Embedder:
         if self._model is not None:
             return
 
+        if self.backend == "onnx":
+            self._load_onnx_model()
+            return
+
         try:
             from sentence_transformers import SentenceTransformer
 
@@ -84,6 +102,22 @@ class Embedder:
                 "pip install sentence-transformers 를 실행하세요."
             )
 
+    def _load_onnx_model(self) -> None:
+        """ONNX Runtime 모델 로드 (CPU 전용)."""
+        from src.rag.onnx_backend import OnnxSentenceEncoder
+
+        logger.info(
+            f"임베딩 모델 로드 (onnx): {self.onnx_dir} "
+            f"(quantized={self.onnx_quantized})"
+        )
+        self._model = OnnxSentenceEncoder(
+            self.onnx_dir,
+            quantized=self.onnx_quantized,
+            threads=self.onnx_threads,
+        )
+        self._dimension = self._model.get_sentence_embedding_dimension()
+        logger.info(f"임베딩 차원: {self._dimension}")
+
     @property
     def dimension(self) -> int:
         """임베딩 차원."""
@@ -139,17 +173,26 @@ class Embedder:
         Returns:
             쿼리 임베딩 벡터
         """
+        with self._query_cache_lock:
+            cached = self._query_cache.get(query)
+            if cached is not None:
+                self._query_cache.move_to_end(query)
+                return cached
+
         self._load_model()
 
         # E5 모델의 경우 쿼리 프리픽스 추가
-        if "e5" in self.model_name.lower():
-            query = f"query: {query}"
+        text = f"query: {query}" if "e5" in self.model_name.lower() else query
 
         embedding = self._model.encode(
-            query,
+            text,
             normalize_embeddings=self.normalize,
         )
 
+        with self._query_cache_lock:
+            self._query_cache[query] = embedding
+            while len(self._query_cache) > _QUERY_CACHE_SIZE:
+                self._query_cache.popitem(last=False)
         return embedding
 
     def encode_documents(
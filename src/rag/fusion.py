@@ -0,0 +1,93 @@
+"""검색 결과 융합 (Rank Fusion).
+
+여러 검색 경로(키워드, 임베딩)의 (score, index) 결과를 하나의 순위로 합칩니다.
+
+지원 방식:
+- score: 각 경로의 정규화 점수([0, 1])를 가중합 (기존 hybrid_alpha 의미 유지)
+- rrf: Reciprocal Rank Fusion. 점수 척도와 무관하게 순위만 사용
+"""
+
+from __future__ import annotations
+
+from typing import Dict, List, Sequence, Tuple
+
+# (score, index) 리스트
+LegResults = List[Tuple[float, int]]
+
+FUSION_METHODS = ("score", "rrf")
+DEFAULT_RRF_K = 60
+
+
+def _sorted_top(score_map: Dict[int, float], top_k: int) -> LegResults:
+    """점수 내림차순, 동점은 인덱스 오름차순으로 상위 top_k 반환."""
+    combined = [(score, idx) for idx, score in score_map.items()]
+    combined.sort(key=lambda x: (-x[0], x[1]))
+    return combined[:top_k]
+
+
+def score_fusion(
+    legs: Sequence[LegResults],
+    weights: Sequence[float],
+    top_k: int,
+) -> LegResults:
+    """정규화 점수 가중합 융합.
+
+    각 경로의 점수는 이미 [0, 1]로 정규화되어 있어야 합니다.
+    한쪽 경로에만 있는 문서는 다른 경로 점수를 0으로 간주합니다.
+
+    Args:
+        legs: 경로별 (score, index) 결과
+        weights: 경로별 가중치
+        top_k: 반환할 최대 결과 수
+    """
+    score_map: Dict[int, float] = {}
+    for results, weight in zip(legs, weights):
+        for score, idx in results:
+            score_map[idx] = score_map.get(idx, 0.0) + weight * score
+    return _sorted_top(score_map, top_k)
+
+
+def reciprocal_rank_fusion(
+    legs: Sequence[LegResults],
+    weights: Sequence[float],
+    top_k: int,
+    k: int = DEFAULT_RRF_K,
+) -> LegResults:
+    """Reciprocal Rank Fusion.
+
+    score(d) = Σ w_leg / (k + rank_leg(d)), rank는 1부터 시작합니다.
+    모든 경로에서 1위인 문서가 1.0이 되도록 정규화하므로
+    min_score 등 [0, 1] 기준 임계값을 그대로 쓸 수 있습니다.
+
+    Args:
+        legs: 경로별 (score, index) 결과 (점수 내림차순)
+        weights: 경로별 가중치
+        top_k: 반환할 최대 결과 수
+        k: RRF 상수 (클수록 하위 순위 영향 증가)
+    """
+    max_score = sum(w / (k + 1) for w in weights)
+    if max_score <= 0:
+        return []
+
+    score_map: Dict[int, float] = {}
+    for results, weight in zip(legs, weights):
+        for rank, (_score, idx) in enumerate(results, start=1):
+            score_map[idx] = score_map.get(idx, 0.0) + weight / (k + rank)
+
+    normalized = {idx: s / max_score for idx, s in score_map.items()}
+    return _sorted_top(normalized, top_k)
+
+
+def fuse(
+    method: str,
+    legs: Sequence[LegResults],
+    weights: Sequence[float],
+    top_k: int,
+    rrf_k: int = DEFAULT_RRF_K,
+) -> LegResults:
+    """설정된 방식으로 결과 융합."""
+    if method == "rrf":
+        return reciprocal_rank_fusion(legs, weights, top_k, k=rrf_k)
+    if method == "score":
+        return score_fusion(legs, weights, top_k)
+    raise ValueError(f"지원하지 않는 fusion 방식: {method} (score, rrf 중 선택)")
@@ -0,0 +1,285 @@
+"""검색 인덱스 버전 관리 및 무중단 교체.
+
+프로세스 전체가 하나의 IndexManager를 통해 PolicyRetriever를 사용합니다.
+
+- reload(): 새 버전(텍스트 인덱스, FAISS, 문서 저장소)을 백그라운드에서 로드하고
+  검증한 뒤 원자적으로 교체합니다. 검증에 실패하면 기존 버전을 유지합니다.
+- acquire(): 현재 버전을 참조 카운트와 함께 빌려줍니다. 교체 중에도
+  진행 중인 검색은 이전 버전에서 끝나며, 마지막 참조가 반납되면 정리됩니다.
+- IndexWatcher: 인덱스 파일 변경을 폴링해 reload()를 호출합니다.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from src.config import get_config
+from src.rag.docstore import source_fingerprint
+from src.rag.retriever import PolicyRetriever
+from src.rag.sharding import create_retriever
+
+logger = logging.getLogger(__name__)
+
+
+class IndexValidationError(Exception):
+    """새 인덱스 버전 검증 실패."""
+
+
+@dataclass
+class IndexVersion:
+    """로드된 인덱스 한 버전."""
+
+    retriever: PolicyRetriever
+    loaded_at: float = field(default_factory=time.time)
+    refcount: int = 0
+    retired: bool = False
+
+    @property
+    def version(self) -> str:
+        return self.retriever.index_version
+
+
+def validate_retriever(retriever: PolicyRetriever, allow_empty: bool = False) -> None:
+    """새로 로드한 리트리버 검증.
+
+    Raises:
+        IndexValidationError: 문서가 없거나, 벡터 수가 문서 수와 다르거나, 검색이 실패할 때
+    """
+    n_docs = len(retriever._docs)
+    if n_docs == 0:
+        if allow_empty:
+            return
+        raise IndexValidationError(f"문서가 없습니다: {retriever.index_path}")
+
+    # 샤드 리트리버는 샤드별로 확인
+    parts = getattr(retriever, "shards", None) or {"": retriever}
+    for name, part in parts.items():
+        faiss_index = part._faiss_index
+        if faiss_index is not None and faiss_index.ntotal != len(part._docs):
+            raise IndexValidationError(
+                f"{name or '전체'} 벡터 수({faiss_index.ntotal})와 문서 수({len(part._docs)})가 다릅니다"
+            )
+
+    # 첫 문서의 앞부분으로 검색이 동작하는지 확인
+    _doc_id, text, _meta = retriever._docs[0]
+    try:
+        retriever.search_policy(text[:50] or "정책", top_k=1)
+    except Exception as e:
+        raise IndexValidationError(f"검색 스모크 테스트 실패: {e}") from e
+
+
+class IndexManager:
+    """PolicyRetriever 버전 관리자."""
+
+    def __init__(
+        self,
+        factory: Optional[Callable[[], PolicyRetriever]] = None,
+    ) -> None:
+        """관리자 초기화.
+
+        Args:
+            factory: 새 리트리버 생성 함수 (기본: 설정에 따라 샤드/단일 리트리버)
+        """
+        self._factory = factory or create_retriever
+        self._lock = threading.Lock()
+        self._reload_lock = threading.Lock()
+        self._current: Optional[IndexVersion] = None
+        self._retired: List[IndexVersion] = []
+        self._reloads = 0
+        self._last_error: Optional[str] = None
+
+    def _ensure_loaded(self) -> IndexVersion:
+        if self._current is None:
+            with self._reload_lock:
+                if self._current is None:
+                    # 최초 로드는 빈 인덱스도 허용 (인덱스 빌드 전 기동)
+                    self._current = IndexVersion(self._factory())
+        return self._current
+
+    @property
+    def current(self) -> PolicyRetriever:
+        """현재 버전의 리트리버 (참조 카운트 없이 잠깐 쓰는 용도)."""
+        return self._ensure_loaded().retriever
+
+    @contextmanager
+    def acquire(self) -> Iterator[PolicyRetriever]:
+        """현재 버전을 빌려 사용 (블록 동안 교체되어도 유지)."""
+        self._ensure_loaded()
+        with self._lock:
+            entry = self._current
+            entry.refcount += 1
+        try:
+            yield entry.retriever
+        finally:
+            with self._lock:
+                entry.refcount -= 1
+                if entry.retired and entry.refcount == 0:
+                    self._release(entry)
+
+    def _release(self, entry: IndexVersion) -> None:
+        """퇴역 버전 정리 (lock 보유 상태에서 호출)."""
+        if entry in self._retired:
+            self._retired.remove(entry)
+        logger.info(f"이전 인덱스 버전 해제: {entry.version}")
+
+    def reload(self, validate: Optional[bool] = None) -> Dict[str, Any]:
+        """새 버전 로드 → 검증 → 원자적 교체 (블로킹).
+
+        Args:
+            validate: 교체 전 검증 여부 (None이면 rag.reload.validate)
+
+        Returns:
+            {"reloaded", "version", "previous", "documents", "duration_ms"}
+
+        Raises:
+            IndexValidationError: 검증 실패 (기존 버전 유지)
+        """
+        if validate is None:
+            validate = get_config().rag.reload.validate
+        start = time.time()
+        with self._reload_lock:
+            try:
+                candidate = self._factory()
+                if validate:
+                    validate_retriever(candidate)
+            except Exception as e:
+                self._last_error = str(e)
+                logger.error(f"인덱스 재로드 실패, 기존 버전 유지: {e}")
+                raise
+
+            new_entry = IndexVersion(candidate)
+            with self._lock:
+                old = self._current
+                self._current = new_entry
+                if old is not None:
+                    old.retired = True
+                    if old.refcount == 0:
+                        logger.info(f"이전 인덱스 버전 해제: {old.version}")
+                    else:
+                        self._retired.append(old)
+                self._reloads += 1
+                self._last_error = None
+
+        duration_ms = (time.time() - start) * 1000
+        logger.info(f"인덱스 교체 완료: {new_entry.version} ({duration_ms:.0f}ms)")
+        return {
+            "reloaded": True,
+            "version": new_entry.version,
+            "previous": old.version if old else None,
+            "documents": len(candidate._docs),
+            "duration_ms": round(duration_ms, 1),
+        }
+
+    async def areload(self, validate: Optional[bool] = None) -> Dict[str, Any]:
+        """reload()를 스레드에서 실행 (이벤트 루프 비차단)."""
+        return await asyncio.to_thread(self.reload, validate)
+
+    def stats(self) -> Dict[str, Any]:
+        """현재/퇴역 버전 및 진행 중 참조 수."""
+        entry = self._ensure_loaded()
+        with self._lock:
+            return {
+                "version": entry.version,
+                "documents": len(entry.retriever._docs),
+                "in_flight": entry.refcount,
+                "retired_in_flight": [
+                    {"version": e.version, "in_flight": e.refcount} for e in self._retired
+                ],
+                "reloads": self._reloads,
+                "last_error": self._last_error,
+            }
+
+
+class IndexWatcher:
+    """인덱스 파일 변경 감지 (폴링).
+
+    파일 버전(mtime, size)이 바뀐 뒤 한 주기 동안 그대로면
+    쓰기가 끝난 것으로 보고 reload()를 호출합니다.
+    """
+
+    def __init__(
+        self,
+        manager: IndexManager,
+        paths: Optional[List[Path]] = None,
+        interval: Optional[float] = None,
+    ) -> None:
+        cfg = get_config().rag
+        self.manager = manager
+        self.paths = [Path(p) for p in (paths or [cfg.paths.policies_index, cfg.paths.vector_index])]
+        self.interval = interval if interval is not None else cfg.reload.poll_interval
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._last = self._snapshot()
+        self._pending: Optional[str] = None
+
+    def _snapshot(self) -> str:
+        return "|".join(source_fingerprint(p) if p.exists() else "none" for p in self.paths)
+
+    def check(self) -> bool:
+        """한 번 검사. 재로드했으면 True."""
+        snap = self._snapshot()
+        if snap == self._last:
+            self._pending = None
+            return False
+        if self._pending != snap:
+            # 변경 감지: 다음 주기까지 안정되기를 기다림
+            self._pending = snap
+            return False
+
+        self._pending = None
+        try:
+            self.manager.reload()
+            self._last = snap
+            return True
+        except Exception:
+            # 검증 실패: 같은 파일로 반복 시도하지 않음
+            self._last = snap
+            return False
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                self.check()
+            except Exception as e:
+                logger.error(f"인덱스 감시 오류: {e}")
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name="index-watcher", daemon=True)
+        self._thread.start()
+        logger.info(f"인덱스 파일 감시 시작: {[str(p) for p in self.paths]} ({self.interval}s)")
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.interval + 1)
+            self._thread = None
+
+
+# 전역 인덱스 관리자
+_index_manager: Optional[IndexManager] = None
+_manager_lock = threading.Lock()
+
+
+def get_index_manager() -> IndexManager:
+    """전역 인덱스 관리자 반환."""
+    global _index_manager
+    if _index_manager is None:
+        with _manager_lock:
+            if _index_manager is None:
+                _index_manager = IndexManager()
+    return _index_manager
+
+
+def reset_index_manager() -> None:
+    """전역 인덱스 관리자 리셋 (테스트용)."""
+    global _index_manager
+    _index_manager = None
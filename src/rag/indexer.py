@@ -1,9 +1,28 @@
 from __future__ import annotations
 
 import hashlib
+import logging
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Dict, Iterable, List
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+import numpy as np
+
+from src.rag.dedup import (
+    SOURCE_KEYS,
+    DedupStats,
+    NearDuplicateFilter,
+    detach_source,
+    merge_source,
+    source_urls,
+)
+from src.rag.docstore import JsonlDocStore, stable_int_id
+from src.rag.vector_index import supports_removal
+
+logger = logging.getLogger(__name__)
+
+# tombstone 비율이 이 값을 넘으면 텍스트 인덱스를 압축
+_COMPACT_RATIO = 0.5
 
 
 def _hash_id(text: str) -> str:
@@ -22,42 +41,401 @@ def _chunks(text: str, chunk_chars: int = 1000, overlap: int = 100) -> Iterable[
         i += step
 
 
+def _refresh_source(meta: Dict[str, Any], chunk_meta: Dict[str, Any]) -> Dict[str, Any]:
+    """기존 청크 metadata에서 chunk_meta와 같은 url의 출처 정보를 최신으로 바꾼 dict."""
+    url = chunk_meta.get("url", "")
+    entry = {k: chunk_meta.get(k, "") for k in SOURCE_KEYS}
+    refreshed = dict(meta)
+    if meta.get("url", "") == url:
+        refreshed.update(entry)
+    if meta.get("sources"):
+        refreshed["sources"] = [entry if s.get("url", "") == url else s for s in meta["sources"]]
+    return refreshed
+
+
 @dataclass
 class PolicyRecord:
     id: str
     text: str
     metadata: Dict[str, str]
 
+    @property
+    def int_id(self) -> int:
+        """FAISS IndexIDMap용 안정 ID."""
+        return stable_int_id(self.id)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "int_id": self.int_id,
+            "text": self.text,
+            "metadata": self.metadata,
+        }
+
+
+def wrap_id_index(index: Any) -> Any:
+    """FAISS 인덱스를 add_with_ids/remove_ids 가능한 형태로 감쌈.
+
+    IVF 계열은 자체적으로 ID를 지원하므로 그대로 반환합니다.
+    """
+    import faiss
+
+    if isinstance(index, faiss.IndexIVF):
+        return index
+    return faiss.IndexIDMap2(index)
+
+
+def supports_ids(index: Any) -> bool:
+    """인덱스가 안정 ID(add_with_ids/remove_ids)를 쓰는지 여부."""
+    import faiss
+
+    index = faiss.downcast_index(index)
+    return isinstance(index, (faiss.IndexIDMap, faiss.IndexIDMap2, faiss.IndexIVF))
+
 
 class PolicyIndexer:
-    """Local policy index builder (prepares JSONL for later vectorization)."""
+    """Local policy index builder (prepares JSONL for later vectorization).
 
-    def build_local_index(self, src_jsonl: Path, out_jsonl: Path, chunk_chars: int = 1000, overlap: int = 100) -> int:
+    build_local_index는 전체를 다시 만들고(근접 중복 제거 포함), upsert_documents/delete_documents는
+    텍스트 인덱스(tombstone JSONL)와 FAISS IndexIDMap을 제자리에서 갱신합니다.
+    doc_type 샤드(index.sharding)가 있으면 바뀐 샤드도 함께 다시 씁니다.
+    """
+
+    last_dedup_stats: Optional[DedupStats] = None
+
+    def chunk_policy(self, rec: Dict[str, Any], chunk_chars: int = 1000, overlap: int = 100) -> List[PolicyRecord]:
+        """정책 원본 레코드 하나를 청크 레코드로 분할."""
+        base_meta = {
+            "url": rec.get("url", ""),
+            "title": rec.get("title", ""),
+            "doc_type": rec.get("doc_type", ""),
+            "source": rec.get("source", ""),
+        }
+        content = rec.get("content", "")
+        return [
+            PolicyRecord(
+                # 본문 전체 해시 (앞부분이 같은 청크끼리 ID가 겹치지 않도록)
+                id=_hash_id(rec.get("url", "") + "\n" + part),
+                text=part,
+                metadata=base_meta,
+            )
+            for part in _chunks(content, chunk_chars=chunk_chars, overlap=overlap)
+        ]
+
+    def build_local_index(
+        self,
+        src_jsonl: Path,
+        out_jsonl: Path,
+        chunk_chars: int = 1000,
+        overlap: int = 100,
+        dedup_threshold: Optional[float] = None,
+        dedup_num_perm: int = 128,
+        dedup_shingle: int = 5,
+    ) -> int:
+        """정책 원본 전체로 텍스트 인덱스를 새로 생성.
+
+        Args:
+            src_jsonl: 정책 원본 경로
+            out_jsonl: 텍스트 인덱스 경로
+            chunk_chars: 청크 크기
+            overlap: 청크 오버랩
+            dedup_threshold: 근접 중복 Jaccard 임계값 (None 또는 0 이하면 중복 제거 안 함)
+            dedup_num_perm: MinHash 순열 수
+            dedup_shingle: 문자 shingle 길이
+
+        Returns:
+            기록한 청크 수 (중복 제거 통계는 last_dedup_stats)
+        """
         import json
 
-        out_jsonl.parent.mkdir(parents=True, exist_ok=True)
-        count = 0
-        with src_jsonl.open("r", encoding="utf-8") as fin, out_jsonl.open("w", encoding="utf-8") as fout:
+        dedup = None
+        if dedup_threshold is not None and dedup_threshold > 0:
+            dedup = NearDuplicateFilter(dedup_threshold, num_perm=dedup_num_perm, shingle_size=dedup_shingle)
+        stats = DedupStats()
+        kept: List[PolicyRecord] = []
+
+        with src_jsonl.open("r", encoding="utf-8") as fin:
             for line in fin:
                 line = line.strip()
                 if not line:
                     continue
                 rec = json.loads(line)
-                base_meta = {
-                    "url": rec.get("url", ""),
-                    "title": rec.get("title", ""),
-                    "doc_type": rec.get("doc_type", ""),
-                    "source": rec.get("source", ""),
-                }
-                content = rec.get("content", "")
-                for part in _chunks(content, chunk_chars=chunk_chars, overlap=overlap):
-                    pid = _hash_id(rec.get("url", "") + part[:50])
-                    out = {
-                        "id": pid,
-                        "text": part,
-                        "metadata": base_meta,
-                    }
-                    fout.write(json.dumps(out, ensure_ascii=False) + "\n")
-                    count += 1
-        return count
+                for chunk in self.chunk_policy(rec, chunk_chars=chunk_chars, overlap=overlap):
+                    stats.input_chunks += 1
+                    stats.input_chars += len(chunk.text)
+                    canonical = dedup.add(chunk.text) if dedup is not None else None
+                    if canonical is None:
+                        kept.append(chunk)
+                    else:
+                        # 중복 청크는 출처만 canonical에 합침
+                        target = kept[canonical]
+                        target.metadata = merge_source(target.metadata, chunk.metadata)
+
+        # 임시 파일에 쓴 뒤 교체 (검색 워커가 쓰는 중인 파일을 읽지 않도록)
+        out_jsonl.parent.mkdir(parents=True, exist_ok=True)
+        tmp = out_jsonl.with_suffix(out_jsonl.suffix + ".tmp")
+        with tmp.open("w", encoding="utf-8") as fout:
+            for chunk in kept:
+                fout.write(json.dumps(chunk.to_dict(), ensure_ascii=False) + "\n")
+                stats.output_chunks += 1
+                stats.output_chars += len(chunk.text)
+        tmp.replace(out_jsonl)
+
+        self.last_dedup_stats = stats
+        if dedup is not None:
+            logger.info(f"근접 중복 제거: {stats.to_dict()}")
+        return stats.output_chunks
+
+    def upsert_documents(
+        self,
+        policies: Iterable[Dict[str, Any]],
+        index_jsonl: Path,
+        vector_path: Optional[Path] = None,
+        chunk_chars: int = 1000,
+        overlap: int = 100,
+        embedder: Any = None,
+        dedup_threshold: Optional[float] = None,
+        dedup_num_perm: int = 128,
+        dedup_shingle: int = 5,
+    ) -> Dict[str, int]:
+        """정책 원본 레코드를 인덱스에 반영 (url 단위 교체).
+
+        url이 출처(metadata.url 또는 metadata.sources)인 기존 청크 중 새 청크에 없는 것은
+        출처에서 떼어내고(다른 출처가 없으면 삭제), 새로 생긴 청크만 임베딩해 FAISS에 추가합니다.
+        dedup_threshold를 주면 기존 인덱스로 채운 NearDuplicateFilter로 새 청크를 검사해
+        근접 중복은 기존 청크의 sources에 합칩니다 (build_local_index와 같은 결과).
+
+        Args:
+            policies: 정책 원본 레코드 (url, title, doc_type, source, content)
+            index_jsonl: 텍스트 인덱스 경로
+            vector_path: FAISS 인덱스 경로 (None이면 텍스트만 갱신)
+            chunk_chars: 청크 크기
+            overlap: 청크 오버랩
+            embedder: encode_documents()를 가진 임베더 (None이면 기본 Embedder)
+            dedup_threshold: 근접 중복 Jaccard 임계값 (None 또는 0 이하면 중복 제거 안 함)
+            dedup_num_perm: MinHash 순열 수
+            dedup_shingle: 문자 shingle 길이
+
+        Returns:
+            {"added": n, "removed": n, "merged": n, "unchanged": n}
+        """
+        store = JsonlDocStore(index_jsonl).load()
+        policies = list(policies)
+        batch_urls = {rec.get("url", "") for rec in policies}
+        owned = self._owned_ids(store)
+
+        # 기존 청크로 중복 판정기 시드 (이번에 다시 청크할 페이지만 출처인 청크는 제외)
+        dedup = None
+        positions: List[int] = []
+        if dedup_threshold is not None and dedup_threshold > 0:
+            dedup = NearDuplicateFilter(dedup_threshold, num_perm=dedup_num_perm, shingle_size=dedup_shingle)
+            for doc in store.records():
+                if set(source_urls(doc.get("metadata") or {})) <= batch_urls:
+                    continue
+                if dedup.add(doc.get("text", "")) is None:
+                    positions.append(doc["int_id"])
+
+        updated: Dict[int, Dict[str, Any]] = {}
+
+        def current(int_id: int) -> Optional[Dict[str, Any]]:
+            return updated.get(int_id) or store.get(int_id)
+
+        added: List[PolicyRecord] = []
+        added_ids = set()
+        removed: List[int] = []
+        merged = 0
+        unchanged = 0
+        for rec in policies:
+            url = rec.get("url", "")
+            keep = set()
+            for chunk in self.chunk_policy(rec, chunk_chars=chunk_chars, overlap=overlap):
+                existing = current(chunk.int_id)
+                if existing is not None and existing.get("text") == chunk.text:
+                    # 같은 청크: 출처 정보만 최신으로
+                    keep.add(chunk.int_id)
+                    if dedup is not None and dedup.add(chunk.text) is None:
+                        positions.append(chunk.int_id)
+                    meta = _refresh_source(existing.get("metadata") or {}, chunk.metadata)
+                    if meta != existing.get("metadata"):
+                        updated[chunk.int_id] = {**existing, "metadata": meta}
+                    unchanged += 1
+                    continue
+
+                canonical = dedup.add(chunk.text) if dedup is not None else None
+                if canonical is None:
+                    positions.append(chunk.int_id)
+                    added.append(chunk)
+                    added_ids.add(chunk.int_id)
+                    keep.add(chunk.int_id)
+                    continue
+
+                # 근접 중복: 기존(또는 이번에 추가된) 청크의 출처로 합침
+                target_id = positions[canonical]
+                keep.add(target_id)
+                if target_id in added_ids:
+                    target = next(c for c in added if c.int_id == target_id)
+                    target.metadata = merge_source(target.metadata, chunk.metadata)
+                    merged += 1
+                    continue
+                target = current(target_id)
+                meta = target.get("metadata") or {}
+                if url in source_urls(meta):
+                    unchanged += 1
+                    continue
+                updated[target_id] = {**target, "metadata": merge_source(meta, chunk.metadata)}
+                merged += 1
+
+            # 새 청크에 없는 기존 청크에서 이 url을 떼어냄
+            for int_id in owned.get(url, ()):
+                if int_id in keep or int_id in added_ids:
+                    continue
+                doc = current(int_id)
+                meta = detach_source(doc.get("metadata") or {}, url)
+                if meta is None:
+                    removed.append(int_id)
+                    updated.pop(int_id, None)
+                else:
+                    updated[int_id] = {**doc, "metadata": meta}
+
+        # 같은 ID가 재추가되는 경우 벡터는 교체해야 하므로 먼저 제거
+        replaced = [c.int_id for c in added if c.int_id in store]
+        # 벡터 갱신이 실패하면(HNSW 삭제 불가, 임베딩 오류 등) 텍스트 인덱스도 그대로 둠
+        if vector_path is not None:
+            self._update_vectors(vector_path, removed + replaced, added, embedder)
+
+        doc_types = self._doc_types(store, removed + replaced + list(updated), updated.values())
+        doc_types.update(c.metadata.get("doc_type") for c in added)
+        store.delete(removed)
+        store.upsert(list(updated.values()) + [c.to_dict() for c in added])
+
+        self._maybe_compact(store)
+        self._update_shards(index_jsonl, vector_path, doc_types, embedder)
+        stats = {"added": len(added), "removed": len(removed), "merged": merged, "unchanged": unchanged}
+        logger.info(f"인덱스 갱신: {stats}")
+        return stats
+
+    def delete_documents(
+        self,
+        index_jsonl: Path,
+        vector_path: Optional[Path] = None,
+        urls: Iterable[str] = (),
+        ids: Iterable[str] = (),
+    ) -> int:
+        """url 또는 청크 ID로 문서 삭제.
+
+        url로 지우면 해당 url을 출처에서 떼어내고, 다른 출처가 남은 청크는
+        남은 출처로 대표 정보를 바꿔 유지합니다.
+
+        Returns:
+            삭제된 청크 수
+        """
+        store = JsonlDocStore(index_jsonl).load()
+        int_ids = {stable_int_id(i) for i in ids}
+        updated: Dict[int, Dict[str, Any]] = {}
+        owned = self._owned_ids(store)
+        for url in urls:
+            for int_id in owned.get(url, ()):
+                if int_id in int_ids:
+                    continue
+                doc = updated.get(int_id) or store.get(int_id)
+                meta = detach_source(doc.get("metadata") or {}, url)
+                if meta is None:
+                    int_ids.add(int_id)
+                    updated.pop(int_id, None)
+                else:
+                    updated[int_id] = {**doc, "metadata": meta}
+
+        present = [i for i in int_ids if i in store]
+        if vector_path is not None and present:
+            self._update_vectors(vector_path, present, [], None)
+        doc_types = self._doc_types(store, present + list(updated), updated.values())
+        n = store.delete(int_ids)
+        store.upsert(updated.values())
+        self._maybe_compact(store)
+        self._update_shards(index_jsonl, vector_path, doc_types, None)
+        return n
+
+    @staticmethod
+    def _owned_ids(store: JsonlDocStore) -> Dict[str, List[int]]:
+        """출처 url → 그 url이 출처인 청크 int_id 목록."""
+        owned: Dict[str, List[int]] = {}
+        for doc in store.records():
+            for url in dict.fromkeys(source_urls(doc.get("metadata") or {})):
+                owned.setdefault(url, []).append(doc["int_id"])
+        return owned
+
+    @staticmethod
+    def _doc_types(
+        store: JsonlDocStore, int_ids: Iterable[int], records: Iterable[Dict[str, Any]]
+    ) -> Set[Any]:
+        """변경 대상 청크의 doc_type (store의 변경 전 값 + 변경 후 레코드 값)."""
+        before = (store.get(i) for i in int_ids)
+        return {
+            (rec.get("metadata") or {}).get("doc_type")
+            for rec in list(before) + list(records)
+            if rec is not None
+        }
+
+    @staticmethod
+    def _update_shards(
+        index_jsonl: Path, vector_path: Optional[Path], doc_types: Set[Any], embedder: Any
+    ) -> None:
+        """doc_type 샤드가 있으면 바뀐 샤드를 다시 씀 (index.sharding 검색이 갱신을 놓치지 않도록)."""
+        if not doc_types:
+            return
+        from src.rag.sharding import update_shards
+
+        update_shards(index_jsonl, doc_types, vector_path=vector_path, embedder=embedder)
+
+    @staticmethod
+    def _maybe_compact(store: JsonlDocStore) -> None:
+        if store.tombstones and store.tombstones > _COMPACT_RATIO * max(1, len(store)):
+            store.compact()
+
+    def _update_vectors(
+        self,
+        vector_path: Path,
+        remove_ids: List[int],
+        added: List[PolicyRecord],
+        embedder: Any,
+    ) -> None:
+        """FAISS IndexIDMap에서 제거/추가 후 저장."""
+        try:
+            import faiss
+        except ImportError:
+            logger.warning("faiss 미설치, 벡터 인덱스 갱신 건너뛰기")
+            return
+
+        vector_path = Path(vector_path)
+        index = faiss.read_index(str(vector_path)) if vector_path.exists() else None
+        if index is not None and not supports_ids(index):
+            raise RuntimeError(
+                f"위치 기반 FAISS 인덱스는 부분 갱신할 수 없습니다: {vector_path}. "
+                "python scripts/04_build_index.py 로 다시 빌드하세요."
+            )
+
+        if index is not None and remove_ids and not supports_removal(index):
+            raise RuntimeError(
+                f"HNSW 벡터 인덱스는 문서를 교체/삭제할 수 없습니다: {vector_path}. "
+                "python scripts/04_build_index.py 로 다시 빌드하세요."
+            )
+
+        if index is not None and remove_ids:
+            index.remove_ids(np.asarray(sorted(set(remove_ids)), dtype=np.int64))
+
+        if added:
+            if embedder is None:
+                from src.rag.embedder import Embedder
+                embedder = Embedder()
+            embeddings = embedder.encode_documents([c.text for c in added], show_progress=False)
+            embeddings = np.asarray(embeddings, dtype=np.float32)
+            if index is None:
+                index = wrap_id_index(faiss.IndexFlatIP(embeddings.shape[1]))
+            index.add_with_ids(embeddings, np.asarray([c.int_id for c in added], dtype=np.int64))
 
+        if index is None:
+            return
+        vector_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = vector_path.with_suffix(vector_path.suffix + ".tmp")
+        faiss.write_index(index, str(tmp))
+        tmp.replace(vector_path)
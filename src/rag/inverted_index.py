@@ -0,0 +1,225 @@
+"""키워드 검색용 역색인.
+
+점수 함수는 기존 전수 스캔과 동일합니다:
+    score(d) = Σ_{t ∈ q} tf(t, d) / sqrt(|d|)
+
+상위 k개만 필요하므로 MaxScore 조기 종료를 사용합니다. 각 용어의 최대 기여도
+(upper bound)를 미리 계산해 두고, 현재 k번째 점수(threshold)를 넘을 수 없는
+용어만 포함한 문서는 점수 계산 없이 건너뜁니다.
+"""
+
+from __future__ import annotations
+
+import heapq
+import json
+import math
+from bisect import bisect_left
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# 부동소수 오차로 인한 잘못된 가지치기 방지용 여유값
+_BOUND_EPS = 1e-9
+
+
+class _Postings:
+    """용어 하나의 포스팅 리스트 (문서 인덱스 오름차순)."""
+
+    __slots__ = ("doc_ids", "tfs", "upper_bound")
+
+    def __init__(self) -> None:
+        self.doc_ids: List[int] = []
+        self.tfs: List[int] = []
+        self.upper_bound: float = 0.0
+
+
+# 저장 파일 이름
+_VOCAB_FILE = "vocab.json"
+_DOC_IDS_FILE = "postings_doc.npy"
+_TFS_FILE = "postings_tf.npy"
+_SQRT_LEN_FILE = "sqrt_len.npy"
+
+
+class InvertedIndex:
+    """토큰 → 포스팅 역색인.
+
+    build()로 메모리에 만들거나, save()로 저장한 파일을 load()로
+    memory-map 해서 사용할 수 있습니다 (포스팅은 조회 시에만 읽음).
+    """
+
+    def __init__(self) -> None:
+        self._postings: Dict[str, _Postings] = {}
+        self._sqrt_len: Sequence[float] = []
+        # load() 시: token → (start, end, upper_bound)
+        self._vocab: Optional[Dict[str, Tuple[int, int, float]]] = None
+        self._doc_ids_arr: Any = None
+        self._tfs_arr: Any = None
+
+    @classmethod
+    def build(cls, token_lists: Iterable[Sequence[str]]) -> "InvertedIndex":
+        """토큰화된 문서 목록으로 역색인 생성 (리스트 순서 = 문서 인덱스)."""
+        index = cls()
+        for doc_idx, tokens in enumerate(token_lists):
+            sqrt_len = math.sqrt(len(tokens)) if tokens else 0.0
+            index._sqrt_len.append(sqrt_len)
+            if not tokens:
+                continue
+
+            counts: Dict[str, int] = {}
+            for token in tokens:
+                counts[token] = counts.get(token, 0) + 1
+
+            for token, tf in counts.items():
+                postings = index._postings.get(token)
+                if postings is None:
+                    postings = index._postings[token] = _Postings()
+                postings.doc_ids.append(doc_idx)
+                postings.tfs.append(tf)
+                postings.upper_bound = max(postings.upper_bound, tf / sqrt_len)
+        return index
+
+    def __len__(self) -> int:
+        return len(self._sqrt_len)
+
+    @property
+    def vocabulary_size(self) -> int:
+        if self._vocab is not None:
+            return len(self._vocab)
+        return len(self._postings)
+
+    def save(self, directory: Path) -> None:
+        """포스팅을 연속 배열(.npy)과 어휘 파일로 저장."""
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+
+        vocab: Dict[str, List[float]] = {}
+        doc_ids: List[int] = []
+        tfs: List[int] = []
+        for token in sorted(self._postings):
+            p = self._postings[token]
+            start = len(doc_ids)
+            doc_ids.extend(p.doc_ids)
+            tfs.extend(p.tfs)
+            vocab[token] = [start, len(doc_ids), p.upper_bound]
+
+        np.save(directory / _DOC_IDS_FILE, np.asarray(doc_ids, dtype=np.int32))
+        np.save(directory / _TFS_FILE, np.asarray(tfs, dtype=np.int32))
+        np.save(directory / _SQRT_LEN_FILE, np.asarray(self._sqrt_len, dtype=np.float64))
+        with (directory / _VOCAB_FILE).open("w", encoding="utf-8") as f:
+            json.dump(vocab, f, ensure_ascii=False)
+
+    @classmethod
+    def load(cls, directory: Path) -> "InvertedIndex":
+        """save()로 저장한 역색인을 memory-map으로 로드."""
+        directory = Path(directory)
+        index = cls()
+        with (directory / _VOCAB_FILE).open("r", encoding="utf-8") as f:
+            index._vocab = {t: (int(v[0]), int(v[1]), float(v[2])) for t, v in json.load(f).items()}
+        index._doc_ids_arr = np.load(directory / _DOC_IDS_FILE, mmap_mode="r")
+        index._tfs_arr = np.load(directory / _TFS_FILE, mmap_mode="r")
+        index._sqrt_len = np.load(directory / _SQRT_LEN_FILE, mmap_mode="r")
+        return index
+
+    def _get_postings(self, token: str) -> Optional[_Postings]:
+        if self._vocab is None:
+            return self._postings.get(token)
+        entry = self._vocab.get(token)
+        if entry is None:
+            return None
+        start, end, upper_bound = entry
+        p = _Postings()
+        p.doc_ids = self._doc_ids_arr[start:end].tolist()
+        p.tfs = self._tfs_arr[start:end].tolist()
+        p.upper_bound = upper_bound
+        return p
+
+    def search(self, query_tokens: Iterable[str], top_k: int) -> List[Tuple[float, int]]:
+        """MaxScore 기반 상위 top_k 검색.
+
+        Args:
+            query_tokens: 쿼리 토큰 (중복은 한 번만 반영)
+            top_k: 반환할 최대 결과 수
+
+        Returns:
+            (raw score, 문서 인덱스) 리스트. 점수 내림차순, 동점은 인덱스 오름차순.
+            점수가 0인 문서는 포함하지 않습니다.
+        """
+        if top_k <= 0:
+            return []
+
+        terms = [p for p in (self._get_postings(t) for t in set(query_tokens)) if p is not None]
+        if not terms:
+            return []
+
+        # upper bound 오름차순: 앞쪽 용어부터 non-essential 후보
+        terms.sort(key=lambda p: p.upper_bound)
+        cum_bounds: List[float] = []
+        acc = 0.0
+        for p in terms:
+            acc += p.upper_bound
+            cum_bounds.append(acc + _BOUND_EPS)
+
+        n_terms = len(terms)
+        cursors = [0] * n_terms
+        # (score, -doc_idx) 최소 힙: 동점이면 인덱스가 큰 문서가 먼저 밀려남
+        heap: List[Tuple[float, int]] = []
+        threshold = 0.0
+        # terms[:first_essential] 만으로는 threshold를 넘을 수 없음
+        first_essential = 0
+
+        while True:
+            # essential 용어들 중 다음 후보 문서
+            doc = -1
+            for i in range(first_essential, n_terms):
+                c = cursors[i]
+                if c < len(terms[i].doc_ids):
+                    d = terms[i].doc_ids[c]
+                    if doc < 0 or d < doc:
+                        doc = d
+            if doc < 0:
+                break
+
+            tf_sum = 0
+            for i in range(first_essential, n_terms):
+                p = terms[i]
+                c = cursors[i]
+                if c < len(p.doc_ids) and p.doc_ids[c] == doc:
+                    tf_sum += p.tfs[c]
+                    cursors[i] = c + 1
+
+            sqrt_len = float(self._sqrt_len[doc])
+            partial = tf_sum / sqrt_len
+
+            # non-essential 용어는 남은 상한으로 가지치기하며 조회
+            full = len(heap) >= top_k
+            pruned = False
+            for i in range(first_essential - 1, -1, -1):
+                if full and partial + cum_bounds[i] <= threshold:
+                    pruned = True
+                    break
+                p = terms[i]
+                pos = bisect_left(p.doc_ids, doc, cursors[i])
+                cursors[i] = pos
+                if pos < len(p.doc_ids) and p.doc_ids[pos] == doc:
+                    tf_sum += p.tfs[pos]
+                    partial = tf_sum / sqrt_len
+            if pruned:
+                continue
+
+            score = tf_sum / sqrt_len
+            if not full:
+                heapq.heappush(heap, (score, -doc))
+            elif score > threshold:
+                heapq.heapreplace(heap, (score, -doc))
+            else:
+                continue
+
+            if len(heap) >= top_k:
+                threshold = heap[0][0]
+                while first_essential < n_terms and cum_bounds[first_essential] <= threshold:
+                    first_essential += 1
+
+        results = [(score, -neg_doc) for score, neg_doc in heap]
+        results.sort(key=lambda x: (-x[0], x[1]))
+        return results
@@ -0,0 +1,253 @@
+"""ONNX Runtime 추론 백엔드.
+
+sentence-transformers(PyTorch) 대신 ONNX로 내보낸 모델을 CPU에서 실행합니다.
+동적 int8 양자화 모델(model_int8.onnx)을 지원하며, torch/transformers를
+임포트하지 않으므로 프로세스 기동과 모델 로드가 빠릅니다.
+
+모델 디렉토리 구성 (scripts/17_export_onnx.py 로 생성):
+    model.onnx          # fp32 모델
+    model_int8.onnx     # 동적 int8 양자화 모델
+    tokenizer.json      # HuggingFace fast tokenizer
+    onnx_config.json    # pooling, dimension, max_seq_length
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+FP32_MODEL_FILE = "model.onnx"
+INT8_MODEL_FILE = "model_int8.onnx"
+TOKENIZER_FILE = "tokenizer.json"
+CONFIG_FILE = "onnx_config.json"
+
+
+def mean_pool(last_hidden_state: np.ndarray, attention_mask: np.ndarray) -> np.ndarray:
+    """어텐션 마스크를 고려한 평균 풀링.
+
+    Args:
+        last_hidden_state: (N, T, D) 토큰 임베딩
+        attention_mask: (N, T) 마스크
+
+    Returns:
+        (N, D) 문장 임베딩
+    """
+    mask = attention_mask[..., None].astype(last_hidden_state.dtype)
+    summed = (last_hidden_state * mask).sum(axis=1)
+    counts = np.clip(mask.sum(axis=1), 1e-9, None)
+    return summed / counts
+
+
+def cls_pool(last_hidden_state: np.ndarray, attention_mask: np.ndarray) -> np.ndarray:
+    """[CLS] 토큰 풀링."""
+    return last_hidden_state[:, 0]
+
+
+_POOLERS = {
+    "mean": mean_pool,
+    "cls": cls_pool,
+}
+
+
+def l2_normalize(embeddings: np.ndarray) -> np.ndarray:
+    """행 단위 L2 정규화."""
+    norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+    return embeddings / np.clip(norms, 1e-12, None)
+
+
+def resolve_model_file(model_dir: Path, quantized: bool) -> Path:
+    """사용할 ONNX 파일 경로 결정.
+
+    양자화 모델이 요청됐지만 없으면 fp32 모델로 대체합니다.
+    """
+    model_dir = Path(model_dir)
+    if quantized:
+        int8_path = model_dir / INT8_MODEL_FILE
+        if int8_path.exists():
+            return int8_path
+        logger.warning(f"int8 모델 없음, fp32 모델 사용: {int8_path}")
+    fp32_path = model_dir / FP32_MODEL_FILE
+    if not fp32_path.exists():
+        raise FileNotFoundError(
+            f"ONNX 모델이 없습니다: {fp32_path}. "
+            "python scripts/17_export_onnx.py 로 먼저 내보내세요."
+        )
+    return fp32_path
+
+
+def load_onnx_config(model_dir: Path) -> Dict[str, Any]:
+    """onnx_config.json 로드 (없으면 빈 dict)."""
+    path = Path(model_dir) / CONFIG_FILE
+    if not path.exists():
+        return {}
+    with path.open("r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _create_session(model_path: Path, threads: int = 0):
+    """ONNX Runtime CPU 세션 생성."""
+    try:
+        import onnxruntime as ort
+    except ImportError:
+        raise ImportError(
+            "onnxruntime이 설치되지 않았습니다. "
+            "pip install onnxruntime tokenizers 를 실행하세요."
+        )
+
+    options = ort.SessionOptions()
+    options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+    if threads and threads > 0:
+        options.intra_op_num_threads = threads
+    options.inter_op_num_threads = 1
+    return ort.InferenceSession(
+        str(model_path),
+        sess_options=options,
+        providers=["CPUExecutionProvider"],
+    )
+
+
+def _load_tokenizer(model_dir: Path, max_seq_length: int):
+    """fast tokenizer 로드 (transformers 미사용)."""
+    try:
+        from tokenizers import Tokenizer
+    except ImportError:
+        raise ImportError(
+            "tokenizers가 설치되지 않았습니다. pip install tokenizers 를 실행하세요."
+        )
+
+    path = Path(model_dir) / TOKENIZER_FILE
+    if not path.exists():
+        raise FileNotFoundError(f"토크나이저 파일이 없습니다: {path}")
+
+    tokenizer = Tokenizer.from_file(str(path))
+    tokenizer.enable_truncation(max_length=max_seq_length)
+    tokenizer.enable_padding()
+    return tokenizer
+
+
+class _OnnxModelBase:
+    """ONNX 세션 + 토크나이저 공통 처리."""
+
+    def __init__(
+        self,
+        model_dir: Union[str, Path],
+        quantized: bool = True,
+        threads: int = 0,
+        max_seq_length: Optional[int] = None,
+    ) -> None:
+        self.model_dir = Path(model_dir)
+        self.onnx_config = load_onnx_config(self.model_dir)
+        self.max_seq_length = int(
+            max_seq_length or self.onnx_config.get("max_seq_length", 512)
+        )
+        self.model_path = resolve_model_file(self.model_dir, quantized)
+        self._session = _create_session(self.model_path, threads)
+        self._tokenizer = _load_tokenizer(self.model_dir, self.max_seq_length)
+        self._input_names = {i.name for i in self._session.get_inputs()}
+        logger.info(f"ONNX 모델 로드: {self.model_path}")
+
+    def _run(self, encodings: Sequence[Any]) -> List[np.ndarray]:
+        """토크나이즈 결과로 세션 실행."""
+        feeds = {
+            "input_ids": np.asarray([e.ids for e in encodings], dtype=np.int64),
+            "attention_mask": np.asarray([e.attention_mask for e in encodings], dtype=np.int64),
+        }
+        if "token_type_ids" in self._input_names:
+            feeds["token_type_ids"] = np.asarray([e.type_ids for e in encodings], dtype=np.int64)
+        return self._session.run(None, feeds)
+
+
+class OnnxSentenceEncoder(_OnnxModelBase):
+    """SentenceTransformer 호환 ONNX 임베딩 모델.
+
+    Embedder가 사용하는 encode()/get_sentence_embedding_dimension()만 구현합니다.
+    """
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        pooling = self.onnx_config.get("pooling", "mean")
+        if pooling not in _POOLERS:
+            raise ValueError(f"지원하지 않는 pooling: {pooling}")
+        self._pool = _POOLERS[pooling]
+        self._dimension: Optional[int] = self.onnx_config.get("dimension")
+
+    def get_sentence_embedding_dimension(self) -> int:
+        if self._dimension is None:
+            self._dimension = int(self.encode("dimension probe").shape[-1])
+        return self._dimension
+
+    def encode(
+        self,
+        sentences: Union[str, List[str]],
+        batch_size: int = 32,
+        show_progress_bar: bool = False,
+        normalize_embeddings: bool = True,
+    ) -> np.ndarray:
+        """문장 임베딩 생성.
+
+        Args:
+            sentences: 단일 문장 또는 문장 리스트
+            batch_size: 배치 크기
+            show_progress_bar: 호환용 (무시)
+            normalize_embeddings: L2 정규화 여부
+
+        Returns:
+            (N, D) 또는 단일 문장이면 (D,)
+        """
+        single = isinstance(sentences, str)
+        texts = [sentences] if single else list(sentences)
+        if not texts:
+            return np.zeros((0, self._dimension or 0), dtype=np.float32)
+
+        outputs: List[np.ndarray] = []
+        for start in range(0, len(texts), batch_size):
+            batch = texts[start : start + batch_size]
+            encodings = self._tokenizer.encode_batch(batch)
+            hidden = self._run(encodings)[0]
+            mask = np.asarray([e.attention_mask for e in encodings], dtype=np.int64)
+            pooled = self._pool(hidden, mask)
+            if normalize_embeddings:
+                pooled = l2_normalize(pooled)
+            outputs.append(pooled.astype(np.float32))
+
+        embeddings = np.concatenate(outputs, axis=0)
+        return embeddings[0] if single else embeddings
+
+
+class OnnxCrossEncoder(_OnnxModelBase):
+    """CrossEncoder 호환 ONNX 리랭커.
+
+    Reranker가 사용하는 predict()만 구현합니다.
+    """
+
+    def predict(
+        self,
+        pairs: Sequence[Tuple[str, str]],
+        batch_size: int = 32,
+        show_progress_bar: bool = False,
+    ) -> np.ndarray:
+        """(query, document) 쌍의 관련성 점수 계산.
+
+        Returns:
+            (N,) 로짓 점수
+        """
+        if not pairs:
+            return np.zeros((0,), dtype=np.float32)
+
+        scores: List[np.ndarray] = []
+        for start in range(0, len(pairs), batch_size):
+            batch = [(q, d) for q, d in pairs[start : start + batch_size]]
+            encodings = self._tokenizer.encode_batch(batch)
+            logits = self._run(encodings)[0]
+            if logits.ndim == 2 and logits.shape[1] == 1:
+                logits = logits[:, 0]
+            scores.append(logits.astype(np.float32))
+
+        return np.concatenate(scores, axis=0)
+
@@ -2,20 +2,144 @@
 
 검색 결과를 재순위화하여 정확도를 향상시킵니다.
 Cross-Encoder 기반 리랭킹을 지원합니다.
+
+비동기 경로(arerank)는 이벤트 루프를 막지 않도록 전용 스레드 풀에서
+모델을 실행하며, 동시 요청의 (query, doc) 쌍을 하나의 배치로 묶습니다.
+쌍 점수는 (쿼리 해시, 문서 ID) 키의 LRU 캐시에 보관합니다.
 """
 
 from __future__ import annotations
 
+import asyncio
+import hashlib
 import logging
+import re
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
-from typing import List, Optional, Tuple
+from typing import Dict, List, Optional, Sequence, Tuple
 
 import numpy as np
 
 from src.config import get_config
+from src.monitoring.metrics import track_rerank_batch, track_rerank_cache
 
 logger = logging.getLogger(__name__)
 
+_ASCII_RUN_RE = re.compile(r"[\x00-\x7f]+")
+
+
+def estimate_tokens(text: str) -> int:
+    """Cross-Encoder 입력 토큰 수 근사치.
+
+    ASCII 구간은 4자당 1토큰, 그 외(한글 등)는 글자당 1토큰으로 계산합니다.
+    """
+    if not text:
+        return 0
+    ascii_chars = sum(len(m) for m in _ASCII_RUN_RE.findall(text))
+    return (ascii_chars + 3) // 4 + (len(text) - ascii_chars)
+
+
+def _query_hash(query: str) -> str:
+    """캐시 키용 쿼리 해시."""
+    return hashlib.blake2b(query.strip().encode("utf-8"), digest_size=8).hexdigest()
+
+
+class PairScoreCache:
+    """(쿼리 해시, 문서 ID) → 점수 LRU 캐시 (스레드 안전)."""
+
+    def __init__(self, max_size: int = 4096) -> None:
+        self.max_size = max_size
+        self._data: "OrderedDict[Tuple[str, str], float]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_many(self, keys: Sequence[Tuple[str, str]]) -> Dict[Tuple[str, str], float]:
+        found: Dict[Tuple[str, str], float] = {}
+        with self._lock:
+            for key in keys:
+                if key in self._data:
+                    self._data.move_to_end(key)
+                    found[key] = self._data[key]
+        return found
+
+    def put_many(self, items: Dict[Tuple[str, str], float]) -> None:
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            for key, score in items.items():
+                self._data[key] = score
+                self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class _RerankBatcher:
+    """동시 요청의 점수 계산을 하나의 forward 배치로 묶는 마이크로 배처.
+
+    첫 요청이 도착하면 batch_wait_ms 동안 다른 요청을 모은 뒤
+    (또는 max_batch_pairs에 도달하면 즉시) 전용 executor에서 한 번에 실행합니다.
+    이벤트 루프 하나에 묶여 동작합니다.
+    """
+
+    def __init__(self, reranker: "Reranker", loop: asyncio.AbstractEventLoop) -> None:
+        self._reranker = reranker
+        self._loop = loop
+        self._pending: List[Tuple[List[Tuple[str, str]], asyncio.Future]] = []
+        self._pending_pairs = 0
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+
+    async def submit(self, pairs: List[Tuple[str, str]]) -> List[float]:
+        future: asyncio.Future = self._loop.create_future()
+        self._pending.append((pairs, future))
+        self._pending_pairs += len(pairs)
+
+        if self._pending_pairs >= self._reranker.max_batch_pairs:
+            self._flush()
+        elif self._flush_handle is None:
+            self._flush_handle = self._loop.call_later(
+                self._reranker.batch_wait_ms / 1000.0, self._flush
+            )
+        return await future
+
+    def _flush(self) -> None:
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        batch, self._pending = self._pending, []
+        self._pending_pairs = 0
+        if batch:
+            self._loop.create_task(self._run(batch))
+
+    async def _run(self, batch: List[Tuple[List[Tuple[str, str]], asyncio.Future]]) -> None:
+        all_pairs = [pair for pairs, _ in batch for pair in pairs]
+        try:
+            scores = await self._loop.run_in_executor(
+                self._reranker._get_executor(),
+                self._reranker._predict,
+                all_pairs,
+            )
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        offset = 0
+        for pairs, future in batch:
+            part = scores[offset : offset + len(pairs)]
+            offset += len(pairs)
+            if not future.done():
+                future.set_result(part)
+
 
 @dataclass
 class RerankedResult:
@@ -33,31 +157,57 @@ class Reranker:
 
     검색 결과를 쿼리와 함께 Cross-Encoder에 통과시켜
     더 정확한 관련성 점수를 계산합니다.
+    backend가 onnx이면 ONNX Runtime으로 CPU에서 실행합니다.
     """
 
     def __init__(
         self,
         model_name: Optional[str] = None,
         device: Optional[str] = None,
+        backend: Optional[str] = None,
     ) -> None:
         """리랭커 초기화.
 
         Args:
             model_name: Cross-Encoder 모델 이름
             device: 사용할 디바이스 (auto, cpu, cuda)
+            backend: 추론 백엔드 (torch, onnx)
         """
         cfg = get_config().rag
-        self.model_name = model_name or getattr(
-            cfg.retrieval, "reranker_model", "cross-encoder/ms-marco-MiniLM-L-6-v2"
-        )
+        self.model_name = model_name or cfg.reranker.model_name
         self.device = device or cfg.embedding.device
+        self.backend = backend or cfg.reranker.backend
+        self.onnx_dir = cfg.reranker.onnx_dir
+        self.onnx_quantized = cfg.reranker.onnx_quantized
+        self.onnx_threads = cfg.embedding.onnx_threads
+
+        rcfg = cfg.reranker
+        self.workers = max(1, rcfg.workers)
+        self.token_budget = rcfg.token_budget
+        self.batch_wait_ms = rcfg.batch_wait_ms
+        self.max_batch_pairs = max(1, rcfg.max_batch_pairs)
+
         self._model = None
+        self._model_lock = threading.Lock()
+        self._cache = PairScoreCache(rcfg.cache_size)
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._batcher: Optional[_RerankBatcher] = None
 
     def _load_model(self):
-        """모델 지연 로딩."""
+        """모델 지연 로딩 (스레드 안전)."""
         if self._model is not None:
             return self._model
 
+        with self._model_lock:
+            if self._model is not None:
+                return self._model
+            return self._load_model_locked()
+
+    def _load_model_locked(self):
+        """모델 로드 본체."""
+        if self.backend == "onnx":
+            return self._load_onnx_model()
+
         try:
             from sentence_transformers import CrossEncoder
 
@@ -79,67 +229,133 @@ class Reranker:
             logger.error(f"리랭커 로드 실패: {e}")
             return None
 
-    def rerank(
-        self,
-        query: str,
-        documents: List[Tuple[str, str, float, dict]],
-        top_k: Optional[int] = None,
-    ) -> List[RerankedResult]:
-        """검색 결과 리랭킹.
+    def _load_onnx_model(self):
+        """ONNX Runtime 리랭커 로드."""
+        try:
+            from src.rag.onnx_backend import OnnxCrossEncoder
 
-        Args:
-            query: 검색 쿼리
-            documents: (id, text, score, metadata) 튜플 리스트
-            top_k: 반환할 최대 결과 수
+            self._model = OnnxCrossEncoder(
+                self.onnx_dir,
+                quantized=self.onnx_quantized,
+                threads=self.onnx_threads,
+            )
+            logger.info(f"리랭커 로드 (onnx): {self.onnx_dir}")
+            return self._model
 
-        Returns:
-            리랭킹된 결과 리스트
-        """
-        if not documents:
-            return []
+        except ImportError as e:
+            logger.warning(f"onnxruntime 미설치, 리랭킹 비활성화: {e}")
+            return None
+        except Exception as e:
+            logger.error(f"ONNX 리랭커 로드 실패: {e}")
+            return None
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        """리랭킹 전용 스레드 풀 (동시 실행 수 = workers)."""
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.workers,
+                thread_name_prefix="reranker",
+            )
+        return self._executor
+
+    def _get_batcher(self) -> _RerankBatcher:
+        """현재 이벤트 루프에 묶인 배처 반환."""
+        loop = asyncio.get_running_loop()
+        if self._batcher is None or self._batcher._loop is not loop:
+            self._batcher = _RerankBatcher(self, loop)
+        return self._batcher
 
+    def _predict(self, pairs: List[Tuple[str, str]]) -> List[float]:
+        """Cross-Encoder forward pass (블로킹)."""
         model = self._load_model()
         if model is None:
-            # 모델 로드 실패 시 원본 순서 유지
-            return [
-                RerankedResult(
-                    id=doc_id,
-                    score=score,
-                    original_score=score,
-                    text=text,
-                    metadata=meta,
-                )
-                for doc_id, text, score, meta in documents[:top_k]
-            ]
+            raise RuntimeError("리랭커 모델을 사용할 수 없습니다")
 
-        # Cross-Encoder 입력 생성
-        pairs = [(query, text) for _, text, _, _ in documents]
+        start = time.perf_counter()
+        scores = model.predict(pairs)
+        track_rerank_batch(len(pairs), time.perf_counter() - start)
 
-        # 점수 계산
-        try:
-            scores = model.predict(pairs)
-            if isinstance(scores, np.ndarray):
-                scores = scores.tolist()
-        except Exception as e:
-            logger.error(f"리랭킹 실패: {e}")
-            return [
-                RerankedResult(
-                    id=doc_id,
-                    score=score,
-                    original_score=score,
-                    text=text,
-                    metadata=meta,
-                )
-                for doc_id, text, score, meta in documents[:top_k]
-            ]
+        if isinstance(scores, np.ndarray):
+            scores = scores.tolist()
+        return [float(s) for s in scores]
+
+    def _apply_token_budget(
+        self,
+        documents: List[Tuple[str, str, float, dict]],
+    ) -> List[Tuple[str, str, float, dict]]:
+        """토큰 예산 내의 후보만 유지 (원래 순서 기준, 최소 1개)."""
+        if self.token_budget <= 0:
+            return documents
+
+        kept = []
+        used = 0
+        for doc in documents:
+            cost = estimate_tokens(doc[1])
+            if kept and used + cost > self.token_budget:
+                break
+            kept.append(doc)
+            used += cost
+        return kept
+
+    def _split_cached(
+        self,
+        query: str,
+        documents: List[Tuple[str, str, float, dict]],
+    ) -> Tuple[Dict[str, float], List[Tuple[str, str, float, dict]]]:
+        """캐시 적중 점수(문서 ID별)와 계산이 필요한 문서로 분리."""
+        qhash = _query_hash(query)
+        keys = [(qhash, doc[0]) for doc in documents]
+        cached = self._cache.get_many(keys)
+        missing = [doc for doc, key in zip(documents, keys) if key not in cached]
+        track_rerank_cache(len(cached), len(missing))
+        return {doc_id: score for (_, doc_id), score in cached.items()}, missing
+
+    def _store_scores(
+        self,
+        query: str,
+        documents: List[Tuple[str, str, float, dict]],
+        scores: List[float],
+    ) -> Dict[str, float]:
+        """계산한 점수를 캐시에 저장하고 문서 ID별 점수 반환."""
+        computed = {doc[0]: float(s) for doc, s in zip(documents, scores)}
+        qhash = _query_hash(query)
+        self._cache.put_many({(qhash, doc_id): s for doc_id, s in computed.items()})
+        return computed
+
+    @staticmethod
+    def _fallback(
+        documents: List[Tuple[str, str, float, dict]],
+        top_k: Optional[int],
+    ) -> List[RerankedResult]:
+        """모델 미사용 시 원본 순서 유지."""
+        return [
+            RerankedResult(
+                id=doc_id,
+                score=score,
+                original_score=score,
+                text=text,
+                metadata=meta,
+            )
+            for doc_id, text, score, meta in documents[:top_k]
+        ]
 
-        # 결과 생성 및 정렬
+    def _build_results(
+        self,
+        documents: List[Tuple[str, str, float, dict]],
+        scores: Dict[str, float],
+        top_k: Optional[int],
+    ) -> List[RerankedResult]:
+        """리랭크 점수로 결과 생성 및 정렬.
+
+        점수는 캐시가 아니라 이번 요청의 적중/계산 결과에서 읽습니다
+        (캐시 비활성화나 즉시 축출 시에도 점수가 유지되도록).
+        """
         results = []
-        for (doc_id, text, orig_score, meta), new_score in zip(documents, scores):
+        for doc_id, text, orig_score, meta in documents:
             results.append(
                 RerankedResult(
                     id=doc_id,
-                    score=float(new_score),
+                    score=float(scores[doc_id]),
                     original_score=orig_score,
                     text=text,
                     metadata=meta,
@@ -154,6 +370,87 @@ class Reranker:
 
         return results
 
+    def rerank(
+        self,
+        query: str,
+        documents: List[Tuple[str, str, float, dict]],
+        top_k: Optional[int] = None,
+    ) -> List[RerankedResult]:
+        """검색 결과 리랭킹 (동기).
+
+        Args:
+            query: 검색 쿼리
+            documents: (id, text, score, metadata) 튜플 리스트
+            top_k: 반환할 최대 결과 수
+
+        Returns:
+            리랭킹된 결과 리스트
+        """
+        if not documents:
+            return []
+
+        if self._load_model() is None:
+            return self._fallback(documents, top_k)
+
+        documents = self._apply_token_budget(documents)
+        reranked, missing = self._split_cached(query, documents)
+
+        if missing:
+            try:
+                scores = self._predict([(query, doc[1]) for doc in missing])
+            except Exception as e:
+                logger.error(f"리랭킹 실패: {e}")
+                return self._fallback(documents, top_k)
+            reranked.update(self._store_scores(query, missing, scores))
+
+        return self._build_results(documents, reranked, top_k)
+
+    async def arerank(
+        self,
+        query: str,
+        documents: List[Tuple[str, str, float, dict]],
+        top_k: Optional[int] = None,
+    ) -> List[RerankedResult]:
+        """검색 결과 리랭킹 (비동기).
+
+        캐시에 없는 쌍만 배처를 거쳐 전용 executor에서 계산하므로
+        이벤트 루프를 막지 않습니다.
+
+        Args:
+            query: 검색 쿼리
+            documents: (id, text, score, metadata) 튜플 리스트
+            top_k: 반환할 최대 결과 수
+
+        Returns:
+            리랭킹된 결과 리스트
+        """
+        if not documents:
+            return []
+
+        loop = asyncio.get_running_loop()
+        model = await loop.run_in_executor(self._get_executor(), self._load_model)
+        if model is None:
+            return self._fallback(documents, top_k)
+
+        documents = self._apply_token_budget(documents)
+        reranked, missing = self._split_cached(query, documents)
+
+        if missing:
+            try:
+                scores = await self._get_batcher().submit([(query, doc[1]) for doc in missing])
+            except Exception as e:
+                logger.error(f"리랭킹 실패: {e}")
+                return self._fallback(documents, top_k)
+            reranked.update(self._store_scores(query, missing, scores))
+
+        return self._build_results(documents, reranked, top_k)
+
+    def close(self) -> None:
+        """executor 종료."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
 
 # 전역 리랭커 인스턴스
 _reranker: Optional[Reranker] = None
@@ -170,4 +467,6 @@ def get_reranker() -> Reranker:
 def reset_reranker() -> None:
     """전역 리랭커 리셋 (테스트용)."""
     global _reranker
+    if _reranker is not None:
+        _reranker.close()
     _reranker = None
@@ -1,21 +1,28 @@
 """정책 검색 리트리버.
 
 키워드 검색, 임베딩 검색, 하이브리드 검색을 지원합니다.
+하이브리드 검색은 두 경로를 동시에 실행한 뒤 fusion 모듈로 순위를 합칩니다.
 """
 
 from __future__ import annotations
 
-import json
 import logging
-import math
 import re
+import time
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, List, Optional, Tuple, Union
 
 import numpy as np
 
 from src.config import get_config
+from src.core.exceptions import RequestTimeoutError, ServiceUnavailableError
+from src.core.executor import BoundedExecutor
+from src.core.singleflight import SingleFlight
+from src.rag.docstore import DocTuple, InMemoryDocStore, MmapDocStore, source_fingerprint
+from src.rag.fusion import fuse
+from src.rag.inverted_index import InvertedIndex
 
 logger = logging.getLogger(__name__)
 
@@ -24,6 +31,44 @@ _reranker_module = None
 
 _TOKEN_RE = re.compile(r"[\w\-]+", re.UNICODE)
 
+# 하이브리드 검색의 임베딩 경로 실행용 스레드 풀 (지연 생성)
+_leg_executor: Optional[ThreadPoolExecutor] = None
+
+
+def _get_leg_executor() -> ThreadPoolExecutor:
+    global _leg_executor
+    if _leg_executor is None:
+        _leg_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="retrieval-leg")
+    return _leg_executor
+
+
+# 비동기 검색(asearch_policy) 전용 제한 executor (지연 생성)
+_search_executor: Optional[BoundedExecutor] = None
+
+
+def get_search_executor() -> BoundedExecutor:
+    """비동기 검색용 executor 반환."""
+    global _search_executor
+    if _search_executor is None:
+        from src.monitoring.metrics import track_retrieval_executor
+
+        cfg = get_config().rag.retrieval
+        _search_executor = BoundedExecutor(
+            max_workers=cfg.search_workers,
+            max_queue=cfg.search_queue_size,
+            name="retrieval-search",
+            on_change=track_retrieval_executor,
+        )
+    return _search_executor
+
+
+def reset_search_executor() -> None:
+    """비동기 검색 executor 리셋 (테스트용)."""
+    global _search_executor
+    if _search_executor is not None:
+        _search_executor.shutdown(wait=False)
+    _search_executor = None
+
 
 def _tokenize(text: str) -> List[str]:
     """텍스트를 토큰으로 분리."""
@@ -68,14 +113,22 @@ class PolicyRetriever:
         self.vector_path = Path(vector_path) if vector_path else Path(cfg.paths.vector_index)
         self.mode = mode or cfg.retrieval.mode
         self.hybrid_alpha = cfg.retrieval.hybrid_alpha
+        self.fusion = cfg.retrieval.fusion
+        self.rrf_k = cfg.retrieval.rrf_k
         self.min_score = cfg.retrieval.min_score
         self.use_reranking = cfg.retrieval.use_reranking
 
         # 리랭커 (필요시 로드)
         self._reranker = None
 
+        # 동일한 진행 중 검색 병합
+        self._flight = SingleFlight("policy_search")
+
         # 문서 저장소
-        self._docs: List[Tuple[str, str, Dict[str, str]]] = []
+        # 문서 테이블: (id, text, metadata) 시퀀스 + position_of(int_id)
+        self.docstore_type = cfg.index.docstore
+        self._docs: Union[InMemoryDocStore, MmapDocStore, List[DocTuple]] = []
+        self._keyword_index = InvertedIndex()
 
         # 벡터 검색 관련
         self._faiss_index = None
@@ -88,25 +141,40 @@ class PolicyRetriever:
         if self.mode in ("embedding", "hybrid"):
             self._load_vector_index()
 
+        self.index_version = self._compute_index_version()
+
+    def _compute_index_version(self) -> str:
+        """로드한 인덱스 파일들의 버전 (캐시 무효화용)."""
+        parts = []
+        for path in (self.index_path, self.vector_path):
+            parts.append(source_fingerprint(path) if path.exists() else "none")
+        return f"{self.mode}:{':'.join(parts)}"
+
     def _load_text_index(self) -> None:
-        """텍스트 인덱스 로드."""
-        self._docs.clear()
+        """텍스트 인덱스 로드 (tombstone 반영).
+
+        docstore가 mmap이면 본문/메타데이터/역색인을 memory-map으로 열어
+        프로세스 메모리를 거의 쓰지 않습니다. 실패하면 메모리 로드로 폴백합니다.
+        """
+        self._docs = []
+        self._keyword_index = InvertedIndex()
         if not self.index_path.exists():
             logger.warning(f"텍스트 인덱스 없음: {self.index_path}")
             return
 
-        with self.index_path.open("r", encoding="utf-8") as f:
-            for line in f:
-                line = line.strip()
-                if not line:
-                    continue
-                obj = json.loads(line)
-                self._docs.append((
-                    obj.get("id", ""),
-                    obj.get("text", ""),
-                    obj.get("metadata", {}),
-                ))
-
+        if self.docstore_type == "mmap":
+            try:
+                store = MmapDocStore.open_for(self.index_path)
+                self._keyword_index = store.keyword_index()
+                self._docs = store
+                logger.info(f"텍스트 인덱스 로드 (mmap): {len(store)}개 문서")
+                return
+            except Exception as e:
+                logger.warning(f"mmap 문서 저장소 사용 불가, 메모리 로드로 폴백: {e}")
+
+        store = InMemoryDocStore(self.index_path)
+        self._keyword_index = InvertedIndex.build(_tokenize(text) for _id, text, _meta in store)
+        self._docs = store
         logger.info(f"텍스트 인덱스 로드: {len(self._docs)}개 문서")
 
     def _load_vector_index(self) -> None:
@@ -123,9 +191,17 @@ class PolicyRetriever:
             return
 
         try:
-            import faiss
-            self._faiss_index = faiss.read_index(str(self.vector_path))
-            logger.info(f"FAISS 인덱스 로드: {self._faiss_index.ntotal}개 벡터")
+            from src.rag.vector_index import configure_search, read_vector_index
+
+            idx_cfg = get_config().rag.index
+            self._faiss_index = read_vector_index(self.vector_path, mmap=idx_cfg.vector_mmap)
+            params = configure_search(
+                self._faiss_index,
+                self.vector_path,
+                nprobe=idx_cfg.ivf_nprobe,
+                ef_search=idx_cfg.hnsw_ef_search,
+            )
+            logger.info(f"FAISS 인덱스 로드: {self._faiss_index.ntotal}개 벡터 {params or ''}")
         except ImportError:
             logger.warning("faiss 미설치, 키워드 모드로 폴백")
             self.mode = "keyword"
@@ -136,8 +212,8 @@ class PolicyRetriever:
     def _get_embedder(self):
         """임베딩 모델 로드 (지연 로딩)."""
         if self._embedder is None:
-            from src.rag.embedder import Embedder
-            self._embedder = Embedder()
+            from src.rag.embedder import get_embedder
+            self._embedder = get_embedder()
         return self._embedder
 
     def _get_reranker(self):
@@ -152,41 +228,19 @@ class PolicyRetriever:
         return self._reranker
 
     def _keyword_search(self, query: str, top_k: int) -> List[Tuple[float, int]]:
-        """키워드 기반 검색.
+        """키워드 기반 검색 (역색인 + MaxScore 조기 종료).
 
         Returns:
-            (score, index) 튜플 리스트
+            (score, index) 튜플 리스트. 최고 점수를 1.0으로 정규화하며
+            쿼리 토큰이 하나도 없는 문서는 제외합니다.
         """
-        q_tokens = set(_tokenize(query))
-        if not q_tokens:
+        results = self._keyword_index.search(_tokenize(query), top_k)
+        if not results:
             return []
 
-        scores: List[Tuple[float, int]] = []
-        for i, (_id, text, _meta) in enumerate(self._docs):
-            t_tokens = _tokenize(text)
-            if not t_tokens:
-                scores.append((0.0, i))
-                continue
-
-            # TF 점수 계산
-            t_token_set = set(t_tokens)
-            overlap = len(q_tokens & t_token_set)
-            if overlap == 0:
-                scores.append((0.0, i))
-                continue
-
-            # TF with length normalization
-            tf = sum(t_tokens.count(qt) for qt in q_tokens)
-            score = tf / math.sqrt(len(t_tokens))
-            scores.append((score, i))
-
         # 점수 정규화 (0-1 범위)
-        max_score = max(s for s, _ in scores) if scores else 1.0
-        if max_score > 0:
-            scores = [(s / max_score, i) for s, i in scores]
-
-        scores.sort(key=lambda x: x[0], reverse=True)
-        return scores[:top_k]
+        max_score = results[0][0]
+        return [(s / max_score, i) for s, i in results]
 
     def _embedding_search(self, query: str, top_k: int) -> List[Tuple[float, int]]:
         """임베딩 기반 검색.
@@ -206,68 +260,82 @@ class PolicyRetriever:
 
         # (score, index) 튜플로 변환
         results = []
-        for score, idx in zip(scores[0], indices[0]):
-            if idx >= 0:  # -1은 결과 없음
-                # 코사인 유사도를 0-1 범위로 정규화
-                normalized_score = (score + 1) / 2  # [-1, 1] → [0, 1]
-                results.append((float(normalized_score), int(idx)))
+        for score, label in zip(scores[0], indices[0]):
+            if label < 0:  # -1은 결과 없음
+                continue
+            # IndexIDMap은 안정 ID, 이전 형식 인덱스는 행 위치를 반환
+            idx = self._docs.position_of(int(label))
+            if idx is None:
+                if label >= len(self._docs):
+                    continue
+                idx = int(label)
+            # 코사인 유사도를 0-1 범위로 정규화
+            normalized_score = (score + 1) / 2  # [-1, 1] → [0, 1]
+            results.append((float(normalized_score), idx))
 
         return results
 
-    def _hybrid_search(self, query: str, top_k: int) -> List[Tuple[float, int]]:
+    def _hybrid_search(
+        self,
+        query: str,
+        top_k: int,
+        timings: Optional[Dict[str, float]] = None,
+    ) -> List[Tuple[float, int]]:
         """하이브리드 검색 (키워드 + 임베딩).
 
-        Returns:
-            (score, index) 튜플 리스트
-        """
-        # 양쪽 모두 더 많은 결과를 가져와서 합침
-        fetch_k = min(top_k * 3, len(self._docs))
-
-        keyword_results = self._keyword_search(query, fetch_k)
-        embedding_results = self._embedding_search(query, fetch_k)
-
-        # 점수 합산 (weighted)
-        alpha = self.hybrid_alpha  # 임베딩 가중치
-        score_map: Dict[int, float] = {}
-
-        for score, idx in keyword_results:
-            score_map[idx] = (1 - alpha) * score
-
-        for score, idx in embedding_results:
-            if idx in score_map:
-                score_map[idx] += alpha * score
-            else:
-                score_map[idx] = alpha * score
-
-        # 정렬
-        combined = [(score, idx) for idx, score in score_map.items()]
-        combined.sort(key=lambda x: x[0], reverse=True)
-
-        return combined[:top_k]
-
-    def search_policy(self, query: str, top_k: int = 5) -> List[PolicyHit]:
-        """정책 검색.
+        두 경로를 동시에 실행하고 각각 top_k만 가져와 융합합니다.
 
         Args:
             query: 검색 쿼리
             top_k: 반환할 최대 결과 수
+            timings: 전달 시 경로별 소요 시간(ms)을 기록
 
         Returns:
-            검색 결과 리스트
+            (score, index) 튜플 리스트
         """
-        if not self._docs:
-            return []
+        def _timed(fn):
+            start = time.perf_counter()
+            out = fn(query, top_k)
+            return out, (time.perf_counter() - start) * 1000
 
-        cfg = get_config().rag
-        top_k = min(top_k, cfg.retrieval.max_top_k)
+        embedding_future = _get_leg_executor().submit(_timed, self._embedding_search)
+        keyword_results, keyword_ms = _timed(self._keyword_search)
+        embedding_results, embedding_ms = embedding_future.result()
 
+        fusion_start = time.perf_counter()
+        alpha = self.hybrid_alpha  # 임베딩 가중치
+        combined = fuse(
+            self.fusion,
+            [keyword_results, embedding_results],
+            [1 - alpha, alpha],
+            top_k,
+            rrf_k=self.rrf_k,
+        )
+
+        if timings is not None:
+            timings["keyword_ms"] = keyword_ms
+            timings["embedding_ms"] = embedding_ms
+            timings["fusion_ms"] = (time.perf_counter() - fusion_start) * 1000
+        return combined
+
+    def _candidate_hits(
+        self,
+        query: str,
+        top_k: int,
+        timings: Optional[Dict[str, float]] = None,
+    ) -> List[PolicyHit]:
+        """모드별 1차 검색 결과를 PolicyHit로 변환."""
         # 모드별 검색
-        if self.mode == "embedding":
-            results = self._embedding_search(query, top_k)
-        elif self.mode == "hybrid":
-            results = self._hybrid_search(query, top_k)
-        else:  # keyword
-            results = self._keyword_search(query, top_k)
+        if self.mode == "hybrid":
+            results = self._hybrid_search(query, top_k, timings)
+        else:
+            start = time.perf_counter()
+            if self.mode == "embedding":
+                results = self._embedding_search(query, top_k)
+            else:  # keyword
+                results = self._keyword_search(query, top_k)
+            if timings is not None:
+                timings[f"{self.mode}_ms"] = (time.perf_counter() - start) * 1000
 
         # 결과 생성
         hits: List[PolicyHit] = []
@@ -284,38 +352,153 @@ class PolicyRetriever:
                 text=text,
                 metadata=meta,
             ))
+        return hits
+
+    @staticmethod
+    def _to_rerank_input(hits: List[PolicyHit]) -> List[Tuple[str, str, float, dict]]:
+        return [(hit.id, hit.text, hit.score, hit.metadata) for hit in hits]
+
+    @staticmethod
+    def _from_reranked(reranked) -> List[PolicyHit]:
+        return [
+            PolicyHit(
+                id=r.id,
+                score=r.score,
+                text=r.text,
+                metadata=r.metadata,
+            )
+            for r in reranked
+        ]
+
+    @staticmethod
+    def _heuristic_rerank(query: str, hits: List[PolicyHit], top_k: int) -> List[PolicyHit]:
+        """휴리스틱 리랭커: 쿼리 토큰과 텍스트/타이틀 겹침 점수로 정렬."""
+        q_tokens = set(_tokenize(query))
+        def _hscore(h: PolicyHit) -> float:
+            text_tokens = set(_tokenize(h.text))
+            title = (h.metadata or {}).get('title', '')
+            title_tokens = set(_tokenize(title))
+            overlap = len(q_tokens & text_tokens)
+            overlap_title = len(q_tokens & title_tokens)
+            return overlap + (2.0 * overlap_title) + (0.1 * h.score)
+        return sorted(hits, key=_hscore, reverse=True)[:top_k]
+
+    def search_policy(
+        self,
+        query: str,
+        top_k: int = 5,
+        timings: Optional[Dict[str, float]] = None,
+    ) -> List[PolicyHit]:
+        """정책 검색.
+
+        Args:
+            query: 검색 쿼리
+            top_k: 반환할 최대 결과 수
+            timings: 전달 시 단계별 소요 시간(ms)을 기록 (트레이스용)
+
+        Returns:
+            검색 결과 리스트
+        """
+        if not self._docs:
+            return []
+
+        # 같은 검색이 진행 중이면 그 결과를 공유 (timings는 실제 실행한 호출만 기록)
+        hits = self._flight.do_sync(
+            f"{top_k}:{query}", lambda: self._search_policy(query, top_k, timings)
+        )
+        return list(hits)
+
+    def _search_policy(
+        self,
+        query: str,
+        top_k: int,
+        timings: Optional[Dict[str, float]],
+    ) -> List[PolicyHit]:
+        cfg = get_config().rag
+        top_k = min(top_k, cfg.retrieval.max_top_k)
+        hits = self._candidate_hits(query, top_k, timings)
 
         # 리랭킹 적용 (설정 시)
         if self.use_reranking and hits:
+            rerank_start = time.perf_counter()
             reranker = self._get_reranker()
             if reranker:
-                documents = [
-                    (hit.id, hit.text, hit.score, hit.metadata)
-                    for hit in hits
-                ]
-                reranked = reranker.rerank(query, documents, top_k)
-                hits = [
-                    PolicyHit(
-                        id=r.id,
-                        score=r.score,
-                        text=r.text,
-                        metadata=r.metadata,
-                    )
-                    for r in reranked
-                ]
+                reranked = reranker.rerank(query, self._to_rerank_input(hits), top_k)
+                hits = self._from_reranked(reranked)
             else:
-                # 휴리스틱 리랭커: 쿼리 토큰과 텍스트/타이틀 겹침 점수로 정렬
-                q_tokens = set(_tokenize(query))
-                def _hscore(h: PolicyHit) -> float:
-                    text_tokens = set(_tokenize(h.text))
-                    title = (h.metadata or {}).get('title', '')
-                    title_tokens = set(_tokenize(title))
-                    overlap = len(q_tokens & text_tokens)
-                    overlap_title = len(q_tokens & title_tokens)
-                    return overlap + (2.0 * overlap_title) + (0.1 * h.score)
-                hits = sorted(hits, key=_hscore, reverse=True)[:top_k]
+                hits = self._heuristic_rerank(query, hits, top_k)
+            if timings is not None:
+                timings["rerank_ms"] = (time.perf_counter() - rerank_start) * 1000
+
+        return hits
+
+    async def asearch_policy(
+        self,
+        query: str,
+        top_k: int = 5,
+        timings: Optional[Dict[str, float]] = None,
+        timeout: Optional[float] = None,
+    ) -> List[PolicyHit]:
+        """정책 검색 (비동기).
+
+        후보 검색(키워드/임베딩/fusion)은 전용 executor에서 실행하고,
+        Cross-Encoder 리랭킹은 리랭커의 배치 executor에서 실행하므로
+        이벤트 루프를 막지 않습니다.
+
+        Args:
+            timeout: 후보 검색 제한 시간 (초, 기본: retrieval.search_timeout)
+
+        Raises:
+            RequestTimeoutError: 제한 시간 초과
+            ServiceUnavailableError: 검색 대기열 포화
+        """
+        if not self._docs:
+            return []
 
+        hits = await self._flight.do(
+            f"{top_k}:{query}", lambda: self._asearch_policy(query, top_k, timings, timeout)
+        )
+        return list(hits)
 
+    async def _asearch_policy(
+        self,
+        query: str,
+        top_k: int,
+        timings: Optional[Dict[str, float]],
+        timeout: Optional[float],
+    ) -> List[PolicyHit]:
+        cfg = get_config().rag
+        top_k = min(top_k, cfg.retrieval.max_top_k)
+        if timeout is None:
+            timeout = cfg.retrieval.search_timeout
+
+        from src.monitoring.metrics import track_retrieval_rejected
+
+        try:
+            hits = await get_search_executor().run(
+                self._candidate_hits, query, top_k, timings, timeout=timeout
+            )
+        except RequestTimeoutError:
+            track_retrieval_rejected("timeout")
+            logger.warning(f"정책 검색 시간 초과 ({timeout}s): {query[:50]}")
+            raise
+        except ServiceUnavailableError:
+            track_retrieval_rejected("saturated")
+            logger.warning("정책 검색 대기열 포화")
+            raise
+
+        if not (self.use_reranking and hits):
+            return hits
+
+        rerank_start = time.perf_counter()
+        reranker = self._get_reranker()
+        if reranker:
+            reranked = await reranker.arerank(query, self._to_rerank_input(hits), top_k)
+            hits = self._from_reranked(reranked)
+        else:
+            hits = self._heuristic_rerank(query, hits, top_k)
+        if timings is not None:
+            timings["rerank_ms"] = (time.perf_counter() - rerank_start) * 1000
         return hits
 
     def search(self, query: str, top_k: int = 5) -> List[PolicyHit]:
@@ -323,19 +506,13 @@ class PolicyRetriever:
         return self.search_policy(query, top_k)
 
 
-# 전역 리트리버 인스턴스 (지연 로딩)
-_retriever: Optional[PolicyRetriever] = None
-
-
 def get_retriever() -> PolicyRetriever:
-    """전역 리트리버 인스턴스 반환."""
-    global _retriever
-    if _retriever is None:
-        _retriever = PolicyRetriever()
-    return _retriever
+    """전역 리트리버 인스턴스 반환 (IndexManager의 현재 버전)."""
+    from src.rag.index_manager import get_index_manager
+    return get_index_manager().current
 
 
 def reset_retriever() -> None:
     """전역 리트리버 리셋 (테스트용)."""
-    global _retriever
-    _retriever = None
+    from src.rag.index_manager import reset_index_manager
+    reset_index_manager()
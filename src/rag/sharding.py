@@ -0,0 +1,496 @@
+"""doc_type 기준 정책 인덱스 샤딩.
+
+정책 질문은 대부분 한 주제(환불, 배송, 결제, 멤버십 등)에 관한 것이므로
+텍스트 인덱스를 metadata.doc_type별 샤드로 나누고, 쿼리에 맞는 샤드만 검색합니다.
+
+디렉토리 구성 (shard_dir_for()로 결정):
+    manifest.json                 # 원본 버전, 샤드별 문서/벡터 수
+    <doc_type>/index.jsonl        # 샤드 텍스트 인덱스
+    <doc_type>/vectors.faiss      # 샤드 벡터 인덱스 (있을 때)
+
+- ShardRouter: POLICY_KEYWORDS로 쿼리에 해당하는 샤드를 고르고, 주제 키워드가 없는
+  샤드(예: 일반 정책)는 항상 포함합니다. 매칭이 없으면 전체 샤드를 검색합니다.
+- ShardedPolicyRetriever: 샤드별 역색인/FAISS를 스레드 풀에서 동시에 검색(scatter)한 뒤
+  원점수로 합쳐 전체 top-k를 만듭니다(gather). 모든 샤드를 검색하면 단일 인덱스와
+  같은 결과를 냅니다.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import re
+import shutil
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+
+from src.config import get_config
+from src.rag.docstore import DocTuple, JsonlDocStore, source_fingerprint
+from src.rag.retriever import PolicyRetriever, _tokenize
+
+logger = logging.getLogger(__name__)
+
+_MANIFEST_FILE = "manifest.json"
+_SHARD_INDEX_FILE = "index.jsonl"
+_SHARD_VECTORS_FILE = "vectors.faiss"
+
+# doc_type이 없는 청크의 샤드 이름
+DEFAULT_SHARD = "general"
+
+_SHARD_NAME_RE = re.compile(r"[^\w\-]+", re.UNICODE)
+
+# 샤드 검색용 스레드 풀 (지연 생성)
+_shard_executor: Optional[ThreadPoolExecutor] = None
+
+
+def _get_shard_executor() -> ThreadPoolExecutor:
+    global _shard_executor
+    if _shard_executor is None:
+        workers = max(1, get_config().rag.index.shard_workers)
+        _shard_executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="retrieval-shard")
+    return _shard_executor
+
+
+def shard_name(doc_type: Any) -> str:
+    """doc_type → 샤드 디렉토리 이름."""
+    name = _SHARD_NAME_RE.sub("_", str(doc_type or "").strip().lower()).strip("_")
+    return name or DEFAULT_SHARD
+
+
+def shard_dir_for(source: Path) -> Path:
+    """원본 텍스트 인덱스의 샤드 디렉토리."""
+    source = Path(source)
+    return source.parent / f"{source.name}.shards"
+
+
+def load_manifest(source: Path) -> Optional[Dict[str, Any]]:
+    """원본의 현재 버전과 일치하는 샤드 manifest (없거나 오래되면 None)."""
+    source = Path(source)
+    path = shard_dir_for(source) / _MANIFEST_FILE
+    if not source.exists() or not path.exists():
+        return None
+    with path.open("r", encoding="utf-8") as f:
+        manifest = json.load(f)
+    if manifest.get("source") != source_fingerprint(source):
+        return None
+    return manifest
+
+
+# ---------------------------------------------------------------------------
+# 빌드
+# ---------------------------------------------------------------------------
+
+
+def _split_by_doc_type(source: Path, directory: Path) -> Dict[str, List[int]]:
+    """유효 레코드를 샤드별 JSONL로 스트리밍 분할.
+
+    Returns:
+        샤드 이름 → int_id 목록 (원본 순서)
+    """
+    files: Dict[str, Any] = {}
+    ids: Dict[str, List[int]] = {}
+    try:
+        for rec in JsonlDocStore(source).iter_live():
+            name = shard_name((rec.get("metadata") or {}).get("doc_type"))
+            f = files.get(name)
+            if f is None:
+                (directory / name).mkdir(parents=True, exist_ok=True)
+                f = files[name] = (directory / name / _SHARD_INDEX_FILE).open("w", encoding="utf-8")
+                ids[name] = []
+            f.write(json.dumps(rec, ensure_ascii=False) + "\n")
+            ids[name].append(rec["int_id"])
+    finally:
+        for f in files.values():
+            f.close()
+    return ids
+
+
+def _reconstruct_vectors(global_index: Any, int_ids: Sequence[int]) -> Optional[np.ndarray]:
+    """전체 인덱스에서 ID별 벡터 복원 (지원하지 않으면 None)."""
+    try:
+        return np.vstack([global_index.reconstruct(int(i)) for i in int_ids]).astype(np.float32)
+    except Exception as e:
+        logger.info(f"전체 인덱스에서 벡터 복원 불가, 샤드별 임베딩으로 대체: {e}")
+        return None
+
+
+def _build_shard_vectors(
+    global_index: Any,
+    int_ids: Sequence[int],
+    shard_index: Path,
+    shard_dir: Path,
+    embedder: Any = None,
+) -> int:
+    """샤드 벡터 인덱스 생성 (전체 인덱스에서 복원, 불가하면 샤드 텍스트로 임베딩).
+
+    Returns:
+        샤드 벡터 수
+    """
+    import faiss
+
+    from src.rag.build_pipeline import build_vector_index_streaming
+    from src.rag.indexer import wrap_id_index
+
+    out = shard_dir / _SHARD_VECTORS_FILE
+    vectors = _reconstruct_vectors(global_index, int_ids) if int_ids else None
+    if vectors is None:
+        stats = build_vector_index_streaming(
+            index_jsonl=shard_index,
+            vector_path=out,
+            embeddings_path=shard_dir / "embeddings.npy",
+            embedder=embedder,
+            progress=None,
+        )
+        return stats.documents
+
+    index = wrap_id_index(faiss.IndexFlatIP(vectors.shape[1]))
+    index.add_with_ids(vectors, np.asarray(int_ids, dtype=np.int64))
+    tmp = out.with_suffix(out.suffix + ".tmp")
+    faiss.write_index(index, str(tmp))
+    tmp.replace(out)
+    return int(index.ntotal)
+
+
+def _write_manifest(directory: Path, source: Path, shards: Dict[str, Dict[str, int]]) -> None:
+    tmp = directory / (_MANIFEST_FILE + ".tmp")
+    with tmp.open("w", encoding="utf-8") as f:
+        json.dump({"source": source_fingerprint(source), "shards": shards}, f, ensure_ascii=False, indent=2)
+    tmp.replace(directory / _MANIFEST_FILE)
+
+
+def build_shards(
+    source: Path,
+    vector_path: Optional[Path] = None,
+    embedder: Any = None,
+    progress: Optional[Any] = print,
+) -> Path:
+    """텍스트 인덱스를 doc_type별 샤드로 분할하고 샤드별 벡터 인덱스 생성.
+
+    벡터는 전체 FAISS 인덱스에서 ID로 복원해 재임베딩을 피하고,
+    복원할 수 없으면(IVF 등) 샤드 단위로 임베딩합니다.
+
+    Args:
+        source: 텍스트 인덱스 경로
+        vector_path: 전체 벡터 인덱스 경로 (None이면 벡터 생략)
+        embedder: 복원 불가 시 사용할 임베더
+        progress: 진행 상황 출력 함수
+
+    Returns:
+        샤드 디렉토리
+    """
+    source = Path(source)
+    directory = shard_dir_for(source)
+    tmp = directory.with_name(directory.name + ".tmp")
+    if tmp.exists():
+        shutil.rmtree(tmp)
+    tmp.mkdir(parents=True)
+
+    shard_ids = _split_by_doc_type(source, tmp)
+    shards: Dict[str, Dict[str, int]] = {
+        name: {"documents": len(ids), "vectors": 0} for name, ids in shard_ids.items()
+    }
+
+    if vector_path is not None and Path(vector_path).exists():
+        import faiss
+
+        global_index = faiss.read_index(str(vector_path))
+        for name, ids in shard_ids.items():
+            shards[name]["vectors"] = _build_shard_vectors(
+                global_index, ids, tmp / name / _SHARD_INDEX_FILE, tmp / name, embedder
+            )
+
+    _write_manifest(tmp, source, shards)
+
+    if directory.exists():
+        shutil.rmtree(directory)
+    tmp.rename(directory)
+
+    if progress:
+        summary = ", ".join(f"{n}={s['documents']}" for n, s in sorted(shards.items()))
+        progress(f"[OK] 샤드 {len(shards)}개 생성 → {directory} ({summary})")
+    return directory
+
+
+def update_shards(
+    source: Path,
+    doc_types: Iterable[Any],
+    vector_path: Optional[Path] = None,
+    embedder: Any = None,
+) -> Optional[Path]:
+    """증분 갱신 후 바뀐 doc_type 샤드만 다시 쓰고 manifest를 원본 버전에 맞춤.
+
+    샤드 디렉토리가 없으면 아무것도 하지 않습니다. 샤드 텍스트/벡터는 임시 파일에 쓴 뒤
+    교체하고, manifest는 마지막에 갱신하므로 그 사이의 검색은 단일 인덱스로 폴백합니다.
+
+    Args:
+        source: 텍스트 인덱스 경로
+        doc_types: 추가/삭제/변경된 청크의 doc_type (변경 전후 모두)
+        vector_path: 갱신된 전체 벡터 인덱스 경로 (None이면 샤드 벡터는 그대로 둠)
+        embedder: 전체 인덱스에서 복원할 수 없을 때 사용할 임베더
+
+    Returns:
+        샤드 디렉토리 (갱신하지 않았으면 None)
+    """
+    source = Path(source)
+    directory = shard_dir_for(source)
+    manifest_path = directory / _MANIFEST_FILE
+    if not manifest_path.exists():
+        return None
+    with manifest_path.open("r", encoding="utf-8") as f:
+        shards: Dict[str, Dict[str, int]] = json.load(f).get("shards", {})
+
+    affected = {shard_name(t) for t in doc_types}
+    files: Dict[str, Any] = {}
+    ids: Dict[str, List[int]] = {name: [] for name in affected}
+    try:
+        for rec in JsonlDocStore(source).iter_live():
+            name = shard_name((rec.get("metadata") or {}).get("doc_type"))
+            if name not in affected:
+                continue
+            f = files.get(name)
+            if f is None:
+                (directory / name).mkdir(parents=True, exist_ok=True)
+                f = files[name] = (directory / name / (_SHARD_INDEX_FILE + ".tmp")).open("w", encoding="utf-8")
+            f.write(json.dumps(rec, ensure_ascii=False) + "\n")
+            ids[name].append(rec["int_id"])
+    finally:
+        for f in files.values():
+            f.close()
+
+    global_index = None
+    if vector_path is not None and Path(vector_path).exists():
+        import faiss
+
+        global_index = faiss.read_index(str(vector_path))
+
+    for name in sorted(affected):
+        shard_dir = directory / name
+        if not ids[name]:
+            # 문서가 모두 빠진 샤드는 제거
+            shards.pop(name, None)
+            if shard_dir.exists():
+                shutil.rmtree(shard_dir)
+            continue
+
+        tmp_index = shard_dir / (_SHARD_INDEX_FILE + ".tmp")
+        entry = shards.setdefault(name, {"documents": 0, "vectors": 0})
+        entry["documents"] = len(ids[name])
+        if global_index is not None:
+            entry["vectors"] = _build_shard_vectors(global_index, ids[name], tmp_index, shard_dir, embedder)
+        tmp_index.replace(shard_dir / _SHARD_INDEX_FILE)
+
+    _write_manifest(directory, source, shards)
+    logger.info(f"샤드 갱신: {sorted(affected)} → {directory}")
+    return directory
+
+
+# ---------------------------------------------------------------------------
+# 라우팅
+# ---------------------------------------------------------------------------
+
+
+class ShardRouter:
+    """쿼리 키워드로 검색할 샤드 선택."""
+
+    def __init__(
+        self,
+        shard_names: Sequence[str],
+        topic_keywords: Optional[Mapping[str, Sequence[str]]] = None,
+    ) -> None:
+        """라우터 초기화.
+
+        Args:
+            shard_names: 사용 가능한 샤드 이름
+            topic_keywords: 샤드 이름 → 키워드 (기본: guardrails POLICY_KEYWORDS)
+        """
+        if topic_keywords is None:
+            from src.guardrails.pipeline import POLICY_KEYWORDS
+            topic_keywords = POLICY_KEYWORDS
+
+        self.shard_names = list(shard_names)
+        self.keywords = {
+            name: [kw.lower() for kw in kws]
+            for name, kws in topic_keywords.items()
+            if name in self.shard_names
+        }
+        # 주제 키워드가 없는 샤드는 항상 검색
+        self.always = [n for n in self.shard_names if n not in self.keywords]
+
+    def route(self, query: str) -> List[str]:
+        """검색할 샤드 이름 목록 (매칭이 없으면 전체)."""
+        q = (query or "").lower()
+        matched = [name for name, kws in self.keywords.items() if any(kw in q for kw in kws)]
+        if not matched:
+            return list(self.shard_names)
+        return [n for n in self.shard_names if n in matched or n in self.always]
+
+
+# ---------------------------------------------------------------------------
+# 검색
+# ---------------------------------------------------------------------------
+
+
+class ShardedDocs:
+    """샤드 문서 테이블을 이어 붙인 읽기 전용 뷰 (전역 위치 = 샤드 오프셋 + 샤드 내 위치)."""
+
+    def __init__(self, parts: Sequence[Any]) -> None:
+        self._parts = list(parts)
+        self._offsets: List[int] = []
+        total = 0
+        for part in self._parts:
+            self._offsets.append(total)
+            total += len(part)
+        self._total = total
+
+    def __len__(self) -> int:
+        return self._total
+
+    def __getitem__(self, pos: int) -> DocTuple:
+        if pos < 0 or pos >= self._total:
+            raise IndexError(pos)
+        i = int(np.searchsorted(self._offsets, pos, side="right")) - 1
+        return self._parts[i][pos - self._offsets[i]]
+
+    def __iter__(self) -> Iterator[DocTuple]:
+        for part in self._parts:
+            yield from part
+
+    def position_of(self, int_id: int) -> Optional[int]:
+        for offset, part in zip(self._offsets, self._parts):
+            pos = part.position_of(int_id)
+            if pos is not None:
+                return offset + pos
+        return None
+
+
+class ShardedPolicyRetriever(PolicyRetriever):
+    """doc_type 샤드 단위 scatter-gather 리트리버.
+
+    PolicyRetriever와 같은 인터페이스이며, 키워드/임베딩 경로만 샤드 검색으로 바뀝니다.
+    융합, 리랭킹, 결과 변환은 기존 구현을 그대로 사용합니다.
+    """
+
+    def __init__(
+        self,
+        index_path: Optional[Path] = None,
+        vector_path: Optional[Path] = None,
+        mode: Optional[str] = None,
+        router: Optional[ShardRouter] = None,
+    ) -> None:
+        self.shards: Dict[str, PolicyRetriever] = {}
+        self._shard_offsets: Dict[str, int] = {}
+        self.router = router
+        super().__init__(index_path=index_path, vector_path=vector_path, mode=mode)
+
+    def _load_text_index(self) -> None:
+        """샤드별 텍스트 인덱스 로드."""
+        manifest = load_manifest(self.index_path)
+        if manifest is None:
+            raise FileNotFoundError(f"샤드 없음 또는 원본과 버전 불일치: {shard_dir_for(self.index_path)}")
+
+        directory = shard_dir_for(self.index_path)
+        offset = 0
+        for name in sorted(manifest["shards"]):
+            shard = PolicyRetriever(
+                index_path=directory / name / _SHARD_INDEX_FILE,
+                vector_path=directory / name / _SHARD_VECTORS_FILE,
+                mode="keyword",
+            )
+            self.shards[name] = shard
+            self._shard_offsets[name] = offset
+            offset += len(shard._docs)
+
+        self._docs = ShardedDocs([s._docs for s in self.shards.values()])
+        if self.router is None:
+            self.router = ShardRouter(list(self.shards))
+        logger.info(f"샤드 인덱스 로드: {len(self.shards)}개 샤드, {len(self._docs)}개 문서")
+
+    def _load_vector_index(self) -> None:
+        """샤드별 FAISS 인덱스 로드 (하나도 없으면 키워드 모드로 폴백)."""
+        for shard in self.shards.values():
+            shard._load_vector_index()
+        if all(s._faiss_index is None for s in self.shards.values()):
+            logger.warning("샤드 벡터 인덱스 없음, 키워드 모드로 폴백")
+            self.mode = "keyword"
+
+    def _compute_index_version(self) -> str:
+        base = super()._compute_index_version()
+        manifest = shard_dir_for(self.index_path) / _MANIFEST_FILE
+        return f"{base}:shards-{source_fingerprint(manifest)}"
+
+    def _scatter(self, query: str, fn) -> List[Tuple[float, int]]:
+        """라우팅된 샤드에서 fn(shard)를 동시에 실행하고 전역 위치로 합침."""
+        names = self.router.route(query)
+        if len(names) == 1:
+            parts = [(names[0], fn(self.shards[names[0]]))]
+        else:
+            executor = _get_shard_executor()
+            futures = [(n, executor.submit(fn, self.shards[n])) for n in names]
+            parts = [(n, f.result()) for n, f in futures]
+
+        merged: List[Tuple[float, int]] = []
+        for name, results in parts:
+            offset = self._shard_offsets[name]
+            merged.extend((score, offset + pos) for score, pos in results)
+        merged.sort(key=lambda x: (-x[0], x[1]))
+        return merged
+
+    def _keyword_search(self, query: str, top_k: int) -> List[Tuple[float, int]]:
+        """샤드별 원점수 top_k를 합친 뒤 전체 최고 점수로 정규화."""
+        tokens = _tokenize(query)
+        results = self._scatter(query, lambda s: s._keyword_index.search(tokens, top_k))[:top_k]
+        if not results:
+            return []
+        max_score = results[0][0]
+        return [(s / max_score, i) for s, i in results]
+
+    def _embedding_search(self, query: str, top_k: int) -> List[Tuple[float, int]]:
+        """쿼리 임베딩은 한 번만 계산하고 샤드별 FAISS에 분산 검색."""
+        if self.mode == "keyword":
+            return []
+        embedder = self._get_embedder()
+        query_embedding = embedder.encode_query(query).astype(np.float32).reshape(1, -1)
+
+        def _search(shard: PolicyRetriever) -> List[Tuple[float, int]]:
+            if shard._faiss_index is None:
+                return []
+            scores, labels = shard._faiss_index.search(query_embedding, top_k)
+            out = []
+            for score, label in zip(scores[0], labels[0]):
+                if label < 0:
+                    continue
+                pos = shard._docs.position_of(int(label))
+                if pos is not None:
+                    out.append((float((score + 1) / 2), pos))
+            return out
+
+        return self._scatter(query, _search)[:top_k]
+
+    def _candidate_hits(
+        self,
+        query: str,
+        top_k: int,
+        timings: Optional[Dict[str, float]] = None,
+    ) -> List[Any]:
+        hits = super()._candidate_hits(query, top_k, timings)
+        if timings is not None:
+            timings["shards_searched"] = float(len(self.router.route(query)))
+        return hits
+
+
+def create_retriever(**kwargs: Any) -> PolicyRetriever:
+    """설정에 따라 샤드/단일 리트리버 생성.
+
+    index.sharding이 켜져 있고 원본과 버전이 맞는 샤드가 있으면 샤드 리트리버를,
+    아니면 단일 PolicyRetriever를 반환합니다.
+    """
+    cfg = get_config().rag
+    if cfg.index.sharding:
+        index_path = Path(kwargs.get("index_path") or cfg.paths.policies_index)
+        if load_manifest(index_path) is not None:
+            return ShardedPolicyRetriever(**kwargs)
+        logger.warning(f"샤드 인덱스가 없거나 오래됨, 단일 인덱스 사용: {shard_dir_for(index_path)}")
+    return PolicyRetriever(**kwargs)
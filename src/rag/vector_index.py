@@ -0,0 +1,400 @@
+"""FAISS 벡터 인덱스 타입/검색 파라미터 관리.
+
+지원 인덱스 타입:
+    flat      정확 검색 (IndexFlatIP)
+    ivf_flat  클러스터 근사 검색 (IndexIVFFlat, 구 설정값 "ivf")
+    ivf_pq    클러스터 + Product Quantization 압축 (IndexIVFPQ, 대용량/디스크용)
+    hnsw      그래프 근사 검색 (IndexHNSWFlat, 학습 불필요, 부분 삭제 불가)
+
+검색 시 IVF는 nprobe(탐색할 클러스터 수), HNSW는 efSearch(탐색 후보 수)가
+정확도/지연을 결정합니다. autotune()은 쿼리 셋에서 이 값을 바꿔 가며
+목표 recall을 만족하는 가장 빠른 값을 찾고, 결과는 인덱스 옆 사이드카
+파일(<vector_index>.params.json)에 저장되어 로드 시 설정값보다 우선합니다.
+recall의 정답은 원본 벡터에 대한 정확 검색(IndexFlatIP)입니다.
+빌드 파라미터(HNSW M, IVF nlist)는 인덱스를 다시 만들어야 하므로 튜닝하지 않습니다.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import time
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from src.rag.docstore import source_fingerprint
+
+logger = logging.getLogger(__name__)
+
+INDEX_TYPES = ("flat", "ivf_flat", "ivf_pq", "hnsw")
+_ALIASES = {"ivf": "ivf_flat", "ivfflat": "ivf_flat", "ivfpq": "ivf_pq"}
+
+PARAMS_SUFFIX = ".params.json"
+
+# efSearch 자동 튜닝 기본 후보
+_EF_SEARCH_CANDIDATES = (16, 32, 64, 128, 256, 512)
+
+
+def normalize_index_type(index_type: str) -> str:
+    """인덱스 타입 이름 정규화 (구 설정값 ivf 포함)."""
+    name = (index_type or "flat").strip().lower()
+    name = _ALIASES.get(name, name)
+    if name not in INDEX_TYPES:
+        raise ValueError(f"지원하지 않는 벡터 인덱스 타입: {index_type} (가능: {', '.join(INDEX_TYPES)})")
+    return name
+
+
+def needs_training(index_type: str) -> bool:
+    """학습(train)이 필요한 인덱스인지 여부."""
+    return normalize_index_type(index_type).startswith("ivf")
+
+
+def pq_subquantizers(dimension: int, pq_m: int) -> int:
+    """차원을 나누어떨어지게 하는 pq_m 이하의 최대 서브 양자화기 수."""
+    for m in range(max(1, min(pq_m, dimension)), 0, -1):
+        if dimension % m == 0:
+            return m
+    return 1
+
+
+def create_index(
+    dimension: int,
+    index_type: str = "flat",
+    nlist: int = 100,
+    train_size: Optional[int] = None,
+    pq_m: int = 16,
+    pq_nbits: int = 8,
+    hnsw_m: int = 32,
+    hnsw_ef_construction: int = 200,
+) -> Any:
+    """내적(IP) 기준 FAISS 인덱스 생성 (학습 전, ID 래핑 전).
+
+    Args:
+        dimension: 벡터 차원
+        index_type: flat, ivf_flat, ivf_pq, hnsw
+        nlist: IVF 클러스터 수 (train_size를 넘지 않도록 조정)
+        train_size: 학습 표본 수 (IVF 파라미터 조정용)
+        pq_m: PQ 서브 양자화기 수 (차원의 약수로 조정)
+        pq_nbits: 서브 양자화기당 비트 수 (표본이 적으면 줄임)
+        hnsw_m: HNSW 노드당 이웃 수
+        hnsw_ef_construction: HNSW 빌드 시 탐색 후보 수
+    """
+    import faiss
+
+    index_type = normalize_index_type(index_type)
+    if index_type == "flat":
+        return faiss.IndexFlatIP(dimension)
+
+    if index_type == "hnsw":
+        index = faiss.IndexHNSWFlat(dimension, hnsw_m, faiss.METRIC_INNER_PRODUCT)
+        index.hnsw.efConstruction = hnsw_ef_construction
+        return index
+
+    if train_size is not None:
+        nlist = max(1, min(nlist, train_size))
+    quantizer = faiss.IndexFlatIP(dimension)
+    if index_type == "ivf_flat":
+        return faiss.IndexIVFFlat(quantizer, dimension, nlist, faiss.METRIC_INNER_PRODUCT)
+
+    # ivf_pq: 코드북 학습에는 2^nbits개 이상의 표본이 필요
+    if train_size is not None:
+        while pq_nbits > 1 and (1 << pq_nbits) > train_size:
+            pq_nbits -= 1
+    m = pq_subquantizers(dimension, pq_m)
+    return faiss.IndexIVFPQ(quantizer, dimension, nlist, m, pq_nbits, faiss.METRIC_INNER_PRODUCT)
+
+
+def _base_index(index: Any) -> Any:
+    """IndexIDMap 래퍼를 벗긴 실제 인덱스."""
+    import faiss
+
+    index = faiss.downcast_index(index)
+    if isinstance(index, (faiss.IndexIDMap, faiss.IndexIDMap2)):
+        index = faiss.downcast_index(index.index)
+    return index
+
+
+def supports_removal(index: Any) -> bool:
+    """remove_ids 가능 여부 (HNSW 그래프는 노드를 제거할 수 없음)."""
+    import faiss
+
+    return not isinstance(_base_index(index), faiss.IndexHNSW)
+
+
+def search_param_name(index: Any) -> Optional[str]:
+    """튜닝 가능한 검색 파라미터 이름 (nprobe, efSearch, 없으면 None)."""
+    import faiss
+
+    base = _base_index(index)
+    if isinstance(base, faiss.IndexIVF):
+        return "nprobe"
+    if isinstance(base, faiss.IndexHNSW):
+        return "efSearch"
+    return None
+
+
+def set_search_param(index: Any, value: int) -> None:
+    """nprobe/efSearch 설정 (nprobe는 nlist로 제한, flat은 무시)."""
+    import faiss
+
+    base = _base_index(index)
+    if isinstance(base, faiss.IndexIVF):
+        base.nprobe = max(1, min(int(value), base.nlist))
+    elif isinstance(base, faiss.IndexHNSW):
+        base.hnsw.efSearch = max(1, int(value))
+
+
+def read_vector_index(path: Path, mmap: bool = False) -> Any:
+    """FAISS 인덱스 로드.
+
+    mmap이면 IO_FLAG_MMAP으로 열어 IVF 역리스트를 디스크에 둔 채 페이지 캐시로
+    읽습니다. mmap을 지원하지 않는 인덱스/빌드는 일반 로드로 폴백합니다.
+    """
+    import faiss
+
+    if mmap:
+        try:
+            return faiss.read_index(str(path), faiss.IO_FLAG_MMAP)
+        except Exception as e:
+            logger.warning(f"FAISS mmap 로드 실패, 일반 로드로 폴백: {e}")
+    return faiss.read_index(str(path))
+
+
+def params_path_for(vector_path: Path) -> Path:
+    """튜닝 결과 사이드카 경로."""
+    vector_path = Path(vector_path)
+    return vector_path.with_name(vector_path.name + PARAMS_SUFFIX)
+
+
+def load_tuned_params(vector_path: Path) -> Dict[str, int]:
+    """인덱스에 맞는 튜닝 결과 로드 (없거나 인덱스가 바뀌었으면 빈 dict)."""
+    path = params_path_for(vector_path)
+    if not path.exists():
+        return {}
+    try:
+        data = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError) as e:
+        logger.warning(f"튜닝 결과 읽기 실패: {path}: {e}")
+        return {}
+    if data.get("fingerprint") != source_fingerprint(Path(vector_path)):
+        logger.info(f"인덱스가 변경되어 튜닝 결과 무시: {path}")
+        return {}
+    return {data["param"]: int(data["value"])} if data.get("param") else {}
+
+
+def configure_search(
+    index: Any,
+    vector_path: Optional[Path] = None,
+    nprobe: int = 16,
+    ef_search: int = 64,
+) -> Dict[str, int]:
+    """로드한 인덱스에 검색 파라미터 적용 (튜닝 결과 > 설정값).
+
+    Returns:
+        적용한 파라미터 ({"nprobe": n} / {"efSearch": n} / {})
+    """
+    param = search_param_name(index)
+    if param is None:
+        return {}
+    tuned = load_tuned_params(vector_path) if vector_path is not None else {}
+    value = tuned.get(param, nprobe if param == "nprobe" else ef_search)
+    set_search_param(index, value)
+    return {param: value}
+
+
+@dataclass
+class TunePoint:
+    """파라미터 값 하나의 측정 결과."""
+
+    value: int
+    recall: float
+    latency_ms: float
+
+
+@dataclass
+class TuneResult:
+    """자동 튜닝 결과."""
+
+    param: Optional[str]
+    value: Optional[int]
+    recall: float
+    latency_ms: float
+    target_recall: float
+    k: int
+    points: List[TunePoint] = field(default_factory=list)
+    ground_truth: str = "exact"  # exact: 정확 검색, exhaustive: 원본 벡터가 없어 최대 탐색 결과 사용
+
+    @property
+    def met_target(self) -> bool:
+        return self.recall >= self.target_recall
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = asdict(self)
+        data["met_target"] = self.met_target
+        return data
+
+
+def select_operating_point(points: Sequence[TunePoint], target_recall: float) -> TunePoint:
+    """목표 recall을 만족하는 가장 빠른 점 (없으면 recall 최대, 동률이면 빠른 쪽)."""
+    if not points:
+        raise ValueError("측정 결과가 없습니다")
+    ok = [p for p in points if p.recall >= target_recall]
+    if ok:
+        return min(ok, key=lambda p: (p.latency_ms, p.value))
+    return max(points, key=lambda p: (p.recall, -p.latency_ms))
+
+
+def _default_candidates(index: Any, param: str, k: int) -> List[int]:
+    if param == "nprobe":
+        nlist = _base_index(index).nlist
+        values, v = [], 1
+        while v < nlist:
+            values.append(v)
+            v *= 2
+        return values + [nlist]
+    return [v for v in _EF_SEARCH_CANDIDATES if v >= k] or [k]
+
+
+def _recall(found: np.ndarray, truth: np.ndarray) -> float:
+    hits = total = 0
+    for row, gt in zip(found, truth):
+        expected = {int(x) for x in gt if x >= 0}
+        if not expected:
+            continue
+        hits += len(expected & {int(x) for x in row if x >= 0})
+        total += len(expected)
+    return hits / total if total else 1.0
+
+
+def stored_vectors(index: Any) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+    """인덱스에 원본 그대로 저장된 (벡터, ID) (PQ처럼 압축 저장이면 None)."""
+    import faiss
+
+    outer = faiss.downcast_index(index)
+    base = _base_index(index)
+    try:
+        if isinstance(base, faiss.IndexIVF):
+            if not isinstance(base, faiss.IndexIVFFlat):
+                return None
+            # IVF-Flat 역리스트의 코드는 float32 원본 벡터
+            invlists = base.invlists
+            vectors, ids = [], []
+            for lst in range(base.nlist):
+                n = invlists.list_size(lst)
+                if n == 0:
+                    continue
+                ids.append(faiss.rev_swig_ptr(invlists.get_ids(lst), n).copy())
+                codes = faiss.rev_swig_ptr(invlists.get_codes(lst), n * invlists.code_size).copy()
+                vectors.append(codes.view(np.float32).reshape(n, base.d))
+            if not vectors:
+                return None
+            return np.vstack(vectors), np.concatenate(ids).astype(np.int64)
+
+        if isinstance(base, faiss.IndexHNSW) and not isinstance(base.storage, faiss.IndexFlat):
+            return None
+        vectors = base.reconstruct_n(0, base.ntotal)
+        if isinstance(outer, (faiss.IndexIDMap, faiss.IndexIDMap2)):
+            ids = faiss.vector_to_array(outer.id_map).astype(np.int64)
+        else:
+            ids = np.arange(base.ntotal, dtype=np.int64)
+        return vectors, ids
+    except Exception as e:
+        logger.info(f"인덱스에서 원본 벡터를 읽을 수 없음: {e}")
+        return None
+
+
+def exact_neighbors(queries: np.ndarray, k: int, vectors: np.ndarray, ids: np.ndarray) -> np.ndarray:
+    """정확 검색(내적) top-k ID (recall 정답)."""
+    import faiss
+
+    flat = faiss.IndexFlatIP(vectors.shape[1])
+    flat.add(np.ascontiguousarray(vectors, dtype=np.float32))
+    _, pos = flat.search(queries, k)
+    ids = np.asarray(ids, dtype=np.int64)
+    return np.where(pos >= 0, ids[np.clip(pos, 0, None)], -1)
+
+
+def autotune(
+    index: Any,
+    queries: np.ndarray,
+    k: int = 10,
+    target_recall: float = 0.95,
+    candidates: Optional[Sequence[int]] = None,
+    repeats: int = 3,
+    vectors: Optional[np.ndarray] = None,
+    ids: Optional[np.ndarray] = None,
+) -> TuneResult:
+    """목표 recall@k를 만족하면서 쿼리 지연이 가장 짧은 nprobe/efSearch 탐색.
+
+    정답은 원본 벡터에 대한 정확 검색 결과입니다. 원본 벡터는 인덱스에 저장된 것
+    (Flat/IVF-Flat/HNSW-Flat)을 쓰고, 없으면(IVF-PQ) vectors/ids를 씁니다. 둘 다 없으면
+    같은 인덱스의 최대 탐색 결과로 대신하고 ground_truth="exhaustive"로 표시합니다.
+    종료 후 인덱스에는 선택한 값이 설정됩니다.
+
+    Args:
+        index: 로드한 FAISS 인덱스
+        queries: (n, d) float32 쿼리 벡터 (벤치마크 쿼리 셋 임베딩)
+        k: recall 기준 top-k
+        target_recall: 목표 recall (0.0~1.0)
+        candidates: 시험할 값 (기본: nprobe 2의 거듭제곱, efSearch 16~512)
+        repeats: 지연 측정 반복 횟수 (중앙값 사용)
+        vectors: 인덱스에 원본 벡터가 없을 때 쓸 (N, d) 원본 벡터 (예: 임베딩 캐시)
+        ids: vectors 행별 인덱스 ID
+    """
+    queries = np.ascontiguousarray(queries, dtype=np.float32)
+    param = search_param_name(index)
+    if param is None:
+        # flat: 항상 정확 검색
+        return TuneResult(param=None, value=None, recall=1.0, latency_ms=0.0, target_recall=target_recall, k=k)
+
+    values = sorted(set(int(v) for v in (candidates or _default_candidates(index, param, k))))
+    stored = stored_vectors(index)
+    if stored is None and vectors is not None and ids is not None:
+        stored = (vectors, ids)
+    if stored is not None:
+        truth = exact_neighbors(queries, k, *stored)
+        ground_truth = "exact"
+    else:
+        logger.warning("원본 벡터가 없어 최대 탐색 결과를 recall 정답으로 사용합니다")
+        exhaustive = _base_index(index).nlist if param == "nprobe" else max(values) * 2
+        set_search_param(index, exhaustive)
+        _, truth = index.search(queries, k)
+        ground_truth = "exhaustive"
+
+    points: List[TunePoint] = []
+    for value in values:
+        set_search_param(index, value)
+        samples = []
+        found = None
+        for _ in range(max(1, repeats)):
+            start = time.perf_counter()
+            # 단건 검색 지연 (서빙 경로와 동일)
+            rows = [index.search(queries[i : i + 1], k)[1][0] for i in range(len(queries))]
+            samples.append((time.perf_counter() - start) * 1000 / max(1, len(queries)))
+            found = np.array(rows)
+        points.append(TunePoint(value=value, recall=_recall(found, truth), latency_ms=float(np.median(samples))))
+
+    best = select_operating_point(points, target_recall)
+    set_search_param(index, best.value)
+    return TuneResult(
+        param=param,
+        value=best.value,
+        recall=best.recall,
+        latency_ms=best.latency_ms,
+        target_recall=target_recall,
+        k=k,
+        points=points,
+        ground_truth=ground_truth,
+    )
+
+
+def save_tuned_params(vector_path: Path, result: TuneResult) -> Path:
+    """튜닝 결과를 인덱스 지문과 함께 사이드카 파일로 저장."""
+    path = params_path_for(vector_path)
+    data = result.to_dict()
+    data["fingerprint"] = source_fingerprint(Path(vector_path))
+    path.write_text(json.dumps(data, ensure_ascii=False, indent=2), encoding="utf-8")
+    return path
@@ -146,6 +146,15 @@ class TestChatEndpoint:
         response = client.post("/chat", json=payload)
         assert response.status_code == 200
 
+    def test_chat_stream_ends_with_final_event(self, client):
+        """POST /chat/stream이 토큰 후 final 이벤트와 [DONE]으로 끝나는지 확인."""
+        payload = {"user_id": "test_user", "message": "배송은 얼마나 걸려요?"}
+        response = client.post("/chat/stream", json=payload)
+        assert response.status_code == 200
+        body = response.text
+        assert "event: final\n" in body
+        assert body.rstrip().endswith("data: [DONE]")
+
     def test_chat_empty_message(self, client):
         """빈 메시지 처리 확인."""
         payload = {
@@ -1,5 +1,8 @@
 """평가 모듈 테스트."""
 
+import json
+from unittest.mock import patch
+
 import pytest
 from src.evaluation import (
     TestScenario,
@@ -245,3 +248,80 @@ class TestBenchmarkResult:
         report = result.print_report()
         assert "통과율" in report
         assert "70.0%" in report
+
+
+class TestRetrievalBenchmark:
+    """검색 벤치마크 테스트."""
+
+    @pytest.fixture
+    def index_path(self, tmp_path):
+        import json
+
+        path = tmp_path / "policies_index.jsonl"
+        docs = [
+            ("1", "환불은 상품 수령 후 7일 이내 신청 가능합니다", "refund"),
+            ("2", "배송은 결제 후 2-3 영업일 소요됩니다", "shipping"),
+            ("3", "카드 할부는 5만원 이상 결제 시 가능합니다", "payment"),
+            ("4", "반품 배송비는 단순 변심 시 고객 부담입니다", "refund"),
+        ]
+        with path.open("w", encoding="utf-8") as f:
+            for doc_id, text, doc_type in docs:
+                f.write(json.dumps({"id": doc_id, "text": text, "metadata": {"doc_type": doc_type}}, ensure_ascii=False) + "\n")
+        return path
+
+    def test_default_query_set_loads(self):
+        from src.evaluation import load_retrieval_queries
+
+        queries = load_retrieval_queries()
+        assert len(queries) >= 20
+        assert all(q.answer_terms or q.relevant_ids or q.doc_types for q in queries)
+
+    def test_relevance_by_terms_and_doc_type(self):
+        from src.evaluation import RetrievalQuery
+
+        q = RetrievalQuery(id="q", query="환불", doc_types=["refund"], answer_terms=["환불", "7일"])
+        assert q.is_relevant("1", "환불 7일 이내", {"doc_type": "refund"})
+        assert not q.is_relevant("1", "환불 7일 이내", {"doc_type": "shipping"})
+        assert not q.is_relevant("1", "환불 가능", {"doc_type": "refund"})
+        assert RetrievalQuery(id="q", query="x", relevant_ids=["9"]).is_relevant("9", "", {})
+
+    def test_sweep_skips_redundant_settings(self):
+        from src.evaluation import sweep
+
+        settings = sweep(["keyword", "hybrid"], alphas=[0.3, 0.7], top_ks=[5], index_types=["flat", "ivf"])
+        labels = [s.label for s in settings]
+        assert labels.count("keyword-k5") == 1
+        assert len(settings) == 1 + 2 * 2
+
+    def test_run_reports_quality_and_latency(self, index_path):
+        from src.evaluation import RetrievalBenchmark, RetrievalQuery, RetrievalSetting
+
+        queries = [
+            RetrievalQuery(id="a", query="환불 신청", answer_terms=["환불"]),
+            RetrievalQuery(id="b", query="배송 영업일", answer_terms=["영업일"]),
+            RetrievalQuery(id="c", query="카드 결제", doc_types=["payment"]),
+            RetrievalQuery(id="d", query="없는 내용", answer_terms=["존재하지않음"]),
+        ]
+        bench = RetrievalBenchmark(queries, index_path=index_path, clients=2, rounds=1, warmup=1)
+        with patch("src.core.singleflight.SingleFlight.do_sync", side_effect=AssertionError("coalesced")):
+            report = bench.run([RetrievalSetting(mode="keyword", top_k=2)])
+
+        assert report["meta"]["corpus_chunks"] == 4
+        assert report["meta"]["singleflight"] is False
+        result = report["results"][0]
+        assert result["label"] == "keyword-k2"
+        assert result["labeled_queries"] == 3
+        assert result["recall_at_k"] == 1.0 and result["mrr"] == 1.0
+        assert result["p99_ms"] >= result["p50_ms"] > 0
+        assert result["qps"] > 0
+        json.dumps(report)
+
+    def test_diff_reports_flags_regressions(self):
+        from src.evaluation import diff_reports
+
+        old = {"results": [{"label": "keyword-k5", "recall_at_k": 0.8, "p95_ms": 10.0, "qps": 100.0}]}
+        new = {"results": [{"label": "keyword-k5", "recall_at_k": 0.7, "p95_ms": 10.2, "qps": 150.0}]}
+        rows = {r["metric"]: r for r in diff_reports(old, new)}
+        assert rows["recall_at_k"]["regression"]
+        assert not rows["p95_ms"]["regression"]
+        assert not rows["qps"]["regression"]
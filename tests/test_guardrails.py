@@ -154,6 +154,26 @@ class TestOutputGuards:
         assert not result.ok
 
 
+class TestStreamingOutputGuard:
+    """스트리밍 출력 가드 테스트."""
+
+    TEXT = "담당자 연락처는 010-1234-5678 이고 이메일은 help.desk@example.com 입니다. 감사합니다."
+
+    @pytest.mark.parametrize("window", [8, 16, 64])
+    def test_pii_split_across_chunks(self, window):
+        """PII가 여러 청크로 나뉘어 도착해도 전체 마스킹 결과와 같음."""
+        from src.guardrails.output_guards import StreamingOutputGuard, sanitize_response
+
+        expected = sanitize_response(self.TEXT)[0]
+        assert "5678" not in expected and "example" not in expected
+        for first in range(1, len(self.TEXT)):
+            for second in range(first + 1, len(self.TEXT), 7):
+                parts = [self.TEXT[:first], self.TEXT[first:second], self.TEXT[second:]]
+                guard = StreamingOutputGuard(window=window)
+                out = "".join(guard.feed(p) for p in parts) + guard.flush()
+                assert out == expected, (window, first, second)
+
+
 class TestPolicyCompliance:
     """정책 준수 체크 테스트."""
 
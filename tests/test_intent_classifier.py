@@ -326,3 +326,96 @@ class TestClassifyIntentLLM:
 
                 result = await classify_intent_llm("테스트")
                 assert result is None
+
+
+class TestSpeculation:
+    """키워드 분류 기반 선행 도구 호출 테스트."""
+
+    @pytest.fixture(autouse=True)
+    def _reset_stats(self):
+        from src.agents.speculation import reset_speculation_stats
+
+        reset_speculation_stats()
+        yield
+        reset_speculation_stats()
+
+    @staticmethod
+    def _slow_llm(result: IntentResult, delay: float = 0.05):
+        import asyncio
+
+        async def fake(message):
+            await asyncio.sleep(delay)
+            return result
+
+        return fake
+
+    @pytest.fixture
+    def order_tool(self):
+        import asyncio
+
+        calls = []
+
+        async def fake(user_id, sub_intent, payload):
+            calls.append((user_id, sub_intent, payload))
+            await asyncio.sleep(0.02)
+            return {"status": {"order_id": payload.get("order_id"), "status": "shipped"}}
+
+        with patch("src.agents.nodes.order_agent.handle_order_query", fake):
+            yield calls
+
+    @pytest.mark.asyncio
+    async def test_prefetch_used_when_llm_agrees(self, order_tool):
+        from src.agents.speculation import classify_with_speculation, get_speculation_stats, run_tool
+
+        llm = IntentResult("order", "status", {"order_id": "ORD-123"}, source="llm")
+        with patch("src.agents.speculation.classify_intent_async", self._slow_llm(llm)):
+            result, prefetch = await classify_with_speculation("ORD-123 배송 상태 알려줘", "user_1")
+
+        assert result.source == "llm" and prefetch is not None
+        assert prefetch.task.done()  # LLM 분류 동안 도구 호출 완료
+
+        not_called = AsyncMock()
+        res = await run_tool(prefetch, "order", "status", {"order_id": "ORD-123"}, not_called)
+        assert res["status"]["status"] == "shipped"
+        not_called.assert_not_called()
+        assert order_tool == [("user_1", "status", {"order_id": "ORD-123"})]
+
+        stats = get_speculation_stats().stats()
+        assert stats["hit"] == 1 and stats["hit_rate"] == 1.0
+        assert stats["saved_ms_total"] >= 15
+
+    @pytest.mark.asyncio
+    async def test_prefetch_discarded_when_llm_disagrees(self, order_tool):
+        from src.agents.speculation import classify_with_speculation, get_speculation_stats
+
+        llm = IntentResult("claim", None, {"action": "create", "order_id": "ORD-123"}, source="llm")
+        with patch("src.agents.speculation.classify_intent_async", self._slow_llm(llm, delay=0.001)):
+            result, prefetch = await classify_with_speculation("ORD-123 배송 상태가 이상해요", "user_1")
+
+        assert result.intent == "claim" and prefetch is None
+        assert get_speculation_stats().stats()["miss"] == 1
+
+    @pytest.mark.asyncio
+    async def test_side_effect_tools_not_speculated(self, order_tool):
+        from src.agents.speculation import classify_with_speculation, get_speculation_stats
+
+        llm = IntentResult("order", "cancel", {"order_id": "ORD-123", "reason": "사용자 요청"}, source="llm")
+        with patch("src.agents.speculation.classify_intent_async", self._slow_llm(llm, delay=0.001)):
+            _, prefetch = await classify_with_speculation("ORD-123 주문 취소해 주세요", "user_1")
+
+        assert prefetch is None and order_tool == []
+        assert get_speculation_stats().stats()["started"] == 0
+
+    @pytest.mark.asyncio
+    async def test_unused_prefetch_cancelled_for_other_tool_call(self, order_tool):
+        import asyncio
+
+        from src.agents.speculation import get_speculation_stats, run_tool, start_prefetch
+
+        prefetch = start_prefetch("user_1", classify_intent_keyword("ORD-123 배송 상태 알려줘"))
+        call = AsyncMock(return_value={"detail": {}})
+        assert await run_tool(prefetch, "order", "detail", {"order_id": "ORD-123"}, call) == {"detail": {}}
+        call.assert_awaited_once()
+        await asyncio.sleep(0)
+        assert prefetch.task.cancelled()
+        assert get_speculation_stats().stats()["unused"] == 1
@@ -0,0 +1,915 @@
+"""LLM 레이어 테스트."""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import threading
+import time
+
+import pytest
+
+from src.config import get_config
+from src.core.singleflight import SingleFlight
+from src.llm.admission import AdmissionController, ProviderOverloadedError
+from src.llm.cache import LLMResponseCache, cached_chat, make_cache_key
+from src.llm.context import ContextBuilder, approx_tokens
+from src.llm.client import LLMClient, LLMConfig, _mark_first_byte
+from src.llm.hedging import AllProvidersFailed, HedgePolicy, hedged_call
+from src.llm.pool import LLMSessionPool
+from src.llm.prompts import PromptRegistry
+from src.llm.stats import LatencyTracker, ProviderStats
+from src.llm.stub_server import LatencyProfile, StubLLMServer
+
+
+class TestPromptRegistry:
+    """프롬프트 레지스트리 테스트."""
+
+    @pytest.fixture
+    def prompt_files(self, tmp_path):
+        system = tmp_path / "system.txt"
+        policy = tmp_path / "policy.txt"
+        system.write_text("당신은 상담원입니다.", encoding="utf-8")
+        policy.write_text("정책 근거를 인용하세요.", encoding="utf-8")
+        return {"system": str(system), "policy": str(policy)}
+
+    def test_combined_system_prompt(self, prompt_files):
+        registry = PromptRegistry(prompt_files)
+        assert registry.system_prompt("policy") == "당신은 상담원입니다.\n\n정책 근거를 인용하세요."
+        # 의도 프롬프트가 없으면 공통 프롬프트만
+        assert registry.system_prompt("general") == "당신은 상담원입니다."
+        assert registry.render_system("policy", "\n\n[제공된 데이터]\nx: 1").endswith("x: 1")
+
+    def test_files_read_once(self, prompt_files):
+        registry = PromptRegistry(prompt_files, check_interval=0)
+        loads = registry.loads
+        for _ in range(5):
+            registry.system_prompt("policy")
+            registry.get("system")
+        assert registry.loads == loads
+
+    def test_hot_reload_on_mtime_change(self, prompt_files):
+        registry = PromptRegistry(prompt_files, check_interval=0)
+        assert "근거" in registry.system_prompt("policy")
+
+        path = prompt_files["policy"]
+        with open(path, "w", encoding="utf-8") as f:
+            f.write("환불 기간을 먼저 안내하세요.")
+        st = os.stat(path)
+        os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))
+
+        assert registry.system_prompt("policy").endswith("환불 기간을 먼저 안내하세요.")
+
+    def test_validate_reports_missing_and_empty(self, tmp_path, prompt_files):
+        empty = tmp_path / "empty.txt"
+        empty.write_text("  \n", encoding="utf-8")
+        registry = PromptRegistry({**prompt_files, "order": str(tmp_path / "none.txt"), "claim": str(empty)})
+        problems = registry.validate()
+        assert len(problems) == 2
+        assert registry.get("order") == ""
+
+
+class TestLLMResponseCache:
+    """LLM 응답 캐시 테스트."""
+
+    @pytest.fixture
+    def cache(self):
+        return LLMResponseCache(
+            enabled=True,
+            max_entries=2,
+            default_ttl=0,
+            intent_ttl={"order": 60, "policy": 60},
+            allow_nonzero_temperature=False,
+            nonzero_temperature_intents=[],
+            sqlite_path="",
+        )
+
+    @staticmethod
+    def _call(response="배송 중입니다."):
+        calls = []
+
+        async def call():
+            calls.append(1)
+            return response
+
+        return call, calls
+
+    async def _chat(self, cache, call, message="주문 상태 알려줘", temperature=0.0, intent="order"):
+        return await cached_chat(
+            call,
+            provider="openai",
+            model="gpt-4o-mini",
+            temperature=temperature,
+            intent=intent,
+            system_prompt="시스템",
+            context="\n\n[제공된 데이터]\nstatus: shipping",
+            user_message=message,
+            cache=cache,
+        )
+
+    def test_key_normalizes_whitespace(self):
+        a = make_cache_key("openai", "m", 0.0, "s", "ctx", "주문  상태 ")
+        b = make_cache_key("openai", "m", 0.0, "s", "ctx", "주문 상태")
+        assert a == b
+        assert a != make_cache_key("anthropic", "m", 0.0, "s", "ctx", "주문 상태")
+
+    @pytest.mark.asyncio
+    async def test_hit_skips_llm_call(self, cache):
+        call, calls = self._call()
+        assert await self._chat(cache, call) == "배송 중입니다."
+        assert await self._chat(cache, call, message=" 주문 상태  알려줘") == "배송 중입니다."
+        assert len(calls) == 1
+        stats = cache.stats()
+        assert stats["hits"] == 1 and stats["misses"] == 1
+
+    @pytest.mark.asyncio
+    async def test_bypass_for_temperature_and_uncached_intent(self, cache):
+        call, calls = self._call()
+        await self._chat(cache, call, temperature=0.7)
+        await self._chat(cache, call, temperature=0.7)
+        await self._chat(cache, call, intent="general")
+        assert len(calls) == 3
+        assert cache.stats()["bypass"] == 3
+
+        cache.allow_nonzero_temperature = True
+        await self._chat(cache, call, temperature=0.7)
+        await self._chat(cache, call, temperature=0.7)
+        assert len(calls) == 4
+
+    def test_default_config_caches_template_intents(self):
+        """기본 설정(프로바이더 temperature 0.7)에서도 주문/클레임/정책 응답은 캐시."""
+        cfg = get_config().llm
+        cache = LLMResponseCache(sqlite_path="")
+        assert cache.enabled and cfg.temperature > 0
+        for intent in ("order", "claim", "policy"):
+            assert cache.eligible(intent, cfg.temperature)
+        assert not cache.eligible("general", cfg.temperature)
+
+    @pytest.mark.asyncio
+    async def test_sqlite_access_runs_off_event_loop(self, tmp_path, monkeypatch):
+        """SQLite 조회/저장은 이벤트 루프 스레드 밖에서 실행."""
+        cache = LLMResponseCache(enabled=True, intent_ttl={"order": 60}, sqlite_path=str(tmp_path / "c.db"))
+        loop_thread = threading.get_ident()
+        threads = []
+        for name in ("get", "put"):
+            orig = getattr(cache, name)
+
+            def wrapped(*args, _orig=orig, **kwargs):
+                threads.append(threading.get_ident())
+                return _orig(*args, **kwargs)
+
+            monkeypatch.setattr(cache, name, wrapped)
+
+        call, calls = self._call()
+        assert await self._chat(cache, call) == "배송 중입니다."
+        assert await self._chat(cache, call) == "배송 중입니다."
+        assert len(calls) == 1
+        assert len(threads) == 3 and loop_thread not in threads
+        cache.close()
+
+    def test_ttl_and_lru_eviction(self, cache):
+        cache.put("a", "order", "A", latency=0.1)
+        cache.put("b", "order", "B", latency=0.1)
+        assert cache.get("a").response == "A"
+        cache.put("c", "order", "C", latency=0.1)  # b가 가장 오래 안 쓰임
+        assert cache.get("b") is None
+        assert cache.get("a") is not None
+
+        cache._entries["a"].expires_at = 0
+        assert cache.get("a") is None
+
+    def test_sqlite_persistence(self, tmp_path):
+        db = str(tmp_path / "llm_cache.db")
+        first = LLMResponseCache(enabled=True, intent_ttl={"policy": 60}, sqlite_path=db)
+        first.put("k", "policy", "7일 이내 환불 가능합니다.", latency=1.5)
+        first.close()
+
+        second = LLMResponseCache(enabled=True, intent_ttl={"policy": 60}, sqlite_path=db)
+        hit = second.get("k")
+        assert hit is not None and hit.response == "7일 이내 환불 가능합니다."
+        assert second.stats()["saved_seconds"] == pytest.approx(1.5)
+        second.close()
+
+
+class TestLLMSessionPool:
+    """LLM 세션 풀 테스트 (로컬 스텁 서버)."""
+
+    @staticmethod
+    def _config(base_url):
+        return LLMConfig(
+            provider="local", api_key="", model="stub", temperature=0.0,
+            max_tokens=64, timeout=10, base_url=base_url,
+        )
+
+    @pytest.mark.asyncio
+    async def test_clients_share_one_session(self):
+        pool = LLMSessionPool()
+        async with StubLLMServer(response="배송 중입니다.") as server:
+            config = self._config(server.base_url)
+            first = await LLMClient(config, pool=pool).chat([{"role": "user", "content": "주문"}])
+            chunks = [c async for c in LLMClient(config, pool=pool).chat_stream([{"role": "user", "content": "주문"}])]
+            assert first == "배송 중입니다."
+            assert "".join(chunks) == "배송 중입니다."
+            assert server.requests == 2
+            assert pool.created == 1
+            await pool.close()
+        assert pool.stats()["sessions"] == {}
+
+    @pytest.mark.asyncio
+    async def test_sessions_keyed_by_provider_and_base_url(self):
+        pool = LLMSessionPool()
+        a = pool.session("local", "http://a/v1")
+        assert pool.session("local", "http://a/v1") is a
+        assert pool.session("local", "http://b/v1") is not a
+        assert pool.session("openai", "http://a/v1") is not a
+        await pool.close()
+        assert a.closed
+
+
+class TestHedging:
+    """프로바이더 헤징 테스트."""
+
+    @staticmethod
+    def _policy(**kwargs):
+        defaults = dict(delay_ms=50, adaptive=False, min_delay_ms=0, max_parallel=2, tracker=LatencyTracker())
+        defaults.update(kwargs)
+        return HedgePolicy(**defaults)
+
+    @staticmethod
+    def _fake(behaviour, calls):
+        async def call(provider):
+            calls.append(provider)
+            first_byte_after, total, fail = behaviour[provider]
+            await asyncio.sleep(first_byte_after)
+            _mark_first_byte()
+            await asyncio.sleep(total - first_byte_after)
+            if fail:
+                raise RuntimeError(f"{provider} 오류")
+            return f"{provider} 응답"
+
+        return call
+
+    @pytest.mark.asyncio
+    async def test_slow_primary_is_hedged_and_cancelled(self):
+        calls = []
+        call = self._fake({"openai": (2.0, 2.0, False), "anthropic": (0.01, 0.02, False)}, calls)
+        start = time.perf_counter()
+        provider, response = await hedged_call(["openai", "anthropic"], call, self._policy())
+        assert (provider, response) == ("anthropic", "anthropic 응답")
+        assert calls == ["openai", "anthropic"]
+        assert time.perf_counter() - start < 1.0
+
+    @pytest.mark.asyncio
+    async def test_no_hedge_after_first_byte(self):
+        calls = []
+        call = self._fake({"openai": (0.01, 0.2, False), "anthropic": (0.01, 0.02, False)}, calls)
+        provider, _ = await hedged_call(["openai", "anthropic"], call, self._policy())
+        assert provider == "openai"
+        assert calls == ["openai"]
+
+    @pytest.mark.asyncio
+    async def test_failure_falls_back(self):
+        calls = []
+        call = self._fake({"openai": (0.0, 0.0, True), "anthropic": (0.01, 0.02, False)}, calls)
+        provider, _ = await hedged_call(["openai", "anthropic"], call, self._policy(delay_ms=5000))
+        assert provider == "anthropic"
+
+        calls.clear()
+        call = self._fake({"openai": (0.0, 0.0, True), "anthropic": (0.0, 0.0, True)}, calls)
+        with pytest.raises(AllProvidersFailed) as exc:
+            await hedged_call(["openai", "anthropic"], call, self._policy())
+        assert len(exc.value.errors) == 2
+
+    def test_adaptive_delay_uses_observed_percentile(self):
+        tracker = LatencyTracker()
+        policy = self._policy(adaptive=True, min_samples=5, delay_ms=3000, tracker=tracker)
+        assert policy.delay_for("openai") == pytest.approx(3.0)
+        for _ in range(10):
+            tracker.record("openai", 0.4)
+        assert policy.delay_for("openai") == pytest.approx(0.4)
+
+
+class TestAdaptiveRouting:
+    """지연 기반 적응형 라우팅 테스트."""
+
+    def test_rank_by_expected_latency(self):
+        stats = ProviderStats(alpha=0.5, min_samples=2, prior_latency=1.0)
+        for _ in range(3):
+            stats.record("openai/a", latency=2.0, ttft=0.5)
+            stats.record("anthropic/b", latency=0.5, ttft=0.1)
+        order, scores, explored = stats.rank(["openai/a", "anthropic/b", "google/c"])
+        assert order == ["anthropic/b", "google/c", "openai/a"]
+        assert scores["google/c"] == 1.0  # 샘플 없음 → prior
+        assert not explored
+
+    def test_errors_move_provider_down(self):
+        stats = ProviderStats(alpha=0.5, error_penalty=10.0, min_samples=1)
+        stats.record("openai/a", latency=0.3)
+        stats.record("anthropic/b", latency=0.8)
+        assert stats.rank(["openai/a", "anthropic/b"])[0][0] == "openai/a"
+        stats.record("openai/a", error=True)
+        stats.record("openai/a", error=True)
+        assert stats.score("openai/a") == pytest.approx(0.3 + 0.75 * 10.0)
+        assert stats.rank(["openai/a", "anthropic/b"])[0][0] == "anthropic/b"
+        # 회복되면 다시 앞으로
+        for _ in range(10):
+            stats.record("openai/a", latency=0.3)
+        assert stats.rank(["openai/a", "anthropic/b"])[0][0] == "openai/a"
+
+    def test_explore_puts_other_provider_first(self):
+        import random
+
+        stats = ProviderStats(min_samples=1)
+        stats.record("a/m", latency=0.1)
+        stats.record("b/m", latency=1.0)
+        order, _, explored = stats.rank(["a/m", "b/m"], explore=1.0, rng=random.Random(0))
+        assert explored and order == ["b/m", "a/m"]
+        order, _, explored = stats.rank(["a/m"], explore=1.0)
+        assert not explored and order == ["a/m"]
+
+    @pytest.mark.asyncio
+    async def test_router_prefers_faster_provider_and_traces(self, monkeypatch):
+        from src.config import get_config
+        from src.core.tracer import Tracer
+        from src.llm import router
+
+        stats = ProviderStats(prior_latency=0.0, min_samples=1)
+        monkeypatch.setattr(router, "get_provider_stats", lambda: stats)
+        monkeypatch.setattr(get_config().llm.adaptive_routing, "enabled", True)
+        monkeypatch.setattr(get_config().llm.adaptive_routing, "explore", 0.0)
+        monkeypatch.setattr(router, "_eligible_providers", lambda intent: ["slow", "fast"])
+
+        async with StubLLMServer(latency_ms=150, response="느린 응답") as slow, \
+                StubLLMServer(response="빠른 응답") as fast:
+            servers = {"slow": slow, "fast": fast}
+            monkeypatch.setattr(
+                router, "_build_llm_config",
+                lambda name: LLMConfig(
+                    provider="local", api_key="", model=name, temperature=0.0,
+                    max_tokens=64, timeout=10, base_url=servers[name].base_url,
+                ),
+            )
+            Tracer.start_session("tester", "안녕")
+            try:
+                responses = [
+                    await router.generate_routed_response({}, f"질문 {i}", "general") for i in range(3)
+                ]
+                steps = [s for s in Tracer.get_current_session().steps if s.name == "LLM 라우팅"]
+            finally:
+                Tracer._current_session = None
+
+        assert responses == ["느린 응답", "빠른 응답", "빠른 응답"]
+        assert (slow.requests, fast.requests) == (1, 2)
+        assert steps[-1].output_data["provider_chain"] == ["fast", "slow"]
+        assert steps[-1].metadata["scores_ms"]["slow/slow"] >= 100
+        snapshot = stats.snapshot()
+        assert snapshot["fast/fast"]["samples"] == 2 and snapshot["fast/fast"]["ttft_ms"] is not None
+
+
+class TestRoutedStream:
+    """라우팅 스트리밍 (폴백 체인/헤징) 테스트."""
+
+    @staticmethod
+    def _route(monkeypatch, servers):
+        from src.llm import router
+
+        monkeypatch.setattr(get_config().llm.adaptive_routing, "enabled", False)
+        monkeypatch.setattr(router, "_eligible_providers", lambda intent: list(servers))
+        monkeypatch.setattr(
+            router, "_build_llm_config",
+            lambda name: LLMConfig(
+                provider="local", api_key="", model=name, temperature=0.0,
+                max_tokens=64, timeout=10, base_url=servers[name].base_url,
+            ),
+        )
+        return router
+
+    @pytest.mark.asyncio
+    async def test_falls_back_before_first_token(self, monkeypatch):
+        monkeypatch.setattr(get_config().llm.hedge, "enabled", False)
+        async with StubLLMServer(faults={"500": 1.0}) as broken, \
+                StubLLMServer(response="대체 응답 입니다") as backup:
+            router = self._route(monkeypatch, {"broken": broken, "backup": backup})
+            chunks = [c async for c in router.generate_routed_response_stream({}, "질문", "general")]
+
+        assert "".join(chunks) == "대체 응답 입니다" and len(chunks) > 1
+        assert broken.requests >= 1 and backup.requests == 1
+
+        async with StubLLMServer(faults={"500": 1.0}) as a, StubLLMServer(faults={"500": 1.0}) as b:
+            router = self._route(monkeypatch, {"a": a, "b": b})
+            with pytest.raises(RuntimeError, match="LLM 라우팅 실패"):
+                [c async for c in router.generate_routed_response_stream({}, "질문", "general")]
+
+    @pytest.mark.asyncio
+    async def test_slow_first_token_is_hedged(self, monkeypatch):
+        hedge = get_config().llm.hedge
+        monkeypatch.setattr(hedge, "enabled", True)
+        monkeypatch.setattr(hedge, "adaptive", False)
+        monkeypatch.setattr(hedge, "delay_ms", 50.0)
+        monkeypatch.setattr(hedge, "min_delay_ms", 0.0)
+        async with StubLLMServer(latency_ms=2000, response="느린 응답") as slow, \
+                StubLLMServer(response="빠른 응답") as fast:
+            router = self._route(monkeypatch, {"slow": slow, "fast": fast})
+            start = time.perf_counter()
+            chunks = [c async for c in router.generate_routed_response_stream({}, "질문", "general")]
+            elapsed = time.perf_counter() - start
+
+        assert "".join(chunks) == "빠른 응답"
+        assert elapsed < 1.5
+        assert (slow.requests, fast.requests) == (1, 1)
+
+
+class TestSingleFlight:
+    """동일 요청 병합 테스트."""
+
+    @pytest.mark.asyncio
+    async def test_concurrent_duplicates_share_one_call(self):
+        flight = SingleFlight("test")
+        calls = []
+
+        async def work():
+            calls.append(1)
+            await asyncio.sleep(0.05)
+            return "결과"
+
+        results = await asyncio.gather(*(flight.do("k", work) for _ in range(5)))
+        assert results == ["결과"] * 5
+        assert len(calls) == 1
+        assert flight.stats() == {"leaders": 1, "shared": 4, "in_flight": 0}
+
+        # 완료 후에는 캐시하지 않고 다시 실행
+        await flight.do("k", work)
+        assert len(calls) == 2
+
+    @pytest.mark.asyncio
+    async def test_error_propagates_to_all_waiters(self):
+        flight = SingleFlight("test")
+
+        async def fail():
+            await asyncio.sleep(0.01)
+            raise ValueError("실패")
+
+        results = await asyncio.gather(*(flight.do("k", fail) for _ in range(3)), return_exceptions=True)
+        assert all(isinstance(r, ValueError) for r in results)
+
+    @pytest.mark.asyncio
+    async def test_cancelling_one_waiter_keeps_call_running(self):
+        flight = SingleFlight("test")
+        started = asyncio.Event()
+
+        async def work():
+            started.set()
+            await asyncio.sleep(0.05)
+            return "결과"
+
+        first = asyncio.ensure_future(flight.do("k", work))
+        await started.wait()
+        second = asyncio.ensure_future(flight.do("k", work))
+        await asyncio.sleep(0)
+        first.cancel()
+        assert await second == "결과"
+        assert first.cancelled()
+
+    @pytest.mark.asyncio
+    async def test_cancelling_all_waiters_cancels_call(self):
+        flight = SingleFlight("test")
+        finished = []
+
+        async def work():
+            await asyncio.sleep(0.05)
+            finished.append(1)
+
+        waiter = asyncio.ensure_future(flight.do("k", work))
+        await asyncio.sleep(0.01)
+        waiter.cancel()
+        await asyncio.sleep(0.08)
+        assert finished == []
+        assert flight.stats()["in_flight"] == 0
+
+    def test_sync_threads_share_one_call(self):
+        from concurrent.futures import ThreadPoolExecutor
+
+        flight = SingleFlight("test")
+        calls = []
+
+        def work():
+            calls.append(1)
+            time.sleep(0.1)
+            return [1, 2]
+
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            results = list(pool.map(lambda _: flight.do_sync("k", work), range(4)))
+        assert results == [[1, 2]] * 4
+        assert len(calls) == 1
+
+    @pytest.mark.asyncio
+    async def test_llm_chat_coalesced(self):
+        config = TestLLMSessionPool._config
+        async with StubLLMServer(latency_ms=50, response="배송 중입니다.") as server:
+            client = LLMClient(config(server.base_url), pool=LLMSessionPool())
+            messages = [{"role": "user", "content": "주문 상태"}]
+            results = await asyncio.gather(*(client.chat(messages) for _ in range(5)))
+            await client._pool.close()
+        assert results == ["배송 중입니다."] * 5
+        assert server.requests == 1
+
+    @pytest.mark.asyncio
+    async def test_coalesced_followers_see_first_byte_and_usage(self):
+        """병합된 호출자도 첫 바이트 이벤트와 요청 사용량을 받음."""
+        from src.llm.client import _first_byte, watch_first_byte
+        from src.llm.usage import meter_usage
+
+        config = TestLLMSessionPool._config
+        messages = [{"role": "user", "content": "주문 상태"}]
+
+        async with StubLLMServer(latency_ms=50, response="배송 중입니다.") as server:
+            client = LLMClient(config(server.base_url), pool=LLMSessionPool())
+
+            async def caller(delay):
+                await asyncio.sleep(delay)
+                with meter_usage() as usage, watch_first_byte() as event:
+                    await client.chat(messages)
+                    assert _first_byte.get() == (event,)
+                assert _first_byte.get() == ()
+                return event.is_set(), usage.calls, usage.total_tokens
+
+            results = await asyncio.gather(caller(0), caller(0.01), caller(0.02))
+            await client._pool.close()
+
+        assert server.requests == 1
+        assert results[0][:2] == (True, 1) and results[0][2] > 0
+        assert results[1:] == [results[0]] * 2
+
+
+class TestContextBuilder:
+    """프롬프트 컨텍스트 빌더 테스트."""
+
+    ORDERS = {
+        "orders": [
+            {
+                "order_id": f"ORD_{i}", "user_id": "user_001", "status": "delivered",
+                "order_date": "2025-01-0%d" % (i + 1), "total_amount": 1000.0 * (i + 1),
+                "shipping_address": "서울 강남구 1동 101호", "delivery_date": None,
+            }
+            for i in range(5)
+        ]
+    }
+
+    @staticmethod
+    def _builder(**kwargs):
+        defaults = dict(budgets={}, default_budget=1000, max_cell_chars=50, counter=approx_tokens)
+        defaults.update(kwargs)
+        return ContextBuilder(**defaults)
+
+    def test_projection_renders_compact_table(self):
+        built = self._builder().build(self.ORDERS, "order")
+        lines = built.text.splitlines()
+        assert lines[0] == "orders (5건): order_id | status | order_date | total_amount | delivery_date"
+        assert lines[1] == "ORD_0 | delivered | 2025-01-01 | 1000 | -"
+        assert "shipping_address" not in built.text and "서울" not in built.text
+        assert built.truncated == []
+
+    def test_budget_truncates_rows_by_priority(self):
+        context = dict(self.ORDERS, error="조회 일부 실패")
+        built = self._builder(budgets={"order": 70}).build(context, "order")
+        lines = built.text.splitlines()
+        # error가 orders보다 우선순위가 높음
+        assert lines[0] == "error: 조회 일부 실패"
+        assert lines[-1].startswith("... 외 ")
+        assert built.truncated == ["orders"]
+        assert lines[-1] == "... 외 3건"
+        assert built.tokens <= 70 + approx_tokens(lines[-1])
+
+    def test_long_cells_and_nested_columns(self):
+        hits = [{"id": "p1", "score": 0.9, "text": "환불 " * 100, "metadata": {"title": "환불 정책 " * 20}}]
+        built = self._builder().build({"query": "환불", "hits": hits}, "policy")
+        header, row = built.text.splitlines()
+        assert header == "hits (1건): title | text"
+        title, text = row.split(" | ")
+        assert len(title) == 50
+        # 정책 본문은 셀 제한 없이 예산 안에서 전부 포함
+        assert text == ("환불 " * 100).strip()
+
+    def test_policy_text_trimmed_by_budget(self):
+        text = "환불 규정 안내 " * 40 + "답변은 여기"
+        hits = [
+            {"id": "p1", "text": text, "metadata": {"title": "환불"}},
+            {"id": "p2", "text": "두 번째 청크", "metadata": {"title": "교환"}},
+        ]
+        built = self._builder(budgets={"policy": 500}).build({"query": "환불", "hits": hits}, "policy")
+        assert "답변은 여기" in built.text
+        assert "두 번째 청크" in built.text
+
+        built = self._builder(budgets={"policy": 60}).build({"query": "환불", "hits": hits}, "policy")
+        lines = built.text.splitlines()
+        assert lines[1].startswith("환불 | 환불 규정 안내") and lines[1].endswith("…")
+        assert lines[2] == "... 외 1건"
+        assert built.tokens <= 60
+        assert built.truncated == ["hits"]
+
+    def test_unknown_intent_uses_all_keys(self):
+        built = self._builder().build({"message": "안녕하세요", "meta": {"a": 1}}, "general")
+        assert built.text == "message: 안녕하세요\nmeta: a=1"
+
+    def test_approx_tokens(self):
+        assert approx_tokens("환불 정책") == 4
+        assert approx_tokens("order_id") == 2
+        assert approx_tokens("") == 0
+
+
+class TestAdmission:
+    """프로바이더 동시 요청 제어 테스트."""
+
+    @pytest.mark.asyncio
+    async def test_excess_requests_wait_in_fifo_order(self):
+        ctrl = AdmissionController("p", max_concurrency=2, max_queue=10, queue_timeout=5.0)
+        running, peak, order = 0, 0, []
+
+        async def call(i):
+            nonlocal running, peak
+            async with ctrl.slot():
+                running += 1
+                peak = max(peak, running)
+                order.append(i)
+                await asyncio.sleep(0.02)
+                running -= 1
+
+        await asyncio.gather(*(call(i) for i in range(6)))
+        assert peak == 2
+        assert order == list(range(6))
+        stats = ctrl.stats()
+        assert stats["admitted"] == 6 and stats["queued_total"] == 4
+        assert stats["in_flight"] == 0 and stats["queued"] == 0
+
+    @pytest.mark.asyncio
+    async def test_queue_full_rejects_immediately(self):
+        ctrl = AdmissionController("p", max_concurrency=1, max_queue=1, queue_timeout=5.0)
+        held = await ctrl.acquire()
+        waiter = asyncio.ensure_future(ctrl.acquire())
+        await asyncio.sleep(0)
+        with pytest.raises(ProviderOverloadedError) as exc:
+            await ctrl.acquire()
+        assert exc.value.status_code == 503
+        assert exc.value.details["reason"] == "queue_full"
+        ctrl.release(held, latency=0.01)
+        ctrl.release(await waiter, latency=0.01)
+        assert ctrl.stats()["rejected"] == 1
+
+    @pytest.mark.asyncio
+    async def test_queue_timeout(self):
+        ctrl = AdmissionController("p", max_concurrency=1, max_queue=5, queue_timeout=0.05)
+        held = await ctrl.acquire()
+        start = time.perf_counter()
+        with pytest.raises(ProviderOverloadedError) as exc:
+            await ctrl.acquire()
+        assert exc.value.details["reason"] == "timeout"
+        assert time.perf_counter() - start < 1.0
+        assert ctrl.stats()["queued"] == 0
+        ctrl.release(held)
+
+    @pytest.mark.asyncio
+    async def test_aimd_halves_on_429_and_grows_on_success(self):
+        class RateLimited(Exception):
+            status = 429
+
+        ctrl = AdmissionController("p", max_concurrency=16, initial_concurrency=8, decrease_cooldown=0)
+        with pytest.raises(RateLimited):
+            async with ctrl.slot():
+                raise RateLimited()
+        assert ctrl.stats()["limit"] == 4
+
+        # 상한 1 증가에 약 상한만큼의 성공 필요
+        for _ in range(5):
+            async with ctrl.slot():
+                pass
+        assert ctrl.stats()["limit"] == 5
+
+        # 429가 아닌 실패는 상한을 바꾸지 않음
+        with pytest.raises(ValueError):
+            async with ctrl.slot():
+                raise ValueError()
+        assert ctrl.stats()["limit"] == 5
+
+    @pytest.mark.asyncio
+    async def test_long_stream_judged_by_first_token(self, monkeypatch):
+        """긴 스트리밍 응답은 첫 토큰이 빠르면 상한을 줄이지 않음."""
+        from src.llm import client as client_module
+
+        ctrl = AdmissionController("local", max_concurrency=4, latency_target=0.1, decrease_cooldown=0)
+        monkeypatch.setattr(client_module, "get_admission", lambda provider: ctrl)
+        pool = LLMSessionPool()
+        async with StubLLMServer(response="가 나 다 라 마 바", token_delay_ms=40) as server:
+            client = LLMClient(TestLLMSessionPool._config(server.base_url), pool=pool)
+            chunks = [c async for c in client.chat_stream([{"role": "user", "content": "안녕"}])]
+            await pool.close()
+        assert len(chunks) == 6
+        assert ctrl.stats()["limit"] == 4
+
+    @pytest.mark.asyncio
+    async def test_tpm_uses_reported_usage(self):
+        ctrl = AdmissionController("p", max_concurrency=4, tpm_limit=100, queue_timeout=0.05)
+        async with ctrl.slot(tokens=90) as ticket:
+            ticket.usage = {"total_tokens": 30}
+        assert ctrl.stats()["tokens_last_minute"] == 30
+
+        ticket = await ctrl.acquire(tokens=60)
+        with pytest.raises(ProviderOverloadedError):
+            await ctrl.acquire(tokens=20)
+        ctrl.release(ticket, latency=0.01)
+
+    @pytest.mark.asyncio
+    async def test_client_records_usage_through_admission(self, monkeypatch):
+        from src.llm import client as client_module
+
+        ctrl = AdmissionController("local", max_concurrency=2, tpm_limit=10_000)
+        monkeypatch.setattr(client_module, "get_admission", lambda provider: ctrl)
+        async with StubLLMServer(response="배송 중입니다.") as server:
+            config = TestLLMSessionPool._config(server.base_url)
+            pool = LLMSessionPool()
+            assert await LLMClient(config, pool=pool).chat([{"role": "user", "content": "주문"}]) == "배송 중입니다."
+            await pool.close()
+        # 스텁 usage: prompt "주문" 2토큰 + completion 2토큰
+        assert ctrl.stats()["tokens_last_minute"] == 4
+        assert ctrl.stats()["admitted"] == 1
+
+
+class TestUsageAccounting:
+    """토큰 사용량/비용 집계 테스트."""
+
+    def test_normalizes_provider_usage_shapes(self):
+        from src.llm.usage import LLMCall
+
+        openai = LLMCall("openai", "gpt-4o-mini")
+        openai.update_usage({"prompt_tokens": 10, "completion_tokens": 5, "total_tokens": 15})
+        assert openai.usage == {"prompt_tokens": 10, "completion_tokens": 5, "total_tokens": 15}
+
+        # Anthropic 스트리밍: message_start(input) 후 message_delta(누적 output)
+        anthropic = LLMCall("anthropic", "claude-3-haiku-20240307")
+        anthropic.update_usage({"input_tokens": 12, "output_tokens": 1})
+        anthropic.update_usage({"output_tokens": 30})
+        assert anthropic.usage == {"prompt_tokens": 12, "completion_tokens": 30, "total_tokens": 42}
+
+        google = LLMCall("google", "gemini-1.5-flash")
+        google.update_usage({"promptTokenCount": 7, "candidatesTokenCount": 3, "totalTokenCount": 10})
+        assert google.usage == {"prompt_tokens": 7, "completion_tokens": 3, "total_tokens": 10}
+
+    def test_cost_uses_longest_prefix_price(self):
+        from src.llm.usage import cost_usd, price_for
+
+        assert price_for("gpt-4o-mini-2024-07-18") == {"prompt": 0.15, "completion": 0.60}
+        assert price_for("gpt-4o-2024-08-06")["prompt"] == 2.50
+        assert price_for("local-model") is None
+        assert cost_usd("gpt-4o-mini", 1_000_000, 500_000) == pytest.approx(0.45)
+        assert cost_usd("local-model", 1000, 1000) == 0.0
+
+    @pytest.mark.asyncio
+    async def test_meter_sums_streaming_and_non_streaming_calls(self):
+        from src.llm.usage import get_usage_ledger, meter_usage, usage_intent
+
+        pool = LLMSessionPool()
+        async with StubLLMServer(response="배송 중입니다.") as server:
+            openai = LLMConfig(
+                provider="openai", api_key="test", model="gpt-4o-mini", temperature=0.0,
+                max_tokens=64, timeout=10, base_url=server.base_url,
+            )
+            local = TestLLMSessionPool._config(server.base_url)
+            with meter_usage() as usage, usage_intent("order"):
+                await LLMClient(local, pool=pool).chat([{"role": "user", "content": "주문 조회"}])
+                # OpenAI 스트리밍은 include_usage로 마지막 청크에 usage 수신
+                chunks = [c async for c in LLMClient(openai, pool=pool).chat_stream([{"role": "user", "content": "주문"}])]
+            await pool.close()
+
+        assert "".join(chunks) == "배송 중입니다."
+        assert usage.calls == 2 and not usage.estimated
+        assert usage.prompt_tokens == 4 + 2  # 한글 1자 = 1토큰 근사 (스텁)
+        assert usage.completion_tokens == 2 + 2
+        assert usage.total_tokens == 10
+        assert usage.cost_usd == pytest.approx((2 * 0.15 + 2 * 0.60) / 1_000_000)
+        assert get_usage_ledger().summary()["order"]["gpt-4o-mini"]["calls"] >= 1
+
+    @pytest.mark.asyncio
+    async def test_missing_stream_usage_is_estimated(self):
+        from src.llm.usage import meter_usage
+
+        pool = LLMSessionPool()
+        async with StubLLMServer(response="환불은 3일 이내 처리됩니다.") as server:
+            with meter_usage() as usage:
+                # 로컬 스트리밍은 include_usage를 요청하지 않음
+                text = "".join([
+                    c async for c in LLMClient(TestLLMSessionPool._config(server.base_url), pool=pool)
+                    .chat_stream([{"role": "user", "content": "환불"}])
+                ])
+            await pool.close()
+        assert text == "환불은 3일 이내 처리됩니다."
+        assert usage.estimated and usage.calls == 1
+        assert usage.prompt_tokens == 2
+        assert usage.completion_tokens > 0
+
+
+class TestStubLLMServer:
+    """LLM 스텁 서버 테스트 (OpenAI / Anthropic / Gemini 형식)."""
+
+    @staticmethod
+    def _config(provider, base_url, model="stub"):
+        return LLMConfig(
+            provider=provider, api_key="stub", model=model, temperature=0.0,
+            max_tokens=64, timeout=10, base_url=base_url,
+        )
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("provider", ["openai", "anthropic", "google"])
+    async def test_provider_shapes_with_usage(self, provider):
+        from src.llm.usage import meter_usage
+
+        pool = LLMSessionPool()
+        async with StubLLMServer() as server:
+            base_url = {
+                "openai": server.base_url,
+                "anthropic": server.anthropic_base_url,
+                "google": server.google_base_url,
+            }[provider]
+            client = LLMClient(self._config(provider, base_url), pool=pool)
+            messages = [{"role": "user", "content": "주문 어디쯤 왔나요"}]
+            with meter_usage() as usage:
+                text = await client.chat(messages, system_prompt="주문 관련 질문에 답변합니다.")
+                chunks = [c async for c in client.chat_stream(messages, system_prompt="주문 관련 질문에 답변합니다.")]
+            await pool.close()
+
+        expected = "고객님의 주문은 현재 배송 중이며 1~2일 내 도착 예정입니다."
+        assert text == expected
+        assert "".join(chunks) == expected and len(chunks) > 1
+        assert server.stats()["intents"] == {"order": 2}
+        assert usage.calls == 2 and not usage.estimated
+        assert usage.completion_tokens == 2 * len(expected.split(" "))
+
+    @pytest.mark.asyncio
+    async def test_canned_responses_per_intent(self):
+        import aiohttp
+
+        async with StubLLMServer(responses={"policy": "정책 답변"}) as server:
+            async with aiohttp.ClientSession() as session:
+                async def ask(system, headers=None):
+                    body = {"messages": [{"role": "system", "content": system}, {"role": "user", "content": "?"}]}
+                    async with session.post(f"{server.base_url}/chat/completions", json=body, headers=headers) as resp:
+                        return (await resp.json())["choices"][0]["message"]["content"]
+
+                assert await ask("정책 및 FAQ 관련 질문에 답변합니다.") == "정책 답변"
+                assert (await ask("클레임(환불/교환/불량) 관련 질문에 답변합니다.")).startswith("문의하신 내용으로 티켓")
+                assert (await ask("일반 안내")) == (await ask("일반 안내"))
+                assert await ask("일반 안내", {"X-Stub-Intent": "policy"}) == "정책 답변"
+                assert '"intent"' in await ask("당신은 한국어 전자상거래 고객 상담 시스템의 의도 분류기입니다.")
+
+    @pytest.mark.asyncio
+    async def test_fault_injection(self):
+        import aiohttp
+
+        from src.llm.client import LLMAPIError
+
+        pool = LLMSessionPool()
+        async with StubLLMServer(faults={"429": 1.0}) as server:
+            with pytest.raises(LLMAPIError) as exc:
+                await LLMClient(self._config("local", server.base_url), pool=pool).chat(
+                    [{"role": "user", "content": "안녕"}]
+                )
+            await pool.close()
+            assert exc.value.status == 429
+            assert server.stats()["faults"] == {"429": 1}
+
+        async with StubLLMServer(timeout_s=0.05) as server:
+            async with aiohttp.ClientSession() as session:
+                url = f"{server.anthropic_base_url}/v1/messages"
+                body = {"messages": [{"role": "user", "content": "안녕"}]}
+                async with session.post(url, json=body, headers={"X-Stub-Fault": "500"}) as resp:
+                    assert resp.status == 500
+                async with session.post(url, json=body, headers={"X-Stub-Fault": "timeout"}) as resp:
+                    assert resp.status == 504
+                async with session.post(url, json=body) as resp:
+                    assert resp.status == 200
+        with pytest.raises(ValueError):
+            StubLLMServer(faults={"404": 0.1})
+
+    def test_latency_profiles_are_reproducible(self):
+        import random
+
+        lognormal = LatencyProfile("lognormal", 100.0, 0.8)
+        first = [lognormal.sample(random.Random(3)) for _ in range(3)]
+        assert first == [lognormal.sample(random.Random(3)) for _ in range(3)]
+        rng = random.Random(1)
+        samples = [LatencyProfile("uniform", 50.0, 10.0).sample(rng) for _ in range(100)]
+        assert all(40.0 <= s <= 60.0 for s in samples)
+        assert LatencyProfile("normal", 0.0, 100.0).sample(rng) >= 0.0
+        assert LatencyProfile("fixed", 20.0).sample(rng) == 20.0
+        with pytest.raises(ValueError):
+            LatencyProfile("pareto", 1.0).sample(rng)
+
+    @pytest.mark.asyncio
+    async def test_tokens_per_second_paces_stream(self):
+        pool = LLMSessionPool()
+        async with StubLLMServer(response="a b c d e", tokens_per_second=50) as server:
+            client = LLMClient(self._config("local", server.base_url), pool=pool)
+            start = time.perf_counter()
+            chunks = [c async for c in client.chat_stream([{"role": "user", "content": "안녕"}])]
+            elapsed = time.perf_counter() - start
+            await pool.close()
+        assert "".join(chunks) == "a b c d e"
+        assert elapsed >= 4 * 0.02 * 0.9
@@ -2,8 +2,10 @@
 
 from __future__ import annotations
 
+import asyncio
 import json
 import tempfile
+import time
 from pathlib import Path
 from unittest.mock import patch, MagicMock
 
@@ -15,8 +17,12 @@ from src.rag.retriever import (
     PolicyHit,
     _tokenize,
     get_retriever,
+    get_search_executor,
     reset_retriever,
+    reset_search_executor,
 )
+from src.core.exceptions import RequestTimeoutError, ServiceUnavailableError
+from src.core.executor import BoundedExecutor
 from src.rag.embedder import Embedder, compute_similarity
 
 
@@ -344,3 +350,1099 @@ class TestRetrieverIntegration:
         r1 = get_retriever()
         r2 = get_retriever()
         assert r1 is r2
+
+
+class TestOnnxBackend:
+    """ONNX 백엔드 유틸리티 테스트."""
+
+    def test_mean_pool_ignores_padding(self):
+        """패딩 토큰은 평균에서 제외."""
+        from src.rag.onnx_backend import mean_pool
+
+        hidden = np.array([[[1.0, 1.0], [3.0, 3.0], [100.0, 100.0]]])
+        mask = np.array([[1, 1, 0]])
+        pooled = mean_pool(hidden, mask)
+        assert pooled.shape == (1, 2)
+        assert pooled[0] == pytest.approx([2.0, 2.0])
+
+    def test_l2_normalize(self):
+        """행 단위 정규화."""
+        from src.rag.onnx_backend import l2_normalize
+
+        out = l2_normalize(np.array([[3.0, 4.0], [0.0, 2.0]]))
+        assert np.linalg.norm(out, axis=1) == pytest.approx([1.0, 1.0])
+
+    def test_resolve_model_file_prefers_int8(self, tmp_path):
+        """int8 모델이 있으면 우선 사용."""
+        from src.rag.onnx_backend import resolve_model_file
+
+        (tmp_path / "model.onnx").write_bytes(b"")
+        (tmp_path / "model_int8.onnx").write_bytes(b"")
+        assert resolve_model_file(tmp_path, quantized=True).name == "model_int8.onnx"
+        assert resolve_model_file(tmp_path, quantized=False).name == "model.onnx"
+
+    def test_resolve_model_file_falls_back_to_fp32(self, tmp_path):
+        """int8 모델이 없으면 fp32 사용."""
+        from src.rag.onnx_backend import resolve_model_file
+
+        (tmp_path / "model.onnx").write_bytes(b"")
+        assert resolve_model_file(tmp_path, quantized=True).name == "model.onnx"
+
+    def test_resolve_model_file_missing(self, tmp_path):
+        """모델이 없으면 FileNotFoundError."""
+        from src.rag.onnx_backend import resolve_model_file
+
+        with pytest.raises(FileNotFoundError):
+            resolve_model_file(tmp_path, quantized=True)
+
+    def test_embedder_backend_from_config(self, monkeypatch):
+        """환경변수로 백엔드 오버라이드."""
+        from src.config import Config
+
+        monkeypatch.setenv("EMBEDDING_BACKEND", "onnx")
+        Config.reset_instance()
+        embedder = Embedder()
+        assert embedder.backend == "onnx"
+        assert embedder.onnx_dir
+
+    def test_onnx_embedder_encode(self):
+        """내보낸 ONNX 모델로 임베딩 (모델이 있을 때만)."""
+        pytest.importorskip("onnxruntime", reason="onnxruntime not installed")
+        pytest.importorskip("tokenizers", reason="tokenizers not installed")
+        from src.config import get_config
+
+        onnx_dir = Path(get_config().rag.embedding.onnx_dir)
+        if not (onnx_dir / "model.onnx").exists():
+            pytest.skip("ONNX model not exported - run scripts/17_export_onnx.py first")
+
+        embedder = Embedder(backend="onnx")
+        embeddings = embedder.encode_documents(["환불 정책", "배송 정책"], show_progress=False)
+        assert embeddings.shape[0] == 2
+        assert np.linalg.norm(embeddings, axis=1) == pytest.approx([1.0, 1.0], abs=1e-3)
+
+
+class _FakeCrossEncoder:
+    """호출 기록을 남기는 CrossEncoder 대역 (텍스트 길이를 점수로 사용)."""
+
+    def __init__(self):
+        self.calls = []
+
+    def predict(self, pairs):
+        self.calls.append(list(pairs))
+        return np.array([float(len(doc)) for _, doc in pairs])
+
+
+class TestRerankerBatching:
+    """리랭커 캐시/토큰 예산/배치 테스트."""
+
+    @pytest.fixture
+    def reranker(self):
+        from src.rag.reranker import Reranker
+
+        r = Reranker()
+        r._model = _FakeCrossEncoder()
+        r.token_budget = 0
+        yield r
+        r.close()
+
+    @pytest.fixture
+    def documents(self):
+        return [
+            ("a", "짧은 문서", 0.9, {}),
+            ("b", "조금 더 긴 문서 내용", 0.8, {}),
+            ("c", "가장 길고 자세한 정책 문서 내용입니다", 0.7, {}),
+        ]
+
+    def test_estimate_tokens(self):
+        """한글은 글자당, ASCII는 4자당 1토큰."""
+        from src.rag.reranker import estimate_tokens
+
+        assert estimate_tokens("") == 0
+        assert estimate_tokens("환불") == 2
+        assert estimate_tokens("abcdefgh") == 2
+
+    def test_rerank_sorts_by_model_score(self, reranker, documents):
+        """모델 점수 순으로 정렬."""
+        results = reranker.rerank("환불", documents, top_k=2)
+        assert [r.id for r in results] == ["c", "b"]
+        assert results[0].original_score == 0.7
+
+    def test_pair_scores_are_cached(self, reranker, documents):
+        """동일 (쿼리, 문서) 쌍은 재계산하지 않음."""
+        reranker.rerank("환불", documents)
+        reranker.rerank("환불", documents + [("d", "새 문서", 0.1, {})])
+        assert len(reranker._model.calls) == 2
+        assert [doc for _, doc in reranker._model.calls[1]] == ["새 문서"]
+
+    @pytest.mark.parametrize("cache_size", [0, 1])
+    def test_scores_kept_when_cache_disabled_or_evicted(self, reranker, documents, cache_size):
+        """캐시 비활성화/축출과 무관하게 이번 요청에서 계산한 점수로 정렬."""
+        from src.rag.reranker import PairScoreCache
+
+        reranker._cache = PairScoreCache(cache_size)
+        results = reranker.rerank("환불", documents)
+        assert [r.id for r in results] == ["c", "b", "a"]
+        assert all(r.score > 1 for r in results)
+
+    def test_token_budget_caps_candidates(self, reranker, documents):
+        """토큰 예산 초과 후보는 제외하되 최소 1개는 유지."""
+        reranker.token_budget = 14
+        results = reranker.rerank("환불", documents)
+        assert {r.id for r in results} == {"a", "b"}
+
+        reranker.token_budget = 1
+        results = reranker.rerank("배송", documents)
+        assert [r.id for r in results] == ["a"]
+
+    def test_fallback_without_model(self, documents):
+        """모델이 없으면 원래 순서 유지."""
+        from src.rag.reranker import Reranker
+
+        r = Reranker()
+        r._load_model = lambda: None
+        results = r.rerank("환불", documents, top_k=2)
+        assert [x.id for x in results] == ["a", "b"]
+
+    @pytest.mark.asyncio
+    async def test_arerank_batches_concurrent_requests(self, reranker, documents):
+        """동시 요청의 쌍이 하나의 forward로 묶임."""
+        import asyncio
+
+        reranker.batch_wait_ms = 20
+        results = await asyncio.gather(
+            reranker.arerank("환불", documents),
+            reranker.arerank("배송", documents),
+        )
+        assert len(reranker._model.calls) == 1
+        assert len(reranker._model.calls[0]) == 6
+        assert [r.id for r in results[0]] == ["c", "b", "a"]
+        assert [r.id for r in results[1]] == ["c", "b", "a"]
+
+    @pytest.mark.asyncio
+    async def test_arerank_flushes_at_max_batch(self, reranker, documents):
+        """max_batch_pairs 도달 시 대기 없이 실행."""
+        reranker.batch_wait_ms = 10_000
+        reranker.max_batch_pairs = 3
+        results = await reranker.arerank("환불", documents)
+        assert len(results) == 3
+        assert len(reranker._model.calls) == 1
+
+    @pytest.mark.asyncio
+    async def test_asearch_policy_uses_async_reranker(self, reranker, tmp_path):
+        """asearch_policy는 arerank 결과를 반환."""
+        index_path = tmp_path / "policies_index.jsonl"
+        docs = [
+            {"id": "1", "text": "환불 정책", "metadata": {}},
+            {"id": "2", "text": "환불 정책: 7일 이내 환불 가능", "metadata": {}},
+        ]
+        with index_path.open("w") as f:
+            for doc in docs:
+                f.write(json.dumps(doc, ensure_ascii=False) + "\n")
+
+        retriever = PolicyRetriever(index_path=index_path, mode="keyword")
+        retriever.use_reranking = True
+        retriever._reranker = reranker
+        hits = await retriever.asearch_policy("환불", top_k=2)
+        assert [h.id for h in hits] == ["2", "1"]
+        assert len(reranker._model.calls) == 1
+
+
+class TestSearchExecutor:
+    """비동기 검색 전용 executor 테스트."""
+
+    @pytest.fixture(autouse=True)
+    def reset_executor(self):
+        reset_search_executor()
+        yield
+        reset_search_executor()
+
+    @pytest.fixture
+    def slow_retriever(self, tmp_path):
+        index_path = tmp_path / "policies_index.jsonl"
+        with index_path.open("w") as f:
+            for i, text in enumerate(["환불 정책: 7일 이내 환불 가능", "배송 정책: 3일 이내 출고"]):
+                f.write(json.dumps({"id": str(i), "text": text, "metadata": {}}, ensure_ascii=False) + "\n")
+        retriever = PolicyRetriever(index_path=index_path, mode="keyword")
+        original = retriever._candidate_hits
+
+        def _slow(query, top_k, timings=None):
+            time.sleep(0.3)
+            return original(query, top_k, timings)
+
+        retriever._candidate_hits = _slow
+        return retriever
+
+    @pytest.mark.asyncio
+    async def test_slow_search_does_not_block_event_loop(self, slow_retriever):
+        """느린 검색 중에도 다른 코루틴이 진행됨."""
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        task = asyncio.create_task(ticker())
+        try:
+            hits = await slow_retriever.asearch_policy("환불", top_k=1, timeout=5)
+        finally:
+            task.cancel()
+        assert [h.id for h in hits] == ["0"]
+        assert ticks >= 10
+        assert get_search_executor().stats()["queued"] == 0
+
+    @pytest.mark.asyncio
+    async def test_search_timeout(self, slow_retriever):
+        """제한 시간 초과 시 RequestTimeoutError."""
+        with pytest.raises(RequestTimeoutError):
+            await slow_retriever.asearch_policy("환불", timeout=0.05)
+        assert get_search_executor().stats()["timeouts"] == 1
+
+    @pytest.mark.asyncio
+    async def test_saturated_executor_rejects(self):
+        """대기열이 가득 차면 ServiceUnavailableError, 완료 후 복구."""
+        executor = BoundedExecutor(max_workers=1, max_queue=0, name="test")
+        first = asyncio.create_task(executor.run(time.sleep, 0.2))
+        await asyncio.sleep(0.05)
+        with pytest.raises(ServiceUnavailableError):
+            await executor.run(time.sleep, 0)
+        await first
+        assert await executor.run(sum, [1, 2]) == 3
+        stats = executor.stats()
+        assert stats["rejected"] == 1
+        assert stats["queued"] == 0 and stats["running"] == 0
+        executor.shutdown()
+
+
+class TestInvertedIndex:
+    """역색인 MaxScore 검색 테스트."""
+
+    @staticmethod
+    def _brute_force(docs, query_tokens, top_k):
+        import math
+
+        q = set(query_tokens)
+        scores = []
+        for i, tokens in enumerate(docs):
+            tf = sum(tokens.count(t) for t in q)
+            if tokens and tf:
+                scores.append((tf / math.sqrt(len(tokens)), i))
+        scores.sort(key=lambda x: (-x[0], x[1]))
+        return scores[:top_k]
+
+    def test_matches_full_scan(self):
+        """MaxScore 결과가 전수 스캔과 동일."""
+        import random
+
+        from src.rag.inverted_index import InvertedIndex
+
+        rng = random.Random(7)
+        vocab = [f"t{i}" for i in range(25)]
+        for _ in range(100):
+            docs = [
+                [rng.choice(vocab[: rng.randint(3, 25)]) for _ in range(rng.randint(0, 15))]
+                for _ in range(rng.randint(1, 40))
+            ]
+            query = rng.sample(vocab, rng.randint(1, 5))
+            top_k = rng.randint(1, 8)
+            index = InvertedIndex.build(docs)
+            assert index.search(query, top_k) == self._brute_force(docs, query, top_k)
+
+    def test_unknown_tokens(self):
+        """색인에 없는 토큰만 있으면 빈 결과."""
+        from src.rag.inverted_index import InvertedIndex
+
+        index = InvertedIndex.build([["환불"], ["배송"]])
+        assert index.search(["없음"], 5) == []
+        assert index.search(["환불"], 0) == []
+
+
+class TestFusion:
+    """결과 융합 테스트."""
+
+    def test_score_fusion_weighted_sum(self):
+        from src.rag.fusion import score_fusion
+
+        keyword = [(1.0, 0), (0.5, 1)]
+        embedding = [(0.9, 1), (0.8, 2)]
+        fused = score_fusion([keyword, embedding], [0.3, 0.7], top_k=3)
+        assert [idx for _, idx in fused] == [1, 2, 0]
+        assert fused[0][0] == pytest.approx(0.3 * 0.5 + 0.7 * 0.9)
+
+    def test_rrf_normalized_to_one(self):
+        """모든 경로에서 1위인 문서는 1.0."""
+        from src.rag.fusion import reciprocal_rank_fusion
+
+        fused = reciprocal_rank_fusion([[(9.0, 3), (1.0, 4)], [(0.2, 3)]], [0.5, 0.5], top_k=2)
+        assert fused[0] == (pytest.approx(1.0), 3)
+        assert 0 < fused[1][0] < 1
+
+    def test_unknown_method(self):
+        from src.rag.fusion import fuse
+
+        with pytest.raises(ValueError):
+            fuse("max", [], [], top_k=1)
+
+    def test_hybrid_records_leg_timings(self, tmp_path):
+        """하이브리드 검색은 경로별 소요 시간을 기록."""
+        index_path = tmp_path / "policies_index.jsonl"
+        with index_path.open("w") as f:
+            f.write(json.dumps({"id": "1", "text": "환불 정책", "metadata": {}}, ensure_ascii=False) + "\n")
+
+        retriever = PolicyRetriever(index_path=index_path, mode="keyword")
+        retriever.mode = "hybrid"
+        retriever._embedding_search = lambda query, top_k: [(0.9, 0)]
+        timings = {}
+        hits = retriever.search_policy("환불", top_k=3, timings=timings)
+        assert [h.id for h in hits] == ["1"]
+        assert {"keyword_ms", "embedding_ms", "fusion_ms"} <= set(timings)
+
+
+class TestIncrementalIndex:
+    """증분 인덱싱 (안정 ID, tombstone 문서 저장소) 테스트."""
+
+    @staticmethod
+    def _policy(url, content, title="정책"):
+        return {"url": url, "title": title, "doc_type": "refund", "source": "test", "content": content}
+
+    def test_stable_int_id(self):
+        """같은 ID는 항상 같은 양의 int64."""
+        from src.rag.docstore import stable_int_id
+
+        a = stable_int_id("ffffffffffffffff")
+        assert a == stable_int_id("ffffffffffffffff")
+        assert 0 <= a < 2**63
+        assert stable_int_id("1") != stable_int_id("2")
+
+    def test_docstore_tombstones(self, tmp_path):
+        """삭제 레코드는 로드 시 제외되고 compact로 정리."""
+        from src.rag.docstore import JsonlDocStore
+
+        path = tmp_path / "index.jsonl"
+        store = JsonlDocStore(path)
+        store.upsert([{"id": "a", "text": "A"}, {"id": "b", "text": "B"}])
+        store.delete([store.records()[0]["int_id"]])
+
+        reloaded = JsonlDocStore(path).load()
+        assert [r["id"] for r in reloaded.records()] == ["b"]
+        assert reloaded.tombstones == 1
+
+        reloaded.compact()
+        assert len(path.read_text(encoding="utf-8").splitlines()) == 1
+
+    def test_docstore_reads_legacy_index(self, tmp_path):
+        """int_id 없는 기존 인덱스도 로드."""
+        from src.rag.docstore import JsonlDocStore, stable_int_id
+
+        path = tmp_path / "index.jsonl"
+        path.write_text(json.dumps({"id": "1", "text": "환불"}) + "\n", encoding="utf-8")
+        assert JsonlDocStore(path).records()[0]["int_id"] == stable_int_id("1")
+
+    def test_upsert_replaces_changed_page(self, tmp_path):
+        """변경된 페이지의 청크만 교체."""
+        from src.rag.indexer import PolicyIndexer
+
+        path = tmp_path / "index.jsonl"
+        indexer = PolicyIndexer()
+        stats = indexer.upsert_documents(
+            [self._policy("u1", "환불은 7일 이내"), self._policy("u2", "배송은 2일")], path
+        )
+        assert stats == {"added": 2, "removed": 0, "merged": 0, "unchanged": 0}
+
+        stats = indexer.upsert_documents([self._policy("u1", "환불은 14일 이내")], path)
+        assert stats == {"added": 1, "removed": 1, "merged": 0, "unchanged": 0}
+
+        stats = indexer.upsert_documents([self._policy("u2", "배송은 2일")], path)
+        assert stats == {"added": 0, "removed": 0, "merged": 0, "unchanged": 1}
+
+        retriever = PolicyRetriever(index_path=path, mode="keyword")
+        texts = sorted(text for _id, text, _meta in retriever._docs)
+        assert texts == ["배송은 2일", "환불은 14일 이내"]
+
+    def test_chunks_with_same_prefix_get_distinct_ids(self, tmp_path):
+        """앞 50자가 같은 청크도 서로 덮어쓰지 않음."""
+        from src.rag.indexer import PolicyIndexer
+
+        header = "반품/교환 안내 " * 10
+        content = header + "가" * 40 + header + "나" * 40
+        chunks = PolicyIndexer().chunk_policy(self._policy("u1", content), chunk_chars=len(header) + 40, overlap=0)
+        assert len(chunks) == 2 and chunks[0].text[:50] == chunks[1].text[:50]
+        assert chunks[0].id != chunks[1].id
+
+        path = tmp_path / "index.jsonl"
+        stats = PolicyIndexer().upsert_documents(
+            [self._policy("u1", content)], path, chunk_chars=len(header) + 40, overlap=0
+        )
+        assert stats["added"] == 2
+        assert len(PolicyRetriever(index_path=path, mode="keyword")._docs) == 2
+
+    def test_delete_documents_by_url(self, tmp_path):
+        from src.rag.indexer import PolicyIndexer
+
+        path = tmp_path / "index.jsonl"
+        indexer = PolicyIndexer()
+        indexer.upsert_documents([self._policy("u1", "환불"), self._policy("u2", "배송")], path)
+        assert indexer.delete_documents(path, urls=["u1"]) == 1
+
+        retriever = PolicyRetriever(index_path=path, mode="keyword")
+        assert [meta["url"] for _id, _text, meta in retriever._docs] == ["u2"]
+
+    def test_vector_index_updated_in_place(self, tmp_path):
+        """IndexIDMap 벡터 인덱스가 ID 기준으로 갱신."""
+        faiss = pytest.importorskip("faiss", reason="faiss not installed")
+        from src.rag.indexer import PolicyIndexer
+
+        class _HashEmbedder:
+            def encode_documents(self, texts, show_progress=False):
+                out = np.zeros((len(texts), 8), dtype=np.float32)
+                for i, t in enumerate(texts):
+                    out[i, hash(t) % 8] = 1.0
+                return out
+
+        path = tmp_path / "index.jsonl"
+        vectors = tmp_path / "vectors.faiss"
+        indexer = PolicyIndexer()
+        indexer.upsert_documents(
+            [self._policy("u1", "환불"), self._policy("u2", "배송")],
+            path, vector_path=vectors, embedder=_HashEmbedder(),
+        )
+        indexer.upsert_documents(
+            [self._policy("u1", "환불 변경")], path, vector_path=vectors, embedder=_HashEmbedder()
+        )
+        assert faiss.read_index(str(vectors)).ntotal == 2
+
+    def test_hnsw_replacement_rejected_before_docstore_change(self, tmp_path):
+        """HNSW는 벡터를 제거할 수 없으므로 텍스트 인덱스를 바꾸기 전에 실패."""
+        faiss = pytest.importorskip("faiss", reason="faiss not installed")
+        from src.rag.indexer import PolicyIndexer, wrap_id_index
+        from src.rag.vector_index import create_index
+
+        path = tmp_path / "index.jsonl"
+        vectors = tmp_path / "vectors.faiss"
+        indexer = PolicyIndexer()
+        indexer.upsert_documents([self._policy("u1", "환불")], path)
+        faiss.write_index(wrap_id_index(create_index(8, "hnsw")), str(vectors))
+        before = path.read_text(encoding="utf-8")
+
+        with pytest.raises(RuntimeError, match="HNSW"):
+            indexer.delete_documents(path, vector_path=vectors, urls=["u1"])
+        assert path.read_text(encoding="utf-8") == before
+
+
+class TestBuildPipeline:
+    """스트리밍 인덱스 빌드 테스트."""
+
+    @pytest.fixture
+    def index_path(self, tmp_path):
+        from src.rag.docstore import JsonlDocStore
+
+        path = tmp_path / "index.jsonl"
+        store = JsonlDocStore(path)
+        store.upsert([{"id": f"doc{i}", "text": f"정책 {i}", "metadata": {}} for i in range(10)])
+        store.delete([store.records()[3]["int_id"]])
+        return path
+
+    def test_iter_live_skips_tombstones(self, index_path):
+        from src.rag.docstore import JsonlDocStore
+
+        ids = [r["id"] for r in JsonlDocStore(index_path).iter_live()]
+        assert len(ids) == 9
+        assert "doc3" not in ids
+
+    def test_batches_preserve_order(self, index_path):
+        from src.rag.build_pipeline import _iter_batches
+        from src.rag.docstore import JsonlDocStore
+
+        batches = list(_iter_batches(JsonlDocStore(index_path), batch_size=4, queue_size=1))
+        assert [len(texts) for texts, _ in batches] == [4, 4, 1]
+        assert batches[0][0][0] == "정책 0"
+
+    def test_reservoir_sampler(self):
+        from src.rag.build_pipeline import ReservoirSampler
+
+        sampler = ReservoirSampler(capacity=5)
+        sampler.add(np.arange(3, dtype=np.float32).reshape(3, 1))
+        assert sampler.sample.shape == (3, 1)
+        sampler.add(np.arange(100, dtype=np.float32).reshape(100, 1))
+        assert sampler.sample.shape == (5, 1)
+
+    @pytest.mark.parametrize("index_type", ["flat", "ivf", "ivf_pq", "hnsw"])
+    def test_streaming_build(self, index_path, tmp_path, index_type):
+        faiss = pytest.importorskip("faiss", reason="faiss not installed")
+        from src.rag.build_pipeline import build_vector_index_streaming
+
+        class _RandomEmbedder:
+            def encode_documents(self, texts, show_progress=False):
+                rng = np.random.default_rng(len(texts))
+                return rng.random((len(texts), 8), dtype=np.float32)
+
+        vectors = tmp_path / "vectors.faiss"
+        stats = build_vector_index_streaming(
+            index_path, vectors, tmp_path / "emb.npy",
+            index_type=index_type, nlist=4, batch_size=4,
+            embedder=_RandomEmbedder(), progress=None,
+        )
+        assert stats.documents == 9
+        assert faiss.read_index(str(vectors)).ntotal == 9
+        assert np.load(tmp_path / "emb.npy").shape == (9, 8)
+
+    def test_streaming_build_replaces_index_atomically(self, index_path, tmp_path, monkeypatch):
+        """라이브 인덱스 파일에 직접 쓰지 않고 임시 파일을 교체."""
+        faiss = pytest.importorskip("faiss", reason="faiss not installed")
+        from src.rag.build_pipeline import build_vector_index_streaming
+
+        class _OnesEmbedder:
+            def encode_documents(self, texts, show_progress=False):
+                return np.ones((len(texts), 8), dtype=np.float32)
+
+        vectors = tmp_path / "vectors.faiss"
+        vectors.write_bytes(b"live")
+        written = []
+        write_index = faiss.write_index
+
+        def _write(index, path):
+            written.append(path)
+            assert Path(vectors).read_bytes() == b"live"
+            write_index(index, path)
+
+        monkeypatch.setattr(faiss, "write_index", _write)
+        build_vector_index_streaming(
+            index_path, vectors, tmp_path / "emb.npy", embedder=_OnesEmbedder(), progress=None
+        )
+        assert written == [str(vectors) + ".tmp"]
+        assert faiss.read_index(str(vectors)).ntotal == 9
+        assert not Path(written[0]).exists()
+
+
+class TestVectorIndex:
+    """FAISS 인덱스 타입/검색 파라미터 테스트."""
+
+    def test_normalize_index_type(self):
+        from src.rag.vector_index import needs_training, normalize_index_type
+
+        assert normalize_index_type("ivf") == "ivf_flat"
+        assert normalize_index_type("HNSW") == "hnsw"
+        assert needs_training("ivf_pq") and not needs_training("hnsw")
+        with pytest.raises(ValueError):
+            normalize_index_type("lsh")
+
+    def test_pq_subquantizers_divides_dimension(self):
+        from src.rag.vector_index import pq_subquantizers
+
+        assert pq_subquantizers(384, 16) == 16
+        assert pq_subquantizers(100, 16) == 10
+        assert pq_subquantizers(7, 16) == 7
+
+    def test_select_operating_point(self):
+        from src.rag.vector_index import TunePoint, select_operating_point
+
+        points = [
+            TunePoint(value=1, recall=0.6, latency_ms=0.1),
+            TunePoint(value=4, recall=0.96, latency_ms=0.3),
+            TunePoint(value=8, recall=1.0, latency_ms=0.5),
+        ]
+        assert select_operating_point(points, 0.95).value == 4
+        # 목표 미달이면 recall 최대
+        assert select_operating_point(points[:1], 0.95).value == 1
+
+    @pytest.mark.parametrize("index_type", ["ivf_flat", "hnsw"])
+    def test_autotune_and_sidecar(self, tmp_path, index_type):
+        faiss = pytest.importorskip("faiss", reason="faiss not installed")
+        from src.rag.vector_index import (
+            autotune,
+            configure_search,
+            create_index,
+            load_tuned_params,
+            save_tuned_params,
+        )
+
+        rng = np.random.default_rng(0)
+        vectors = rng.random((400, 16), dtype=np.float32)
+        index = create_index(16, index_type, nlist=16, train_size=len(vectors))
+        if not index.is_trained:
+            index.train(vectors)
+        index.add(vectors)
+
+        result = autotune(index, vectors[:20], k=5, target_recall=0.9)
+        assert result.param in ("nprobe", "efSearch")
+        assert result.ground_truth == "exact"
+        assert result.met_target
+        assert result.points[-1].recall == pytest.approx(1.0)
+
+        path = tmp_path / "vectors.faiss"
+        faiss.write_index(index, str(path))
+        save_tuned_params(path, result)
+        assert load_tuned_params(path) == {result.param: result.value}
+        loaded = faiss.read_index(str(path))
+        assert configure_search(loaded, path, nprobe=1, ef_search=1) == {result.param: result.value}
+
+
+    def test_autotune_truth_is_exact_search(self):
+        """정답은 같은 인덱스의 최대 탐색이 아니라 원본 벡터 정확 검색."""
+        pytest.importorskip("faiss", reason="faiss not installed")
+        from src.rag.indexer import wrap_id_index
+        from src.rag.vector_index import autotune, create_index, exact_neighbors, stored_vectors
+
+        rng = np.random.default_rng(1)
+        vectors = rng.random((300, 16), dtype=np.float32)
+        ids = np.arange(1000, 1300, dtype=np.int64)
+        queries = vectors[:10]
+
+        hnsw = wrap_id_index(create_index(16, "hnsw"))
+        hnsw.add_with_ids(vectors, ids)
+        stored, stored_ids = stored_vectors(hnsw)
+        assert stored.shape == vectors.shape and set(stored_ids) == set(ids)
+        truth = exact_neighbors(queries, 5, vectors, ids)
+        assert (truth[:, 0] == ids[:10]).all()
+
+        pq = create_index(16, "ivf_pq", nlist=4, pq_m=4, train_size=len(vectors))
+        pq.train(vectors)
+        pq.add_with_ids(vectors, ids)
+        assert stored_vectors(pq) is None
+        assert autotune(pq, queries, k=5, vectors=vectors, ids=ids).ground_truth == "exact"
+        assert autotune(pq, queries, k=5).ground_truth == "exhaustive"
+
+
+class TestMmapDocStore:
+    """memory-map 문서 저장소 테스트."""
+
+    @pytest.fixture
+    def index_path(self, tmp_path):
+        path = tmp_path / "policies_index.jsonl"
+        docs = [
+            {"id": "1", "text": "환불 정책: 7일 이내 환불 가능", "metadata": {"doc_type": "refund", "url": "u1"}},
+            {"id": "2", "text": "배송 정책: 2-3 영업일 소요", "metadata": {"doc_type": "shipping", "url": "u2"}},
+            {"id": "3", "text": "환불 예외: 개봉 상품", "metadata": {"doc_type": "refund", "url": "u1"}},
+        ]
+        with path.open("w", encoding="utf-8") as f:
+            for doc in docs:
+                f.write(json.dumps(doc, ensure_ascii=False) + "\n")
+        return path
+
+    def test_roundtrip(self, index_path):
+        from src.rag.docstore import MmapDocStore, stable_int_id
+
+        store = MmapDocStore.open_for(index_path)
+        assert len(store) == 3
+        assert store[1] == ("2", "배송 정책: 2-3 영업일 소요", {"doc_type": "shipping", "url": "u2"})
+        assert store.position_of(stable_int_id("3")) == 2
+        assert store.position_of(12345) is None
+        # 동일 메타데이터는 한 번만 저장
+        assert len(store._metadata) == 2
+
+    def test_keyword_index_persisted(self, index_path):
+        from src.rag.docstore import MmapDocStore
+
+        from src.rag.inverted_index import InvertedIndex
+
+        store = MmapDocStore.open_for(index_path)
+        loaded = store.keyword_index()
+        built = InvertedIndex.build(_tokenize(text) for _id, text, _meta in store)
+        for query in (["환불"], ["배송", "정책"], ["없음"]):
+            assert loaded.search(query, 3) == built.search(query, 3)
+
+    def test_rebuilt_when_source_changes(self, index_path):
+        from src.rag.docstore import MmapDocStore
+
+        first = MmapDocStore.mmap_dir_for(index_path)
+        MmapDocStore.open_for(index_path)
+        with index_path.open("a", encoding="utf-8") as f:
+            f.write(json.dumps({"id": "4", "text": "교환 정책", "metadata": {}}, ensure_ascii=False) + "\n")
+
+        store = MmapDocStore.open_for(index_path)
+        assert len(store) == 4
+        assert store.directory != first
+        # 직전 버전은 이전 리트리버/다른 워커를 위해 유지
+        assert first.exists()
+
+        second = store.directory
+        with index_path.open("a", encoding="utf-8") as f:
+            f.write(json.dumps({"id": "5", "text": "반품 정책", "metadata": {}}, ensure_ascii=False) + "\n")
+        assert len(MmapDocStore.open_for(index_path)) == 5
+        assert second.exists()
+        assert not first.exists()
+
+    def test_retriever_uses_mmap(self, index_path):
+        from src.rag.docstore import MmapDocStore
+
+        retriever = PolicyRetriever(index_path=index_path, mode="keyword")
+        assert isinstance(retriever._docs, MmapDocStore)
+        hits = retriever.search_policy("환불", top_k=2)
+        assert {h.id for h in hits} == {"1", "3"}
+
+
+class TestSemanticAnswerCache:
+    """정책 답변 시맨틱 캐시 테스트."""
+
+    VECTORS = {
+        "환불 정책 알려주세요": [1.0, 0.0, 0.0],
+        "환불 규정이 어떻게 되나요": [0.98, 0.2, 0.0],
+        "배송 얼마나 걸려요": [0.0, 1.0, 0.0],
+    }
+
+    @pytest.fixture
+    def cache(self):
+        from src.rag.answer_cache import SemanticAnswerCache
+
+        return SemanticAnswerCache(
+            embed_fn=lambda q: np.asarray(self.VECTORS[q]),
+            similarity_threshold=0.9,
+            max_entries=2,
+            ttl_seconds=60,
+            enabled=True,
+        )
+
+    def _store(self, cache, query, version="v1", top_k=5):
+        cache.store(query, version, top_k, {"query": query, "hits": []}, f"답변:{query}", latency=0.5)
+
+    def test_paraphrase_hit(self, cache):
+        self._store(cache, "환불 정책 알려주세요")
+        hit = cache.lookup("환불 규정이 어떻게 되나요", "v1", 5)
+        assert hit is not None
+        assert hit.response == "답변:환불 정책 알려주세요"
+        assert hit.similarity > 0.9
+        assert cache.lookup("배송 얼마나 걸려요", "v1", 5) is None
+
+        stats = cache.stats()
+        assert stats["hits"] == 1 and stats["misses"] == 1
+        assert stats["hit_rate"] == 0.5
+        assert stats["saved_seconds"] == 0.5
+
+    def test_index_version_invalidates(self, cache):
+        self._store(cache, "환불 정책 알려주세요", version="v1")
+        assert cache.lookup("환불 정책 알려주세요", "v2", 5) is None
+
+    def test_top_k_must_match(self, cache):
+        self._store(cache, "환불 정책 알려주세요", top_k=5)
+        assert cache.lookup("환불 정책 알려주세요", "v1", 3) is None
+
+    def test_ttl_expiry(self, cache):
+        cache.ttl_seconds = 0.0001
+        self._store(cache, "환불 정책 알려주세요")
+        import time
+
+        time.sleep(0.01)
+        assert cache.lookup("환불 정책 알려주세요", "v1", 5) is None
+
+    def test_ring_buffer_evicts_oldest(self, cache):
+        self._store(cache, "환불 정책 알려주세요")
+        self._store(cache, "배송 얼마나 걸려요")
+        self._store(cache, "환불 규정이 어떻게 되나요")
+        assert cache.stats()["entries"] == 2
+        hit = cache.lookup("환불 정책 알려주세요", "v1", 5)
+        assert hit is not None and hit.query == "환불 규정이 어떻게 되나요"
+
+    @pytest.mark.asyncio
+    async def test_async_api_embeds_off_event_loop(self, cache):
+        """alookup/astore는 임베딩을 이벤트 루프 밖 스레드에서 실행."""
+        import threading
+
+        threads = []
+        embed = cache._embed_fn
+
+        def _recording(q):
+            threads.append(threading.current_thread())
+            return embed(q)
+
+        cache._embed_fn = _recording
+        await cache.astore("환불 정책 알려주세요", "v1", 5, {"hits": []}, "답변", latency=0.5)
+        hit = await cache.alookup("환불 규정이 어떻게 되나요", "v1", 5)
+        assert hit is not None and hit.response == "답변"
+        assert len(threads) == 2
+        assert all(t is not threading.current_thread() for t in threads)
+
+    def test_disabled_when_embedding_fails(self):
+        from src.rag.answer_cache import SemanticAnswerCache
+
+        def _fail(query):
+            raise ImportError("no model")
+
+        cache = SemanticAnswerCache(embed_fn=_fail, enabled=True)
+        assert cache.lookup("환불", "v1", 5) is None
+        assert cache.enabled is False
+
+
+class TestIndexManager:
+    """인덱스 무중단 재로드 테스트."""
+
+    @pytest.fixture
+    def index_path(self, tmp_path):
+        path = tmp_path / "policies_index.jsonl"
+        self._write(path, [("1", "환불 정책: 7일 이내 환불 가능")])
+        return path
+
+    @staticmethod
+    def _write(path, docs):
+        with path.open("w", encoding="utf-8") as f:
+            for doc_id, text in docs:
+                f.write(json.dumps({"id": doc_id, "text": text, "metadata": {}}, ensure_ascii=False) + "\n")
+
+    @pytest.fixture
+    def manager(self, index_path):
+        from src.rag.index_manager import IndexManager
+
+        return IndexManager(
+            factory=lambda: PolicyRetriever(index_path=index_path, vector_path=index_path.with_suffix(".faiss"), mode="keyword")
+        )
+
+    def test_reload_swaps_version(self, manager, index_path):
+        before = manager.current
+        self._write(index_path, [("1", "환불 정책: 7일 이내 환불 가능"), ("2", "배송 정책: 2-3 영업일")])
+        result = manager.reload()
+
+        assert result["reloaded"] and result["documents"] == 2
+        assert manager.current is not before
+        assert manager.current.search_policy("배송", top_k=1)[0].id == "2"
+        assert manager.stats()["reloads"] == 1
+
+    def test_in_flight_search_keeps_old_version(self, manager, index_path):
+        with manager.acquire() as old:
+            self._write(index_path, [("2", "배송 정책: 2-3 영업일")])
+            manager.reload()
+            # 진행 중인 요청은 이전 버전 유지
+            assert old.search_policy("환불", top_k=1)[0].id == "1"
+            assert manager.current is not old
+            assert manager.stats()["retired_in_flight"][0]["in_flight"] == 1
+        assert manager.stats()["retired_in_flight"] == []
+
+    def test_invalid_index_keeps_current(self, manager, index_path):
+        from src.rag.index_manager import IndexValidationError
+
+        before = manager.current
+        index_path.write_text("", encoding="utf-8")
+        with pytest.raises(IndexValidationError):
+            manager.reload()
+        assert manager.current is before
+        assert manager.stats()["last_error"]
+
+    def test_watcher_reloads_after_stable_change(self, manager, index_path):
+        from src.rag.index_manager import IndexWatcher
+
+        manager.current
+        watcher = IndexWatcher(manager, paths=[index_path], interval=0.01)
+        self._write(index_path, [("1", "환불"), ("2", "배송 정책")])
+        # 첫 검사는 변경 감지만, 다음 검사에서 재로드
+        assert watcher.check() is False
+        assert watcher.check() is True
+        assert len(manager.current._docs) == 2
+        assert watcher.check() is False
+
+
+class TestShardedRetriever:
+    """doc_type 샤드 검색 테스트."""
+
+    DOCS = [
+        ("r1", "환불 정책: 7일 이내 환불 가능", "refund"),
+        ("r2", "환불 시 배송비는 고객 부담", "refund"),
+        ("s1", "배송 정책: 2-3 영업일 소요", "shipping"),
+        ("p1", "결제 수단: 카드, 계좌이체", "payment"),
+        ("g1", "정책 일반 안내: 고객센터 운영 시간", ""),
+    ]
+
+    @pytest.fixture
+    def index_path(self, tmp_path):
+        from src.rag.docstore import JsonlDocStore
+        from src.rag.sharding import build_shards
+
+        path = tmp_path / "policies_index.jsonl"
+        JsonlDocStore(path).upsert(
+            {"id": i, "text": t, "metadata": {"doc_type": d}} for i, t, d in self.DOCS
+        )
+        build_shards(path, progress=None)
+        return path
+
+    def test_build_splits_by_doc_type(self, index_path):
+        from src.rag.sharding import load_manifest
+
+        manifest = load_manifest(index_path)
+        assert {n: s["documents"] for n, s in manifest["shards"].items()} == {
+            "refund": 2, "shipping": 1, "payment": 1, "general": 1,
+        }
+
+    def test_stale_manifest_ignored(self, index_path):
+        from src.rag.docstore import JsonlDocStore
+        from src.rag.sharding import load_manifest
+
+        JsonlDocStore(index_path).upsert([{"id": "n1", "text": "새 정책"}])
+        assert load_manifest(index_path) is None
+
+    def test_router_picks_topic_and_catch_all_shards(self):
+        from src.rag.sharding import ShardRouter
+
+        router = ShardRouter(["general", "payment", "refund", "shipping"])
+        assert router.route("환불 가능한가요") == ["general", "refund"]
+        assert router.route("VIP 혜택") == ["general", "payment", "refund", "shipping"]
+
+    def test_matches_single_index_when_all_shards_searched(self, index_path):
+        from src.rag.sharding import ShardedPolicyRetriever, ShardRouter
+
+        single = PolicyRetriever(index_path=index_path, mode="keyword")
+        sharded = ShardedPolicyRetriever(
+            index_path=index_path, mode="keyword", router=ShardRouter(["general", "payment", "refund", "shipping"], {}),
+        )
+        # 동점 순서는 샤드 배치에 따라 다를 수 있으므로 (점수, ID)로 비교
+        for query in ["정책", "환불 배송비", "카드"]:
+            expected = sorted((-round(h.score, 6), h.id) for h in single.search_policy(query, top_k=5))
+            actual = sorted((-round(h.score, 6), h.id) for h in sharded.search_policy(query, top_k=5))
+            assert actual == expected
+
+    def test_targeted_query_searches_fewer_shards(self, index_path):
+        from src.rag.sharding import ShardedPolicyRetriever
+
+        retriever = ShardedPolicyRetriever(index_path=index_path, mode="keyword")
+        timings = {}
+        hits = retriever.search_policy("환불 기간", top_k=5, timings=timings)
+        assert timings["shards_searched"] == 2
+        assert [h.id for h in hits] == ["r1", "r2"]
+
+    def test_create_retriever_falls_back_without_shards(self, tmp_path):
+        from src.rag.sharding import ShardedPolicyRetriever, create_retriever
+
+        path = tmp_path / "policies_index.jsonl"
+        path.write_text(json.dumps({"id": "1", "text": "환불"}) + "\n", encoding="utf-8")
+        cfg = MagicMock()
+        cfg.rag.index.sharding = True
+        with patch("src.rag.sharding.get_config", return_value=cfg):
+            assert not isinstance(create_retriever(index_path=path, mode="keyword"), ShardedPolicyRetriever)
+            from src.rag.sharding import build_shards
+            build_shards(path, progress=None)
+            assert isinstance(create_retriever(index_path=path, mode="keyword"), ShardedPolicyRetriever)
+
+    def test_incremental_update_rewrites_affected_shards(self, tmp_path):
+        """증분 upsert/delete 후 바뀐 doc_type 샤드와 manifest가 갱신."""
+        from src.rag.indexer import PolicyIndexer
+        from src.rag.sharding import ShardedPolicyRetriever, build_shards, load_manifest
+
+        def page(url, content, doc_type):
+            return {"url": url, "title": url, "doc_type": doc_type, "source": "test", "content": content}
+
+        path = tmp_path / "policies_index.jsonl"
+        indexer = PolicyIndexer()
+        indexer.upsert_documents([page("r", "환불은 7일 이내", "refund"), page("s", "배송은 2일", "shipping")], path)
+        build_shards(path, progress=None)
+        shipping_before = (path.parent / f"{path.name}.shards" / "shipping" / "index.jsonl").read_bytes()
+
+        indexer.upsert_documents([page("r", "환불은 14일 이내", "refund"), page("p", "카드 결제", "payment")], path)
+        manifest = load_manifest(path)
+        assert manifest is not None
+        assert {n: s["documents"] for n, s in manifest["shards"].items()} == {
+            "refund": 1, "shipping": 1, "payment": 1,
+        }
+        assert (path.parent / f"{path.name}.shards" / "shipping" / "index.jsonl").read_bytes() == shipping_before
+
+        retriever = ShardedPolicyRetriever(index_path=path, mode="keyword")
+        assert [h.text for h in retriever.search_policy("환불은 며칠", top_k=5)] == ["환불은 14일 이내"]
+
+        indexer.delete_documents(path, urls=["p"])
+        manifest = load_manifest(path)
+        assert sorted(manifest["shards"]) == ["refund", "shipping"]
+        assert not (path.parent / f"{path.name}.shards" / "payment").exists()
+
+
+class TestNearDuplicateDedup:
+    """MinHash/LSH 근접 중복 제거 테스트."""
+
+    FOOTER = "고객센터 1588-0000 (평일 09:00~18:00) | 사업자등록번호 123-45-67890 | 통신판매업 신고 제2024-서울-0000호"
+
+    def test_jaccard_estimate_close_to_exact(self):
+        from src.rag.dedup import MinHasher, estimate_jaccard, shingles
+
+        a = set(shingles("환불은 상품 수령 후 7일 이내에 신청할 수 있습니다. 단순 변심은 왕복 배송비가 부과됩니다."))
+        b = set(shingles("환불은 상품 수령 후 7일 이내에 신청할 수 있습니다. 단순 변심은 왕복 배송비를 부담합니다."))
+        exact = len(a & b) / len(a | b)
+        hasher = MinHasher(num_perm=256)
+        est = estimate_jaccard(hasher.signature(list(a)), hasher.signature(list(b)))
+        assert abs(est - exact) < 0.1
+
+    def test_filter_detects_near_duplicate(self):
+        from src.rag.dedup import NearDuplicateFilter
+
+        f = NearDuplicateFilter(threshold=0.8)
+        assert f.add(self.FOOTER) is None
+        assert f.add(self.FOOTER.replace("0000호", "0001호")) == 0
+        assert f.add("배송은 결제 완료 후 2-3 영업일 이내 출고됩니다.") is None
+
+    def test_build_collapses_duplicates_with_sources(self, tmp_path):
+        from src.rag.indexer import PolicyIndexer
+
+        src = tmp_path / "policies.jsonl"
+        pages = [
+            {"url": "u1", "title": "A 환불", "doc_type": "refund", "content": self.FOOTER},
+            {"url": "u2", "title": "B 환불", "doc_type": "refund", "content": self.FOOTER + " "},
+            {"url": "u3", "title": "배송", "doc_type": "shipping", "content": "배송은 2-3 영업일 소요됩니다."},
+        ]
+        src.write_text("\n".join(json.dumps(p, ensure_ascii=False) for p in pages), encoding="utf-8")
+        out = tmp_path / "index.jsonl"
+
+        indexer = PolicyIndexer()
+        assert indexer.last_dedup_stats is None
+        n = indexer.build_local_index(src, out, dedup_threshold=0.9)
+        assert n == 2
+        stats = indexer.last_dedup_stats
+        assert stats.input_chunks == 3 and stats.duplicates == 1
+        assert stats.reduction == pytest.approx(1 / 3)
+
+        records = [json.loads(l) for l in out.read_text(encoding="utf-8").splitlines()]
+        meta = records[0]["metadata"]
+        assert meta["duplicates"] == 1
+        assert [s["url"] for s in meta["sources"]] == ["u1", "u2"]
+        assert "sources" not in records[1]["metadata"]
+
+        # 임계값 0이면 중복 제거 안 함
+        assert indexer.build_local_index(src, out, dedup_threshold=0) == 3
+
+    def test_incremental_updates_respect_merged_sources(self, tmp_path):
+        """증분 upsert/delete가 합쳐진 청크의 sources 기준으로 동작."""
+        from src.rag.docstore import JsonlDocStore
+        from src.rag.indexer import PolicyIndexer
+
+        pages = [
+            {"url": "u1", "title": "A 환불", "doc_type": "refund", "content": self.FOOTER},
+            {"url": "u2", "title": "B 환불", "doc_type": "refund", "content": self.FOOTER + " "},
+            {"url": "u3", "title": "배송", "doc_type": "shipping", "content": "배송은 2-3 영업일 소요됩니다."},
+        ]
+        src = tmp_path / "policies.jsonl"
+        src.write_text("\n".join(json.dumps(p, ensure_ascii=False) for p in pages), encoding="utf-8")
+        out = tmp_path / "index.jsonl"
+        indexer = PolicyIndexer()
+        indexer.build_local_index(src, out, dedup_threshold=0.9)
+
+        # 합쳐진 페이지를 그대로 다시 넣으면 중복이 되살아나지 않음
+        stats = indexer.upsert_documents([pages[1]], out, dedup_threshold=0.9)
+        assert stats == {"added": 0, "removed": 0, "merged": 0, "unchanged": 1}
+        assert len(JsonlDocStore(out).records()) == 2
+
+        # 대표 출처를 지우면 남은 출처로 대표 정보를 바꾸고 본문은 유지
+        assert indexer.delete_documents(out, urls=["u1"]) == 0
+        records = JsonlDocStore(out).records()
+        shared = next(r for r in records if r["metadata"]["doc_type"] == "refund")
+        assert shared["text"] == self.FOOTER
+        assert shared["metadata"]["url"] == "u2" and shared["metadata"]["title"] == "B 환불"
+        assert "sources" not in shared["metadata"] and "duplicates" not in shared["metadata"]
+
+        # 마지막 출처까지 지우면 청크 삭제
+        assert indexer.delete_documents(out, urls=["u2"]) == 1
+        assert [r["metadata"]["url"] for r in JsonlDocStore(out).records()] == ["u3"]
+
+    def test_incremental_upsert_merges_new_duplicate(self, tmp_path):
+        """기존 청크와 근접 중복인 새 페이지는 sources에만 추가."""
+        from src.rag.docstore import JsonlDocStore
+        from src.rag.indexer import PolicyIndexer
+
+        out = tmp_path / "index.jsonl"
+        indexer = PolicyIndexer()
+        page = {"url": "u1", "title": "A", "doc_type": "refund", "content": self.FOOTER}
+        indexer.upsert_documents([page], out, dedup_threshold=0.9)
+        stats = indexer.upsert_documents([{**page, "url": "u2", "title": "B"}], out, dedup_threshold=0.9)
+        assert stats == {"added": 0, "removed": 0, "merged": 1, "unchanged": 0}
+
+        [record] = JsonlDocStore(out).records()
+        assert [s["url"] for s in record["metadata"]["sources"]] == ["u1", "u2"]
+
+        # 페이지 내용이 바뀌면 공유 청크에서 떼어내고 새 청크 추가
+        stats = indexer.upsert_documents([{**page, "url": "u2", "content": "교환은 7일 이내"}], out, dedup_threshold=0.9)
+        assert stats == {"added": 1, "removed": 0, "merged": 0, "unchanged": 0}
+        records = JsonlDocStore(out).records()
+        assert [r["metadata"]["url"] for r in records] == ["u1", "u2"]
+        assert "sources" not in records[0]["metadata"]